@@ -0,0 +1,43 @@
+"""Command-line entry point: ``python -m app``."""
+import argparse
+import sys
+
+from .server import ServeOptions, default_workers, serve
+
+
+def build_parser() -> argparse.ArgumentParser:
+    defaults = ServeOptions.from_settings()
+    parser = argparse.ArgumentParser(prog="python -m app", description="HobBees API")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    run = commands.add_parser("serve", help="Run the production server")
+    run.add_argument("--host", default=defaults.host)
+    run.add_argument("--port", type=int, default=defaults.port)
+    run.add_argument("--workers", type=int, default=defaults.workers,
+                     help=f"Worker processes (default: one per CPU, {default_workers()} here)")
+    run.add_argument("--backlog", type=int, default=defaults.backlog,
+                     help="Pending connection queue size")
+    run.add_argument("--keep-alive", type=int, default=defaults.keep_alive,
+                     help="Seconds to hold idle keep-alive connections open")
+    run.add_argument("--graceful-timeout", type=int, default=defaults.graceful_timeout,
+                     help="Seconds to drain in-flight requests on shutdown")
+    run.add_argument("--max-requests", type=int, default=defaults.max_requests,
+                     help="Recycle a worker after this many requests (0: never)")
+    run.add_argument("--max-requests-jitter", type=int, default=defaults.max_requests_jitter,
+                     help="Random extra requests per worker so recycles are staggered")
+    run.add_argument("--log-level", default=defaults.log_level)
+    run.add_argument("--no-access-log", dest="access_log", action="store_false", default=defaults.access_log)
+    return parser
+
+
+def main(argv=None) -> int:
+    args = build_parser().parse_args(argv)
+    if args.command == "serve":
+        options = vars(args)
+        options.pop("command")
+        return serve(ServeOptions(**options))
+    return 2
+
+
+if __name__ == "__main__":
+    sys.exit(main())
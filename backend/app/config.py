@@ -11,15 +11,93 @@ class Settings(BaseSettings):
     VERSION: str = "1.0.0"
     DEBUG: bool = False
     
+    # Server (python -m app serve)
+    SERVER_HOST: str = "0.0.0.0"
+    SERVER_PORT: int = 8000
+    SERVER_WORKERS: int = 0  # 0 = one per CPU
+    SERVER_BACKLOG: int = 2048
+    SERVER_KEEP_ALIVE: int = 5
+    SERVER_GRACEFUL_TIMEOUT: int = 30
+    SERVER_MAX_REQUESTS: int = 0  # Recycle workers after this many requests; 0 = never
+    SERVER_MAX_REQUESTS_JITTER: int = 0
+    SERVER_ACCESS_LOG: bool = True
+    
     # Database
+    STORAGE_ENGINE: str = "mongo"  # mongo, sqlite or memory
     MONGODB_URL: str = "mongodb://mongodb:27017"
     DATABASE_NAME: str = "hobbees"
+    SQLITE_PATH: str = "hobbees.db"
+    BACKGROUND_STARTUP: bool = True  # Serve liveness probes while the database warms up
+    DB_WARMUP_ATTEMPTS: int = 0  # 0 = keep retrying until shutdown
+    DB_WARMUP_BACKOFF_SECONDS: float = 0.1
+    DB_WARMUP_BACKOFF_MAX_SECONDS: float = 5.0
+    DB_PING_TIMEOUT_SECONDS: float = 2.0
+    READY_CACHE_SECONDS: float = 1.0
+    SINGLEFLIGHT_ENABLED: bool = True  # Share concurrent identical hobby reads
+    
+    # Item attachments (stored in GridFS)
+    ATTACHMENT_MAX_BYTES: int = 10 * 1024 * 1024
+    ATTACHMENT_MAX_PER_ITEM: int = 20
+    ATTACHMENT_CHUNK_SIZE: int = 255 * 1024
+    ATTACHMENT_CONTENT_TYPES: list[str] = ["image/jpeg", "image/png", "image/gif", "image/webp", "application/pdf"]
+    THUMBNAIL_SIZES: list[int] = [128, 512]  # Allowed ?size= values; each is rendered once and cached
+    THUMBNAIL_WORKERS: int = 2
+    
+    # Background jobs (persisted in the jobs collection)
+    JOBS_ENABLED: bool = True  # Run job workers in this process
+    JOB_WORKERS: int = 2  # Jobs run at once per process
+    JOB_POLL_SECONDS: float = 1.0
+    JOB_LEASE_SECONDS: float = 30.0  # A job whose worker stops renewing this long is run again
+    JOB_MAX_ATTEMPTS: int = 3
+    JOB_RETENTION_HOURS: int = 24 * 7  # Finished jobs are then removed
+    
+    # Coalesced item updates (PUT ...?coalesce=true); 0 writes them straight through
+    ITEM_WRITE_COALESCE_MS: int = 500
+    
+    # Idempotency-Key support on the creating POST routes
+    IDEMPOTENCY_ENABLED: bool = True
+    IDEMPOTENCY_TTL_HOURS: float = 24  # How long a retry gets the stored response
+    IDEMPOTENCY_CACHE_SIZE: int = 1000  # Stored responses also kept in process
+    IDEMPOTENCY_LOCK_SECONDS: float = 60  # A claim left by a crashed request lapses after this
+    
+    # Item change history (written behind, in batches)
+    HISTORY_ENABLED: bool = True
+    HISTORY_BATCH_SIZE: int = 500  # Flush as soon as this many entries wait
+    HISTORY_FLUSH_SECONDS: float = 1.0  # ...or at least this often
+    HISTORY_MAX_PENDING: int = 10000  # Writers wait for a flush beyond this
+    HISTORY_RETENTION_DAYS: int = 365
+    
+    # Per-category item activity, pre-aggregated in day buckets (written behind)
+    ACTIVITY_ENABLED: bool = True
+    ACTIVITY_FLUSH_SECONDS: float = 1.0
+    
+    # Likely duplicate items: the index is kept by item writes; similarity is 0-1
+    DUPLICATES_ENABLED: bool = True
+    DUPLICATE_SIMILARITY: float = 0.7
     
     # Security
     SECRET_KEY: str = "your-secret-key-change-this-in-production"
     ALGORITHM: str = "HS256"
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 60 * 24 * 7  # 7 days
     
+    # Rate limiting: "<requests>/<period>" per client, e.g. "10/minute"; empty = unlimited
+    RATE_LIMIT_ENABLED: bool = True
+    RATE_LIMIT_BACKEND: str = "memory"  # memory (per process) or storage (shared via the database)
+    RATE_LIMIT_AUTH: str = "10/minute"  # POST /api/auth/login and /register, per IP
+    RATE_LIMIT_READ: str = "600/minute"  # GET /api/hobbies..., per user (or IP)
+    RATE_LIMIT_WRITE: str = "300/minute"  # Writes under /api/hobbies, per user (or IP)
+    
+    # Observability
+    METRICS_ENABLED: bool = True
+    PROFILING_ENABLED: bool = True  # Admins may profile a request with ?profile=1 or X-Profile: 1
+    PROFILER_INTERVAL_MS: float = 1.0
+    PROFILER_HISTORY: int = 50
+    PROFILER_MAX_AGE_SECONDS: float = 3600  # Profiles older than this are dropped, however slow
+    TRACING_ENABLED: bool = False
+    TRACE_SAMPLE_RATE: float = 1.0  # Share of requests without an incoming traceparent to trace
+    TRACE_EXPORTER: str = "memory"  # memory or jsonl
+    TRACE_FILE: str = "traces.jsonl"
+    
     # CORS
     CORS_ORIGINS: list[str] = ["http://localhost:5173", "http://localhost:3000"]
     
@@ -1,53 +1,218 @@
-"""MongoDB database connection and initialization."""
-from motor.motor_asyncio import AsyncIOMotorClient, AsyncIOMotorDatabase
+"""Database connection and initialization."""
+from typing import TYPE_CHECKING, Any, List, Optional, Tuple
 from .config import settings
+from .storage import Database as StorageDatabase, StorageEngine, create_engine
+import asyncio
 import logging
+import random
+import time
+
+if TYPE_CHECKING:
+    from motor.motor_asyncio import AsyncIOMotorClient
 
 logger = logging.getLogger(__name__)
 
+# (collection, keys, options) for every index the repositories rely on
+INDEXES: List[Tuple[str, List[Tuple[str, int]], dict]] = [
+    ("users", [("username", 1)], {"unique": True}),
+    ("users", [("email", 1)], {"unique": True}),
+    ("hobbies", [("user_id", 1), ("name", 1)], {}),
+    ("hobbies", [("user_id", 1)], {}),
+    ("rate_limits", [("expires_at", 1)], {"expireAfterSeconds": 0}),
+    ("jobs", [("status", 1), ("created_at", 1)], {}),
+    ("jobs", [("user_id", 1), ("created_at", -1)], {}),
+    ("jobs", [("expires_at", 1)], {"expireAfterSeconds": 0}),
+    ("idempotency_keys", [("expires_at", 1)], {"expireAfterSeconds": 0}),
+    ("item_history", [("user_id", 1), ("item_id", 1), ("at", -1)], {}),
+    ("item_history", [("at", 1)], {"expireAfterSeconds": settings.HISTORY_RETENTION_DAYS * 86400}),
+    ("item_activity", [("user_id", 1), ("hobby_id", 1), ("category", 1), ("day", 1)], {"unique": True}),
+    ("item_activity_baselines", [("user_id", 1), ("hobby_id", 1), ("category", 1)], {"unique": True}),
+    ("item_signatures", [("user_id", 1), ("hobby_id", 1), ("category", 1), ("item_id", 1)], {"unique": True}),
+    ("item_signatures", [("user_id", 1), ("hobby_id", 1), ("category", 1), ("bands", 1)], {}),
+    # GridFS buckets (see app/storage/gridfs.py)
+    ("attachments.files", [("filename", 1), ("uploadDate", 1)], {}),
+    ("attachments.chunks", [("files_id", 1), ("n", 1)], {"unique": True}),
+    ("thumbnails.files", [("filename", 1), ("uploadDate", 1)], {}),
+    ("thumbnails.files", [("metadata.source", 1)], {}),
+    ("thumbnails.chunks", [("files_id", 1), ("n", 1)], {"unique": True}),
+]
+
 
 class Database:
-    """MongoDB database connection manager."""
-    
-    client: AsyncIOMotorClient = None
-    db: AsyncIOMotorDatabase = None
+    """Database connection manager."""
+
+    engine: StorageEngine = None
+    client: "AsyncIOMotorClient" = None  # Only set for the mongo engine
+    db: StorageDatabase = None
+    warm_up_task: Optional[asyncio.Task] = None
+    indexes_ready: bool = False
+    # Cached readiness probe: (checked_at, reachable) and the ping in flight
+    last_ping: Optional[Tuple[float, bool]] = None
+    ping_task: Optional[asyncio.Task] = None
 
 
 # Global database instance
 database = Database()
 
 
-async def connect_to_mongo():
-    """Establish connection to MongoDB and create indexes."""
-    logger.info(f"Connecting to MongoDB at {settings.MONGODB_URL}")
-    database.client = AsyncIOMotorClient(settings.MONGODB_URL)
-    database.db = database.client[settings.DATABASE_NAME]
-    
+def build_engine() -> StorageEngine:
+    """Create the storage engine selected by ``settings.STORAGE_ENGINE``."""
+    client_options = {}
+    if settings.STORAGE_ENGINE == "mongo":
+        # pymongo is only imported when the mongo engine is actually used
+        from .storage.monitoring import command_listener, tracing_listener
+        listeners = []
+        if settings.METRICS_ENABLED:
+            listeners.append(command_listener)
+        if settings.TRACING_ENABLED:
+            listeners.append(tracing_listener)
+        client_options["event_listeners"] = listeners
+    return create_engine(
+        settings.STORAGE_ENGINE,
+        url=settings.MONGODB_URL,
+        path=settings.SQLITE_PATH,
+        database_name=settings.DATABASE_NAME,
+        client_options=client_options,
+    )
+
+
+def index_name(keys: List[Tuple[str, Any]]) -> str:
+    """The name MongoDB gives an index on ``keys`` by default."""
+    return "_".join(f"{field}_{direction}" for field, direction in keys)
+
+
+async def _reconcile_collection(db: StorageDatabase, collection: str, specs: list) -> List[str]:
+    existing = await db[collection].index_information()
+    created = []
+    for keys, options in specs:
+        name = options.get("name") or index_name(keys)
+        if name not in existing:
+            await db[collection].create_index(keys, **options)
+            created.append(name)
+    return created
+
+
+async def create_indexes(db: StorageDatabase) -> List[str]:
+    """Create the indexes in ``INDEXES`` that do not exist yet.
+
+    Each collection's existing indexes are listed once and collections are
+    reconciled concurrently, so a restart against an initialised database
+    costs one ``listIndexes`` round trip per collection. Returns the names
+    of the indexes that were created.
+    """
+    by_collection = {}
+    for collection, keys, options in INDEXES:
+        by_collection.setdefault(collection, []).append((keys, options))
+    results = await asyncio.gather(*(
+        _reconcile_collection(db, collection, specs) for collection, specs in by_collection.items()
+    ))
+    return [name for created in results for name in created]
+
+
+async def ping_database(timeout: Optional[float] = None) -> bool:
+    """Return True if the storage engine answers a ping within ``timeout`` seconds."""
+    if database.engine is None:
+        return False
+    try:
+        return await asyncio.wait_for(database.engine.ping(), timeout or settings.DB_PING_TIMEOUT_SECONDS)
+    except asyncio.TimeoutError:
+        return False
+
+
+async def warm_up_database() -> bool:
+    """Wait for the store to answer, then reconcile indexes.
+
+    Pings are retried with jittered exponential backoff, up to
+    ``settings.DB_WARMUP_ATTEMPTS`` times (0 retries until cancelled).
+    Returns True once the store is reachable and indexes are in place.
+    """
+    attempt = 0
+    delay = settings.DB_WARMUP_BACKOFF_SECONDS
+    while not await ping_database():
+        attempt += 1
+        if settings.DB_WARMUP_ATTEMPTS and attempt >= settings.DB_WARMUP_ATTEMPTS:
+            logger.error(f"{database.engine.name} storage unreachable after {attempt} attempts")
+            return False
+        logger.warning(f"{database.engine.name} storage not reachable, retrying in {delay:.2f}s")
+        await asyncio.sleep(delay * random.uniform(0.5, 1.0))
+        delay = min(delay * 2, settings.DB_WARMUP_BACKOFF_MAX_SECONDS)
+    database.last_ping = (time.monotonic(), True)
+
     # Create indexes for better query performance
     try:
-        # Users collection indexes
-        await database.db.users.create_index("username", unique=True)
-        await database.db.users.create_index("email", unique=True)
-        
-        # Hobbies collection indexes
-        await database.db.hobbies.create_index([("user_id", 1), ("name", 1)])
-        await database.db.hobbies.create_index("user_id")
-        
-        logger.info("Database indexes created successfully")
+        created = await create_indexes(database.db)
+        database.indexes_ready = True
+        logger.info(f"Database indexes reconciled ({len(created)} created)")
     except Exception as e:
         logger.warning(f"Error creating indexes: {e}")
-    
-    logger.info("Connected to MongoDB successfully")
+    return database.indexes_ready
+
+
+async def connect_to_database(engine: StorageEngine = None, background: bool = False):
+    """Open the storage engine and warm it up.
+
+    With ``background=True`` the warm-up (ping retries and index
+    reconciliation) runs as a task so the app can start serving liveness
+    probes immediately; ``/api/ready`` reports when the store is usable.
+    """
+    engine = engine or build_engine()
+    logger.info(f"Connecting to {engine.name} storage")
+    await engine.connect()
+    database.engine = engine
+    database.client = getattr(engine, "client", None)
+    database.db = engine.database
+    database.indexes_ready = False
+    database.last_ping = None
+
+    if background:
+        database.warm_up_task = asyncio.create_task(warm_up_database())
+        logger.info(f"Warming up {engine.name} storage in the background")
+    else:
+        await warm_up_database()
+        logger.info(f"Connected to {engine.name} storage successfully")
+
+
+async def check_readiness() -> dict:
+    """Ping the store, caching the answer for ``settings.READY_CACHE_SECONDS``.
+
+    Concurrent probes share a single in-flight ping.
+    """
+    now = time.monotonic()
+    if database.last_ping is None or now - database.last_ping[0] >= settings.READY_CACHE_SECONDS:
+        if database.ping_task is None or database.ping_task.done():
+            database.ping_task = asyncio.create_task(ping_database())
+        reachable = await asyncio.shield(database.ping_task)
+        database.last_ping = (time.monotonic(), reachable)
+    reachable = database.last_ping[1]
+    return {
+        "status": "ready" if reachable else "unavailable",
+        "storage": database.engine.name if database.engine else None,
+        "indexes": "ready" if database.indexes_ready else "pending",
+    }
 
 
-async def close_mongo_connection():
-    """Close MongoDB connection."""
-    logger.info("Closing MongoDB connection")
-    if database.client:
-        database.client.close()
-    logger.info("MongoDB connection closed")
+async def close_database_connection():
+    """Close the storage engine."""
+    logger.info("Closing database connection")
+    for task in (database.warm_up_task, database.ping_task):
+        if task is not None and not task.done():
+            task.cancel()
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+    if database.engine:
+        await database.engine.close()
+    database.engine = None
+    database.client = None
+    database.db = None
+    database.warm_up_task = None
+    database.ping_task = None
+    database.indexes_ready = False
+    database.last_ping = None
+    logger.info("Database connection closed")
 
 
-def get_database() -> AsyncIOMotorDatabase:
+def get_database() -> StorageDatabase:
     """Get database instance."""
     return database.db
@@ -0,0 +1,171 @@
+"""Application-scoped repositories and services, and the dependencies that hand them out.
+
+Repositories and services hold no per-request state, so one set is built
+per database connection (in ``lifespan``, or by whoever connects the
+database) and stored on ``app.state.container``. Route dependencies then
+cost an attribute lookup instead of constructing a repository and service
+chain on every request. Tests can swap any component with
+``container.override(...)``.
+"""
+from contextlib import contextmanager
+from functools import cached_property
+from typing import TYPE_CHECKING, Iterator
+
+from fastapi import Request
+
+from .storage import Database, StorageEngine
+
+if TYPE_CHECKING:
+    from .repositories.activity_repository import ActivityRepository
+    from .repositories.attachment_repository import AttachmentRepository
+    from .repositories.history_repository import HistoryRepository
+    from .repositories.hobby_repository import HobbyRepository
+    from .repositories.job_repository import JobRepository
+    from .repositories.signature_repository import SignatureRepository
+    from .repositories.user_repository import UserRepository
+    from .services.activity_service import ActivityService
+    from .services.attachment_service import AttachmentService
+    from .services.auth_service import AuthService
+    from .services.duplicate_service import DuplicateService
+    from .services.history_service import HistoryService
+    from .services.hobby_service import HobbyService
+    from .services.job_service import JobService
+    from .services.write_effects import HobbyWriteEffects
+
+
+class Container:
+    """The repositories and services of one database connection.
+
+    Each component is built (and its module imported) on first use, so
+    importing the app does not load every repository and service.
+    """
+
+    def __init__(self, db: Database, engine: StorageEngine):
+        self.db = db
+        self.engine = engine
+
+    @cached_property
+    def user_repository(self) -> "UserRepository":
+        from .repositories.user_repository import UserRepository
+        return UserRepository(self.db)
+
+    @cached_property
+    def hobby_repository(self) -> "HobbyRepository":
+        from .repositories.hobby_repository import HobbyRepository
+        return HobbyRepository(self.db, self.engine)
+
+    @cached_property
+    def attachment_repository(self) -> "AttachmentRepository":
+        from .repositories.attachment_repository import AttachmentRepository
+        return AttachmentRepository(self.db)
+
+    @cached_property
+    def job_repository(self) -> "JobRepository":
+        from .repositories.job_repository import JobRepository
+        return JobRepository(self.db)
+
+    @cached_property
+    def history_repository(self) -> "HistoryRepository":
+        from .repositories.history_repository import HistoryRepository
+        return HistoryRepository(self.db)
+
+    @cached_property
+    def activity_repository(self) -> "ActivityRepository":
+        from .repositories.activity_repository import ActivityRepository
+        return ActivityRepository(self.db)
+
+    @cached_property
+    def signature_repository(self) -> "SignatureRepository":
+        from .repositories.signature_repository import SignatureRepository
+        return SignatureRepository(self.db)
+
+    @cached_property
+    def hobby_write_effects(self) -> "HobbyWriteEffects":
+        from .services.write_effects import HobbyWriteEffects
+        return HobbyWriteEffects(self.signature_repository)
+
+    @cached_property
+    def auth_service(self) -> "AuthService":
+        from .services.auth_service import AuthService
+        return AuthService(self.user_repository)
+
+    @cached_property
+    def hobby_service(self) -> "HobbyService":
+        from .services.hobby_service import HobbyService
+        return HobbyService(self.hobby_repository, self.attachment_repository, self.hobby_write_effects)
+
+    @cached_property
+    def attachment_service(self) -> "AttachmentService":
+        from .services.attachment_service import AttachmentService
+        return AttachmentService(self.hobby_repository, self.attachment_repository, self.hobby_write_effects)
+
+    @cached_property
+    def job_service(self) -> "JobService":
+        from .services.job_service import JobService
+        return JobService(self.job_repository)
+
+    @cached_property
+    def history_service(self) -> "HistoryService":
+        from .services.history_service import HistoryService
+        return HistoryService(self.history_repository)
+
+    @cached_property
+    def activity_service(self) -> "ActivityService":
+        from .services.activity_service import ActivityService
+        return ActivityService(self.hobby_repository, self.activity_repository)
+
+    @cached_property
+    def duplicate_service(self) -> "DuplicateService":
+        from .services.duplicate_service import DuplicateService
+        return DuplicateService(self.hobby_repository, self.signature_repository)
+
+    @contextmanager
+    def override(self, **components) -> Iterator["Container"]:
+        """Swap components (e.g. ``hobby_service=fake``) for the duration of a block."""
+        saved = {name: getattr(self, name) for name in components}
+        try:
+            for name, component in components.items():
+                setattr(self, name, component)
+            yield self
+        finally:
+            for name, component in saved.items():
+                setattr(self, name, component)
+
+
+def get_container(request: Request) -> Container:
+    return request.app.state.container
+
+
+def get_auth_service(request: Request) -> "AuthService":
+    """Dependency to get auth service."""
+    return request.app.state.container.auth_service
+
+
+def get_hobby_service(request: Request) -> "HobbyService":
+    """Dependency to get hobby service."""
+    return request.app.state.container.hobby_service
+
+
+def get_attachment_service(request: Request) -> "AttachmentService":
+    """Dependency to get attachment service."""
+    return request.app.state.container.attachment_service
+
+
+def get_job_service(request: Request) -> "JobService":
+    """Dependency to get job service."""
+    return request.app.state.container.job_service
+
+
+def get_history_service(request: Request) -> "HistoryService":
+    """Dependency to get history service."""
+    return request.app.state.container.history_service
+
+
+def get_activity_service(request: Request) -> "ActivityService":
+    """Dependency to get activity service."""
+    return request.app.state.container.activity_service
+
+
+def get_duplicate_service(request: Request) -> "DuplicateService":
+    """Dependency to get duplicate service."""
+    return request.app.state.container.duplicate_service
@@ -1,12 +1,21 @@
 """Main FastAPI application."""
-from fastapi import FastAPI
+from fastapi import FastAPI, Response
+from fastapi.responses import JSONResponse
 from fastapi.middleware.cors import CORSMiddleware
 from contextlib import asynccontextmanager
 import logging
 
 from .config import settings
-from .database import connect_to_mongo, close_mongo_connection
-from .routers import auth, hobbies
+from .database import connect_to_database, close_database_connection, check_readiness, database
+from .dependencies import Container
+from .routers import admin, attachments, auth, hobbies, history, jobs
+from .middleware.idempotency_middleware import REPLAYED_HEADER, IdempotencyMiddleware
+from .middleware.metrics_middleware import MetricsMiddleware
+from .middleware.profiling_middleware import ProfilingMiddleware
+from .middleware.rate_limit_middleware import RATE_LIMIT_HEADERS, RateLimitMiddleware
+from .middleware.tracing_middleware import TracingMiddleware
+from .utils import metrics
+from .utils.duplicates import DUPLICATES_HEADER
 
 # Configure logging
 logging.basicConfig(
@@ -19,13 +28,30 @@ logger = logging.getLogger(__name__)
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     """Manage application lifespan events."""
+    # The write-behind workers are imported here rather than at module level
+    # (see benchmarks/import_budget.json)
+    from .utils.activity import activity_counter
+    from .utils.coalesce import item_writes
+    from .utils.history import history_writer
+    from .utils.jobs import job_queue
+
     # Startup
     logger.info("Starting up HobBees API...")
-    await connect_to_mongo()
+    await connect_to_database(background=settings.BACKGROUND_STARTUP)
+    container = app.state.container = Container(database.db, database.engine)
+    history_writer.start(container)
+    activity_counter.start(container)
+    if settings.JOBS_ENABLED:
+        container.hobby_service  # Registers the job handlers before the queue resumes jobs
+        job_queue.start(container)
     yield
     # Shutdown
     logger.info("Shutting down HobBees API...")
-    await close_mongo_connection()
+    await job_queue.stop()
+    await item_writes.stop()
+    await activity_counter.stop()  # Last two: they count the writes of the others
+    await history_writer.stop()
+    await close_database_connection()
 
 
 # Create FastAPI application
@@ -39,6 +65,14 @@ app = FastAPI(
     openapi_url="/api/openapi.json"
 )
 
+# Replay retried creates that carry an Idempotency-Key (inside rate limiting, so retries count)
+if settings.IDEMPOTENCY_ENABLED:
+    app.add_middleware(IdempotencyMiddleware)
+
+# Per-user/per-IP rate limits (inside CORS, so 429s still carry CORS headers)
+if settings.RATE_LIMIT_ENABLED:
+    app.add_middleware(RateLimitMiddleware)
+
 # Configure CORS
 app.add_middleware(
     CORSMiddleware,
@@ -46,11 +80,24 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=[*RATE_LIMIT_HEADERS, REPLAYED_HEADER, DUPLICATES_HEADER],
 )
 
+# Admin-triggered request profiling (?profile=1 or X-Profile: 1)
+if settings.PROFILING_ENABLED:
+    app.add_middleware(ProfilingMiddleware)
+
+# Request tracing (TRACING_ENABLED, sampled by TRACE_SAMPLE_RATE or the caller's traceparent)
+if settings.TRACING_ENABLED:
+    app.add_middleware(TracingMiddleware)
+
+# Record request metrics (outermost, so CORS preflights are timed too)
+if settings.METRICS_ENABLED:
+    app.add_middleware(MetricsMiddleware)
+
 # Include routers
-app.include_router(auth.router, prefix="/api")
-app.include_router(hobbies.router, prefix="/api")
+for module in (auth, hobbies, attachments, jobs, history, admin):
+    app.include_router(module.router, prefix="/api")
 
 
 @app.get("/")
@@ -65,13 +112,30 @@ async def root():
 
 @app.get("/api/health")
 async def health_check():
-    """Health check endpoint."""
+    """Liveness probe: the process is up and serving."""
     return {
         "status": "healthy",
         "version": settings.VERSION
     }
 
 
+@app.get("/api/ready")
+async def readiness_check():
+    """Readiness probe: the database answers a ping (cached briefly)."""
+    readiness = await check_readiness()
+    status_code = 200 if readiness["status"] == "ready" else 503
+    return JSONResponse(readiness, status_code=status_code)
+
+
+async def metrics_endpoint():
+    """Prometheus scrape endpoint."""
+    return Response(metrics.registry.render(), media_type=metrics.CONTENT_TYPE)
+
+
+if settings.METRICS_ENABLED:
+    app.add_api_route("/metrics", metrics_endpoint, methods=["GET"], include_in_schema=False)
+
+
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run(
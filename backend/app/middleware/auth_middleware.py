@@ -1,26 +1,28 @@
 """Authentication middleware and dependencies."""
-from fastapi import Depends, HTTPException, status
+from fastapi import Depends, HTTPException, Request, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
-from typing import Optional
-from ..database import get_database
-from ..repositories.user_repository import UserRepository
-from ..services.auth_service import AuthService
+from typing import TYPE_CHECKING, Optional
+from ..dependencies import get_auth_service
 from ..models.user import User
+from ..utils.security import request_token_payload
+from ..utils.tracing import traced
+
+if TYPE_CHECKING:
+    from ..services.auth_service import AuthService
 
 # Security scheme
 security = HTTPBearer()
 
 
+@traced("auth.get_current_user")
 async def get_current_user(
-    credentials: HTTPAuthorizationCredentials = Depends(security)
+    request: Request,
+    credentials: HTTPAuthorizationCredentials = Depends(security),
+    auth_service: "AuthService" = Depends(get_auth_service)
 ) -> User:
     """Dependency to get current authenticated user."""
-    db = get_database()
-    user_repo = UserRepository(db)
-    auth_service = AuthService(user_repo)
-    
-    token = credentials.credentials
-    user = await auth_service.get_current_user(token)
+    # ``security`` rejects requests without a bearer token, which is decoded once per request
+    user = await auth_service.get_user_from_payload(request_token_payload(request.scope))
     
     if not user.is_active:
         raise HTTPException(
@@ -38,3 +40,15 @@ async def get_current_active_user(
     if not current_user.is_active:
         raise HTTPException(status_code=400, detail="Inactive user")
     return current_user
+
+
+async def get_current_admin_user(
+    current_user: User = Depends(get_current_active_user)
+) -> User:
+    """Dependency to require an admin user."""
+    if not current_user.is_admin:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Admin privileges required"
+        )
+    return current_user
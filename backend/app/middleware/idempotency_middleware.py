@@ -0,0 +1,134 @@
+"""Idempotency-Key middleware."""
+import asyncio
+import hashlib
+import json
+from typing import List, Optional
+
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from ..utils.idempotency import MAX_KEY_LENGTH, StoredResponse, idempotency_store, is_idempotent_route
+from .rate_limit_middleware import client_identity
+
+REPLAYED_HEADER = "Idempotent-Replayed"
+
+
+async def send_json(send: Send, status: int, detail: str) -> None:
+    body = json.dumps({"detail": detail}).encode()
+    await send({
+        "type": "http.response.start",
+        "status": status,
+        "headers": [(b"content-type", b"application/json"), (b"content-length", str(len(body)).encode())],
+    })
+    await send({"type": "http.response.body", "body": body})
+
+
+class IdempotencyMiddleware:
+    """Answers retried creates that carry an ``Idempotency-Key`` with the first response.
+
+    See ``app.utils.idempotency``. A key reused for a different request
+    (another route or body) gets 422; a key whose first request is still
+    running in another process gets 409.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        key = None
+        if scope["type"] == "http" and is_idempotent_route(scope["method"], scope["path"]):
+            key = next((v for n, v in scope["headers"] if n == b"idempotency-key"), None)
+        identity = client_identity(scope, "write") if key is not None else ""
+        if not identity.startswith("user:"):  # No key, or not signed in (the route will answer 401)
+            await self.app(scope, receive, send)
+            return
+        if not key or len(key) > MAX_KEY_LENGTH:
+            await send_json(send, 400, f"Idempotency-Key must be 1 to {MAX_KEY_LENGTH} characters")
+            return
+
+        body = await self._read_body(receive)
+        fingerprint = hashlib.sha256(b"\0".join(
+            [scope["path"].encode(), scope.get("query_string", b""), body]
+        )).hexdigest()
+        key = f"{identity}:{key.decode('latin-1')}"
+
+        store = idempotency_store
+        while True:
+            stored = store.cached(key)
+            if stored is not None:
+                await self._replay(send, stored, fingerprint)
+                return
+            flight = store.in_flight(key)
+            if flight is None:
+                break
+            await asyncio.shield(flight)  # Then replay its response, or run if it failed
+
+        store.begin(key)
+        try:
+            existing = await store.claim(key, fingerprint)
+            if existing is not None:
+                stored = store.cached(key)
+                if stored is not None:
+                    await self._replay(send, stored, fingerprint)
+                elif existing["fingerprint"] != fingerprint:
+                    await send_json(send, 422, "Idempotency-Key was already used for a different request")
+                else:
+                    await send_json(send, 409, "A request with this Idempotency-Key is still in progress")
+                return
+            await self._run(scope, body, send, key, fingerprint)
+        finally:
+            store.end(key)
+
+    async def _run(self, scope: Scope, body: bytes, send: Send, key: str, fingerprint: str) -> None:
+        status: Optional[int] = None
+        headers: List[List[str]] = []
+        chunks: List[bytes] = []
+        replayed = False
+
+        async def receive_body() -> Message:
+            nonlocal replayed
+            if replayed:
+                return {"type": "http.disconnect"}
+            replayed = True
+            return {"type": "http.request", "body": body, "more_body": False}
+
+        async def capture(message: Message) -> None:
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                headers.extend([name.decode("latin-1"), value.decode("latin-1")]
+                               for name, value in message.get("headers", []))
+            elif message["type"] == "http.response.body":
+                chunks.append(message.get("body", b""))
+            await send(message)
+
+        try:
+            await self.app(scope, receive_body, capture)
+        except BaseException:
+            await asyncio.shield(idempotency_store.release(key))
+            raise
+        if status is None or status >= 500:
+            await idempotency_store.release(key)
+        else:
+            await idempotency_store.complete(key, fingerprint, status, headers, b"".join(chunks))
+
+    @staticmethod
+    async def _read_body(receive: Receive) -> bytes:
+        chunks = []
+        while True:
+            message = await receive()
+            chunks.append(message.get("body", b""))
+            if not message.get("more_body", False):
+                return b"".join(chunks)
+
+    @staticmethod
+    async def _replay(send: Send, stored: StoredResponse, fingerprint: str) -> None:
+        if stored.fingerprint != fingerprint:
+            await send_json(send, 422, "Idempotency-Key was already used for a different request")
+            return
+        await send({
+            "type": "http.response.start",
+            "status": stored.status,
+            "headers": [(name.encode("latin-1"), value.encode("latin-1")) for name, value in stored.headers]
+                       + [(REPLAYED_HEADER.lower().encode(), b"true")],
+        })
+        await send({"type": "http.response.body", "body": stored.body})
@@ -0,0 +1,60 @@
+"""Request metrics middleware."""
+import time
+
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from ..utils import metrics
+
+UNMATCHED_ROUTE = "<unmatched>"
+
+
+class MetricsMiddleware:
+    """Records per-route latency histograms and in-flight request gauges.
+
+    Plain ASGI rather than ``BaseHTTPMiddleware`` to avoid the extra task and
+    stream wrapping per request. The route label is the matched path template
+    (``/api/hobbies/{hobby_id}``), never the raw URL, so cardinality stays
+    bounded.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+        # Pre-bound children: (method, route, status) -> histogram child
+        self._latency = {}
+        self._in_progress = {
+            method: metrics.http_requests_in_progress.labels(method)
+            for method in ("GET", "POST", "PUT", "PATCH", "DELETE", "HEAD", "OPTIONS")
+        }
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        method = scope["method"]
+        gauge = self._in_progress.get(method) or metrics.http_requests_in_progress.labels(method)
+        status_code = 500
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        gauge.inc()
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            elapsed = time.perf_counter() - start
+            gauge.dec()
+            route = scope.get("route")
+            key = (method, route.path if route is not None else UNMATCHED_ROUTE, status_code)
+            child = self._latency.get(key)
+            if child is None:
+                child = self._latency[key] = metrics.http_request_duration.labels(
+                    key[0], key[1], str(status_code)
+                )
+            child.observe(elapsed)
+            if metrics.mongodb_command_samples:
+                metrics.record_mongodb_commands()
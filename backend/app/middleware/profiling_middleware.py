@@ -0,0 +1,75 @@
+"""On-demand request profiling middleware."""
+from urllib.parse import parse_qs
+
+from fastapi import HTTPException
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from ..config import settings
+from ..utils.profiler import RequestProfile, SamplingProfiler, profile_store
+from ..utils.security import request_token_payload
+
+PROFILE_HEADER = b"x-profile"
+PROFILE_ID_HEADER = b"x-profile-id"
+_FALSE_VALUES = {"", "0", "false", "no", "off"}
+
+
+def profiling_requested(scope: Scope) -> bool:
+    """True if the request asks for a profile via ``X-Profile`` or ``?profile=``."""
+    for name, value in scope["headers"]:
+        if name == PROFILE_HEADER:
+            return value.decode("latin-1").strip().lower() not in _FALSE_VALUES
+    query = scope["query_string"]
+    if b"profile" in query:
+        values = parse_qs(query.decode("latin-1")).get("profile")
+        return bool(values) and values[-1].strip().lower() not in _FALSE_VALUES
+    return False
+
+
+async def is_admin_request(scope: Scope) -> bool:
+    """True if the bearer token belongs to an active admin user."""
+    payload = request_token_payload(scope)
+    if payload is None:
+        return False
+    # The same checks and batched lookup by id as the auth dependency
+    auth_service = scope["app"].state.container.auth_service
+    try:
+        user = await auth_service.get_user_from_payload(payload)
+    except HTTPException:
+        return False
+    return user.is_active and user.is_admin
+
+
+class ProfilingMiddleware:
+    """Runs a sampling profiler around requests that ask for it.
+
+    Only admins can trigger profiling; for anyone else the flag is ignored.
+    Requests without the flag pay for one header scan and nothing else.
+    Captured profiles go to ``profile_store``, which keeps the slowest, and
+    their id is returned in the ``X-Profile-Id`` response header.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+        self.interval = settings.PROFILER_INTERVAL_MS / 1000
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or not profiling_requested(scope) or not await is_admin_request(scope):
+            await self.app(scope, receive, send)
+            return
+        await self.profile(scope, receive, send)
+
+    async def profile(self, scope: Scope, receive: Receive, send: Send) -> None:
+        profile = RequestProfile(profile_store.new_id(), scope["method"], scope["path"], self.interval)
+
+        async def send_wrapper(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                profile.status_code = message["status"]
+                message.setdefault("headers", [])
+                message["headers"] = [*message["headers"], (PROFILE_ID_HEADER, profile.id.encode())]
+            await send(message)
+
+        try:
+            with SamplingProfiler(profile, root=ProfilingMiddleware.profile.__code__):
+                await self.app(scope, receive, send_wrapper)
+        finally:
+            profile_store.add(profile)
@@ -0,0 +1,82 @@
+"""Rate limiting middleware."""
+import json
+import math
+
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from ..utils import rate_limit
+from ..utils.rate_limit import Decision, RateLimit, route_group
+from ..utils.security import request_token_payload
+
+# Exposed to browsers through CORS so the frontend can back off
+RATE_LIMIT_HEADERS = ["Retry-After", "RateLimit-Limit", "RateLimit-Remaining", "RateLimit-Reset",
+                      "RateLimit-Policy"]
+
+
+def client_identity(scope: Scope, group: str) -> str:
+    """``user:<user id>`` for a valid bearer token, else ``ip:<address>``.
+
+    Login and registration are always keyed by IP: the caller is not
+    authenticated yet and the expensive part is the password hash.
+    """
+    if group != "auth":
+        payload = request_token_payload(scope)
+        if payload and payload.get("user_id"):
+            return f"user:{payload['user_id']}"
+    client = scope.get("client")
+    return f"ip:{client[0] if client else 'unknown'}"
+
+
+def rate_limit_headers(rule: RateLimit, decision: Decision) -> list:
+    headers = [
+        (b"ratelimit-limit", str(decision.limit).encode()),
+        (b"ratelimit-remaining", str(decision.remaining).encode()),
+        (b"ratelimit-reset", str(math.ceil(decision.reset_after)).encode()),
+        (b"ratelimit-policy", rule.policy.encode()),
+    ]
+    if not decision.allowed:
+        headers.append((b"retry-after", str(max(1, math.ceil(decision.retry_after))).encode()))
+    return headers
+
+
+class RateLimitMiddleware:
+    """Applies ``rate_limit.rate_limiter`` to the route groups it covers.
+
+    Requests over the limit get a 429 with ``Retry-After``; every limited
+    response carries ``RateLimit-*`` headers. Unlimited routes (health,
+    readiness, metrics, docs) pass straight through.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        limiter = rate_limit.rate_limiter
+        group = route_group(scope["method"], scope["path"])
+        rule = limiter.rule_for(group)
+        if rule is None:
+            await self.app(scope, receive, send)
+            return
+
+        decision = await limiter.hit(group, client_identity(scope, group))
+        headers = rate_limit_headers(rule, decision)
+        if not decision.allowed:
+            body = json.dumps({"detail": "Rate limit exceeded"}).encode()
+            await send({
+                "type": "http.response.start",
+                "status": 429,
+                "headers": [(b"content-type", b"application/json"),
+                            (b"content-length", str(len(body)).encode()), *headers],
+            })
+            await send({"type": "http.response.body", "body": body})
+            return
+
+        async def send_wrapper(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                message["headers"] = [*message.get("headers", []), *headers]
+            await send(message)
+
+        await self.app(scope, receive, send_wrapper)
@@ -0,0 +1,45 @@
+"""Request tracing middleware."""
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from ..utils.tracing import tracer
+
+TRACEPARENT_HEADER = b"traceparent"
+TRACE_ID_HEADER = b"x-trace-id"
+
+
+class TracingMiddleware:
+    """Opens the root span of each sampled request.
+
+    Continues the caller's trace when a W3C ``traceparent`` header is present
+    (honouring its sampled flag) and returns the trace id in ``X-Trace-Id``.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        traceparent = next((v for n, v in scope["headers"] if n == TRACEPARENT_HEADER), b"").decode("latin-1")
+        method = scope["method"]
+        with tracer.start_trace(f"{method} {scope['path']}", traceparent,
+                                **{"http.method": method, "http.target": scope["path"]}) as root:
+            if root is None:
+                await self.app(scope, receive, send)
+                return
+
+            async def send_wrapper(message: Message) -> None:
+                if message["type"] == "http.response.start":
+                    root.set_attribute("http.status_code", message["status"])
+                    message["headers"] = [*message.get("headers", []), (TRACE_ID_HEADER, root.trace_id.encode())]
+                await send(message)
+
+            try:
+                await self.app(scope, receive, send_wrapper)
+            finally:
+                route = scope.get("route")
+                if route is not None:
+                    root.name = f"{method} {route.path}"
+                    root.set_attribute("http.route", route.path)
@@ -0,0 +1,35 @@
+"""Item change history data model."""
+from pydantic import BaseModel, Field
+from typing import Optional, Dict, Any
+from datetime import datetime
+from enum import Enum
+from .hobby import PyObjectId
+
+
+class HistoryAction(str, Enum):
+    """What happened to an item."""
+    CREATED = "created"
+    UPDATED = "updated"
+    PATCHED = "patched"
+    INCREMENTED = "incremented"
+    MOVED = "moved"
+    COPIED = "copied"
+    ATTACHMENT_ADDED = "attachment_added"
+    ATTACHMENT_REMOVED = "attachment_removed"
+    DELETED = "deleted"
+
+
+class HistoryEntry(BaseModel):
+    """One change to an item, appended to the ``item_history`` collection."""
+    id: Optional[PyObjectId] = Field(alias="_id", default=None)
+    user_id: str
+    hobby_id: str
+    category: str  # Where the item is after the change
+    item_id: str
+    action: HistoryAction
+    changes: Dict[str, Any] = Field(default_factory=dict)
+    at: datetime = Field(default_factory=datetime.utcnow)
+
+    class Config:
+        populate_by_name = True
+        arbitrary_types_allowed = True
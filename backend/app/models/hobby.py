@@ -71,10 +71,20 @@ class CategorySchema(BaseModel):
         }
 
 
+class Attachment(BaseModel):
+    """Reference to a file stored in the attachments GridFS bucket."""
+    id: str
+    filename: str
+    content_type: str
+    length: int
+    created_at: datetime = Field(default_factory=datetime.utcnow)
+
+
 class SubCategoryItem(BaseModel):
     """An item within a category with custom fields."""
     id: str = Field(default_factory=lambda: str(ObjectId()))
     data: Dict[str, Any] = Field(default_factory=dict)
+    attachments: List[Attachment] = Field(default_factory=list)
     created_at: datetime = Field(default_factory=datetime.utcnow)
     updated_at: datetime = Field(default_factory=datetime.utcnow)
     
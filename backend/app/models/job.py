@@ -0,0 +1,44 @@
+"""Background job data model."""
+from pydantic import BaseModel, Field
+from typing import Optional, Dict, Any
+from datetime import datetime
+from enum import Enum
+from .hobby import PyObjectId
+
+
+class JobStatus(str, Enum):
+    """Lifecycle of a job."""
+    QUEUED = "queued"
+    RUNNING = "running"
+    SUCCEEDED = "succeeded"
+    FAILED = "failed"
+    CANCELLED = "cancelled"
+
+
+FINISHED_STATUSES = (JobStatus.SUCCEEDED, JobStatus.FAILED, JobStatus.CANCELLED)
+
+
+class Job(BaseModel):
+    """A unit of background work, persisted in the ``jobs`` collection."""
+    id: Optional[PyObjectId] = Field(alias="_id", default=None)
+    user_id: str
+    kind: str
+    params: Dict[str, Any] = Field(default_factory=dict)
+    state: Dict[str, Any] = Field(default_factory=dict)  # Checkpoint saved with progress, for resuming
+    status: JobStatus = JobStatus.QUEUED
+    progress: float = 0.0
+    message: Optional[str] = None
+    result: Optional[Dict[str, Any]] = None
+    error: Optional[str] = None
+    cancel_requested: bool = False
+    attempts: int = 0
+    worker: Optional[str] = None  # Process holding the lease while running
+    lease_expires_at: Optional[datetime] = None
+    created_at: datetime = Field(default_factory=datetime.utcnow)
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+    expires_at: Optional[datetime] = None  # Finished jobs are removed by a TTL index
+
+    class Config:
+        populate_by_name = True
+        arbitrary_types_allowed = True
@@ -36,6 +36,7 @@ class User(BaseModel):
     email: EmailStr
     hashed_password: str
     is_active: bool = True
+    is_admin: bool = False
     created_at: datetime = Field(default_factory=datetime.utcnow)
     updated_at: datetime = Field(default_factory=datetime.utcnow)
     
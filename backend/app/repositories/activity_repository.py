@@ -0,0 +1,63 @@
+"""Item activity repository for database operations."""
+from datetime import datetime
+from typing import List, Optional
+from ..storage import Database
+from ..utils.tracing import traced_methods
+
+
+@traced_methods
+class ActivityRepository:
+    """Repository for the ``item_activity`` day buckets and their per-category baselines.
+
+    A baseline (in ``item_activity_baselines``) is what a category held
+    before its activity was counted; it is written once, on the first read.
+    """
+
+    def __init__(self, db: Database):
+        self.db = db
+        self.collection = db.item_activity
+        self.baselines = db.item_activity_baselines
+
+    async def increment(self, user_id: str, hobby_id: str, category: str, day: datetime, update: dict) -> None:
+        """Apply an ``$inc`` update to a day bucket, creating it if needed."""
+        await self.collection.update_one(
+            {"user_id": user_id, "hobby_id": hobby_id, "category": category, "day": day},
+            update,
+            upsert=True
+        )
+
+    async def get_days(self, user_id: str, hobby_id: str, category: str,
+                       until: Optional[datetime] = None) -> List[dict]:
+        """Get a category's day buckets, oldest first, optionally only those before ``until``."""
+        query = {"user_id": user_id, "hobby_id": hobby_id, "category": category}
+        if until is not None:
+            query["day"] = {"$lt": until}
+        return await self.collection.find(query, {"_id": 0}).sort("day", 1).to_list(None)
+
+    async def get_baseline(self, user_id: str, hobby_id: str, category: str) -> Optional[dict]:
+        return await self.baselines.find_one({"user_id": user_id, "hobby_id": hobby_id, "category": category})
+
+    async def insert_baseline(self, baseline: dict) -> dict:
+        """Store a category's baseline; if another request stored one first, return that one."""
+        from pymongo.errors import DuplicateKeyError
+
+        try:
+            await self.baselines.insert_one(baseline)
+        except DuplicateKeyError:
+            return await self.get_baseline(baseline["user_id"], baseline["hobby_id"], baseline["category"])
+        return baseline
+
+    async def rename_category(self, user_id: str, hobby_id: str, old: str, new: str) -> None:
+        for collection in (self.collection, self.baselines):
+            await collection.update_many(
+                {"user_id": user_id, "hobby_id": hobby_id, "category": old},
+                {"$set": {"category": new}}
+            )
+
+    async def delete(self, user_id: str, hobby_id: str, category: Optional[str] = None) -> None:
+        """Delete the activity of one category, or of every category of a hobby."""
+        query = {"user_id": user_id, "hobby_id": hobby_id}
+        if category is not None:
+            query["category"] = category
+        for collection in (self.collection, self.baselines):
+            await collection.delete_many(query)
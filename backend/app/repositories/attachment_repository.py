@@ -0,0 +1,66 @@
+"""Attachment repository for file storage operations."""
+from typing import AsyncIterable, AsyncIterator, List, Optional
+from bson import ObjectId
+from ..config import settings
+from ..storage import Database
+from ..storage.gridfs import GridFSBucket
+from ..utils.tracing import traced_methods
+
+
+@traced_methods
+class AttachmentRepository:
+    """Repository for item attachment files and their cached thumbnails."""
+
+    def __init__(self, db: Database):
+        self.files = GridFSBucket(db, "attachments", settings.ATTACHMENT_CHUNK_SIZE)
+        self.thumbnails = GridFSBucket(db, "thumbnails", settings.ATTACHMENT_CHUNK_SIZE)
+
+    async def save_file(self, source: AsyncIterable[bytes], filename: str, content_type: str,
+                        owner: dict, max_length: int) -> dict:
+        """Stream an upload into GridFS; ``owner`` (user and item ids) goes in its metadata."""
+        metadata = {**owner, "content_type": content_type}
+        return await self.files.upload_from_stream(filename, source, metadata, max_length=max_length)
+
+    async def get_file(self, file_id: str) -> Optional[dict]:
+        """Get a file's GridFS files document."""
+        if not ObjectId.is_valid(file_id):
+            return None
+        return await self.files.find_file(ObjectId(file_id))
+
+    def stream_file(self, file: dict, start: int = 0, end: Optional[int] = None) -> AsyncIterator[bytes]:
+        """Stream bytes ``[start, end)`` of a file."""
+        return self.files.stream(file, start, end)
+
+    async def read_file(self, file: dict) -> bytes:
+        return await self.files.read(file)
+
+    async def get_thumbnail(self, file_id: str, size: int) -> Optional[dict]:
+        """Get a cached thumbnail's files document."""
+        return await self.thumbnails.find_file(f"{file_id}_{size}")
+
+    async def save_thumbnail(self, file_id: str, size: int, data: bytes, content_type: str) -> dict:
+        """Cache a rendered thumbnail; if another worker cached it first, return theirs."""
+        from pymongo.errors import DuplicateKeyError
+        
+        async def source():
+            yield data
+
+        thumbnail_id = f"{file_id}_{size}"
+        try:
+            return await self.thumbnails.upload_from_stream(
+                thumbnail_id, source(), {"source": file_id, "size": size, "content_type": content_type},
+                file_id=thumbnail_id
+            )
+        except DuplicateKeyError:
+            return await self.thumbnails.find_file(thumbnail_id)
+
+    async def read_thumbnail(self, thumbnail: dict) -> bytes:
+        return await self.thumbnails.read(thumbnail)
+
+    async def delete_files(self, file_ids: List[str]) -> None:
+        """Delete files and every thumbnail rendered from them."""
+        for file_id in file_ids:
+            if ObjectId.is_valid(file_id):
+                await self.files.delete(ObjectId(file_id))
+            async for thumbnail in self.thumbnails.files.find({"metadata.source": file_id}, {"_id": 1}):
+                await self.thumbnails.delete(thumbnail["_id"])
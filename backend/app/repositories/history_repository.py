@@ -0,0 +1,41 @@
+"""Item history repository for database operations."""
+from datetime import datetime
+from typing import List, Optional
+from ..models.history import HistoryEntry
+from ..storage import Database
+from ..utils.tracing import traced_methods
+
+
+@traced_methods
+class HistoryRepository:
+    """Repository for the append-only ``item_history`` collection."""
+
+    def __init__(self, db: Database):
+        self.db = db
+        self.collection = db.item_history
+
+    async def insert_entries(self, entries: List[dict]) -> None:
+        """Append a batch of entries in one round trip.
+        
+        Entries keep their ``_id`` when a failed batch is retried, so those
+        the failed attempt did store are skipped rather than failing again.
+        """
+        from pymongo.errors import BulkWriteError, DuplicateKeyError
+        
+        try:
+            await self.collection.insert_many(entries, ordered=False)
+        except (BulkWriteError, DuplicateKeyError):
+            for entry in entries:
+                try:
+                    await self.collection.insert_one(entry)
+                except DuplicateKeyError:
+                    pass
+
+    async def get_item_history(self, user_id: str, item_id: str, limit: int = 50,
+                               before: Optional[datetime] = None) -> List[HistoryEntry]:
+        """Get an item's changes, newest first, optionally only those older than ``before``."""
+        query = {"user_id": user_id, "item_id": item_id}
+        if before is not None:
+            query["at"] = {"$lt": before}
+        cursor = self.collection.find(query).sort("at", -1).limit(limit)
+        return [HistoryEntry(**entry) for entry in await cursor.to_list(None)]
@@ -1,18 +1,47 @@
 """Hobby repository for database operations."""
 from typing import Optional, List
-from motor.motor_asyncio import AsyncIOMotorDatabase
-from ..models.hobby import Hobby, Category, SubCategoryItem, CategorySchema
+from ..storage import Database, StorageEngine
+from ..models.hobby import Hobby, Category, SubCategoryItem, CategorySchema, Attachment
+from ..utils.singleflight import SingleFlight
+from ..utils.tracing import traced_methods
 from bson import ObjectId
 from datetime import datetime
+from functools import wraps
+from inspect import signature
 
+# Concurrent identical reads share one query; keys are (kind, db, user_id, ...)
+hobby_reads = SingleFlight("hobbies")
 
+
+class TransferConflict(Exception):
+    """A guarded step of an item transfer matched nothing; the transaction is aborted."""
+
+
+def invalidates_reads(method):
+    """Stop sharing the user's in-flight reads once the write finishes."""
+    user_of = signature(method).bind_partial
+
+    @wraps(method)
+    async def wrapper(self, *args, **kwargs):
+        arguments = user_of(self, *args, **kwargs).arguments
+        user_id = arguments["hobby"].user_id if "hobby" in arguments else arguments["user_id"]
+        try:
+            return await method(self, *args, **kwargs)
+        finally:
+            hobby_reads.forget(lambda key: key[2] == user_id)
+    return wrapper
+
+
+@traced_methods
 class HobbyRepository:
     """Repository for hobby database operations."""
     
-    def __init__(self, db: AsyncIOMotorDatabase):
+    def __init__(self, db: Database, engine: Optional[StorageEngine] = None):
         self.db = db
+        self.engine = engine
         self.collection = db.hobbies
     
+    @invalidates_reads
     async def create_hobby(self, hobby: Hobby) -> Hobby:
         """Create a new hobby in the database."""
         hobby_dict = hobby.model_dump(by_alias=True, exclude={"id"})
@@ -20,27 +49,83 @@ class HobbyRepository:
         hobby_dict["_id"] = result.inserted_id
         return Hobby(**hobby_dict)
     
+    @invalidates_reads
+    async def clone_hobby(self, hobby_id: str, user_id: str, name: Optional[str] = None,
+                          description: Optional[str] = None, include_items: bool = True) -> Optional[Hobby]:
+        """Copy a hobby into a new one with fresh ids and timestamps.
+        
+        Items are left out of the read entirely when not copied. ``name`` and
+        ``description`` default to the source's.
+        """
+        if not ObjectId.is_valid(hobby_id):
+            return None
+        
+        source = await self.collection.find_one(
+            {"_id": ObjectId(hobby_id), "user_id": user_id},
+            None if include_items else {"categories.items": 0}
+        )
+        if not source:
+            return None
+        
+        now = datetime.utcnow()
+        stamps = {"created_at": now, "updated_at": now}
+        categories = [
+            {
+                **category,
+                **stamps,
+                # Attachment files belong to one item, so copies start without them
+                "items": [{**item, **stamps, "id": str(ObjectId()), "attachments": []}
+                          for item in category.get("items", [])]
+            }
+            for category in source.get("categories", [])
+        ]
+        hobby_dict = {
+            "user_id": user_id,
+            "name": name or source["name"],
+            "description": description if description is not None else source.get("description"),
+            "categories": categories,
+            **stamps
+        }
+        result = await self.collection.insert_one(hobby_dict)
+        hobby_dict["_id"] = result.inserted_id
+        return Hobby(**hobby_dict)
+    
     async def get_hobby_by_id(self, hobby_id: str, user_id: str) -> Optional[Hobby]:
         """Get hobby by ID for a specific user."""
         if not ObjectId.is_valid(hobby_id):
             return None
         
-        hobby_dict = await self.collection.find_one({
-            "_id": ObjectId(hobby_id),
-            "user_id": user_id
-        })
+        hobby_dict = await hobby_reads.do(
+            ("hobby", id(self.db), user_id, hobby_id),
+            lambda: self.collection.find_one({"_id": ObjectId(hobby_id), "user_id": user_id}),
+        )
         if hobby_dict:
             return Hobby(**hobby_dict)
         return None
     
+    async def get_categories_document(self, hobby_id: str, user_id: str, items: bool = True) -> Optional[dict]:
+        """Get a hobby's raw categories (``{"_id", "categories"}``), without building models.
+        
+        With ``items=False`` only the categories' names and schemas are read.
+        """
+        if not ObjectId.is_valid(hobby_id):
+            return None
+        
+        projection = {"categories": 1} if items else {"categories.name": 1, "categories.schema": 1}
+        return await hobby_reads.do(
+            ("categories", id(self.db), user_id, hobby_id, items),
+            lambda: self.collection.find_one({"_id": ObjectId(hobby_id), "user_id": user_id}, projection),
+        )
+    
     async def get_hobbies_by_user(self, user_id: str) -> List[Hobby]:
         """Get all hobbies for a user."""
-        cursor = self.collection.find({"user_id": user_id})
-        hobbies = []
-        async for hobby_dict in cursor:
-            hobbies.append(Hobby(**hobby_dict))
-        return hobbies
+        hobby_dicts = await hobby_reads.do(
+            ("hobbies", id(self.db), user_id),
+            lambda: self.collection.find({"user_id": user_id}).to_list(None),
+        )
+        return [Hobby(**hobby_dict) for hobby_dict in hobby_dicts]
     
+    @invalidates_reads
     async def update_hobby(self, hobby_id: str, user_id: str, update_data: dict) -> Optional[Hobby]:
         """Update hobby information."""
         if not ObjectId.is_valid(hobby_id):
@@ -56,6 +141,7 @@ class HobbyRepository:
             return Hobby(**result)
         return None
     
+    @invalidates_reads
     async def delete_hobby(self, hobby_id: str, user_id: str) -> bool:
         """Delete a hobby."""
         if not ObjectId.is_valid(hobby_id):
@@ -67,6 +153,7 @@ class HobbyRepository:
         })
         return result.deleted_count > 0
     
+    @invalidates_reads
     async def add_category(self, hobby_id: str, user_id: str, category: Category) -> Optional[Hobby]:
         """Add a category to a hobby."""
         if not ObjectId.is_valid(hobby_id):
@@ -85,6 +172,7 @@ class HobbyRepository:
             return Hobby(**result)
         return None
     
+    @invalidates_reads
     async def update_category(self, hobby_id: str, user_id: str, category_name: str, 
                             update_data: dict) -> Optional[Hobby]:
         """Update a category in a hobby."""
@@ -107,6 +195,7 @@ class HobbyRepository:
             return Hobby(**result)
         return None
     
+    @invalidates_reads
     async def delete_category(self, hobby_id: str, user_id: str, category_name: str) -> Optional[Hobby]:
         """Delete a category from a hobby."""
         if not ObjectId.is_valid(hobby_id):
@@ -124,6 +213,7 @@ class HobbyRepository:
             return Hobby(**result)
         return None
     
+    @invalidates_reads
     async def add_item_to_category(self, hobby_id: str, user_id: str, category_name: str,
                                    item: SubCategoryItem) -> Optional[Hobby]:
         """Add an item to a category."""
@@ -147,13 +237,14 @@ class HobbyRepository:
             return Hobby(**result)
         return None
     
+    @invalidates_reads
     async def update_item_in_category(self, hobby_id: str, user_id: str, category_name: str,
                                      item_id: str, update_data: dict) -> Optional[Hobby]:
         """Update an item in a category."""
         if not ObjectId.is_valid(hobby_id):
             return None
         
-        update_data["updated_at"] = datetime.utcnow()
+        update_data["updated_at"] = now = datetime.utcnow()
         result = await self.collection.find_one_and_update(
             {
                 "_id": ObjectId(hobby_id),
@@ -164,8 +255,8 @@ class HobbyRepository:
             {
                 "$set": {
                     "categories.$[cat].items.$[item].data": update_data.get("data"),
-                    "categories.$[cat].items.$[item].updated_at": update_data.get("updated_at"),
-                    "updated_at": datetime.utcnow()
+                    "categories.$[cat].items.$[item].updated_at": now,
+                    "updated_at": now
                 }
             },
             array_filters=[
@@ -178,9 +269,241 @@ class HobbyRepository:
             return Hobby(**result)
         return None
     
+    @invalidates_reads
+    async def patch_item_in_category(self, hobby_id: str, user_id: str, category_name: str, item_id: str,
+                                     set_fields: dict, unset_fields: List[str]) -> Optional[Hobby]:
+        """Set and remove individual ``data`` keys of an item, leaving the rest untouched."""
+        if not ObjectId.is_valid(hobby_id):
+            return None
+        
+        now = datetime.utcnow()
+        item_path = "categories.$[cat].items.$[item]"
+        update = {
+            "$set": {
+                **{f"{item_path}.data.{key}": value for key, value in set_fields.items()},
+                f"{item_path}.updated_at": now,
+                "updated_at": now
+            }
+        }
+        if unset_fields:
+            update["$unset"] = {f"{item_path}.data.{key}": "" for key in unset_fields}
+        result = await self.collection.find_one_and_update(
+            {
+                "_id": ObjectId(hobby_id),
+                "user_id": user_id,
+                "categories.name": category_name,
+                "categories.items.id": item_id
+            },
+            update,
+            array_filters=[
+                {"cat.name": category_name},
+                {"item.id": item_id}
+            ],
+            return_document=True
+        )
+        if result:
+            return Hobby(**result)
+        return None
+    
+    @invalidates_reads
+    async def increment_item_field(self, hobby_id: str, user_id: str, category_name: str, item_id: str,
+                                   field: str, amount: float, minimum: Optional[float] = None,
+                                   maximum: Optional[float] = None) -> Optional[float]:
+        """Atomically add ``amount`` to a number field of an item; return the new value.
+        
+        The category must declare ``field`` as a number, the item must hold a
+        number there and the result must stay within ``minimum``/``maximum``;
+        all of that is part of the update's filter, so concurrent increments
+        cannot race past a bound. Returns None if anything does not match.
+        """
+        if not ObjectId.is_valid(hobby_id):
+            return None
+        
+        guard = {"$type": "number"}
+        if minimum is not None:
+            guard["$gte"] = minimum - amount
+        if maximum is not None:
+            guard["$lte"] = maximum - amount
+        now = datetime.utcnow()
+        result = await self.collection.find_one_and_update(
+            {
+                "_id": ObjectId(hobby_id),
+                "user_id": user_id,
+                "categories": {"$elemMatch": {
+                    "name": category_name,
+                    "schema.fields": {"$elemMatch": {"name": field, "field_type": "number"}},
+                    "items": {"$elemMatch": {"id": item_id, f"data.{field}": guard}},
+                }},
+            },
+            {
+                "$inc": {f"categories.$[cat].items.$[item].data.{field}": amount},
+                "$set": {
+                    "categories.$[cat].items.$[item].updated_at": now,
+                    "updated_at": now
+                }
+            },
+            array_filters=[
+                {"cat.name": category_name},
+                {"item.id": item_id}
+            ],
+            projection={"categories.name": 1, "categories.items.id": 1, f"categories.items.data.{field}": 1},
+            return_document=True
+        )
+        if not result:
+            return None
+        for category in result["categories"]:
+            if category.get("name") == category_name:
+                for item in category["items"]:
+                    if item.get("id") == item_id:
+                        return item["data"][field]
+        return None
+    
+    @invalidates_reads
+    async def transfer_items(self, hobby_id: str, user_id: str, category_name: str,
+                             items: List[SubCategoryItem], target_hobby_id: str, target_category: str,
+                             move: bool) -> bool:
+        """Append ``items`` to the target category, removing them from the source when moving.
+        
+        When moving, ``items`` must be the source items as read: the update
+        only applies while the source still holds each of them with the same
+        ``updated_at``, so a concurrent edit is never overwritten by a stale
+        copy. Items are matched by id and timestamp, not as whole documents,
+        whose equality in MongoDB depends on key order and on keys added
+        since (such as ``attachments``). Within one
+        hobby this is a single update. Across hobbies the push and the pull
+        run in a transaction when the engine has one; otherwise the push is
+        undone if the pull no longer matches. Returns False if a guard did
+        not match.
+        """
+        if not ObjectId.is_valid(hobby_id) or not ObjectId.is_valid(target_hobby_id):
+            return False
+        
+        now = datetime.utcnow()
+        item_docs = [item.model_dump() for item in items]
+        item_ids = [item.id for item in items]
+        source_filter = {"_id": ObjectId(hobby_id), "user_id": user_id}
+        if move:
+            unchanged = [{"$elemMatch": {"id": item.id, "updated_at": item.updated_at}} for item in items]
+            source_filter["categories"] = {"$elemMatch": {"name": category_name, "items": {"$all": unchanged}}}
+        pull = {"categories.$[src].items": {"id": {"$in": item_ids}}}
+        push = {"categories.$[dst].items": {"$each": item_docs}}
+        
+        if target_hobby_id == hobby_id:
+            update = {"$push": push, "$set": {"updated_at": now}}
+            array_filters = [{"dst.name": target_category}]
+            if move:
+                update["$pull"] = pull
+                array_filters.append({"src.name": category_name})
+            result = await self.collection.update_one(
+                {**source_filter, "categories.name": target_category},
+                update,
+                array_filters=array_filters
+            )
+            return result.matched_count == 1
+        
+        async def apply(session) -> None:
+            pushed = await self.collection.update_one(
+                {
+                    "_id": ObjectId(target_hobby_id),
+                    "user_id": user_id,
+                    "categories": {"$elemMatch": {"name": target_category, "items.id": {"$nin": item_ids}}}
+                },
+                {"$push": push, "$set": {"updated_at": now}},
+                array_filters=[{"dst.name": target_category}],
+                session=session
+            )
+            if not pushed.matched_count:
+                raise TransferConflict()
+            if not move:
+                return
+            pulled = await self.collection.update_one(
+                source_filter,
+                {"$pull": pull, "$set": {"updated_at": now}},
+                array_filters=[{"src.name": category_name}],
+                session=session
+            )
+            if pulled.matched_count:
+                return
+            if session is None:
+                # No transaction to abort: take the copies back out of the target
+                await self.collection.update_one(
+                    {"_id": ObjectId(target_hobby_id), "user_id": user_id},
+                    {"$pull": {"categories.$[dst].items": {"id": {"$in": item_ids}}}},
+                    array_filters=[{"dst.name": target_category}]
+                )
+            raise TransferConflict()
+        
+        try:
+            if self.engine is None:
+                await apply(None)
+            else:
+                async with self.engine.transaction() as session:
+                    await apply(session)
+        except TransferConflict:
+            return False
+        return True
+    
+    @invalidates_reads
+    async def add_attachment(self, hobby_id: str, user_id: str, category_name: str, item_id: str,
+                             attachment: Attachment, limit: int) -> bool:
+        """Reference an uploaded file from an item that has fewer than ``limit`` attachments."""
+        if not ObjectId.is_valid(hobby_id):
+            return False
+        
+        now = datetime.utcnow()
+        result = await self.collection.update_one(
+            {
+                "_id": ObjectId(hobby_id),
+                "user_id": user_id,
+                "categories": {"$elemMatch": {
+                    "name": category_name,
+                    "items": {"$elemMatch": {"id": item_id, f"attachments.{limit - 1}": {"$exists": False}}},
+                }},
+            },
+            {
+                "$push": {"categories.$[cat].items.$[item].attachments": attachment.model_dump()},
+                # A new updated_at makes a move of a copy read before this fail its guard
+                "$set": {"categories.$[cat].items.$[item].updated_at": now, "updated_at": now}
+            },
+            array_filters=[
+                {"cat.name": category_name},
+                {"item.id": item_id}
+            ]
+        )
+        return result.matched_count == 1
+    
+    @invalidates_reads
+    async def remove_attachment(self, hobby_id: str, user_id: str, category_name: str, item_id: str,
+                                attachment_id: str) -> bool:
+        """Drop an attachment reference from an item; return False if it was not there."""
+        if not ObjectId.is_valid(hobby_id):
+            return False
+        
+        now = datetime.utcnow()
+        result = await self.collection.update_one(
+            {
+                "_id": ObjectId(hobby_id),
+                "user_id": user_id,
+                "categories": {"$elemMatch": {
+                    "name": category_name,
+                    "items": {"$elemMatch": {"id": item_id, "attachments.id": attachment_id}},
+                }},
+            },
+            {
+                "$pull": {"categories.$[cat].items.$[item].attachments": {"id": attachment_id}},
+                "$set": {"categories.$[cat].items.$[item].updated_at": now, "updated_at": now}
+            },
+            array_filters=[
+                {"cat.name": category_name},
+                {"item.id": item_id}
+            ]
+        )
+        return result.matched_count == 1
+    
+    @invalidates_reads
     async def delete_item_from_category(self, hobby_id: str, user_id: str, category_name: str,
                                        item_id: str) -> Optional[Hobby]:
-        """Delete an item from a category."""
+        """Delete an item from a category; return None if the category does not hold it."""
         if not ObjectId.is_valid(hobby_id):
             return None
         
@@ -188,12 +511,13 @@ class HobbyRepository:
             {
                 "_id": ObjectId(hobby_id),
                 "user_id": user_id,
-                "categories.name": category_name
+                "categories": {"$elemMatch": {"name": category_name, "items.id": item_id}}
             },
             {
-                "$pull": {"categories.$.items": {"id": item_id}},
+                "$pull": {"categories.$[cat].items": {"id": item_id}},
                 "$set": {"updated_at": datetime.utcnow()}
             },
+            array_filters=[{"cat.name": category_name}],
             return_document=True
         )
         if result:
@@ -0,0 +1,148 @@
+"""Job repository for database operations."""
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional
+from bson import ObjectId
+from ..config import settings
+from ..models.job import Job, JobStatus
+from ..storage import Database
+from ..utils.tracing import traced_methods
+
+
+@traced_methods
+class JobRepository:
+    """Repository for background job database operations.
+
+    Writes by a worker are guarded on its lease (``worker`` field), so a
+    worker whose job was reclaimed after its lease ran out cannot overwrite
+    the new attempt.
+    """
+
+    def __init__(self, db: Database):
+        self.db = db
+        self.collection = db.jobs
+
+    async def create_job(self, job: Job) -> Job:
+        """Queue a new job."""
+        job_dict = job.model_dump(by_alias=True, exclude={"id"})
+        result = await self.collection.insert_one(job_dict)
+        job_dict["_id"] = result.inserted_id
+        return Job(**job_dict)
+
+    async def get_job(self, job_id: str, user_id: str) -> Optional[Job]:
+        """Get a job by ID for a specific user."""
+        if not ObjectId.is_valid(job_id):
+            return None
+        job_dict = await self.collection.find_one({"_id": ObjectId(job_id), "user_id": user_id})
+        return Job(**job_dict) if job_dict else None
+
+    async def get_jobs_by_user(self, user_id: str, limit: int = 50) -> List[Job]:
+        """Get a user's most recent jobs."""
+        cursor = self.collection.find({"user_id": user_id}).sort("created_at", -1).limit(limit)
+        return [Job(**job_dict) for job_dict in await cursor.to_list(None)]
+
+    async def claim_job(self, worker: str, lease_seconds: float) -> Optional[Job]:
+        """Take the oldest queued job, or a running one whose worker's lease ran out."""
+        now = datetime.utcnow()
+        job_dict = await self.collection.find_one_and_update(
+            {"$or": [
+                {"status": JobStatus.QUEUED.value},
+                {"status": JobStatus.RUNNING.value, "lease_expires_at": {"$lt": now}},
+            ]},
+            {
+                "$set": {
+                    "status": JobStatus.RUNNING.value,
+                    "worker": worker,
+                    "lease_expires_at": now + timedelta(seconds=lease_seconds),
+                    "started_at": now
+                },
+                "$inc": {"attempts": 1}
+            },
+            sort=[("created_at", 1)],
+            return_document=True
+        )
+        return Job(**job_dict) if job_dict else None
+
+    async def renew_leases(self, job_ids: List[ObjectId], worker: str, lease_seconds: float) -> Dict[ObjectId, bool]:
+        """Extend the leases this worker still holds; map each held job to its cancel flag."""
+        if not job_ids:
+            return {}
+        held = {"_id": {"$in": job_ids}, "worker": worker, "status": JobStatus.RUNNING.value}
+        lease = datetime.utcnow() + timedelta(seconds=lease_seconds)
+        await self.collection.update_many(held, {"$set": {"lease_expires_at": lease}})
+        return {job_dict["_id"]: job_dict.get("cancel_requested", False)
+                async for job_dict in self.collection.find(held, {"cancel_requested": 1})}
+
+    async def report_progress(self, job_id: ObjectId, worker: str, progress: float,
+                              message: Optional[str], lease_seconds: float,
+                              state: Optional[dict] = None) -> Optional[bool]:
+        """Record progress (and a checkpoint) and extend the lease; return the cancel flag, or None if the lease was lost."""
+        update = {
+            "progress": progress,
+            "lease_expires_at": datetime.utcnow() + timedelta(seconds=lease_seconds)
+        }
+        if message is not None:
+            update["message"] = message
+        if state is not None:
+            update["state"] = state
+        job_dict = await self.collection.find_one_and_update(
+            {"_id": job_id, "worker": worker, "status": JobStatus.RUNNING.value},
+            {"$set": update},
+            projection={"cancel_requested": 1},
+            return_document=True
+        )
+        return job_dict.get("cancel_requested", False) if job_dict else None
+
+    async def finish_job(self, job_id: ObjectId, worker: str, status: JobStatus,
+                         result: Optional[dict] = None, error: Optional[str] = None) -> bool:
+        """Record the outcome of a job this worker holds."""
+        now = datetime.utcnow()
+        update = {
+            "status": status.value,
+            "finished_at": now,
+            "expires_at": now + timedelta(hours=settings.JOB_RETENTION_HOURS),
+            "lease_expires_at": None,
+            "result": result,
+            "error": error
+        }
+        if status == JobStatus.SUCCEEDED:
+            update["progress"] = 1.0
+        updated = await self.collection.update_one(
+            {"_id": job_id, "worker": worker, "status": JobStatus.RUNNING.value},
+            {"$set": update}
+        )
+        return updated.matched_count == 1
+
+    async def release_job(self, job_id: ObjectId, worker: str) -> None:
+        """Put a job this worker holds back in the queue (e.g. on shutdown), without using up an attempt."""
+        await self.collection.update_one(
+            {"_id": job_id, "worker": worker, "status": JobStatus.RUNNING.value},
+            {
+                "$set": {"status": JobStatus.QUEUED.value, "worker": None, "lease_expires_at": None},
+                "$inc": {"attempts": -1}
+            }
+        )
+
+    async def request_cancel(self, job_id: str, user_id: str) -> Optional[Job]:
+        """Cancel a queued job outright, or flag a running one for its worker; return the job."""
+        if not ObjectId.is_valid(job_id):
+            return None
+        now = datetime.utcnow()
+        job_dict = await self.collection.find_one_and_update(
+            {"_id": ObjectId(job_id), "user_id": user_id, "status": JobStatus.QUEUED.value},
+            {"$set": {
+                "status": JobStatus.CANCELLED.value,
+                "cancel_requested": True,
+                "finished_at": now,
+                "expires_at": now + timedelta(hours=settings.JOB_RETENTION_HOURS)
+            }},
+            return_document=True
+        )
+        if job_dict is None:
+            job_dict = await self.collection.find_one_and_update(
+                {"_id": ObjectId(job_id), "user_id": user_id, "status": JobStatus.RUNNING.value},
+                {"$set": {"cancel_requested": True}},
+                return_document=True
+            )
+        if job_dict is None:
+            return await self.get_job(job_id, user_id)
+        return Job(**job_dict)
@@ -0,0 +1,60 @@
+"""Item signature repository for database operations."""
+from typing import List, Optional
+from ..storage import Database
+from ..utils.tracing import traced_methods
+
+
+@traced_methods
+class SignatureRepository:
+    """Repository for the ``item_signatures`` of the duplicate index (see ``app/utils/duplicates.py``)."""
+
+    def __init__(self, db: Database):
+        self.db = db
+        self.collection = db.item_signatures
+
+    async def upsert_many(self, signatures: List[dict]) -> None:
+        """Store several signatures at once, in one bulk write."""
+        from pymongo import UpdateOne
+
+        if not signatures:
+            return
+        await self.collection.bulk_write([
+            UpdateOne(
+                {key: doc[key] for key in ("user_id", "hobby_id", "category", "item_id")},
+                {"$set": {"digest": doc["digest"], "bands": doc["bands"]}},
+                upsert=True
+            )
+            for doc in signatures
+        ], ordered=False)
+
+    async def find_candidates(self, user_id: str, hobby_id: str, category: str, bands: List[int]) -> List[str]:
+        """Ids of the items of a category sharing at least one band key with ``bands``."""
+        if not bands:
+            return []
+        docs = await self.collection.find(
+            {"user_id": user_id, "hobby_id": hobby_id, "category": category, "bands": {"$in": bands}},
+            {"_id": 0, "item_id": 1}
+        ).to_list(None)
+        return [doc["item_id"] for doc in docs]
+
+    async def get_category(self, user_id: str, hobby_id: str, category: str) -> List[dict]:
+        return await self.collection.find(
+            {"user_id": user_id, "hobby_id": hobby_id, "category": category},
+            {"_id": 0, "item_id": 1, "digest": 1, "bands": 1}
+        ).to_list(None)
+
+    async def rename_category(self, user_id: str, hobby_id: str, old: str, new: str) -> None:
+        await self.collection.update_many(
+            {"user_id": user_id, "hobby_id": hobby_id, "category": old},
+            {"$set": {"category": new}}
+        )
+
+    async def delete(self, user_id: str, hobby_id: str, category: Optional[str] = None,
+                     item_ids: Optional[List[str]] = None) -> None:
+        """Delete the signatures of some items of a category, of a whole category or of a whole hobby."""
+        query = {"user_id": user_id, "hobby_id": hobby_id}
+        if category is not None:
+            query["category"] = category
+        if item_ids is not None:
+            query["item_id"] = {"$in": item_ids}
+        await self.collection.delete_many(query)
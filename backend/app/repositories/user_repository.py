@@ -1,14 +1,31 @@
 """User repository for database operations."""
-from typing import Optional
-from motor.motor_asyncio import AsyncIOMotorDatabase
+from typing import Dict, List, Optional
+from weakref import WeakKeyDictionary
+from ..storage import Database
 from ..models.user import User
+from ..utils.dataloader import DataLoader
+from ..utils.tracing import traced_methods
 from bson import ObjectId
 
+# One batching loader per database, shared by every request's repository
+_user_loaders: "WeakKeyDictionary[Database, DataLoader[str, dict]]" = WeakKeyDictionary()
 
+
+def _user_loader(db: Database) -> DataLoader:
+    loader = _user_loaders.get(db)
+    if loader is None:
+        async def fetch_users(user_ids: List[str]) -> Dict[str, dict]:
+            ids = [ObjectId(user_id) for user_id in user_ids]
+            return {str(doc["_id"]): doc async for doc in db.users.find({"_id": {"$in": ids}})}
+        loader = _user_loaders[db] = DataLoader(fetch_users, "users")
+    return loader
+
+
+@traced_methods
 class UserRepository:
     """Repository for user database operations."""
     
-    def __init__(self, db: AsyncIOMotorDatabase):
+    def __init__(self, db: Database):
         self.db = db
         self.collection = db.users
     
@@ -29,6 +46,16 @@ class UserRepository:
             return User(**user_dict)
         return None
     
+    async def load_user_by_id(self, user_id: str) -> Optional[User]:
+        """Get user by ID, batched with concurrent lookups into one ``$in`` query."""
+        if not ObjectId.is_valid(user_id):
+            return None
+        
+        user_dict = await _user_loader(self.db).load(str(ObjectId(user_id)))
+        if user_dict:
+            return User(**user_dict)
+        return None
+    
     async def get_user_by_username(self, username: str) -> Optional[User]:
         """Get user by username."""
         user_dict = await self.collection.find_one({"username": username})
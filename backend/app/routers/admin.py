@@ -0,0 +1,37 @@
+"""Admin API routes."""
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi.responses import PlainTextResponse
+from typing import List, Literal
+from ..schemas.admin import ProfileSummary
+from ..models.user import User
+from ..middleware.auth_middleware import get_current_admin_user
+from ..utils.profiler import profile_store
+
+router = APIRouter(prefix="/admin", tags=["admin"])
+
+
+@router.get("/profiles", response_model=List[ProfileSummary])
+async def list_profiles(
+    limit: int = Query(20, ge=1, le=500),
+    admin: User = Depends(get_current_admin_user)
+):
+    """List recently captured request profiles, slowest first."""
+    return [ProfileSummary(**profile.summary()) for profile in profile_store.slowest(limit)]
+
+
+@router.get("/profiles/{profile_id}")
+async def get_profile(
+    profile_id: str,
+    format: Literal["speedscope", "collapsed"] = "speedscope",
+    admin: User = Depends(get_current_admin_user)
+):
+    """Download a profile as speedscope JSON or collapsed stacks."""
+    profile = profile_store.get(profile_id)
+    if profile is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Profile not found"
+        )
+    if format == "collapsed":
+        return PlainTextResponse(profile.collapsed())
+    return profile.speedscope()
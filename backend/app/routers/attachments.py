@@ -0,0 +1,124 @@
+"""Item attachment API routes."""
+from typing import TYPE_CHECKING, Optional, Tuple
+from urllib.parse import quote
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response, status
+from fastapi.responses import StreamingResponse
+from ..schemas.hobby import AttachmentResponse
+from ..models.user import User
+from ..dependencies import get_attachment_service
+from ..middleware.auth_middleware import get_current_active_user
+
+if TYPE_CHECKING:
+    from ..services.attachment_service import AttachmentService
+
+router = APIRouter(prefix="/hobbies", tags=["attachments"])
+
+ITEM_PATH = "/{hobby_id}/categories/{category_name}/items/{item_id}/attachments"
+# Files never change once stored, so clients may keep them
+CACHE_CONTROL = "private, max-age=31536000, immutable"
+
+
+def byte_range(header: Optional[str], length: int) -> Optional[Tuple[int, int]]:
+    """Parse a single ``bytes=`` Range header into ``[start, end)``.
+
+    Returns None (serve the whole file) for a missing, malformed or
+    multi-range header, as RFC 9110 allows; raises 416 if it is unsatisfiable.
+    """
+    if not header or not header.startswith("bytes=") or "," in header:
+        return None
+    first, _, last = header[len("bytes="):].strip().partition("-")
+    try:
+        if first:
+            start = int(first)
+            end = min(int(last) + 1, length) if last else length
+        else:
+            start, end = max(length - int(last), 0), length
+    except ValueError:
+        return None
+    if start < 0 or start >= end:
+        raise HTTPException(
+            status_code=status.HTTP_416_REQUESTED_RANGE_NOT_SATISFIABLE,
+            detail="Range not satisfiable",
+            headers={"Content-Range": f"bytes */{length}"}
+        )
+    return start, end
+
+
+@router.post(ITEM_PATH, response_model=AttachmentResponse, status_code=status.HTTP_201_CREATED)
+async def upload_attachment(
+    hobby_id: str,
+    category_name: str,
+    item_id: str,
+    request: Request,
+    filename: str = Query("attachment", max_length=255),
+    current_user: User = Depends(get_current_active_user),
+    attachment_service: "AttachmentService" = Depends(get_attachment_service)
+):
+    """Attach a file to an item; the request body is the raw file, streamed into storage."""
+    declared = request.headers.get("content-length")
+    attachment = await attachment_service.upload_attachment(
+        hobby_id, category_name, item_id, filename, request.headers.get("content-type", ""),
+        request.stream(), current_user, int(declared) if declared and declared.isdigit() else None
+    )
+    return AttachmentResponse(**attachment.model_dump())
+
+
+@router.get(ITEM_PATH + "/{attachment_id}")
+async def download_attachment(
+    item_id: str,
+    attachment_id: str,
+    request: Request,
+    current_user: User = Depends(get_current_active_user),
+    attachment_service: "AttachmentService" = Depends(get_attachment_service)
+):
+    """Download an attachment; a ``Range: bytes=`` header gets a 206 partial response."""
+    file = await attachment_service.get_attachment(item_id, attachment_id, current_user)
+    length = file["length"]
+    headers = {
+        "Accept-Ranges": "bytes",
+        "Cache-Control": CACHE_CONTROL,
+        "ETag": f'"{attachment_id}"',
+        "Content-Disposition": f"inline; filename*=UTF-8''{quote(file['filename'])}",
+    }
+    start, end, status_code = 0, length, status.HTTP_200_OK
+    requested = byte_range(request.headers.get("range"), length)
+    if requested and request.headers.get("if-range", headers["ETag"]) == headers["ETag"]:
+        start, end = requested
+        status_code = status.HTTP_206_PARTIAL_CONTENT
+        headers["Content-Range"] = f"bytes {start}-{end - 1}/{length}"
+    headers["Content-Length"] = str(end - start)
+    return StreamingResponse(
+        attachment_service.stream_attachment(file, start, end),
+        status_code=status_code,
+        media_type=file["metadata"]["content_type"],
+        headers=headers
+    )
+
+
+@router.get(ITEM_PATH + "/{attachment_id}/thumbnail")
+async def get_thumbnail(
+    item_id: str,
+    attachment_id: str,
+    size: int = Query(128),
+    current_user: User = Depends(get_current_active_user),
+    attachment_service: "AttachmentService" = Depends(get_attachment_service)
+):
+    """Get a resized image attachment; rendered once per size and cached."""
+    data, content_type = await attachment_service.get_thumbnail(item_id, attachment_id, size, current_user)
+    return Response(content=data, media_type=content_type, headers={
+        "Cache-Control": CACHE_CONTROL,
+        "ETag": f'"{attachment_id}_{size}"',
+    })
+
+
+@router.delete(ITEM_PATH + "/{attachment_id}", status_code=status.HTTP_204_NO_CONTENT)
+async def delete_attachment(
+    hobby_id: str,
+    category_name: str,
+    item_id: str,
+    attachment_id: str,
+    current_user: User = Depends(get_current_active_user),
+    attachment_service: "AttachmentService" = Depends(get_attachment_service)
+):
+    """Remove an attachment from an item and delete the file."""
+    await attachment_service.delete_attachment(hobby_id, category_name, item_id, attachment_id, current_user)
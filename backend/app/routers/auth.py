@@ -1,26 +1,21 @@
 """Authentication API routes."""
+from typing import TYPE_CHECKING
 from fastapi import APIRouter, Depends, HTTPException, status
 from ..schemas.auth import UserRegister, UserLogin, Token, UserResponse
 from ..models.user import User
-from ..services.auth_service import AuthService
-from ..repositories.user_repository import UserRepository
-from ..database import get_database
+from ..dependencies import get_auth_service
 from ..middleware.auth_middleware import get_current_active_user
 
-router = APIRouter(prefix="/auth", tags=["auth"])
-
+if TYPE_CHECKING:
+    from ..services.auth_service import AuthService
 
-def get_auth_service():
-    """Dependency to get auth service."""
-    db = get_database()
-    user_repo = UserRepository(db)
-    return AuthService(user_repo)
+router = APIRouter(prefix="/auth", tags=["auth"])
 
 
 @router.post("/register", response_model=UserResponse, status_code=status.HTTP_201_CREATED)
 async def register(
     user_data: UserRegister,
-    auth_service: AuthService = Depends(get_auth_service)
+    auth_service: "AuthService" = Depends(get_auth_service)
 ):
     """Register a new user."""
     user = await auth_service.register_user(user_data)
@@ -35,7 +30,7 @@ async def register(
 @router.post("/login", response_model=Token)
 async def login(
     login_data: UserLogin,
-    auth_service: AuthService = Depends(get_auth_service)
+    auth_service: "AuthService" = Depends(get_auth_service)
 ):
     """Login and get access token."""
     user = await auth_service.authenticate_user(login_data.username, login_data.password)
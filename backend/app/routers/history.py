@@ -0,0 +1,34 @@
+"""Item history API routes."""
+from datetime import datetime
+from fastapi import APIRouter, Depends, Query
+from typing import TYPE_CHECKING, List, Optional
+from ..schemas.history import HistoryEntryResponse
+from ..models.user import User
+from ..dependencies import get_history_service
+from ..middleware.auth_middleware import get_current_active_user
+
+if TYPE_CHECKING:
+    from ..models.history import HistoryEntry
+    from ..services.history_service import HistoryService
+
+router = APIRouter(prefix="/history", tags=["history"])
+
+
+def entry_to_response(entry: "HistoryEntry") -> HistoryEntryResponse:
+    """Convert HistoryEntry model to response schema."""
+    entry_dict = entry.model_dump(by_alias=True)
+    entry_dict["id"] = str(entry_dict.pop("_id"))
+    return HistoryEntryResponse(**entry_dict)
+
+
+@router.get("/items/{item_id}", response_model=List[HistoryEntryResponse])
+async def get_item_history(
+    item_id: str,
+    limit: int = Query(50, ge=1, le=500),
+    before: Optional[datetime] = Query(None, description="Only changes older than this (for paging)"),
+    current_user: User = Depends(get_current_active_user),
+    history_service: "HistoryService" = Depends(get_history_service)
+):
+    """Get an item's change history, newest first; it follows the item across moves."""
+    entries = await history_service.get_item_history(item_id, current_user, limit, before)
+    return [entry_to_response(entry) for entry in entries]
@@ -1,29 +1,34 @@
 """Hobby API routes."""
-from fastapi import APIRouter, Depends, status
-from typing import List
+from datetime import date
+from fastapi import APIRouter, Depends, Query, Response, status
+from typing import TYPE_CHECKING, List, Optional, Union
 from ..schemas.hobby import (
-    HobbyCreate, HobbyUpdate, HobbyResponse,
+    HobbyCreate, HobbyUpdate, HobbyClone, HobbyResponse,
     CategoryCreate, CategoryUpdate,
-    SubCategoryItemCreate, SubCategoryItemUpdate
+    SubCategoryItemCreate, SubCategoryItemUpdate, SubCategoryItemPatch,
+    ItemFieldIncrement, ItemFieldValue, ItemTransfer, ItemTransferResult,
+    SubCategoryItemResponse, CategoryStats, ItemQueryResult, CategoryActivity, CategoryDuplicates
 )
+from ..schemas.job import JobResponse
 from ..models.user import User
-from ..models.hobby import Hobby
-from ..services.hobby_service import HobbyService
-from ..repositories.hobby_repository import HobbyRepository
-from ..database import get_database
+from ..dependencies import get_activity_service, get_duplicate_service, get_hobby_service, get_job_service
+from .jobs import job_to_response
 from ..middleware.auth_middleware import get_current_active_user
+from ..utils.duplicates import DUPLICATES_HEADER, DUPLICATES_HEADER_LIMIT
+from ..utils.tracing import traced
 
-router = APIRouter(prefix="/hobbies", tags=["hobbies"])
-
+if TYPE_CHECKING:
+    from ..models.hobby import Hobby
+    from ..services.activity_service import ActivityService
+    from ..services.duplicate_service import DuplicateService
+    from ..services.hobby_service import HobbyService
+    from ..services.job_service import JobService
 
-def get_hobby_service():
-    """Dependency to get hobby service."""
-    db = get_database()
-    hobby_repo = HobbyRepository(db)
-    return HobbyService(hobby_repo)
+router = APIRouter(prefix="/hobbies", tags=["hobbies"])
 
 
-def hobby_to_response(hobby: Hobby) -> HobbyResponse:
+@traced("hobby_to_response")
+def hobby_to_response(hobby: "Hobby") -> HobbyResponse:
     """Convert Hobby model to response schema."""
     hobby_dict = hobby.model_dump(by_alias=True)
     hobby_dict["id"] = str(hobby_dict.pop("_id"))
@@ -34,17 +39,29 @@ def hobby_to_response(hobby: Hobby) -> HobbyResponse:
 async def create_hobby(
     hobby_data: HobbyCreate,
     current_user: User = Depends(get_current_active_user),
-    hobby_service: HobbyService = Depends(get_hobby_service)
+    hobby_service: "HobbyService" = Depends(get_hobby_service)
 ):
     """Create a new hobby."""
     hobby = await hobby_service.create_hobby(hobby_data, current_user)
     return hobby_to_response(hobby)
 
 
+@router.post("/{hobby_id}/clone", response_model=HobbyResponse, status_code=status.HTTP_201_CREATED)
+async def clone_hobby(
+    hobby_id: str,
+    clone: HobbyClone,
+    current_user: User = Depends(get_current_active_user),
+    hobby_service: "HobbyService" = Depends(get_hobby_service)
+):
+    """Copy a hobby, with or without its items, into a new hobby with fresh ids."""
+    hobby = await hobby_service.clone_hobby(hobby_id, clone, current_user)
+    return hobby_to_response(hobby)
+
+
 @router.get("", response_model=List[HobbyResponse])
 async def get_user_hobbies(
     current_user: User = Depends(get_current_active_user),
-    hobby_service: HobbyService = Depends(get_hobby_service)
+    hobby_service: "HobbyService" = Depends(get_hobby_service)
 ):
     """Get all hobbies for the current user."""
     hobbies = await hobby_service.get_user_hobbies(current_user)
@@ -55,7 +72,7 @@ async def get_user_hobbies(
 async def get_hobby(
     hobby_id: str,
     current_user: User = Depends(get_current_active_user),
-    hobby_service: HobbyService = Depends(get_hobby_service)
+    hobby_service: "HobbyService" = Depends(get_hobby_service)
 ):
     """Get a specific hobby."""
     hobby = await hobby_service.get_hobby(hobby_id, current_user)
@@ -67,7 +84,7 @@ async def update_hobby(
     hobby_id: str,
     hobby_data: HobbyUpdate,
     current_user: User = Depends(get_current_active_user),
-    hobby_service: HobbyService = Depends(get_hobby_service)
+    hobby_service: "HobbyService" = Depends(get_hobby_service)
 ):
     """Update a hobby."""
     hobby = await hobby_service.update_hobby(hobby_id, hobby_data, current_user)
@@ -78,7 +95,7 @@ async def update_hobby(
 async def delete_hobby(
     hobby_id: str,
     current_user: User = Depends(get_current_active_user),
-    hobby_service: HobbyService = Depends(get_hobby_service)
+    hobby_service: "HobbyService" = Depends(get_hobby_service)
 ):
     """Delete a hobby."""
     await hobby_service.delete_hobby(hobby_id, current_user)
@@ -89,7 +106,7 @@ async def add_category(
     hobby_id: str,
     category_data: CategoryCreate,
     current_user: User = Depends(get_current_active_user),
-    hobby_service: HobbyService = Depends(get_hobby_service)
+    hobby_service: "HobbyService" = Depends(get_hobby_service)
 ):
     """Add a category to a hobby."""
     hobby = await hobby_service.add_category(hobby_id, category_data, current_user)
@@ -102,7 +119,7 @@ async def update_category(
     category_name: str,
     category_data: CategoryUpdate,
     current_user: User = Depends(get_current_active_user),
-    hobby_service: HobbyService = Depends(get_hobby_service)
+    hobby_service: "HobbyService" = Depends(get_hobby_service)
 ):
     """Update a category in a hobby."""
     hobby = await hobby_service.update_category(hobby_id, category_name, category_data, current_user)
@@ -114,7 +131,7 @@ async def delete_category(
     hobby_id: str,
     category_name: str,
     current_user: User = Depends(get_current_active_user),
-    hobby_service: HobbyService = Depends(get_hobby_service)
+    hobby_service: "HobbyService" = Depends(get_hobby_service)
 ):
     """Delete a category from a hobby."""
     hobby = await hobby_service.delete_category(hobby_id, category_name, current_user)
@@ -126,35 +143,200 @@ async def add_item_to_category(
     hobby_id: str,
     category_name: str,
     item_data: SubCategoryItemCreate,
+    response: Response,
     current_user: User = Depends(get_current_active_user),
-    hobby_service: HobbyService = Depends(get_hobby_service)
+    hobby_service: "HobbyService" = Depends(get_hobby_service),
+    duplicate_service: "DuplicateService" = Depends(get_duplicate_service)
 ):
-    """Add an item to a category."""
+    """Add an item to a category.
+    
+    The ids of the (at most five) existing items it most likely duplicates,
+    if any, are listed in the ``X-Possible-Duplicates`` header; the item is
+    added either way.
+    """
     hobby = await hobby_service.add_item_to_category(hobby_id, category_name, item_data, current_user)
+    category = next(cat for cat in hobby.categories if cat.name == category_name)
+    if category.items:  # Pushed last
+        duplicates = await duplicate_service.similar_items(hobby, category_name, category.items[-1].id)
+        if duplicates:
+            response.headers[DUPLICATES_HEADER] = ", ".join(duplicates[:DUPLICATES_HEADER_LIMIT])
     return hobby_to_response(hobby)
 
 
+@router.get("/{hobby_id}/categories/{category_name}/stats", response_model=CategoryStats)
+async def get_category_stats(
+    hobby_id: str,
+    category_name: str,
+    current_user: User = Depends(get_current_active_user),
+    hobby_service: "HobbyService" = Depends(get_hobby_service)
+):
+    """Summary statistics of every field of a category's items (counts, ranges, top values)."""
+    return CategoryStats(**await hobby_service.category_stats(hobby_id, category_name, current_user))
+
+
+@router.get("/{hobby_id}/categories/{category_name}/activity", response_model=CategoryActivity)
+async def get_category_activity(
+    hobby_id: str,
+    category_name: str,
+    granularity: str = Query("month", pattern="^(day|week|month)$"),
+    start: Optional[date] = Query(None, description="First day to chart (default: 30 days, 26 weeks or 12 months back)"),
+    end: Optional[date] = Query(None, description="Last day to chart (default: today, UTC)"),
+    current_user: User = Depends(get_current_active_user),
+    activity_service: "ActivityService" = Depends(get_activity_service)
+):
+    """Items added, removed and updated per day, week or month, with the item count and number field totals over time."""
+    return CategoryActivity(**await activity_service.get_category_activity(
+        hobby_id, category_name, granularity, start, end, current_user
+    ))
+
+
+@router.get("/{hobby_id}/categories/{category_name}/duplicates", response_model=CategoryDuplicates)
+async def get_category_duplicates(
+    hobby_id: str,
+    category_name: str,
+    min_similarity: Optional[float] = Query(None, gt=0, le=1, description="Least similarity reported (default: DUPLICATE_SIMILARITY)"),
+    limit: int = Query(100, ge=1, le=1000),
+    current_user: User = Depends(get_current_active_user),
+    duplicate_service: "DuplicateService" = Depends(get_duplicate_service)
+):
+    """Pairs of items whose text fields are alike enough to be the same item entered twice."""
+    return CategoryDuplicates(**await duplicate_service.find_duplicates(
+        hobby_id, category_name, min_similarity, limit, current_user
+    ))
+
+
+@router.get("/{hobby_id}/categories/{category_name}/items", response_model=ItemQueryResult)
+async def query_items(
+    hobby_id: str,
+    category_name: str,
+    where: List[str] = Query([], description="Filters as Field:op:value with op one of eq, ne, lt, lte, gt, gte"),
+    sort: Optional[str] = Query(None, description="Field to sort by; missing values come last"),
+    order: str = Query("asc", pattern="^(asc|desc)$"),
+    limit: int = Query(50, ge=1, le=1000),
+    offset: int = Query(0, ge=0),
+    current_user: User = Depends(get_current_active_user),
+    hobby_service: "HobbyService" = Depends(get_hobby_service)
+):
+    """Filter and sort a category's items and return one page of them, with the number that matched."""
+    total, items = await hobby_service.query_items(hobby_id, category_name, where, sort, order == "desc",
+                                                   limit, offset, current_user)
+    return ItemQueryResult(total=total, items=[SubCategoryItemResponse(**item.model_dump()) for item in items])
+
+
+async def _transfer_items(hobby_id: str, category_name: str, transfer: ItemTransfer, move: bool,
+                          background: bool, response: Response, current_user: User,
+                          hobby_service: "HobbyService", job_service: "JobService"):
+    if not background:
+        return await hobby_service.transfer_items(hobby_id, category_name, transfer, current_user, move=move)
+    await hobby_service.get_hobby(hobby_id, current_user)  # 404 now rather than in the job
+    job = await job_service.submit_job("transfer_items", {
+        "hobby_id": hobby_id,
+        "category_name": category_name,
+        "transfer": transfer.model_dump(),
+        "move": move
+    }, current_user)
+    response.status_code = status.HTTP_202_ACCEPTED
+    response.headers["Location"] = f"/api/jobs/{job.id}"
+    return job_to_response(job)
+
+
+@router.post("/{hobby_id}/categories/{category_name}/items/move",
+             response_model=Union[ItemTransferResult, JobResponse])
+async def move_items(
+    hobby_id: str,
+    category_name: str,
+    transfer: ItemTransfer,
+    response: Response,
+    background: bool = Query(False),
+    current_user: User = Depends(get_current_active_user),
+    hobby_service: "HobbyService" = Depends(get_hobby_service),
+    job_service: "JobService" = Depends(get_job_service)
+):
+    """Move items to another category, of this or another hobby, keeping their ids.
+
+    With ``background=true`` this queues a job and answers 202 with it; poll
+    ``/api/jobs/{id}`` for progress and the result.
+    """
+    return await _transfer_items(hobby_id, category_name, transfer, True, background, response,
+                                 current_user, hobby_service, job_service)
+
+
+@router.post("/{hobby_id}/categories/{category_name}/items/copy",
+             response_model=Union[ItemTransferResult, JobResponse])
+async def copy_items(
+    hobby_id: str,
+    category_name: str,
+    transfer: ItemTransfer,
+    response: Response,
+    background: bool = Query(False),
+    current_user: User = Depends(get_current_active_user),
+    hobby_service: "HobbyService" = Depends(get_hobby_service),
+    job_service: "JobService" = Depends(get_job_service)
+):
+    """Copy items to another category, of this or another hobby; copies get new ids.
+
+    With ``background=true`` this queues a job and answers 202 with it.
+    """
+    return await _transfer_items(hobby_id, category_name, transfer, False, background, response,
+                                 current_user, hobby_service, job_service)
+
+
 @router.put("/{hobby_id}/categories/{category_name}/items/{item_id}", response_model=HobbyResponse)
 async def update_item_in_category(
     hobby_id: str,
     category_name: str,
     item_id: str,
     item_data: SubCategoryItemUpdate,
+    coalesce: bool = Query(False, description="Merge with this item's other updates of the next moment"),
+    current_user: User = Depends(get_current_active_user),
+    hobby_service: "HobbyService" = Depends(get_hobby_service)
+):
+    """Update an item in a category.
+    
+    ``coalesce=true`` suits editors that save on every change: the update is
+    validated and answered at once, and the item's latest data is written
+    once per ``ITEM_WRITE_COALESCE_MS``.
+    """
+    hobby = await hobby_service.update_item_in_category(hobby_id, category_name, item_id, item_data,
+                                                        current_user, coalesce=coalesce)
+    return hobby_to_response(hobby)
+
+
+@router.patch("/{hobby_id}/categories/{category_name}/items/{item_id}", response_model=HobbyResponse)
+async def patch_item_in_category(
+    hobby_id: str,
+    category_name: str,
+    item_id: str,
+    patch: SubCategoryItemPatch,
     current_user: User = Depends(get_current_active_user),
-    hobby_service: HobbyService = Depends(get_hobby_service)
+    hobby_service: "HobbyService" = Depends(get_hobby_service)
 ):
-    """Update an item in a category."""
-    hobby = await hobby_service.update_item_in_category(hobby_id, category_name, item_id, item_data, current_user)
+    """Partially update an item: only the keys sent are changed, null removes a key."""
+    hobby = await hobby_service.patch_item_in_category(hobby_id, category_name, item_id, patch, current_user)
     return hobby_to_response(hobby)
 
 
+@router.post("/{hobby_id}/categories/{category_name}/items/{item_id}/increment", response_model=ItemFieldValue)
+async def increment_item_field(
+    hobby_id: str,
+    category_name: str,
+    item_id: str,
+    increment: ItemFieldIncrement,
+    current_user: User = Depends(get_current_active_user),
+    hobby_service: "HobbyService" = Depends(get_hobby_service)
+):
+    """Atomically add to a number field of an item (e.g. use one up), returning the new value."""
+    value = await hobby_service.increment_item_field(hobby_id, category_name, item_id, increment, current_user)
+    return ItemFieldValue(item_id=item_id, field=increment.field, value=value)
+
+
 @router.delete("/{hobby_id}/categories/{category_name}/items/{item_id}", response_model=HobbyResponse)
 async def delete_item_from_category(
     hobby_id: str,
     category_name: str,
     item_id: str,
     current_user: User = Depends(get_current_active_user),
-    hobby_service: HobbyService = Depends(get_hobby_service)
+    hobby_service: "HobbyService" = Depends(get_hobby_service)
 ):
     """Delete an item from a category."""
     hobby = await hobby_service.delete_item_from_category(hobby_id, category_name, item_id, current_user)
@@ -0,0 +1,52 @@
+"""Background job API routes."""
+from fastapi import APIRouter, Depends
+from typing import TYPE_CHECKING, List
+from ..schemas.job import JobResponse
+from ..models.user import User
+from ..dependencies import get_job_service
+from ..middleware.auth_middleware import get_current_active_user
+
+if TYPE_CHECKING:
+    from ..models.job import Job
+    from ..services.job_service import JobService
+
+router = APIRouter(prefix="/jobs", tags=["jobs"])
+
+
+def job_to_response(job: "Job") -> JobResponse:
+    """Convert Job model to response schema."""
+    job_dict = job.model_dump(by_alias=True)
+    job_dict["id"] = str(job_dict.pop("_id"))
+    return JobResponse(**job_dict)
+
+
+@router.get("", response_model=List[JobResponse])
+async def get_user_jobs(
+    current_user: User = Depends(get_current_active_user),
+    job_service: "JobService" = Depends(get_job_service)
+):
+    """Get the current user's recent jobs, newest first."""
+    jobs = await job_service.get_user_jobs(current_user)
+    return [job_to_response(job) for job in jobs]
+
+
+@router.get("/{job_id}", response_model=JobResponse)
+async def get_job(
+    job_id: str,
+    current_user: User = Depends(get_current_active_user),
+    job_service: "JobService" = Depends(get_job_service)
+):
+    """Get a job's status and progress (poll this after submitting work)."""
+    job = await job_service.get_job(job_id, current_user)
+    return job_to_response(job)
+
+
+@router.post("/{job_id}/cancel", response_model=JobResponse)
+async def cancel_job(
+    job_id: str,
+    current_user: User = Depends(get_current_active_user),
+    job_service: "JobService" = Depends(get_job_service)
+):
+    """Cancel a job; a running job stops at its next progress report."""
+    job = await job_service.cancel_job(job_id, current_user)
+    return job_to_response(job)
@@ -0,0 +1,15 @@
+"""Admin request/response schemas."""
+from pydantic import BaseModel
+from typing import Optional
+from datetime import datetime
+
+
+class ProfileSummary(BaseModel):
+    """A captured request profile, without its samples."""
+    id: str
+    method: str
+    path: str
+    status_code: Optional[int] = None
+    started_at: datetime
+    duration_ms: float
+    samples: int
@@ -0,0 +1,29 @@
+"""Item history response schemas."""
+from pydantic import BaseModel
+from typing import Dict, Any
+from datetime import datetime
+from ..models.history import HistoryAction
+
+
+class HistoryEntryResponse(BaseModel):
+    """Schema for one change to an item."""
+    id: str
+    hobby_id: str
+    category: str
+    item_id: str
+    action: HistoryAction
+    changes: Dict[str, Any]
+    at: datetime
+    
+    class Config:
+        json_schema_extra = {
+            "example": {
+                "id": "507f1f77bcf86cd799439011",
+                "hobby_id": "507f1f77bcf86cd799439012",
+                "category": "Strings",
+                "item_id": "9b2f0c4e-1a2b-4c3d-8e9f-0a1b2c3d4e5f",
+                "action": "incremented",
+                "changes": {"field": "Sets left", "amount": -1, "value": 2},
+                "at": "2024-01-01T00:00:00"
+            }
+        }
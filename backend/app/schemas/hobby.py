@@ -1,24 +1,42 @@
 """Hobby request/response schemas."""
 from pydantic import BaseModel, Field
-from typing import List, Dict, Any, Optional
-from datetime import datetime
+from typing import List, Dict, Any, Optional, Union
+from datetime import date, datetime
 from ..models.hobby import FieldDefinition, FieldType
 
 
 class HobbyCreate(BaseModel):
-    """Schema for creating a new hobby."""
+    """Schema for creating a new hobby, optionally with its categories and seed items."""
     name: str = Field(..., min_length=1, max_length=100)
     description: Optional[str] = None
+    categories: List["CategorySeed"] = Field(default_factory=list, max_length=100)
     
     class Config:
         json_schema_extra = {
             "example": {
                 "name": "Slingshot",
-                "description": "Tracking slingshot equipment and ammo"
+                "description": "Tracking slingshot equipment and ammo",
+                "categories": [
+                    {
+                        "name": "Latex",
+                        "fields": [
+                            {"name": "Brand", "field_type": "text", "required": True},
+                            {"name": "Quantity", "field_type": "number", "required": False}
+                        ],
+                        "items": [{"data": {"Brand": "Snipersling", "Quantity": 4}}]
+                    }
+                ]
             }
         }
 
 
+class HobbyClone(BaseModel):
+    """Schema for cloning a hobby; unset fields keep the source's values."""
+    name: Optional[str] = Field(None, min_length=1, max_length=100)
+    description: Optional[str] = None
+    include_items: bool = True
+
+
 class HobbyUpdate(BaseModel):
     """Schema for updating a hobby."""
     name: Optional[str] = Field(None, min_length=1, max_length=100)
@@ -67,15 +85,101 @@ class SubCategoryItemCreate(BaseModel):
         }
 
 
+class CategorySeed(CategoryCreate):
+    """Schema for a category created together with its hobby."""
+    items: List[SubCategoryItemCreate] = Field(default_factory=list, max_length=1000)
+
+
+HobbyCreate.model_rebuild()
+
+
 class SubCategoryItemUpdate(BaseModel):
     """Schema for updating a sub-category item."""
     data: Dict[str, Any]
 
 
+class SubCategoryItemPatch(BaseModel):
+    """Schema for partially updating a sub-category item (JSON merge patch).
+    
+    Only the keys present are changed; a null value removes the key.
+    """
+    data: Dict[str, Any]
+    
+    class Config:
+        json_schema_extra = {
+            "example": {
+                "data": {
+                    "Quantity": 3,
+                    "Colour": None
+                }
+            }
+        }
+
+
+class ItemFieldIncrement(BaseModel):
+    """Schema for atomically adding to a number field of an item."""
+    field: str = Field(..., min_length=1, max_length=100)
+    amount: Union[int, float] = 1
+    floor: Optional[Union[int, float]] = None
+    ceiling: Optional[Union[int, float]] = None
+    
+    class Config:
+        json_schema_extra = {
+            "example": {
+                "field": "Quantity",
+                "amount": -1,
+                "floor": 0
+            }
+        }
+
+
+class ItemFieldValue(BaseModel):
+    """Schema for the new value of an item field."""
+    item_id: str
+    field: str
+    value: Union[int, float]
+
+
+class ItemTransfer(BaseModel):
+    """Schema for moving or copying items to another category, possibly of another hobby.
+
+    More than 500 items need ``?background=true``.
+    """
+    item_ids: List[str] = Field(..., min_length=1, max_length=10000)
+    target_category: str = Field(..., min_length=1, max_length=100)
+    target_hobby_id: Optional[str] = None
+    
+    class Config:
+        json_schema_extra = {
+            "example": {
+                "item_ids": ["507f1f77bcf86cd799439011", "507f1f77bcf86cd799439012"],
+                "target_category": "Retired bands",
+                "target_hobby_id": "507f1f77bcf86cd799439013"
+            }
+        }
+
+
+class ItemTransferResult(BaseModel):
+    """Schema for where transferred items ended up; copies get new ids, in request order."""
+    hobby_id: str
+    category: str
+    item_ids: List[str]
+
+
+class AttachmentResponse(BaseModel):
+    """Schema for an attachment reference; the file itself is served separately."""
+    id: str
+    filename: str
+    content_type: str
+    length: int
+    created_at: datetime
+
+
 class SubCategoryItemResponse(BaseModel):
     """Schema for sub-category item response."""
     id: str
     data: Dict[str, Any]
+    attachments: List[AttachmentResponse] = []
     created_at: datetime
     updated_at: datetime
 
@@ -111,3 +215,75 @@ class HobbyResponse(BaseModel):
                 "updated_at": "2024-01-01T00:00:00"
             }
         }
+
+
+class ValueCount(BaseModel):
+    """Schema for how many items have one value of a text field."""
+    value: str
+    count: int
+
+
+class FieldStats(BaseModel):
+    """Schema for summary statistics of one field; which of the optional keys are set depends on its type."""
+    field: str
+    type: FieldType
+    count: int
+    missing: int
+    min: Optional[Union[float, str]] = None  # Numbers and dates (as ISO day)
+    max: Optional[Union[float, str]] = None
+    sum: Optional[float] = None
+    mean: Optional[float] = None
+    median: Optional[float] = None
+    true: Optional[int] = None
+    false: Optional[int] = None
+    distinct: Optional[int] = None
+    top: Optional[List[ValueCount]] = None  # Most frequent text values
+
+
+class CategoryStats(BaseModel):
+    """Schema for summary statistics of a category's items."""
+    hobby_id: str
+    category: str
+    items: int
+    fields: List[FieldStats]
+
+
+class ItemQueryResult(BaseModel):
+    """Schema for one page of a category's items, filtered and sorted."""
+    total: int
+    items: List[SubCategoryItemResponse]
+
+
+class ActivityPeriod(BaseModel):
+    """Schema for a category's activity in one day, week or month, and its state at the period's end."""
+    start: date
+    added: int
+    removed: int
+    updated: int
+    items: int
+    changes: Dict[str, float]  # Net change of each number field during the period
+    totals: Dict[str, float]  # Each number field summed over all items, at the period's end
+
+
+class CategoryActivity(BaseModel):
+    """Schema for a category's activity over time."""
+    hobby_id: str
+    category: str
+    granularity: str
+    fields: List[str]
+    periods: List[ActivityPeriod]
+
+
+class DuplicatePair(BaseModel):
+    """Schema for two items of a category that are likely duplicates."""
+    item_ids: List[str]
+    similarity: float  # Jaccard index of their text's character trigrams, 0-1
+
+
+class CategoryDuplicates(BaseModel):
+    """Schema for the likely duplicate items of a category."""
+    hobby_id: str
+    category: str
+    min_similarity: float
+    total: int
+    pairs: List[DuplicatePair]
@@ -0,0 +1,32 @@
+"""Background job response schemas."""
+from pydantic import BaseModel
+from typing import Dict, Any, Optional
+from datetime import datetime
+from ..models.job import JobStatus
+
+
+class JobResponse(BaseModel):
+    """Schema for a background job's status, progress and outcome."""
+    id: str
+    kind: str
+    status: JobStatus
+    progress: float
+    message: Optional[str]
+    result: Optional[Dict[str, Any]]
+    error: Optional[str]
+    cancel_requested: bool
+    attempts: int
+    created_at: datetime
+    started_at: Optional[datetime]
+    finished_at: Optional[datetime]
+    
+    class Config:
+        json_schema_extra = {
+            "example": {
+                "id": "507f1f77bcf86cd799439011",
+                "kind": "transfer_items",
+                "status": "running",
+                "progress": 0.4,
+                "message": "Moved 200 of 500 items"
+            }
+        }
@@ -0,0 +1,179 @@
+"""Production server: ``python -m app serve``.
+
+Runs uvicorn with uvloop/httptools when installed, a worker process per CPU
+sharing one listening socket, and a supervisor that replaces workers when
+they exit, so ``max_requests`` can recycle them without losing capacity. On
+SIGTERM/SIGINT workers stop accepting connections and drain in-flight
+requests for up to ``graceful_timeout`` seconds before being killed.
+"""
+from dataclasses import dataclass, replace
+from importlib.util import find_spec
+from multiprocessing.context import SpawnProcess
+from typing import Dict, Optional
+import logging
+import os
+import random
+import signal
+import threading
+import time
+
+import uvicorn
+from uvicorn._subprocess import get_subprocess
+
+from .config import settings
+
+logger = logging.getLogger("uvicorn.error")
+
+APP = "app.main:app"
+# A worker that dies sooner than this after starting is treated as crashing
+MIN_WORKER_LIFETIME = 5.0
+
+
+def default_workers() -> int:
+    """One worker per CPU available to this process."""
+    try:
+        return max(1, len(os.sched_getaffinity(0)))
+    except AttributeError:
+        return max(1, os.cpu_count() or 1)
+
+
+def pick_loop() -> str:
+    return "uvloop" if find_spec("uvloop") else "asyncio"
+
+
+def pick_http() -> str:
+    return "httptools" if find_spec("httptools") else "h11"
+
+
+@dataclass
+class ServeOptions:
+    """Server settings; zero ``workers``/``max_requests`` mean auto/off."""
+
+    host: str = "0.0.0.0"
+    port: int = 8000
+    workers: int = 0
+    backlog: int = 2048
+    keep_alive: int = 5
+    graceful_timeout: int = 30
+    max_requests: int = 0
+    max_requests_jitter: int = 0
+    log_level: str = "info"
+    access_log: bool = True
+
+    @classmethod
+    def from_settings(cls) -> "ServeOptions":
+        return cls(
+            host=settings.SERVER_HOST,
+            port=settings.SERVER_PORT,
+            workers=settings.SERVER_WORKERS,
+            backlog=settings.SERVER_BACKLOG,
+            keep_alive=settings.SERVER_KEEP_ALIVE,
+            graceful_timeout=settings.SERVER_GRACEFUL_TIMEOUT,
+            max_requests=settings.SERVER_MAX_REQUESTS,
+            max_requests_jitter=settings.SERVER_MAX_REQUESTS_JITTER,
+            access_log=settings.SERVER_ACCESS_LOG,
+        )
+
+    def resolved(self) -> "ServeOptions":
+        return replace(self, workers=self.workers or default_workers())
+
+
+def build_config(options: ServeOptions) -> uvicorn.Config:
+    """A uvicorn config for one worker.
+
+    ``max_requests`` gets a random extra of up to ``max_requests_jitter`` so
+    workers started together do not all recycle at the same moment.
+    """
+    max_requests = None
+    if options.max_requests:
+        max_requests = options.max_requests + random.randint(0, options.max_requests_jitter)
+    return uvicorn.Config(
+        APP,
+        host=options.host,
+        port=options.port,
+        loop=pick_loop(),
+        http=pick_http(),
+        backlog=options.backlog,
+        timeout_keep_alive=options.keep_alive,
+        timeout_graceful_shutdown=options.graceful_timeout,
+        limit_max_requests=max_requests,
+        log_level=options.log_level,
+        access_log=options.access_log,
+        proxy_headers=True,
+        server_header=False,
+    )
+
+
+class Supervisor:
+    """Keeps ``options.workers`` processes serving one shared socket."""
+
+    def __init__(self, options: ServeOptions):
+        self.options = options
+        self.should_exit = threading.Event()
+        self.processes: Dict[int, SpawnProcess] = {}
+        self.started_at: Dict[int, float] = {}
+        self.socket = None
+
+    def _signal(self, signum, frame) -> None:
+        self.should_exit.set()
+
+    def spawn(self) -> None:
+        config = build_config(self.options)
+        server = uvicorn.Server(config)
+        process = get_subprocess(config=config, target=server.run, sockets=[self.socket])
+        process.start()
+        self.processes[process.pid] = process
+        self.started_at[process.pid] = time.monotonic()
+
+    def reap(self) -> None:
+        """Replace workers that exited (recycled or crashed)."""
+        for pid, process in list(self.processes.items()):
+            if process.is_alive():
+                continue
+            lifetime = time.monotonic() - self.started_at.pop(pid)
+            del self.processes[pid]
+            if process.exitcode == 0:
+                logger.info(f"Worker [{pid}] exited after reaching its request limit, replacing it")
+            else:
+                logger.warning(f"Worker [{pid}] died with exit code {process.exitcode}, replacing it")
+                if lifetime < MIN_WORKER_LIFETIME:
+                    # Don't spin if workers fail at startup (bad config, port, ...)
+                    self.should_exit.wait(1.0)
+            if not self.should_exit.is_set():
+                self.spawn()
+
+    def run(self) -> int:
+        config = build_config(self.options)
+        self.socket = config.bind_socket()
+        for sig in (signal.SIGINT, signal.SIGTERM):
+            signal.signal(sig, self._signal)
+        logger.info(f"Starting {self.options.workers} workers (loop={config.loop}, http={config.http}) "
+                    f"[{os.getpid()}]")
+        for _ in range(self.options.workers):
+            self.spawn()
+        while not self.should_exit.wait(0.5):
+            self.reap()
+        self.shutdown()
+        return 0
+
+    def shutdown(self) -> None:
+        logger.info("Shutting down: draining in-flight requests")
+        for process in self.processes.values():
+            process.terminate()
+        deadline = time.monotonic() + self.options.graceful_timeout + 5
+        for pid, process in self.processes.items():
+            process.join(max(0.0, deadline - time.monotonic()))
+            if process.is_alive():
+                logger.warning(f"Worker [{pid}] did not stop in time, killing it")
+                process.kill()
+                process.join()
+        self.socket.close()
+
+
+def serve(options: Optional[ServeOptions] = None) -> int:
+    """Run the server until it is told to stop."""
+    options = (options or ServeOptions.from_settings()).resolved()
+    if options.workers == 1 and not options.max_requests:
+        uvicorn.Server(build_config(options)).run()
+        return 0
+    return Supervisor(options).run()
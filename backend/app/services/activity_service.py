@@ -0,0 +1,81 @@
+"""Item activity service for business logic."""
+from datetime import date, datetime, timedelta
+from typing import Optional
+from fastapi import HTTPException, status
+from ..models.hobby import CategorySchema, FieldType
+from ..models.user import User
+from ..repositories.activity_repository import ActivityRepository
+from ..repositories.hobby_repository import HobbyRepository
+from ..utils.activity import activity_counter
+from ..utils.tracing import traced_methods
+
+MAX_PERIODS = 1000
+DEFAULT_SPAN = {"day": timedelta(days=29), "week": timedelta(weeks=25), "month": timedelta(days=334)}
+
+
+@traced_methods
+class ActivityService:
+    """Service for charts of a category's items over time."""
+
+    def __init__(self, hobby_repository: HobbyRepository, activity_repository: ActivityRepository):
+        self.hobby_repository = hobby_repository
+        self.activity_repository = activity_repository
+
+    async def get_category_activity(self, hobby_id: str, category_name: str, granularity: str,
+                                    start: Optional[date], end: Optional[date], user: User) -> dict:
+        """Items added, removed and updated per period, and the item count and number field totals at its end.
+
+        Reads the category's day buckets, not its items; only the first read
+        of a category reads its items, to seed what it held before counting.
+        """
+        from ..utils.timeseries import period_range, roll_up, seed_baseline  # NumPy loads on first use
+
+        user_id = str(user.id)
+        end = end or datetime.utcnow().date()
+        start = start or end - DEFAULT_SPAN[granularity]
+        if start > end or len(period_range(start, end, granularity)) > MAX_PERIODS:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Choose a start before the end and at most {MAX_PERIODS} {granularity}s"
+            )
+
+        category = await self._find_category(hobby_id, category_name, user_id, items=False)
+        schema = CategorySchema(**category["schema"])
+        fields = [f.name for f in schema.fields if f.field_type == FieldType.NUMBER]
+
+        baseline = await self.activity_repository.get_baseline(user_id, hobby_id, category_name)
+        if baseline is None:
+            await activity_counter.flush()
+            buckets = await self.activity_repository.get_days(user_id, hobby_id, category_name)
+            items = (await self._find_category(hobby_id, category_name, user_id, items=True)).get("items", [])
+            baseline = await self.activity_repository.insert_baseline({
+                "user_id": user_id, "hobby_id": hobby_id, "category": category_name,
+                **seed_baseline(items, fields, buckets, datetime.utcnow())
+            })
+
+        until = datetime.combine(end + timedelta(days=1), datetime.min.time())
+        buckets = await self.activity_repository.get_days(user_id, hobby_id, category_name, until)
+        buckets += [bucket for bucket in activity_counter.buffered(user_id, hobby_id, category_name)
+                    if bucket["day"] < until]
+        return {
+            "hobby_id": hobby_id,
+            "category": category_name,
+            "granularity": granularity,
+            "fields": fields,
+            "periods": roll_up(buckets, baseline, fields, granularity, start, end),
+        }
+
+    async def _find_category(self, hobby_id: str, category_name: str, user_id: str, items: bool) -> dict:
+        hobby_dict = await self.hobby_repository.get_categories_document(hobby_id, user_id, items=items)
+        if not hobby_dict:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Hobby not found"
+            )
+        category = next((cat for cat in hobby_dict.get("categories", []) if cat["name"] == category_name), None)
+        if not category:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail=f"Category '{category_name}' not found"
+            )
+        return category
@@ -0,0 +1,154 @@
+"""Attachment service for business logic."""
+import os
+from typing import AsyncIterable, AsyncIterator, Optional, Tuple
+from fastapi import HTTPException, status
+from ..config import settings
+from ..models.hobby import Attachment, SubCategoryItem
+from ..models.user import User
+from ..repositories.attachment_repository import AttachmentRepository
+from ..repositories.hobby_repository import HobbyRepository
+from ..storage.gridfs import FileTooLarge
+from ..utils import thumbnails
+from ..utils.coalesce import flushes_parked_writes
+from ..utils.singleflight import SingleFlight
+from ..utils.tracing import traced_methods
+from .write_effects import HobbyWriteEffects
+
+# Concurrent requests for a thumbnail that is not cached yet render it once
+thumbnail_renders = SingleFlight("thumbnails")
+
+
+@traced_methods
+class AttachmentService:
+    """Service for item attachment business logic."""
+
+    def __init__(self, hobby_repository: HobbyRepository, attachment_repository: AttachmentRepository,
+                 write_effects: HobbyWriteEffects):
+        self.hobby_repository = hobby_repository
+        self.attachment_repository = attachment_repository
+        self.write_effects = write_effects
+
+    @flushes_parked_writes
+    async def upload_attachment(self, hobby_id: str, category_name: str, item_id: str, filename: str,
+                                content_type: str, source: AsyncIterable[bytes], user: User,
+                                declared_length: Optional[int] = None) -> Attachment:
+        """Stream a file into storage and reference it from the item."""
+        if declared_length is not None and declared_length > settings.ATTACHMENT_MAX_BYTES:
+            raise self._too_large()
+        content_type = (content_type or "").split(";")[0].strip().lower()
+        if content_type not in settings.ATTACHMENT_CONTENT_TYPES:
+            raise HTTPException(
+                status_code=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE,
+                detail=f"Unsupported attachment type '{content_type}'"
+            )
+        filename = os.path.basename(filename.replace("\\", "/")).strip() or "attachment"
+
+        item = await self._find_item(hobby_id, category_name, item_id, user)
+        self._check_attachment_limit(item)
+        try:
+            file = await self.attachment_repository.save_file(
+                source, filename, content_type, {"user_id": str(user.id), "item_id": item_id},
+                settings.ATTACHMENT_MAX_BYTES
+            )
+        except FileTooLarge:
+            raise self._too_large()
+
+        attachment = Attachment(id=str(file["_id"]), filename=filename, content_type=content_type,
+                                length=file["length"])
+        if not await self.hobby_repository.add_attachment(
+                hobby_id, str(user.id), category_name, item_id, attachment, settings.ATTACHMENT_MAX_PER_ITEM):
+            # The item was deleted or filled up during the upload
+            await self.attachment_repository.delete_files([attachment.id])
+            self._check_attachment_limit(await self._find_item(hobby_id, category_name, item_id, user))
+            raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail="Item changed concurrently, retry")
+        await self.write_effects.attachment_added(str(user.id), hobby_id, category_name, item_id, attachment)
+        return attachment
+
+    async def get_attachment(self, item_id: str, attachment_id: str, user: User) -> dict:
+        """Get an attachment's file document, checking it belongs to the user's item.
+
+        Ownership is recorded on the file, so downloads do not read the hobby.
+        """
+        file = await self.attachment_repository.get_file(attachment_id)
+        metadata = file["metadata"] if file else {}
+        if metadata.get("user_id") != str(user.id) or metadata.get("item_id") != item_id:
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Attachment not found")
+        return file
+
+    def stream_attachment(self, file: dict, start: int, end: int) -> AsyncIterator[bytes]:
+        """Stream bytes ``[start, end)`` of an attachment's file."""
+        return self.attachment_repository.stream_file(file, start, end)
+
+    async def get_thumbnail(self, item_id: str, attachment_id: str, size: int, user: User) -> Tuple[bytes, str]:
+        """Return a thumbnail of an image attachment, rendering and caching it on first use."""
+        if size not in settings.THUMBNAIL_SIZES:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Thumbnail size must be one of {', '.join(map(str, settings.THUMBNAIL_SIZES))}"
+            )
+        file = await self.get_attachment(item_id, attachment_id, user)
+        if not file["metadata"]["content_type"].startswith("image/"):
+            raise HTTPException(
+                status_code=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE,
+                detail="Attachment is not an image"
+            )
+
+        cached = await self.attachment_repository.get_thumbnail(attachment_id, size)
+        if cached:
+            return await self.attachment_repository.read_thumbnail(cached), cached["metadata"]["content_type"]
+        return await thumbnail_renders.do((attachment_id, size), lambda: self._render_thumbnail(file, size))
+
+    async def _render_thumbnail(self, file: dict, size: int) -> Tuple[bytes, str]:
+        if not thumbnails.available():
+            raise HTTPException(
+                status_code=status.HTTP_501_NOT_IMPLEMENTED,
+                detail="Thumbnails are not available on this server"
+            )
+        data = await self.attachment_repository.read_file(file)
+        try:
+            rendered, content_type = await thumbnails.render_in_pool(data, size)
+        except Exception:
+            raise HTTPException(
+                status_code=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE,
+                detail="Attachment is not a readable image"
+            )
+        await self.attachment_repository.save_thumbnail(str(file["_id"]), size, rendered, content_type)
+        return rendered, content_type
+
+    @flushes_parked_writes
+    async def delete_attachment(self, hobby_id: str, category_name: str, item_id: str,
+                                attachment_id: str, user: User) -> None:
+        """Remove an attachment from an item and delete its file and thumbnails."""
+        if not await self.hobby_repository.remove_attachment(
+                hobby_id, str(user.id), category_name, item_id, attachment_id):
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Attachment not found")
+        await self.write_effects.attachment_removed(str(user.id), hobby_id, category_name, item_id, attachment_id)
+        await self.attachment_repository.delete_files([attachment_id])
+
+    async def _find_item(self, hobby_id: str, category_name: str, item_id: str, user: User) -> SubCategoryItem:
+        hobby = await self.hobby_repository.get_hobby_by_id(hobby_id, str(user.id))
+        if not hobby:
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Hobby not found")
+        category = next((cat for cat in hobby.categories if cat.name == category_name), None)
+        if not category:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail=f"Category '{category_name}' not found"
+            )
+        item = next((item for item in category.items if item.id == item_id), None)
+        if not item:
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Item not found")
+        return item
+
+    def _too_large(self) -> HTTPException:
+        return HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail=f"Attachments are limited to {settings.ATTACHMENT_MAX_BYTES} bytes"
+        )
+
+    def _check_attachment_limit(self, item: SubCategoryItem):
+        if len(item.attachments) >= settings.ATTACHMENT_MAX_PER_ITEM:
+            raise HTTPException(
+                status_code=status.HTTP_409_CONFLICT,
+                detail=f"Items can have at most {settings.ATTACHMENT_MAX_PER_ITEM} attachments"
+            )
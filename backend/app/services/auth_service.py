@@ -66,13 +66,16 @@ class AuthService:
     
     async def get_current_user(self, token: str) -> User:
         """Get current user from JWT token."""
+        return await self.get_user_from_payload(decode_access_token(token))
+
+    async def get_user_from_payload(self, payload: Optional[dict]) -> User:
+        """Get the user a decoded token names (see ``request_token_payload``)."""
         credentials_exception = HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Could not validate credentials",
             headers={"WWW-Authenticate": "Bearer"},
         )
         
-        payload = decode_access_token(token)
         if payload is None:
             raise credentials_exception
         
@@ -82,8 +85,9 @@ class AuthService:
         if username is None or user_id is None:
             raise credentials_exception
         
-        user = await self.user_repository.get_user_by_username(username)
-        if user is None:
+        # By _id from the token, batched with other requests' lookups
+        user = await self.user_repository.load_user_by_id(user_id)
+        if user is None or user.username != username:
             raise credentials_exception
         
         return user
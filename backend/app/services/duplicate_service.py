@@ -0,0 +1,107 @@
+"""Duplicate item service for business logic."""
+from typing import List, Optional
+from fastapi import HTTPException, status
+from ..config import settings
+from ..models.hobby import FieldType, Hobby
+from ..models.user import User
+from ..repositories.hobby_repository import HobbyRepository
+from ..repositories.signature_repository import SignatureRepository
+from ..utils.coalesce import item_writes
+from ..utils.duplicates import (
+    band_candidates, band_keys, digest, item_text, shingles, signature, similarity, text_fields
+)
+from ..utils.tracing import traced_methods
+
+
+@traced_methods
+class DuplicateService:
+    """Service for finding likely duplicate items within a category."""
+
+    def __init__(self, hobby_repository: HobbyRepository, signature_repository: SignatureRepository):
+        self.hobby_repository = hobby_repository
+        self.signature_repository = signature_repository
+
+    async def find_duplicates(self, hobby_id: str, category_name: str, min_similarity: Optional[float],
+                              limit: int, user: User) -> dict:
+        """Pairs of a category's items at least ``min_similarity`` alike, most alike first.
+
+        Only items sharing a band key are compared, so this costs about the
+        number of items rather than of pairs. Signatures that are missing
+        or out of date (items from before the index, changed text fields,
+        failed index writes) are stored again first.
+        """
+        user_id = str(user.id)
+        min_similarity = min_similarity or settings.DUPLICATE_SIMILARITY
+        await item_writes.flush_user(user_id)  # Parked updates count as written
+        hobby_dict = await self.hobby_repository.get_categories_document(hobby_id, user_id)
+        if not hobby_dict:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Hobby not found"
+            )
+        category = next((cat for cat in hobby_dict.get("categories", []) if cat["name"] == category_name), None)
+        if not category:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail=f"Category '{category_name}' not found"
+            )
+
+        fields = text_fields(category)
+        texts = {item["id"]: item_text(item.get("data"), fields) for item in category.get("items", [])}
+        stored = {doc["item_id"]: doc
+                  for doc in await self.signature_repository.get_category(user_id, hobby_id, category_name)}
+        stale = [signature(user_id, hobby_id, category_name, item_id, text) for item_id, text in texts.items()
+                 if item_id not in stored or stored[item_id]["digest"] != digest(text)]
+        removed = [item_id for item_id in stored if item_id not in texts]
+        if stale:
+            await self.signature_repository.upsert_many(stale)
+            stored.update((doc["item_id"], doc) for doc in stale)
+        if removed:
+            await self.signature_repository.delete(user_id, hobby_id, category_name, removed)
+            for item_id in removed:
+                del stored[item_id]
+
+        grams = {}
+        pairs = []
+        for item_id, others in band_candidates(stored.values()).items():
+            for other in others:
+                if item_id < other:  # Each pair once
+                    for key in (item_id, other):
+                        if key not in grams:
+                            grams[key] = shingles(texts[key])
+                    score = similarity(grams[item_id], grams[other])
+                    if score >= min_similarity:
+                        pairs.append({"item_ids": [item_id, other], "similarity": round(score, 3)})
+        pairs.sort(key=lambda pair: (-pair["similarity"], pair["item_ids"]))
+        return {
+            "hobby_id": hobby_id,
+            "category": category_name,
+            "min_similarity": min_similarity,
+            "total": len(pairs),
+            "pairs": pairs[:limit],
+        }
+
+    async def similar_items(self, hobby: Hobby, category_name: str, item_id: str) -> List[str]:
+        """Ids of the items of a category likely to duplicate one of its items, most alike first.
+
+        One indexed lookup of the item's band keys, then an exact check of
+        the few candidates against ``hobby``, which already holds the items.
+        """
+        if not settings.DUPLICATES_ENABLED:
+            return []
+        category = next((cat for cat in hobby.categories if cat.name == category_name), None)
+        by_id = {item.id: item for item in category.items} if category else {}
+        if item_id not in by_id:
+            return []
+        fields = [f.name for f in category.schema.fields if f.field_type == FieldType.TEXT]
+        grams = shingles(item_text(by_id[item_id].data, fields))
+        candidates = await self.signature_repository.find_candidates(
+            str(hobby.user_id), str(hobby.id), category_name, band_keys(grams)
+        )
+        scores = {}
+        for other in candidates:
+            if other != item_id and other in by_id:
+                score = similarity(grams, shingles(item_text(by_id[other].data, fields)))
+                if score >= settings.DUPLICATE_SIMILARITY:
+                    scores[other] = score
+        return sorted(scores, key=lambda other: -scores[other])
@@ -0,0 +1,30 @@
+"""Item history service for business logic."""
+from datetime import datetime
+from typing import List, Optional
+from ..models.history import HistoryEntry
+from ..models.user import User
+from ..repositories.history_repository import HistoryRepository
+from ..utils.history import history_writer
+from ..utils.tracing import traced_methods
+
+
+@traced_methods
+class HistoryService:
+    """Service for reading item change history."""
+    
+    def __init__(self, history_repository: HistoryRepository):
+        self.history_repository = history_repository
+    
+    async def get_item_history(self, item_id: str, user: User, limit: int = 50,
+                               before: Optional[datetime] = None) -> List[HistoryEntry]:
+        """Get an item's changes, newest first, including ones this process has not flushed yet."""
+        user_id = str(user.id)
+        stored = await self.history_repository.get_item_history(user_id, item_id, limit, before)
+        stored_ids = {entry.id for entry in stored}
+        buffered = [HistoryEntry(**entry) for entry in history_writer.buffered(
+            lambda entry: entry["user_id"] == user_id and entry["item_id"] == item_id
+            and (before is None or entry["at"] < before)
+            and entry["_id"] not in stored_ids  # Stored by a flush that has not finished yet
+        )]
+        entries = sorted(stored + buffered, key=lambda entry: entry.at, reverse=True)
+        return entries[:limit]
@@ -1,35 +1,106 @@
 """Hobby service for business logic."""
-from typing import List, Optional
+from functools import partial
+from hashlib import blake2b
+from typing import List, Optional, Set, Tuple
 from fastapi import HTTPException, status
-from ..models.hobby import Hobby, Category, SubCategoryItem, CategorySchema
+from ..models.history import HistoryAction
+from ..models.hobby import Hobby, Category, SubCategoryItem, CategorySchema, FieldType
 from ..models.user import User
+from ..repositories.attachment_repository import AttachmentRepository
 from ..repositories.hobby_repository import HobbyRepository
+from ..repositories.signature_repository import SignatureRepository
 from ..schemas.hobby import (
-    HobbyCreate, HobbyUpdate, CategoryCreate, CategoryUpdate,
-    SubCategoryItemCreate, SubCategoryItemUpdate
+    HobbyCreate, HobbyUpdate, HobbyClone, CategoryCreate, CategoryUpdate,
+    SubCategoryItemCreate, SubCategoryItemUpdate, SubCategoryItemPatch, ItemFieldIncrement,
+    ItemTransfer, ItemTransferResult
 )
+from ..utils.coalesce import flushes_parked_writes, item_writes
+from ..utils.jobs import JobContext, job_handler
+from ..utils.tracing import traced_methods
+from .write_effects import HobbyWriteEffects
 from datetime import datetime
 
+TRANSFER_ATTEMPTS = 3
+TRANSFER_SYNC_LIMIT = 500  # Larger transfers run as a background job
+TRANSFER_JOB_BATCH = 100
 
+
+def copy_item_id(copy_key: str, item_id: str) -> str:
+    """The id of the copy of an item made under ``copy_key``: the same every time, shaped like an ObjectId."""
+    return blake2b(f"{copy_key}:{item_id}".encode(), digest_size=12).hexdigest()
+
+
+@traced_methods
 class HobbyService:
-    """Service for hobby business logic."""
+    """Service for hobby business logic.
     
-    def __init__(self, hobby_repository: HobbyRepository):
+    Writes go through ``hobby_repository``, which only stores; what else a
+    write does (history, activity, duplicate index) is reported to
+    ``write_effects`` once it took effect.
+    """
+    
+    def __init__(self, hobby_repository: HobbyRepository,
+                 attachment_repository: Optional[AttachmentRepository] = None,
+                 write_effects: Optional[HobbyWriteEffects] = None):
         self.hobby_repository = hobby_repository
+        self.attachment_repository = attachment_repository
+        if write_effects is None and hobby_repository is not None:
+            write_effects = HobbyWriteEffects(SignatureRepository(hobby_repository.db))
+        self.write_effects = write_effects
     
+    @flushes_parked_writes
     async def create_hobby(self, hobby_data: HobbyCreate, user: User) -> Hobby:
-        """Create a new hobby for a user."""
+        """Create a new hobby for a user, with any categories and items in one insert."""
+        categories = []
+        for seed in hobby_data.categories:
+            if any(category.name == seed.name for category in categories):
+                raise HTTPException(
+                    status_code=status.HTTP_400_BAD_REQUEST,
+                    detail=f"Category '{seed.name}' already exists"
+                )
+            schema = CategorySchema(category_name=seed.name, fields=seed.fields)
+            for item_data in seed.items:
+                try:
+                    self._validate_item_data(item_data.data, schema)
+                except HTTPException as e:
+                    e.detail = f"Category '{seed.name}': {e.detail}"
+                    raise
+            categories.append(Category(
+                name=seed.name,
+                schema=schema,
+                items=[SubCategoryItem(data=item_data.data) for item_data in seed.items]
+            ))
+        
         hobby = Hobby(
             user_id=str(user.id),
             name=hobby_data.name,
             description=hobby_data.description,
-            categories=[]
+            categories=categories
+        )
+        created = await self.hobby_repository.create_hobby(hobby)
+        await self.write_effects.hobby_created(created)
+        return created
+    
+    @flushes_parked_writes
+    async def clone_hobby(self, hobby_id: str, clone: HobbyClone, user: User) -> Hobby:
+        """Copy a hobby's categories (and optionally items) into a new hobby."""
+        hobby = await self.hobby_repository.clone_hobby(
+            hobby_id, str(user.id), clone.name, clone.description, clone.include_items
         )
-        return await self.hobby_repository.create_hobby(hobby)
+        if not hobby:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Hobby not found"
+            )
+        await self.write_effects.hobby_created(hobby)
+        return hobby
     
     async def get_user_hobbies(self, user: User) -> List[Hobby]:
         """Get all hobbies for a user."""
-        return await self.hobby_repository.get_hobbies_by_user(str(user.id))
+        hobbies = await self.hobby_repository.get_hobbies_by_user(str(user.id))
+        for hobby in hobbies:
+            item_writes.overlay(hobby)
+        return hobbies
     
     async def get_hobby(self, hobby_id: str, user: User) -> Hobby:
         """Get a specific hobby."""
@@ -39,8 +110,10 @@ class HobbyService:
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail="Hobby not found"
             )
+        item_writes.overlay(hobby)
         return hobby
     
+    @flushes_parked_writes
     async def update_hobby(self, hobby_id: str, hobby_data: HobbyUpdate, user: User) -> Hobby:
         """Update a hobby."""
         hobby = await self.hobby_repository.get_hobby_by_id(hobby_id, str(user.id))
@@ -59,6 +132,7 @@ class HobbyService:
         )
         return updated_hobby
     
+    @flushes_parked_writes
     async def delete_hobby(self, hobby_id: str, user: User) -> bool:
         """Delete a hobby."""
         hobby = await self.hobby_repository.get_hobby_by_id(hobby_id, str(user.id))
@@ -68,8 +142,13 @@ class HobbyService:
                 detail="Hobby not found"
             )
         
-        return await self.hobby_repository.delete_hobby(hobby_id, str(user.id))
+        deleted = await self.hobby_repository.delete_hobby(hobby_id, str(user.id))
+        if deleted:
+            await self.write_effects.hobby_deleted(str(user.id), hobby_id)
+        await self._delete_attachment_files([item for category in hobby.categories for item in category.items])
+        return deleted
     
+    @flushes_parked_writes
     async def add_category(self, hobby_id: str, category_data: CategoryCreate, user: User) -> Hobby:
         """Add a category to a hobby."""
         hobby = await self.hobby_repository.get_hobby_by_id(hobby_id, str(user.id))
@@ -101,6 +180,7 @@ class HobbyService:
         
         return await self.hobby_repository.add_category(hobby_id, str(user.id), category)
     
+    @flushes_parked_writes
     async def update_category(self, hobby_id: str, category_name: str, 
                             category_data: CategoryUpdate, user: User) -> Hobby:
         """Update a category in a hobby."""
@@ -133,10 +213,14 @@ class HobbyService:
         
         update_data["updated_at"] = datetime.utcnow()
         
-        return await self.hobby_repository.update_category(
+        updated_hobby = await self.hobby_repository.update_category(
             hobby_id, str(user.id), category_name, update_data
         )
+        if updated_hobby and update_data.get("name", category_name) != category_name:
+            await self.write_effects.category_renamed(str(user.id), hobby_id, category_name, update_data["name"])
+        return updated_hobby
     
+    @flushes_parked_writes
     async def delete_category(self, hobby_id: str, category_name: str, user: User) -> Hobby:
         """Delete a category from a hobby."""
         hobby = await self.hobby_repository.get_hobby_by_id(hobby_id, str(user.id))
@@ -147,15 +231,20 @@ class HobbyService:
             )
         
         # Check if category exists
-        category_exists = any(cat.name == category_name for cat in hobby.categories)
-        if not category_exists:
+        category = next((cat for cat in hobby.categories if cat.name == category_name), None)
+        if not category:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail=f"Category '{category_name}' not found"
             )
         
-        return await self.hobby_repository.delete_category(hobby_id, str(user.id), category_name)
+        updated_hobby = await self.hobby_repository.delete_category(hobby_id, str(user.id), category_name)
+        if updated_hobby:
+            await self.write_effects.category_deleted(str(user.id), hobby_id, category_name)
+        await self._delete_attachment_files(category.items)
+        return updated_hobby
     
+    @flushes_parked_writes
     async def add_item_to_category(self, hobby_id: str, category_name: str, 
                                    item_data: SubCategoryItemCreate, user: User) -> Hobby:
         """Add an item to a category."""
@@ -184,13 +273,24 @@ class HobbyService:
         
         item = SubCategoryItem(data=item_data.data)
         
-        return await self.hobby_repository.add_item_to_category(
+        updated_hobby = await self.hobby_repository.add_item_to_category(
             hobby_id, str(user.id), category_name, item
         )
+        if updated_hobby:
+            await self.write_effects.item_added(str(user.id), hobby_id, category, item)
+        return updated_hobby
     
     async def update_item_in_category(self, hobby_id: str, category_name: str, item_id: str,
-                                     item_data: SubCategoryItemUpdate, user: User) -> Hobby:
-        """Update an item in a category."""
+                                     item_data: SubCategoryItemUpdate, user: User,
+                                     coalesce: bool = False) -> Hobby:
+        """Update an item in a category.
+        
+        With ``coalesce`` the update is validated now but written together
+        with the item's other updates of the next ``ITEM_WRITE_COALESCE_MS``.
+        """
+        coalesce = coalesce and item_writes.enabled
+        if not coalesce:
+            await item_writes.flush_user(str(user.id))
         hobby = await self.hobby_repository.get_hobby_by_id(hobby_id, str(user.id))
         if not hobby:
             raise HTTPException(
@@ -212,8 +312,8 @@ class HobbyService:
             )
         
         # Validate item exists
-        item_exists = any(item.id == item_id for item in category.items)
-        if not item_exists:
+        item = next((item for item in category.items if item.id == item_id), None)
+        if not item:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail="Item not found"
@@ -222,15 +322,299 @@ class HobbyService:
         # Validate item data against schema
         self._validate_item_data(item_data.data, category.schema)
         
-        update_data = {
-            "data": item_data.data,
-            "updated_at": datetime.utcnow()
-        }
+        if coalesce:
+            # Stored data until the flush, so item.data is what the flush replaces
+            item_writes.submit(partial(self.store_parked_item, before=item.data), str(user.id),
+                               hobby_id, category_name, item_id, item_data.data)
+            item_writes.overlay(hobby)
+            return hobby
         
-        return await self.hobby_repository.update_item_in_category(
-            hobby_id, str(user.id), category_name, item_id, update_data
+        return await self.store_parked_item(hobby_id, str(user.id), category_name, item_id, item_data.data,
+                                            before=item.data)
+    
+    async def store_parked_item(self, hobby_id: str, user_id: str, category_name: str, item_id: str,
+                                data: dict, before: Optional[dict] = None) -> Optional[Hobby]:
+        """Replace an item's data (``before`` as last read); return None if the item is gone."""
+        updated_hobby = await self.hobby_repository.update_item_in_category(
+            hobby_id, user_id, category_name, item_id, {"data": data, "updated_at": datetime.utcnow()}
         )
+        if updated_hobby:
+            await self._item_changed(HistoryAction.UPDATED, updated_hobby, category_name, item_id, before,
+                                     data=data)
+        return updated_hobby
+    
+    async def _item_changed(self, action: HistoryAction, hobby: Hobby, category_name: str, item_id: str,
+                            before: Optional[dict], **changes) -> None:
+        """Report a change of an item to ``write_effects``, given the hobby as written."""
+        category = self._find_category(hobby, category_name)
+        item = next(item for item in category.items if item.id == item_id)
+        await self.write_effects.item_changed(action, hobby.user_id, str(hobby.id), category, before, item,
+                                              **changes)
     
+    @flushes_parked_writes
+    async def patch_item_in_category(self, hobby_id: str, category_name: str, item_id: str,
+                                    patch: SubCategoryItemPatch, user: User) -> Hobby:
+        """Change only the item keys in ``patch`` (null removes a key)."""
+        if not patch.data:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="No fields to update"
+            )
+        for key in patch.data:
+            self._check_field_name(key)
+        
+        hobby = await self.hobby_repository.get_hobby_by_id(hobby_id, str(user.id))
+        if not hobby:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Hobby not found"
+            )
+        
+        category = next((cat for cat in hobby.categories if cat.name == category_name), None)
+        if not category:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail=f"Category '{category_name}' not found"
+            )
+        
+        item = next((item for item in category.items if item.id == item_id), None)
+        if not item:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Item not found"
+            )
+        
+        # Validate just the keys being changed
+        set_fields = {key: value for key, value in patch.data.items() if value is not None}
+        unset_fields = [key for key, value in patch.data.items() if value is None]
+        for field_def in category.schema.fields:
+            if field_def.required and field_def.name in unset_fields:
+                raise HTTPException(
+                    status_code=status.HTTP_400_BAD_REQUEST,
+                    detail=f"Required field '{field_def.name}' cannot be removed"
+                )
+            if field_def.name in set_fields and not self._validate_field_type(
+                    set_fields[field_def.name], field_def.field_type):
+                raise HTTPException(
+                    status_code=status.HTTP_400_BAD_REQUEST,
+                    detail=f"Field '{field_def.name}' has invalid type. Expected {field_def.field_type}"
+                )
+        
+        updated_hobby = await self.hobby_repository.patch_item_in_category(
+            hobby_id, str(user.id), category_name, item_id, set_fields, unset_fields
+        )
+        if not updated_hobby:
+            # Deleted between the read and the write
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Item not found"
+            )
+        await self._item_changed(HistoryAction.PATCHED, updated_hobby, category_name, item_id, item.data,
+                                 set=dict(set_fields), unset=list(unset_fields))
+        return updated_hobby
+    
+    @flushes_parked_writes
+    async def increment_item_field(self, hobby_id: str, category_name: str, item_id: str,
+                                   increment: ItemFieldIncrement, user: User) -> float:
+        """Atomically add to a number field of an item and return the new value."""
+        field = increment.field
+        self._check_field_name(field)
+        
+        value = await self.hobby_repository.increment_item_field(
+            hobby_id, str(user.id), category_name, item_id, field,
+            increment.amount, increment.floor, increment.ceiling
+        )
+        if value is None:
+            # Nothing matched: read the hobby once to explain why
+            await self._explain_failed_increment(hobby_id, category_name, item_id, increment, user)
+        await self.write_effects.item_incremented(str(user.id), hobby_id, category_name, item_id, field,
+                                                  increment.amount, value)
+        return value
+    
+    async def _explain_failed_increment(self, hobby_id: str, category_name: str, item_id: str,
+                                        increment: ItemFieldIncrement, user: User) -> None:
+        hobby = await self.hobby_repository.get_hobby_by_id(hobby_id, str(user.id))
+        if not hobby:
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Hobby not found")
+        
+        category = next((cat for cat in hobby.categories if cat.name == category_name), None)
+        if not category:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail=f"Category '{category_name}' not found"
+            )
+        
+        field_def = next((f for f in category.schema.fields if f.name == increment.field), None)
+        if not field_def or field_def.field_type != FieldType.NUMBER:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Field '{increment.field}' is not a number field"
+            )
+        
+        item = next((item for item in category.items if item.id == item_id), None)
+        if not item:
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Item not found")
+        
+        current = item.data.get(increment.field)
+        if isinstance(current, bool) or not isinstance(current, (int, float)):
+            detail = f"Field '{increment.field}' has no number to increment"
+        elif increment.floor is not None and current + increment.amount < increment.floor:
+            detail = f"Field '{increment.field}' would drop below {increment.floor}"
+        elif increment.ceiling is not None and current + increment.amount > increment.ceiling:
+            detail = f"Field '{increment.field}' would exceed {increment.ceiling}"
+        else:
+            detail = "Item changed concurrently, retry"
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=detail)
+    
+    @flushes_parked_writes
+    async def transfer_items(self, hobby_id: str, category_name: str, transfer: ItemTransfer,
+                             user: User, move: bool, copy_key: Optional[str] = None) -> ItemTransferResult:
+        """Move or copy items to a category, re-validating them against its schema.
+
+        Copies get new ids, derived from ``copy_key`` and the source ids when
+        given (see ``copy_item_id``), so that a re-run can tell which copies
+        it already made.
+        """
+        item_ids = list(dict.fromkeys(transfer.item_ids))
+        if len(item_ids) > TRANSFER_SYNC_LIMIT:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Transfers of more than {TRANSFER_SYNC_LIMIT} items must run in the background"
+            )
+        target_hobby_id = transfer.target_hobby_id or hobby_id
+        target_category = transfer.target_category
+        if move and target_hobby_id == hobby_id and target_category == category_name:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Items are already in this category"
+            )
+        
+        for _ in range(TRANSFER_ATTEMPTS):
+            hobby = await self.hobby_repository.get_hobby_by_id(hobby_id, str(user.id))
+            if not hobby:
+                raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Hobby not found")
+            category = self._find_category(hobby, category_name)
+            by_id = {item.id: item for item in category.items}
+            missing = [item_id for item_id in item_ids if item_id not in by_id]
+            if missing:
+                raise HTTPException(
+                    status_code=status.HTTP_404_NOT_FOUND,
+                    detail=f"Items not found: {', '.join(missing)}"
+                )
+            
+            target = hobby
+            if target_hobby_id != hobby_id:
+                target = await self.hobby_repository.get_hobby_by_id(target_hobby_id, str(user.id))
+                if not target:
+                    raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Target hobby not found")
+            destination = self._find_category(target, target_category)
+            
+            items = []
+            for item_id in item_ids:
+                item = by_id[item_id]
+                try:
+                    self._validate_item_data(item.data, destination.schema)
+                except HTTPException as e:
+                    e.detail = f"Item {item_id}: {e.detail}"
+                    raise
+                if move:
+                    items.append(item)
+                elif copy_key is not None:
+                    items.append(SubCategoryItem(id=copy_item_id(copy_key, item_id), data=item.data))
+                else:
+                    items.append(SubCategoryItem(data=item.data))
+            
+            if await self.hobby_repository.transfer_items(
+                    hobby_id, str(user.id), category_name, items, target_hobby_id, target_category, move):
+                await self.write_effects.items_transferred(str(user.id), hobby_id, category_name, items,
+                                                           target_hobby_id, destination, move)
+                return ItemTransferResult(
+                    hobby_id=target_hobby_id,
+                    category=target_category,
+                    item_ids=[item.id for item in items]
+                )
+            # Items or target changed between the read and the write: re-read and re-validate
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="Items changed concurrently, retry"
+        )
+    
+    async def category_stats(self, hobby_id: str, category_name: str, user: User) -> dict:
+        """Summary statistics of every field of a category's items."""
+        columns = await self._category_columns(hobby_id, category_name, user)
+        return {"hobby_id": hobby_id, "category": category_name, "items": len(columns),
+                "fields": columns.stats()}
+    
+    async def query_items(self, hobby_id: str, category_name: str, where: List[str], sort: Optional[str],
+                          descending: bool, limit: int, offset: int,
+                          user: User) -> Tuple[int, List[SubCategoryItem]]:
+        """Filter (``Field:op:value``, all must match) and sort a category's items; return the total and one page."""
+        columns = await self._category_columns(hobby_id, category_name, user)
+        filters = [self._parse_filter(condition, columns) for condition in where]
+        if sort is not None and sort not in columns.columns:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Field '{sort}' not in schema"
+            )
+        positions = columns.order(sort, descending, columns.mask(filters))
+        return len(positions), [SubCategoryItem(**columns.items[i]) for i in positions[offset:offset + limit]]
+    
+    async def _category_columns(self, hobby_id: str, category_name: str, user: User):
+        """Read a category's raw items and encode them column by column."""
+        from ..utils.columnar import ItemColumns  # NumPy is loaded on first use, not at startup
+        
+        user_id = str(user.id)
+        await item_writes.flush_user(user_id)  # Parked updates count as written
+        hobby_dict = await self.hobby_repository.get_categories_document(hobby_id, user_id)
+        if not hobby_dict:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Hobby not found"
+            )
+        category = next((cat for cat in hobby_dict.get("categories", []) if cat["name"] == category_name), None)
+        if not category:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail=f"Category '{category_name}' not found"
+            )
+        return ItemColumns.from_documents(CategorySchema(**category["schema"]), category.get("items", []))
+    
+    def _parse_filter(self, condition: str, columns) -> tuple:
+        """Split ``Field:op:value`` (field names may hold colons) and parse the value for the field's type."""
+        from ..utils.columnar import FILTER_OPS
+        
+        for name in sorted(columns.columns, key=len, reverse=True):
+            if not condition.startswith(f"{name}:"):
+                continue
+            op, _, value = condition[len(name) + 1:].partition(":")
+            if op not in FILTER_OPS:
+                raise HTTPException(
+                    status_code=status.HTTP_400_BAD_REQUEST,
+                    detail=f"Unknown operator '{op}', expected one of {', '.join(FILTER_OPS)}"
+                )
+            column = columns.column(name)
+            try:
+                return name, op, column.parse(value)
+            except ValueError:
+                raise HTTPException(
+                    status_code=status.HTTP_400_BAD_REQUEST,
+                    detail=f"Field '{name}' has invalid value '{value}'. Expected {column.field_type.value}"
+                )
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Filter '{condition}' does not start with a field in the schema"
+        )
+    
+    def _find_category(self, hobby: Hobby, category_name: str) -> Category:
+        category = next((cat for cat in hobby.categories if cat.name == category_name), None)
+        if not category:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail=f"Category '{category_name}' not found"
+            )
+        return category
+    
+    @flushes_parked_writes
     async def delete_item_from_category(self, hobby_id: str, category_name: str, 
                                        item_id: str, user: User) -> Hobby:
         """Delete an item from a category."""
@@ -255,16 +639,39 @@ class HobbyService:
             )
         
         # Validate item exists
-        item_exists = any(item.id == item_id for item in category.items)
-        if not item_exists:
+        item = next((item for item in category.items if item.id == item_id), None)
+        if not item:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail="Item not found"
             )
         
-        return await self.hobby_repository.delete_item_from_category(
+        updated_hobby = await self.hobby_repository.delete_item_from_category(
             hobby_id, str(user.id), category_name, item_id
         )
+        if not updated_hobby:
+            # Deleted or moved between the read and the write
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Item not found"
+            )
+        await self.write_effects.item_deleted(str(user.id), hobby_id, category_name, item)
+        await self._delete_attachment_files([item])
+        return updated_hobby
+    
+    async def _delete_attachment_files(self, items: List[SubCategoryItem]):
+        """Delete the files attached to items that were just deleted."""
+        file_ids = [attachment.id for item in items for attachment in item.attachments]
+        if file_ids and self.attachment_repository:
+            await self.attachment_repository.delete_files(file_ids)
+    
+    def _check_field_name(self, name: str):
+        """Reject item keys that would be read as a path or operator in an update."""
+        if not name or "." in name or name.startswith("$"):
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Invalid field name '{name}'"
+            )
     
     def _validate_item_data(self, data: dict, schema: CategorySchema):
         """Validate item data against category schema."""
@@ -300,3 +707,60 @@ class HobbyService:
             return isinstance(value, str)  # Date should be ISO string
         
         return False
+
+
+@job_handler("transfer_items")
+async def run_transfer_items(ctx: JobContext) -> dict:
+    """Move or copy items in batches of TRANSFER_JOB_BATCH, checkpointing after each.
+
+    Each batch is atomic on its own; a cancelled job keeps the batches
+    already done. A re-run resumes after the last checkpoint. A batch done
+    just before the checkpoint was lost is skipped: a move skips ids that
+    already left the source category, and a copy, whose ids derive from the
+    job id, skips items whose copy is already in the target.
+    """
+    params = ctx.params
+    user = await ctx.container.user_repository.get_user_by_id(ctx.job.user_id)
+    if not user:
+        raise ValueError("User not found")
+    service = ctx.container.hobby_service
+    transfer = ItemTransfer(**params["transfer"])
+    item_ids = list(dict.fromkeys(transfer.item_ids))
+    done = ctx.state.get("done", 0)
+    moved = list(ctx.state.get("item_ids", []))
+    copy_key = None if params["move"] else str(ctx.job.id)
+    
+    while done < len(item_ids):
+        batch = item_ids[done:done + TRANSFER_JOB_BATCH]
+        if ctx.job.attempts > 1:
+            # The previous attempt may have done this batch without saving its checkpoint
+            if params["move"]:
+                present = await _category_item_ids(service, params["hobby_id"], params["category_name"], user)
+                moved += [item_id for item_id in batch if item_id not in present]
+                batch = [item_id for item_id in batch if item_id in present]
+            else:
+                present = await _category_item_ids(service, transfer.target_hobby_id or params["hobby_id"],
+                                                   transfer.target_category, user)
+                moved += [copy_item_id(copy_key, item_id) for item_id in batch
+                          if copy_item_id(copy_key, item_id) in present]
+                batch = [item_id for item_id in batch if copy_item_id(copy_key, item_id) not in present]
+        if batch:
+            result = await service.transfer_items(
+                params["hobby_id"], params["category_name"],
+                transfer.model_copy(update={"item_ids": batch}), user, move=params["move"], copy_key=copy_key
+            )
+            moved += result.item_ids
+        done = min(done + TRANSFER_JOB_BATCH, len(item_ids))
+        await ctx.progress(done / len(item_ids), f"{done} of {len(item_ids)} items",
+                           state={"done": done, "item_ids": moved})
+    
+    return {
+        "hobby_id": transfer.target_hobby_id or params["hobby_id"],
+        "category": transfer.target_category,
+        "item_ids": moved
+    }
+
+
+async def _category_item_ids(service: HobbyService, hobby_id: str, category_name: str, user: User) -> Set[str]:
+    hobby = await service.hobby_repository.get_hobby_by_id(hobby_id, str(user.id))
+    return {item.id for cat in (hobby.categories if hobby else []) if cat.name == category_name for item in cat.items}
@@ -0,0 +1,53 @@
+"""Background job service for business logic."""
+from typing import List
+from fastapi import HTTPException, status
+from ..models.job import Job, JobStatus, FINISHED_STATUSES
+from ..models.user import User
+from ..repositories.job_repository import JobRepository
+from ..utils.jobs import JOB_HANDLERS, job_queue
+from ..utils.tracing import traced_methods
+
+
+@traced_methods
+class JobService:
+    """Service for submitting and following background jobs."""
+    
+    def __init__(self, job_repository: JobRepository):
+        self.job_repository = job_repository
+    
+    async def submit_job(self, kind: str, params: dict, user: User) -> Job:
+        """Queue a job of a registered kind for the user."""
+        if kind not in JOB_HANDLERS:
+            raise ValueError(f"No handler registered for job kind '{kind}'")
+        job = await self.job_repository.create_job(Job(user_id=str(user.id), kind=kind, params=params))
+        job_queue.notify()
+        return job
+    
+    async def get_job(self, job_id: str, user: User) -> Job:
+        """Get a job of the user."""
+        job = await self.job_repository.get_job(job_id, str(user.id))
+        if not job:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Job not found"
+            )
+        return job
+    
+    async def get_user_jobs(self, user: User) -> List[Job]:
+        """Get the user's most recent jobs, newest first."""
+        return await self.job_repository.get_jobs_by_user(str(user.id))
+    
+    async def cancel_job(self, job_id: str, user: User) -> Job:
+        """Cancel a queued job, or ask a running one to stop at its next progress report."""
+        job = await self.job_repository.request_cancel(job_id, str(user.id))
+        if not job:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Job not found"
+            )
+        if job.status in FINISHED_STATUSES and job.status != JobStatus.CANCELLED:
+            raise HTTPException(
+                status_code=status.HTTP_409_CONFLICT,
+                detail=f"Job already {job.status.value}"
+            )
+        return job
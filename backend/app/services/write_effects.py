@@ -0,0 +1,143 @@
+"""What a write to a user's hobbies does besides storing it.
+
+``HobbyRepository`` only stores. Once one of its writes has taken effect,
+``HobbyService`` and ``AttachmentService`` report it here, and this hook
+appends the item history (written behind, see ``app/utils/history.py``),
+counts the category activity (``app/utils/activity.py``) and keeps the
+duplicate index current (``app/utils/duplicates.py``). Each of those logs
+its own failures, so a failed side effect never fails the write.
+"""
+from datetime import datetime
+from typing import Dict, List, Optional
+
+from bson import ObjectId
+
+from ..config import settings
+from ..models.history import HistoryAction
+from ..models.hobby import Attachment, Category, Hobby, SubCategoryItem
+from ..repositories.signature_repository import SignatureRepository
+from ..utils.activity import activity_counter, number_changes
+from ..utils.duplicates import DuplicateIndex
+from ..utils.history import history_writer
+from ..utils.tracing import traced_methods
+
+
+def _schema_document(category: Category) -> dict:
+    """The name and schema of a category, as the duplicate index reads them."""
+    return {"name": category.name, "schema": category.schema.model_dump()}
+
+
+def _item_documents(items: List[SubCategoryItem]) -> List[dict]:
+    return [{"id": item.id, "data": item.data} for item in items]
+
+
+def _added_changes(items: List[SubCategoryItem]) -> Dict[str, float]:
+    """The number field changes of adding ``items``."""
+    changes: Dict[str, float] = {}
+    for item in items:
+        for field, change in number_changes(None, item.data).items():
+            changes[field] = changes.get(field, 0) + change
+    return changes
+
+
+@traced_methods
+class HobbyWriteEffects:
+    """Item history, category activity and duplicate index upkeep after hobby writes."""
+
+    def __init__(self, signature_repository: SignatureRepository):
+        self.duplicate_index = DuplicateIndex(signature_repository)
+
+    async def _record(self, action: HistoryAction, user_id: str, hobby_id: str, category_name: str,
+                      item_id: str, **changes) -> None:
+        """Append an item history entry (written behind, in batches)."""
+        if settings.HISTORY_ENABLED:
+            await history_writer.record({
+                "_id": ObjectId(),  # Set now so buffered entries already have their id
+                "user_id": user_id,
+                "hobby_id": hobby_id,
+                "category": category_name,
+                "item_id": item_id,
+                "action": action.value,
+                "changes": changes,
+                "at": datetime.utcnow()
+            })
+
+    async def hobby_created(self, hobby: Hobby) -> None:
+        """Count the items a new (or cloned) hobby starts with as added, and index them."""
+        hobby_id = str(hobby.id)
+        for category in hobby.categories:
+            if category.items:
+                await self.duplicate_index.index(hobby.user_id, hobby_id, _schema_document(category),
+                                                 _item_documents(category.items))
+                await activity_counter.record(hobby.user_id, hobby_id, category.name, added=len(category.items),
+                                              changes=_added_changes(category.items))
+
+    async def hobby_deleted(self, user_id: str, hobby_id: str) -> None:
+        await activity_counter.forget(user_id, hobby_id)
+        await self.duplicate_index.forget(user_id, hobby_id)
+
+    async def category_renamed(self, user_id: str, hobby_id: str, old: str, new: str) -> None:
+        await activity_counter.rename(user_id, hobby_id, old, new)
+        await self.duplicate_index.rename(user_id, hobby_id, old, new)
+
+    async def category_deleted(self, user_id: str, hobby_id: str, category_name: str) -> None:
+        await activity_counter.forget(user_id, hobby_id, category_name)
+        await self.duplicate_index.forget(user_id, hobby_id, category_name)
+
+    async def item_added(self, user_id: str, hobby_id: str, category: Category, item: SubCategoryItem) -> None:
+        await self._record(HistoryAction.CREATED, user_id, hobby_id, category.name, item.id, data=item.data)
+        await activity_counter.record(user_id, hobby_id, category.name, added=1,
+                                      changes=number_changes(None, item.data))
+        await self.duplicate_index.index(user_id, hobby_id, _schema_document(category), _item_documents([item]))
+
+    async def item_changed(self, action: HistoryAction, user_id: str, hobby_id: str, category: Category,
+                           before: Optional[dict], item: SubCategoryItem, **changes) -> None:
+        """An item's data went from ``before`` to ``item.data`` (a replacement or a patch)."""
+        await activity_counter.record(user_id, hobby_id, category.name, updated=1,
+                                      changes=number_changes(before, item.data))
+        await self.duplicate_index.index(user_id, hobby_id, _schema_document(category), _item_documents([item]))
+        await self._record(action, user_id, hobby_id, category.name, item.id, **changes)
+
+    async def item_incremented(self, user_id: str, hobby_id: str, category_name: str, item_id: str,
+                               field: str, amount: float, value: float) -> None:
+        await self._record(HistoryAction.INCREMENTED, user_id, hobby_id, category_name, item_id,
+                           field=field, amount=amount, value=value)
+        await activity_counter.record(user_id, hobby_id, category_name, updated=1,
+                                      changes=number_changes(None, {field: amount}))
+
+    async def items_transferred(self, user_id: str, hobby_id: str, category_name: str,
+                                items: List[SubCategoryItem], target_hobby_id: str, target: Category,
+                                move: bool) -> None:
+        """``items`` (as stored in ``target``) were moved or copied there from ``category_name``."""
+        changes = _added_changes(items)
+        await activity_counter.record(user_id, target_hobby_id, target.name, added=len(items), changes=changes)
+        if move:
+            await activity_counter.record(user_id, hobby_id, category_name, removed=len(items),
+                                          changes={field: -change for field, change in changes.items()})
+        # Indexed by the target's text fields, which may differ from the source's
+        await self.duplicate_index.index(user_id, target_hobby_id, _schema_document(target), _item_documents(items))
+        if move:
+            await self.duplicate_index.forget(user_id, hobby_id, category_name, [item.id for item in items])
+        for item in items:
+            if move:
+                await self._record(HistoryAction.MOVED, user_id, target_hobby_id, target.name, item.id,
+                                   from_hobby_id=hobby_id, from_category=category_name)
+            else:
+                await self._record(HistoryAction.COPIED, user_id, target_hobby_id, target.name, item.id,
+                                   from_hobby_id=hobby_id, from_category=category_name, data=item.data)
+
+    async def item_deleted(self, user_id: str, hobby_id: str, category_name: str, item: SubCategoryItem) -> None:
+        await activity_counter.record(user_id, hobby_id, category_name, removed=1,
+                                      changes=number_changes(item.data, None))
+        await self.duplicate_index.forget(user_id, hobby_id, category_name, [item.id])
+        await self._record(HistoryAction.DELETED, user_id, hobby_id, category_name, item.id)
+
+    async def attachment_added(self, user_id: str, hobby_id: str, category_name: str, item_id: str,
+                               attachment: Attachment) -> None:
+        await self._record(HistoryAction.ATTACHMENT_ADDED, user_id, hobby_id, category_name, item_id,
+                           attachment_id=attachment.id, filename=attachment.filename)
+
+    async def attachment_removed(self, user_id: str, hobby_id: str, category_name: str, item_id: str,
+                                 attachment_id: str) -> None:
+        await self._record(HistoryAction.ATTACHMENT_REMOVED, user_id, hobby_id, category_name, item_id,
+                           attachment_id=attachment_id)
@@ -0,0 +1,33 @@
+# Pluggable storage engines
+"""Storage engines behind the repositories.
+
+``mongo`` (Motor, the default), ``memory`` (tests/benchmarks) and ``sqlite``
+(small single-node installs) all expose the same Motor-style database API.
+"""
+from typing import Any
+
+from .base import Collection, Database, StorageEngine
+
+ENGINES = ("mongo", "memory", "sqlite")
+
+
+def create_engine(name: str, **options: Any) -> StorageEngine:
+    """Build an engine by name.
+
+    Options: ``url``/``database_name`` for mongo, ``database_name`` for
+    memory, ``path``/``database_name`` for sqlite. Engine modules are
+    imported on demand so unused backends cost nothing.
+    """
+    if name == "mongo":
+        from .mongo import MongoEngine
+        return MongoEngine(options["url"], options["database_name"], **options.get("client_options", {}))
+    if name == "memory":
+        from .memory import MemoryEngine
+        return MemoryEngine(options.get("database_name", "hobbees"))
+    if name == "sqlite":
+        from .sqlite import SQLiteEngine
+        return SQLiteEngine(options.get("path", "hobbees.db"), options.get("database_name", "hobbees"))
+    raise ValueError(f"Unknown storage engine '{name}'. Choose from: {', '.join(ENGINES)}")
+
+
+__all__ = ["Collection", "Database", "StorageEngine", "ENGINES", "create_engine"]
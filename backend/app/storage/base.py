@@ -0,0 +1,100 @@
+"""Storage engine interface.
+
+Repositories talk to a *database* object that exposes collections as
+attributes (``db.hobbies``) and a *collection* object that implements the
+subset of the Motor collection API listed in :class:`Collection`. The Mongo
+engine hands out real Motor objects; the other engines implement the same
+methods over their own storage, so repository code is engine-agnostic.
+"""
+from abc import ABC, abstractmethod
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Dict, List, Optional, Protocol
+
+
+class Cursor(Protocol):
+    """Async cursor returned by ``Collection.find``."""
+
+    def sort(self, key: Any, direction: Any = None) -> "Cursor": ...
+    def skip(self, count: int) -> "Cursor": ...
+    def limit(self, count: int) -> "Cursor": ...
+    def __aiter__(self): ...
+    async def to_list(self, length: Optional[int] = None) -> List[dict]: ...
+
+
+class Collection(Protocol):
+    """The Motor collection methods every engine supports.
+
+    Filters and update documents use MongoDB syntax. Results are the
+    ``pymongo.results`` classes, and unique index violations raise
+    ``pymongo.errors.DuplicateKeyError``, regardless of engine.
+    """
+
+    name: str
+
+    def find(self, filter: Optional[dict] = None, projection: Optional[Any] = None, **kwargs) -> Cursor: ...
+    async def find_one(self, filter: Optional[dict] = None, projection: Optional[Any] = None, **kwargs) -> Optional[dict]: ...
+    async def count_documents(self, filter: Optional[dict] = None, **kwargs) -> int: ...
+    async def insert_one(self, document: dict, **kwargs) -> Any: ...
+    async def insert_many(self, documents: List[dict], ordered: bool = True, **kwargs) -> Any: ...
+    async def update_one(self, filter: dict, update: dict, upsert: bool = False, **kwargs) -> Any: ...
+    async def update_many(self, filter: dict, update: dict, upsert: bool = False, **kwargs) -> Any: ...
+    async def find_one_and_update(self, filter: dict, update: dict, projection: Optional[Any] = None,
+                                  **kwargs) -> Optional[dict]: ...
+    async def find_one_and_delete(self, filter: dict, projection: Optional[Any] = None,
+                                  **kwargs) -> Optional[dict]: ...
+    async def delete_one(self, filter: dict, **kwargs) -> Any: ...
+    async def delete_many(self, filter: dict, **kwargs) -> Any: ...
+    async def bulk_write(self, requests: List[Any], ordered: bool = True, **kwargs) -> Any: ...
+    async def create_index(self, keys: Any, **kwargs) -> str: ...
+    async def index_information(self) -> Dict[str, dict]: ...
+    async def drop(self) -> None: ...
+
+
+class Database(Protocol):
+    """A named set of collections, addressable as attributes or items."""
+
+    name: str
+
+    def __getattr__(self, name: str) -> Collection: ...
+    def __getitem__(self, name: str) -> Collection: ...
+    async def list_collection_names(self) -> List[str]: ...
+    async def drop_collection(self, name: str) -> None: ...
+
+
+class StorageEngine(ABC):
+    """Owns the connection/resources behind a :class:`Database`."""
+
+    name: str = "abstract"
+
+    @property
+    @abstractmethod
+    def database(self) -> Database:
+        """The application database. Only valid between ``connect`` and ``close``."""
+
+    @abstractmethod
+    async def connect(self) -> None:
+        """Open connections/files."""
+
+    @abstractmethod
+    async def close(self) -> None:
+        """Release connections/files."""
+
+    @abstractmethod
+    async def ping(self) -> bool:
+        """Return True if the backing store is reachable."""
+
+    @asynccontextmanager
+    async def transaction(self) -> AsyncIterator[Any]:
+        """Run the block in a multi-document transaction.
+
+        Yields a session to pass as ``session=`` to collection methods; the
+        transaction commits when the block exits and aborts if it raises.
+        Yields None when the engine (or deployment) has no transactions, in
+        which case callers must make their writes safe on their own.
+        """
+        yield None
+
+    async def drop_database(self) -> None:
+        """Remove every collection (used by tests)."""
+        for name in await self.database.list_collection_names():
+            await self.database.drop_collection(name)
@@ -0,0 +1,613 @@
+"""MongoDB query/update language evaluated over plain Python documents.
+
+Shared by the storage engines that do not talk to a MongoDB server. Covers
+the operators the repositories use: equality and comparison queries over
+dotted paths (descending into arrays), ``$set``/``$unset``/``$inc``/``$push``/
+``$pull`` and friends with positional ``$`` and filtered ``$[ident]`` paths,
+inclusion/exclusion projections and multi-key sorts.
+"""
+from datetime import datetime
+from itertools import product
+from typing import Any, Callable, Dict, Iterable, List, Optional, Set, Tuple
+import re
+
+from bson import ObjectId
+from pymongo import DeleteMany, DeleteOne, InsertOne, UpdateMany, UpdateOne
+from pymongo.errors import WriteError
+from pymongo.results import BulkWriteResult
+
+
+_MISSING = object()
+
+
+def clone(value: Any) -> Any:
+    """Copy a document the way a BSON round trip would."""
+    if isinstance(value, dict):
+        return {k: clone(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [clone(v) for v in value]
+    return value
+
+
+# ---------------------------------------------------------------------------
+# Query matching
+# ---------------------------------------------------------------------------
+
+def lookup(doc: Any, path: str) -> List[Any]:
+    """Return every value reachable at a dotted path, descending into arrays."""
+    values = [doc]
+    for part in path.split("."):
+        found = []
+        for value in values:
+            if isinstance(value, dict):
+                if part in value:
+                    found.append(value[part])
+            elif isinstance(value, list):
+                if part.isdigit():
+                    index = int(part)
+                    if index < len(value):
+                        found.append(value[index])
+                for element in value:
+                    if isinstance(element, dict) and part in element:
+                        found.append(element[part])
+        values = found
+    return values
+
+
+def expand(values: List[Any]) -> Iterable[Any]:
+    for value in values:
+        yield value
+        if isinstance(value, list):
+            yield from value
+
+
+def _compare(values: List[Any], predicate) -> bool:
+    for value in expand(values):
+        try:
+            if predicate(value):
+                return True
+        except TypeError:
+            continue
+    return False
+
+
+def is_operator_dict(value: Any) -> bool:
+    return isinstance(value, dict) and bool(value) and all(k.startswith("$") for k in value)
+
+
+def _equals(values: List[Any], target: Any) -> bool:
+    if target is None and not values:
+        return True
+    return any(value == target for value in expand(values))
+
+
+# $type aliases -> predicate on a single (non-array) value
+_BSON_TYPES = {
+    "double": lambda v: isinstance(v, float),
+    "string": lambda v: isinstance(v, str),
+    "object": lambda v: isinstance(v, dict),
+    "array": lambda v: isinstance(v, list),
+    "objectId": lambda v: isinstance(v, ObjectId),
+    "bool": lambda v: isinstance(v, bool),
+    "date": lambda v: isinstance(v, datetime),
+    "null": lambda v: v is None,
+    "int": lambda v: isinstance(v, int) and not isinstance(v, bool),
+    "long": lambda v: isinstance(v, int) and not isinstance(v, bool),
+    "number": lambda v: isinstance(v, (int, float)) and not isinstance(v, bool),
+}
+
+
+def _has_type(values: List[Any], aliases: Any) -> bool:
+    aliases = aliases if isinstance(aliases, list) else [aliases]
+    for alias in aliases:
+        predicate = _BSON_TYPES.get(alias)
+        if predicate is None:
+            raise WriteError(f"Unsupported $type {alias!r}")
+        candidates = values if alias == "array" else expand(values)
+        if any(predicate(v) for v in candidates):
+            return True
+    return False
+
+
+def _apply_operator(values: List[Any], op: str, arg: Any) -> bool:
+    if op == "$eq":
+        return _equals(values, arg)
+    if op == "$ne":
+        return not _equals(values, arg)
+    if op == "$gt":
+        return _compare(values, lambda v: v is not None and v > arg)
+    if op == "$gte":
+        return _compare(values, lambda v: v is not None and v >= arg)
+    if op == "$lt":
+        return _compare(values, lambda v: v is not None and v < arg)
+    if op == "$lte":
+        return _compare(values, lambda v: v is not None and v <= arg)
+    if op == "$in":
+        return any(_equals(values, candidate) for candidate in arg)
+    if op == "$all":
+        return bool(arg) and all(
+            _apply_operator(values, "$elemMatch", candidate["$elemMatch"])
+            if isinstance(candidate, dict) and set(candidate) == {"$elemMatch"} else _equals(values, candidate)
+            for candidate in arg
+        )
+    if op == "$nin":
+        return not any(_equals(values, candidate) for candidate in arg)
+    if op == "$exists":
+        return bool(values) == bool(arg)
+    if op == "$type":
+        return _has_type(values, arg)
+    if op == "$size":
+        return any(isinstance(v, list) and len(v) == arg for v in values)
+    if op == "$regex":
+        pattern = arg if hasattr(arg, "search") else re.compile(arg)
+        return _compare(values, lambda v: isinstance(v, str) and pattern.search(v) is not None)
+    if op == "$not":
+        return not match_condition(values, arg)
+    if op == "$elemMatch":
+        for value in values:
+            if not isinstance(value, list):
+                continue
+            for element in value:
+                if is_operator_dict(arg):
+                    if match_condition([element], arg):
+                        return True
+                elif isinstance(element, dict) and matches(element, arg):
+                    return True
+        return False
+    raise WriteError(f"Unsupported query operator {op}")
+
+
+def match_condition(values: List[Any], condition: Any) -> bool:
+    """Match the values found at a path against a query condition."""
+    if is_operator_dict(condition):
+        if "$regex" in condition and "$options" in condition:
+            flags = re.IGNORECASE if "i" in condition["$options"] else 0
+            condition = dict(condition)
+            condition["$regex"] = re.compile(condition["$regex"], flags)
+            del condition["$options"]
+        return all(_apply_operator(values, op, arg) for op, arg in condition.items())
+    return _equals(values, condition)
+
+
+def matches(doc: Dict[str, Any], query: Optional[Dict[str, Any]]) -> bool:
+    """Return True if a document satisfies a MongoDB query document."""
+    if not query:
+        return True
+    for key, condition in query.items():
+        if key == "$and":
+            if not all(matches(doc, sub) for sub in condition):
+                return False
+        elif key == "$or":
+            if not any(matches(doc, sub) for sub in condition):
+                return False
+        elif key == "$nor":
+            if any(matches(doc, sub) for sub in condition):
+                return False
+        elif not match_condition(lookup(doc, key), condition):
+            return False
+    return True
+
+
+# ---------------------------------------------------------------------------
+# Update application
+# ---------------------------------------------------------------------------
+
+class _UpdateContext:
+    """Resolves positional (``$``) and filtered (``$[ident]``) path segments."""
+
+    def __init__(self, query: Optional[dict], array_filters: Optional[List[dict]]):
+        self.query = query or {}
+        # Like MongoDB, ``$`` is matched once, before the update changes what the query looked at
+        self.positions: Dict[str, int] = {}
+        self.filters: Dict[str, List[tuple]] = {}
+        for array_filter in array_filters or []:
+            for key, condition in array_filter.items():
+                ident, _, rest = key.partition(".")
+                self.filters.setdefault(ident, []).append((rest or None, condition))
+
+    def positional_index(self, array: list, query_path: List[str]) -> int:
+        prefix = ".".join(query_path)
+        if prefix not in self.positions:
+            self.positions[prefix] = self._match_position(array, prefix)
+        return self.positions[prefix]
+
+    def _match_position(self, array: list, prefix: str) -> int:
+        exact = self.query.get(prefix, _MISSING)
+        nested = {
+            key[len(prefix) + 1:]: condition
+            for key, condition in self.query.items()
+            if key.startswith(prefix + ".")
+        }
+        for index, element in enumerate(array):
+            if exact is not _MISSING and not match_condition([element], exact):
+                continue
+            if nested and not (isinstance(element, dict) and matches(element, nested)):
+                continue
+            if exact is _MISSING and not nested:
+                break
+            return index
+        raise WriteError("The positional operator did not find the match needed from the query.")
+
+    def filtered_indexes(self, array: list, ident: str) -> List[int]:
+        if ident not in self.filters:
+            raise WriteError(f"No array filter found for identifier '{ident}'")
+        indexes = []
+        for index, element in enumerate(array):
+            ok = True
+            for rest, condition in self.filters[ident]:
+                if rest is None:
+                    ok = match_condition([element], condition)
+                else:
+                    ok = isinstance(element, dict) and match_condition(lookup(element, rest), condition)
+                if not ok:
+                    break
+            if ok:
+                indexes.append(index)
+        return indexes
+
+
+def _resolve(node: Any, parts: List[str], position: int, query_path: List[str],
+             ctx: _UpdateContext, create: bool) -> List[tuple]:
+    part = parts[position]
+    last = position == len(parts) - 1
+
+    if isinstance(node, list):
+        if part == "$":
+            indexes = [ctx.positional_index(node, query_path)]
+        elif part == "$[]":
+            indexes = list(range(len(node)))
+        elif part.startswith("$[") and part.endswith("]"):
+            indexes = ctx.filtered_indexes(node, part[2:-1])
+        elif part.isdigit():
+            index = int(part)
+            if index >= len(node):
+                if not create:
+                    return []
+                node.extend([None] * (index + 1 - len(node)))
+            indexes = [index]
+        else:
+            raise WriteError(f"Cannot create field '{part}' in an array")
+        if last:
+            return [(node, index) for index in indexes]
+        targets = []
+        for index in indexes:
+            if node[index] is None and create:
+                node[index] = {}
+            targets.extend(_resolve(node[index], parts, position + 1, query_path, ctx, create))
+        return targets
+
+    if isinstance(node, dict):
+        if last:
+            return [(node, part)]
+        child = node.get(part, _MISSING)
+        if child is _MISSING or child is None:
+            if not create:
+                return []
+            child = node[part] = {}
+        return _resolve(child, parts, position + 1, query_path + [part], ctx, create)
+
+    return []
+
+
+def _get(parent: Any, key: Any, default: Any = _MISSING) -> Any:
+    if isinstance(parent, list):
+        return parent[key] if key < len(parent) else default
+    return parent.get(key, default)
+
+
+def _pull_matches(element: Any, condition: Any) -> bool:
+    if is_operator_dict(condition):
+        return match_condition([element], condition)
+    if isinstance(condition, dict):
+        return isinstance(element, dict) and matches(element, condition)
+    return element == condition
+
+
+def apply_update(doc: Dict[str, Any], update: Dict[str, Any], query: Optional[dict] = None,
+                 array_filters: Optional[List[dict]] = None, is_insert: bool = False) -> None:
+    """Apply a MongoDB update document to ``doc`` in place."""
+    if not update or not all(op.startswith("$") for op in update):
+        raise WriteError("Update document requires atomic operators")
+    ctx = _UpdateContext(query, array_filters)
+
+    for op, fields in update.items():
+        if op == "$setOnInsert" and not is_insert:
+            continue
+        creating = op in ("$set", "$setOnInsert", "$inc", "$push", "$addToSet",
+                          "$min", "$max", "$mul", "$currentDate")
+        for path, value in fields.items():
+            for parent, key in _resolve(doc, path.split("."), 0, [], ctx, creating):
+                current = _get(parent, key)
+                if op in ("$set", "$setOnInsert"):
+                    parent[key] = clone(value)
+                elif op == "$unset":
+                    if isinstance(parent, list):
+                        parent[key] = None
+                    elif key in parent:
+                        del parent[key]
+                elif op == "$inc":
+                    parent[key] = (0 if current is _MISSING else current) + value
+                elif op == "$mul":
+                    parent[key] = (0 if current is _MISSING else current) * value
+                elif op == "$min":
+                    if current is _MISSING or value < current:
+                        parent[key] = clone(value)
+                elif op == "$max":
+                    if current is _MISSING or value > current:
+                        parent[key] = clone(value)
+                elif op == "$currentDate":
+                    parent[key] = datetime.utcnow()
+                elif op in ("$push", "$addToSet"):
+                    if current is _MISSING:
+                        current = parent[key] = []
+                    if not isinstance(current, list):
+                        raise WriteError(f"The field '{path}' must be an array")
+                    values = value["$each"] if isinstance(value, dict) and "$each" in value else [value]
+                    for item in values:
+                        if op == "$addToSet" and item in current:
+                            continue
+                        current.append(clone(item))
+                elif op == "$pull":
+                    if isinstance(current, list):
+                        current[:] = [e for e in current if not _pull_matches(e, value)]
+                elif op == "$pop":
+                    if isinstance(current, list) and current:
+                        current.pop(0 if value < 0 else -1)
+                else:
+                    raise WriteError(f"Unsupported update operator {op}")
+
+
+# ---------------------------------------------------------------------------
+# Projection and sorting
+# ---------------------------------------------------------------------------
+
+def _project_path(source: Any, parts: List[str]) -> Any:
+    if isinstance(source, list):
+        # Like MongoDB, sub-documents without the field stay as {} so paths merge by position
+        projected = [_project_path(e, parts) for e in source if isinstance(e, dict)]
+        return [{} if p is _MISSING else p for p in projected]
+    if not isinstance(source, dict) or parts[0] not in source:
+        return _MISSING
+    if len(parts) == 1:
+        return {parts[0]: clone(source[parts[0]])}
+    inner = _project_path(source[parts[0]], parts[1:])
+    if inner is _MISSING:
+        return _MISSING
+    return {parts[0]: inner}
+
+
+def _exclude_path(node: Any, parts: List[str]) -> None:
+    if isinstance(node, list):
+        # Like MongoDB, an excluded path applies to every sub-document of an array
+        for element in node:
+            _exclude_path(element, parts)
+    elif isinstance(node, dict):
+        if len(parts) == 1:
+            node.pop(parts[0], None)
+        elif parts[0] in node:
+            _exclude_path(node[parts[0]], parts[1:])
+
+
+def _merge(target: dict, addition: dict) -> None:
+    for key, value in addition.items():
+        if key in target and isinstance(target[key], dict) and isinstance(value, dict):
+            _merge(target[key], value)
+        elif key in target and isinstance(target[key], list) and isinstance(value, list):
+            for index, element in enumerate(value):
+                if index < len(target[key]) and isinstance(element, dict):
+                    _merge(target[key][index], element)
+        else:
+            target[key] = value
+
+
+def project(doc: Dict[str, Any], projection: Optional[Any]) -> Dict[str, Any]:
+    """Apply an inclusion or exclusion projection to a (cloned) document."""
+    if not projection:
+        return clone(doc)
+    if isinstance(projection, (list, tuple)):
+        projection = {field: 1 for field in projection}
+    include_id = bool(projection.get("_id", 1))
+    fields = {k: v for k, v in projection.items() if k != "_id"}
+
+    if fields and all(fields.values()):
+        result: Dict[str, Any] = {}
+        if include_id and "_id" in doc:
+            result["_id"] = doc["_id"]
+        for path in fields:
+            projected = _project_path(doc, path.split("."))
+            if projected is not _MISSING:
+                _merge(result, projected)
+        return result
+
+    result = clone(doc)
+    if not include_id:
+        result.pop("_id", None)
+    for path in fields:
+        _exclude_path(result, path.split("."))
+    return result
+
+
+def _sort_key(value: Any) -> tuple:
+    if value is None or value is _MISSING:
+        return (0, 0)
+    if isinstance(value, bool):
+        return (4, value)
+    if isinstance(value, (int, float)):
+        return (1, value)
+    if isinstance(value, str):
+        return (2, value)
+    if isinstance(value, ObjectId):
+        return (3, str(value))
+    if isinstance(value, datetime):
+        return (5, value)
+    return (6, str(value))
+
+
+def sort_documents(docs: List[dict], spec: List[tuple]) -> List[dict]:
+    """Sort documents by a list of ``(path, direction)`` pairs."""
+    for path, direction in reversed(spec):
+        docs.sort(
+            key=lambda d: _sort_key((lookup(d, path) or [None])[0]),
+            reverse=direction < 0,
+        )
+    return docs
+
+
+def normalize_keys(keys: Any, direction: Any = None) -> List[tuple]:
+    """Normalise the key argument accepted by ``sort``/``create_index``."""
+    if isinstance(keys, str):
+        return [(keys, 1 if direction is None else direction)]
+    return [(k, d) for k, d in keys]
+
+
+def upsert_seed(query: Optional[dict]) -> Dict[str, Any]:
+    """The document an upsert starts from: the query's plain equality fields."""
+    return {
+        key: clone(value) for key, value in (query or {}).items()
+        if not key.startswith("$") and "." not in key and not is_operator_dict(value)
+    }
+
+
+# ---------------------------------------------------------------------------
+# Bulk writes
+# ---------------------------------------------------------------------------
+
+def apply_bulk_write(requests: List[Any], insert: Callable[[dict], Any],
+               update: Callable[[dict, dict, bool, bool, Optional[List[dict]]], Tuple[int, Any]],
+               delete: Callable[[dict, bool], int]) -> BulkWriteResult:
+    """Apply pymongo ``InsertOne``/``UpdateOne``/``UpdateMany``/``DeleteOne``/``DeleteMany`` requests in order.
+
+    The engine supplies the writes: ``insert(doc)``, ``update(filter,
+    update, many, upsert, array_filters)`` returning the number of matched
+    documents and the upserted id (or None), and ``delete(filter, many)``
+    returning the number removed.
+    """
+    raw = {"nInserted": 0, "nUpserted": 0, "nMatched": 0, "nModified": 0, "nRemoved": 0, "upserted": []}
+    for index, request in enumerate(requests):
+        if isinstance(request, InsertOne):
+            insert(request._doc)
+            raw["nInserted"] += 1
+        elif isinstance(request, (UpdateOne, UpdateMany)):
+            matched, upserted = update(request._filter, request._doc, isinstance(request, UpdateMany),
+                                       bool(request._upsert), request._array_filters)
+            raw["nMatched"] += matched
+            raw["nModified"] += matched
+            if upserted is not None:
+                raw["nUpserted"] += 1
+                raw["upserted"].append({"index": index, "_id": upserted})
+        elif isinstance(request, (DeleteOne, DeleteMany)):
+            raw["nRemoved"] += delete(request._filter, isinstance(request, DeleteMany))
+        else:
+            raise TypeError(f"Unsupported bulk write request: {type(request).__name__}")
+    return BulkWriteResult(raw, True)
+
+
+# ---------------------------------------------------------------------------
+# Index keys
+# ---------------------------------------------------------------------------
+
+def hashable(value: Any) -> Any:
+    """Hashable index key for a value; bools stay distinct from 0/1, 1 == 1.0."""
+    if isinstance(value, bool):
+        return ("bool", value)
+    if isinstance(value, float) and value.is_integer():
+        return int(value)
+    if isinstance(value, (dict, list)):
+        return ("repr", repr(value))
+    return value
+
+
+def index_keys(fields: List[str], doc: dict) -> Set[tuple]:
+    """Every key tuple a document contributes to an index on ``fields``.
+
+    Array values are multi-key: each element is indexed as well as the
+    whole array. Missing fields are indexed as ``None``.
+    """
+    per_field = []
+    for field in fields:
+        values = set()
+        found = lookup(doc, field)
+        if not found:
+            values.add(None)
+        for value in found:
+            values.add(hashable(value))
+            if isinstance(value, list):
+                values.update(hashable(element) for element in value)
+        per_field.append(values)
+    return set(product(*per_field))
+
+
+def query_keys(fields: List[str], query: dict) -> Optional[List[tuple]]:
+    """Index keys to probe for ``query``, or None if the index cannot serve it.
+
+    An index serves a query when every indexed field has an equality or
+    ``$in`` condition at the top level of the query.
+    """
+    per_field = []
+    for field in fields:
+        if field not in query:
+            return None
+        condition = query[field]
+        if is_operator_dict(condition):
+            if set(condition) == {"$eq"}:
+                values = [condition["$eq"]]
+            elif set(condition) == {"$in"}:
+                values = list(condition["$in"])
+            else:
+                return None
+        else:
+            values = [condition]
+        per_field.append([hashable(v) for v in values])
+    return list(product(*per_field))
+
+
+# ---------------------------------------------------------------------------
+# Cursor
+# ---------------------------------------------------------------------------
+
+class DocumentCursor:
+    """Async cursor over a snapshot of matching documents."""
+
+    def __init__(self, docs: List[dict], projection: Optional[Any] = None):
+        self._docs = docs
+        self._projection = projection
+        self._sort: List[tuple] = []
+        self._skip = 0
+        self._limit = 0
+        self._iter = None
+
+    def sort(self, key: Any, direction: Any = None) -> "DocumentCursor":
+        self._sort = normalize_keys(key, direction)
+        return self
+
+    def skip(self, count: int) -> "DocumentCursor":
+        self._skip = count
+        return self
+
+    def limit(self, count: int) -> "DocumentCursor":
+        self._limit = count
+        return self
+
+    def _materialize(self) -> List[dict]:
+        docs = list(self._docs)
+        if self._sort:
+            sort_documents(docs, self._sort)
+        docs = docs[self._skip:]
+        if self._limit:
+            docs = docs[:self._limit]
+        return [project(doc, self._projection) for doc in docs]
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self) -> dict:
+        if self._iter is None:
+            self._iter = iter(self._materialize())
+        try:
+            return next(self._iter)
+        except StopIteration:
+            raise StopAsyncIteration
+
+    async def to_list(self, length: Optional[int] = None) -> List[dict]:
+        docs = self._materialize()
+        return docs if length is None else docs[:length]
@@ -0,0 +1,114 @@
+"""GridFS file storage on top of any storage engine.
+
+A file is split into ``<bucket>.chunks`` documents of ``chunk_size`` bytes
+(``{files_id, n, data}``) and described by one ``<bucket>.files`` document,
+as the GridFS spec lays out, so files written to MongoDB can be read by any
+GridFS driver and the in-process engines store them the same way. Uploads
+are consumed chunk by chunk and downloads read a few chunks at a time, so
+neither holds a whole file in memory. The files document is written last:
+a file is only visible once all of its chunks are in.
+"""
+from datetime import datetime
+from typing import Any, AsyncIterable, AsyncIterator, Optional
+
+from bson import ObjectId
+
+from .base import Database
+
+DEFAULT_CHUNK_SIZE = 255 * 1024
+READ_AHEAD_CHUNKS = 4
+
+
+class FileTooLarge(Exception):
+    """An upload went past its size limit; nothing was stored."""
+
+
+class CorruptFile(Exception):
+    """A file's chunks are missing or out of order."""
+
+
+class GridFSBucket:
+    """Stores files in ``<name>.files`` and ``<name>.chunks``."""
+
+    def __init__(self, db: Database, name: str = "fs", chunk_size: int = DEFAULT_CHUNK_SIZE):
+        self.name = name
+        self.chunk_size = chunk_size
+        self.files = db[f"{name}.files"]
+        self.chunks = db[f"{name}.chunks"]
+
+    async def upload_from_stream(self, filename: str, source: AsyncIterable[bytes],
+                                 metadata: Optional[dict] = None, file_id: Any = None,
+                                 max_length: Optional[int] = None) -> dict:
+        """Store the bytes of ``source`` and return the files document.
+
+        Raises FileTooLarge once more than ``max_length`` bytes arrive, and
+        DuplicateKeyError if ``file_id`` is already taken.
+        """
+        file_id = ObjectId() if file_id is None else file_id
+        buffer = bytearray()
+        length = n = 0
+        try:
+            async for piece in source:
+                length += len(piece)
+                if max_length is not None and length > max_length:
+                    raise FileTooLarge(f"File is larger than {max_length} bytes")
+                buffer += piece
+                while len(buffer) >= self.chunk_size:
+                    await self._write_chunk(file_id, n, bytes(buffer[:self.chunk_size]))
+                    del buffer[:self.chunk_size]
+                    n += 1
+            if buffer:
+                await self._write_chunk(file_id, n, bytes(buffer))
+            file = {
+                "_id": file_id,
+                "length": length,
+                "chunkSize": self.chunk_size,
+                "uploadDate": datetime.utcnow(),
+                "filename": filename,
+                "metadata": metadata or {},
+            }
+            await self.files.insert_one(file)
+        except BaseException as e:
+            from pymongo.errors import DuplicateKeyError
+            if not isinstance(e, DuplicateKeyError):  # Otherwise the chunks belong to whoever holds the id
+                await self.chunks.delete_many({"files_id": file_id})
+            raise
+        return file
+
+    async def _write_chunk(self, file_id: Any, n: int, data: bytes) -> None:
+        await self.chunks.insert_one({"files_id": file_id, "n": n, "data": data})
+
+    async def find_file(self, file_id: Any) -> Optional[dict]:
+        return await self.files.find_one({"_id": file_id})
+
+    async def stream(self, file: dict, start: int = 0, end: Optional[int] = None) -> AsyncIterator[bytes]:
+        """Yield bytes ``[start, end)`` of a file, reading only the chunks covering them."""
+        end = file["length"] if end is None else min(end, file["length"])
+        if start >= end:
+            return
+        size = file["chunkSize"]
+        n, last = start // size, (end - 1) // size
+        while n <= last:
+            chunks = await self.chunks.find({
+                "files_id": file["_id"],
+                "n": {"$gte": n, "$lte": min(last, n + READ_AHEAD_CHUNKS - 1)},
+            }).sort("n", 1).to_list(None)
+            for chunk in chunks:
+                if chunk["n"] != n:
+                    raise CorruptFile(f"Chunk {n} of file {file['_id']} is missing")
+                data = bytes(chunk["data"])
+                offset = n * size
+                yield data[max(start - offset, 0):end - offset]
+                n += 1
+            if not chunks:
+                raise CorruptFile(f"Chunk {n} of file {file['_id']} is missing")
+
+    async def read(self, file: dict) -> bytes:
+        """Return a whole (small) file."""
+        return b"".join([piece async for piece in self.stream(file)])
+
+    async def delete(self, file_id: Any) -> bool:
+        """Remove a file and its chunks; return False if there was no such file."""
+        result = await self.files.delete_one({"_id": file_id})
+        await self.chunks.delete_many({"files_id": file_id})
+        return result.deleted_count == 1
@@ -0,0 +1,352 @@
+"""Pure in-memory storage engine.
+
+Documents live in per-collection dicts keyed by ``_id``. Every index created
+with ``create_index`` is maintained as a hash index (multi-key aware, unique
+and TTL options honoured), and queries with equality/``$in`` conditions on all
+fields of an index are answered from it instead of scanning the collection.
+Intended for tests, benchmarks and throwaway single-process runs.
+"""
+from collections import defaultdict
+from datetime import datetime, timedelta
+from typing import Any, Dict, Iterable, List, Optional, Set
+import time
+
+from bson import ObjectId
+from pymongo.errors import DuplicateKeyError, WriteError
+from pymongo.results import BulkWriteResult, DeleteResult, InsertManyResult, InsertOneResult, UpdateResult
+
+from .base import StorageEngine
+from .documents import (
+    DocumentCursor, apply_bulk_write, apply_update, clone, hashable, index_keys, matches,
+    normalize_keys, project, query_keys, sort_documents, upsert_seed,
+)
+
+
+class HashIndex:
+    """Maps index key tuples to the ids of the documents holding them."""
+
+    def __init__(self, name: str, keys: List[tuple], unique: bool = False,
+                 expire_after_seconds: Optional[float] = None, **options):
+        self.name = name
+        self.keys = keys
+        self.fields = [field for field, _ in keys]
+        self.unique = unique
+        self.expire_after_seconds = expire_after_seconds
+        self.options = options
+        self.entries: Dict[tuple, Set[Any]] = defaultdict(set)
+
+    def info(self) -> dict:
+        info = {"key": list(self.keys), **self.options}
+        if self.unique:
+            info["unique"] = True
+        if self.expire_after_seconds is not None:
+            info["expireAfterSeconds"] = self.expire_after_seconds
+        return info
+
+    def keys_for(self, doc: dict) -> Set[tuple]:
+        return index_keys(self.fields, doc)
+
+    def add(self, doc_key: Any, doc: dict) -> None:
+        for key in self.keys_for(doc):
+            self.entries[key].add(doc_key)
+
+    def remove(self, doc_key: Any, doc: dict) -> None:
+        for key in self.keys_for(doc):
+            bucket = self.entries.get(key)
+            if bucket is not None:
+                bucket.discard(doc_key)
+                if not bucket:
+                    del self.entries[key]
+
+    def conflicts(self, doc_key: Any, doc: dict) -> bool:
+        return any(self.entries.get(key, set()) - {doc_key} for key in self.keys_for(doc))
+
+    def candidates(self, query: dict) -> Optional[Set[Any]]:
+        """Ids that may match ``query``, or None if the index cannot serve it."""
+        keys = query_keys(self.fields, query)
+        if keys is None:
+            return None
+        ids: Set[Any] = set()
+        for key in keys:
+            ids.update(self.entries.get(key, ()))
+        return ids
+
+
+class MemoryCollection:
+    """A collection held in a dict, with hash indexes."""
+
+    def __init__(self, database: "MemoryDatabase", name: str):
+        self.database = database
+        self.name = name
+        self._docs: Dict[Any, dict] = {}
+        self._position: Dict[Any, int] = {}
+        self._counter = 0
+        self._indexes: Dict[str, HashIndex] = {"_id_": HashIndex("_id_", [("_id", 1)], unique=True)}
+        self._next_expiry_check = 0.0
+
+    # -- indexes -----------------------------------------------------------
+
+    async def create_index(self, keys: Any, **kwargs) -> str:
+        spec = normalize_keys(keys)
+        name = kwargs.pop("name", None) or "_".join(f"{k}_{d}" for k, d in spec)
+        if name in self._indexes:
+            return name
+        index = HashIndex(name, spec, unique=kwargs.pop("unique", False),
+                          expire_after_seconds=kwargs.pop("expireAfterSeconds", None), **kwargs)
+        for doc_key, doc in self._docs.items():
+            if index.unique and index.conflicts(doc_key, doc):
+                raise DuplicateKeyError(f"E11000 duplicate key error collection: {self.name} index: {name}")
+            index.add(doc_key, doc)
+        self._indexes[name] = index
+        return name
+
+    async def create_indexes(self, indexes: Iterable[Any]) -> List[str]:
+        names = []
+        for model in indexes:
+            document = dict(model.document)
+            keys = list(document.pop("key").items())
+            names.append(await self.create_index(keys, **document))
+        return names
+
+    async def index_information(self) -> Dict[str, dict]:
+        return {name: index.info() for name, index in self._indexes.items()}
+
+    async def drop_index(self, name: str) -> None:
+        if name != "_id_":
+            self._indexes.pop(name, None)
+
+    def explain(self, filter: Optional[dict]) -> str:
+        """Name of the index that would serve ``filter``, or ``"COLLSCAN"``."""
+        plan = self._plan(filter or {})
+        return plan[0].name if plan else "COLLSCAN"
+
+    # -- internals ---------------------------------------------------------
+
+    def _plan(self, query: dict) -> Optional[tuple]:
+        best = None
+        for index in self._indexes.values():
+            ids = index.candidates(query)
+            if ids is not None and (best is None or len(ids) < len(best[1])):
+                best = (index, ids)
+        return best
+
+    def _expire(self) -> None:
+        now = time.monotonic()
+        if now < self._next_expiry_check:
+            return
+        self._next_expiry_check = now + 1.0
+        for index in self._indexes.values():
+            if index.expire_after_seconds is None:
+                continue
+            cutoff = datetime.utcnow() - timedelta(seconds=index.expire_after_seconds)
+            field = index.fields[0]
+            for doc_key, doc in list(self._docs.items()):
+                value = doc.get(field)
+                if isinstance(value, datetime) and value.replace(tzinfo=None) < cutoff:
+                    self._remove(doc_key)
+
+    def _find(self, query: Optional[dict]) -> List[dict]:
+        self._expire()
+        query = query or {}
+        plan = self._plan(query) if query else None
+        if plan is None:
+            return [doc for doc in self._docs.values() if matches(doc, query)]
+        ordered = sorted(plan[1], key=self._position.__getitem__)
+        return [self._docs[k] for k in ordered if matches(self._docs[k], query)]
+
+    def _check_unique(self, doc_key: Any, doc: dict) -> None:
+        for index in self._indexes.values():
+            if index.unique and index.conflicts(doc_key, doc):
+                raise DuplicateKeyError(
+                    f"E11000 duplicate key error collection: {self.name} index: {index.name}"
+                )
+
+    def _insert(self, document: dict) -> Any:
+        if "_id" not in document:
+            document["_id"] = ObjectId()
+        stored = clone(document)
+        doc_key = hashable(stored["_id"])
+        if doc_key in self._docs:
+            raise DuplicateKeyError(f"E11000 duplicate key error collection: {self.name} index: _id_")
+        self._check_unique(doc_key, stored)
+        for index in self._indexes.values():
+            index.add(doc_key, stored)
+        self._docs[doc_key] = stored
+        self._counter += 1
+        self._position[doc_key] = self._counter
+        return document["_id"]
+
+    def _replace(self, old: dict, new: dict) -> None:
+        if new.get("_id") != old.get("_id"):
+            raise WriteError("Performing an update on the path '_id' would modify the immutable field '_id'")
+        doc_key = hashable(old["_id"])
+        self._check_unique(doc_key, new)
+        for index in self._indexes.values():
+            index.remove(doc_key, old)
+            index.add(doc_key, new)
+        self._docs[doc_key] = new
+
+    def _remove(self, doc_key: Any) -> None:
+        doc = self._docs.pop(doc_key)
+        del self._position[doc_key]
+        for index in self._indexes.values():
+            index.remove(doc_key, doc)
+
+    def _update(self, filter: dict, update: dict, many: bool, upsert: bool,
+                array_filters: Optional[List[dict]]) -> tuple:
+        targets = self._find(filter)
+        if not many:
+            targets = targets[:1]
+        results = []
+        for doc in targets:
+            updated = clone(doc)
+            apply_update(updated, update, filter, array_filters)
+            self._replace(doc, updated)
+            results.append(updated)
+        upserted = None
+        if not targets and upsert:
+            seed = upsert_seed(filter)
+            apply_update(seed, update, filter, array_filters, is_insert=True)
+            upserted = self._insert(seed)
+        return results, upserted
+
+    # -- reads -------------------------------------------------------------
+
+    def find(self, filter: Optional[dict] = None, projection: Optional[Any] = None, **kwargs) -> DocumentCursor:
+        cursor = DocumentCursor(self._find(filter), projection)
+        if kwargs.get("sort"):
+            cursor.sort(kwargs["sort"])
+        if kwargs.get("skip"):
+            cursor.skip(kwargs["skip"])
+        if kwargs.get("limit"):
+            cursor.limit(kwargs["limit"])
+        return cursor
+
+    async def find_one(self, filter: Optional[dict] = None, projection: Optional[Any] = None,
+                       **kwargs) -> Optional[dict]:
+        docs = await self.find(filter, projection, **kwargs).limit(1).to_list()
+        return docs[0] if docs else None
+
+    async def count_documents(self, filter: Optional[dict] = None, **kwargs) -> int:
+        return len(self._find(filter))
+
+    # -- writes ------------------------------------------------------------
+
+    async def insert_one(self, document: dict, **kwargs) -> InsertOneResult:
+        return InsertOneResult(self._insert(document), True)
+
+    async def insert_many(self, documents: List[dict], ordered: bool = True, **kwargs) -> InsertManyResult:
+        return InsertManyResult([self._insert(doc) for doc in documents], True)
+
+    async def update_one(self, filter: dict, update: dict, upsert: bool = False,
+                         array_filters: Optional[List[dict]] = None, **kwargs) -> UpdateResult:
+        return self._update_result(*self._update(filter, update, False, upsert, array_filters))
+
+    async def update_many(self, filter: dict, update: dict, upsert: bool = False,
+                          array_filters: Optional[List[dict]] = None, **kwargs) -> UpdateResult:
+        return self._update_result(*self._update(filter, update, True, upsert, array_filters))
+
+    @staticmethod
+    def _update_result(updated: List[dict], upserted: Any) -> UpdateResult:
+        raw = {"n": len(updated) or int(upserted is not None), "nModified": len(updated)}
+        if upserted is not None:
+            raw["upserted"] = upserted
+        return UpdateResult(raw, True)
+
+    async def find_one_and_update(self, filter: dict, update: dict, projection: Optional[Any] = None,
+                                  sort: Optional[Any] = None, upsert: bool = False,
+                                  return_document: bool = False,
+                                  array_filters: Optional[List[dict]] = None, **kwargs) -> Optional[dict]:
+        candidates = self._find(filter)
+        if sort:
+            sort_documents(candidates, normalize_keys(sort))
+        if not candidates:
+            if not upsert:
+                return None
+            _, upserted = self._update(filter, update, False, True, array_filters)
+            return project(self._docs[hashable(upserted)], projection) if return_document else None
+        doc = candidates[0]
+        updated = clone(doc)
+        apply_update(updated, update, filter, array_filters)
+        self._replace(doc, updated)
+        return project(updated if return_document else doc, projection)
+
+    async def find_one_and_delete(self, filter: dict, projection: Optional[Any] = None,
+                                  **kwargs) -> Optional[dict]:
+        candidates = self._find(filter)
+        if not candidates:
+            return None
+        self._remove(hashable(candidates[0]["_id"]))
+        return project(candidates[0], projection)
+
+    def _delete(self, filter: dict, many: bool) -> int:
+        candidates = self._find(filter)
+        if not many:
+            candidates = candidates[:1]
+        for doc in candidates:
+            self._remove(hashable(doc["_id"]))
+        return len(candidates)
+
+    async def delete_one(self, filter: dict, **kwargs) -> DeleteResult:
+        return DeleteResult({"n": self._delete(filter, many=False)}, True)
+
+    async def delete_many(self, filter: dict, **kwargs) -> DeleteResult:
+        return DeleteResult({"n": self._delete(filter, many=True)}, True)
+
+    async def bulk_write(self, requests: List[Any], ordered: bool = True, **kwargs) -> BulkWriteResult:
+        def update(filter, update, many, upsert, array_filters):
+            updated, upserted = self._update(filter, update, many, upsert, array_filters)
+            return len(updated), upserted
+        return apply_bulk_write(requests, self._insert, update, self._delete)
+
+    async def drop(self) -> None:
+        await self.database.drop_collection(self.name)
+
+
+class MemoryDatabase:
+    """Dictionary of in-memory collections, addressable like a Motor database."""
+
+    def __init__(self, name: str = "hobbees"):
+        self.name = name
+        self._collections: Dict[str, MemoryCollection] = {}
+
+    def __getitem__(self, name: str) -> MemoryCollection:
+        if name not in self._collections:
+            self._collections[name] = MemoryCollection(self, name)
+        return self._collections[name]
+
+    def __getattr__(self, name: str) -> MemoryCollection:
+        if name.startswith("_"):
+            raise AttributeError(name)
+        return self[name]
+
+    async def list_collection_names(self) -> List[str]:
+        return list(self._collections)
+
+    async def drop_collection(self, name: str) -> None:
+        self._collections.pop(name, None)
+
+    async def command(self, command: Any, **kwargs) -> dict:
+        return {"ok": 1.0}
+
+
+class MemoryEngine(StorageEngine):
+    """Storage engine keeping everything in process memory."""
+
+    name = "memory"
+
+    def __init__(self, database_name: str = "hobbees"):
+        self._database = MemoryDatabase(database_name)
+
+    @property
+    def database(self) -> MemoryDatabase:
+        return self._database
+
+    async def connect(self) -> None:
+        pass
+
+    async def close(self) -> None:
+        pass
+
+    async def ping(self) -> bool:
+        return True
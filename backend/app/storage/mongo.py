@@ -0,0 +1,60 @@
+"""MongoDB storage engine (Motor)."""
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Optional
+
+from motor.motor_asyncio import AsyncIOMotorClient, AsyncIOMotorDatabase
+
+from .base import StorageEngine
+
+
+class MongoEngine(StorageEngine):
+    """Storage engine backed by a MongoDB server through Motor."""
+
+    name = "mongo"
+
+    def __init__(self, url: str, database_name: str, **client_options: Any):
+        self.url = url
+        self.database_name = database_name
+        self.client_options = client_options
+        self.client: Optional[AsyncIOMotorClient] = None
+        self._transactions: Optional[bool] = None
+
+    @property
+    def database(self) -> AsyncIOMotorDatabase:
+        if self.client is None:
+            raise RuntimeError("MongoDB engine is not connected")
+        return self.client[self.database_name]
+
+    async def connect(self) -> None:
+        self.client = AsyncIOMotorClient(self.url, **self.client_options)
+
+    async def close(self) -> None:
+        if self.client is not None:
+            self.client.close()
+            self.client = None
+
+    async def ping(self) -> bool:
+        try:
+            await self.client.admin.command("ping")
+            return True
+        except Exception:
+            return False
+
+    async def supports_transactions(self) -> bool:
+        """Transactions need a replica set or sharded cluster, not a standalone server."""
+        if self._transactions is None:
+            hello = await self.client.admin.command("hello")
+            self._transactions = "setName" in hello or hello.get("msg") == "isdbgrid"
+        return self._transactions
+
+    @asynccontextmanager
+    async def transaction(self) -> AsyncIterator[Any]:
+        if not await self.supports_transactions():
+            yield None
+            return
+        async with await self.client.start_session() as session:
+            async with session.start_transaction():
+                yield session
+
+    async def drop_database(self) -> None:
+        await self.client.drop_database(self.database_name)
@@ -0,0 +1,92 @@
+"""pymongo command monitoring feeding the application metrics and traces.
+
+Motor runs pymongo on worker threads, so listener callbacks never touch the
+metrics themselves: they append a sample to ``metrics.mongodb_command_samples``
+(deque appends are atomic under the GIL) and the event loop folds the queue
+into the histograms before each scrape and after each HTTP request. Motor
+copies the caller's context into those threads, which is how command spans
+find their parent repository span.
+"""
+from typing import Deque, Dict, Optional, Tuple
+
+from pymongo import monitoring
+
+from ..utils import metrics
+from ..utils.tracing import Span, start_child_span
+
+# Commands whose first value is not a collection name
+_DATABASE_COMMANDS = {"ping", "hello", "ismaster", "isMaster", "buildInfo", "endSessions",
+                      "listCollections", "listDatabases", "dropDatabase", "serverStatus"}
+
+
+def command_collection(event: monitoring.CommandStartedEvent) -> str:
+    """The collection a command targets, or ``""`` for database commands."""
+    name = event.command_name
+    target = event.command.get(name)
+    return target if isinstance(target, str) and name not in _DATABASE_COMMANDS else ""
+
+
+class CommandMetricsListener(monitoring.CommandListener):
+    """Records duration and outcome of every MongoDB command."""
+
+    def __init__(self, samples: Optional[Deque[Tuple[str, str, float, bool]]] = None):
+        # (connection, request id) -> collection, while a command is in flight
+        self._collections: Dict[Tuple, str] = {}
+        self._samples = metrics.mongodb_command_samples if samples is None else samples
+
+    def started(self, event: monitoring.CommandStartedEvent) -> None:
+        self._collections[(event.connection_id, event.request_id)] = command_collection(event)
+
+    def succeeded(self, event: monitoring.CommandSucceededEvent) -> None:
+        self._record(event, True)
+
+    def failed(self, event: monitoring.CommandFailedEvent) -> None:
+        self._record(event, False)
+
+    def _record(self, event, ok: bool) -> None:
+        collection = self._collections.pop((event.connection_id, event.request_id), "")
+        self._samples.append((collection, event.command_name, event.duration_micros / 1e6, ok))
+
+    @property
+    def pending(self) -> int:
+        return len(self._samples)
+
+    def drain(self) -> None:
+        """Fold queued samples into the metrics. Call from the event loop."""
+        metrics.record_mongodb_commands(self._samples)
+
+
+class CommandTracingListener(monitoring.CommandListener):
+    """Adds a span per MongoDB command to the current trace."""
+
+    def __init__(self):
+        self._spans: Dict[Tuple, Span] = {}
+
+    def started(self, event: monitoring.CommandStartedEvent) -> None:
+        span = start_child_span(f"mongodb.{event.command_name}", **{
+            "db.system": "mongodb",
+            "db.name": event.database_name,
+            "db.operation": event.command_name,
+            "db.collection": command_collection(event),
+        })
+        if span is not None:
+            self._spans[(event.connection_id, event.request_id)] = span
+
+    def succeeded(self, event: monitoring.CommandSucceededEvent) -> None:
+        self._end(event)
+
+    def failed(self, event: monitoring.CommandFailedEvent) -> None:
+        span = self._end(event)
+        if span is not None:
+            span.error = str(event.failure.get("errmsg", event.failure))
+
+    def _end(self, event) -> Optional[Span]:
+        span = self._spans.pop((event.connection_id, event.request_id), None)
+        if span is not None:
+            span.end()
+        return span
+
+
+# Shared listeners registered on every Motor client the app creates
+command_listener = CommandMetricsListener()
+tracing_listener = CommandTracingListener()
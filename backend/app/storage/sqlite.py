@@ -0,0 +1,538 @@
+"""SQLite storage engine for small single-node installs.
+
+Each collection is a table of JSON documents (``id TEXT PRIMARY KEY, doc
+TEXT``). Indexes declared with ``create_index`` are materialised as side
+tables of ``(key, id)`` rows maintained on every write, so multi-key and
+dotted-path indexes (``categories.name``) behave as they do in MongoDB and
+unique indexes are enforced by SQLite. Queries that no index serves are
+narrowed with JSON1 (``json_each``) before the remaining conditions are
+evaluated in Python.
+
+All SQLite work runs on one dedicated thread, which serialises writes and
+keeps the event loop free.
+"""
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
+from typing import Any, Callable, Dict, Iterable, List, Optional, Set
+import asyncio
+import base64
+import json
+import re
+import sqlite3
+import time
+
+from bson import ObjectId
+from pymongo.errors import DuplicateKeyError, WriteError
+from pymongo.results import BulkWriteResult, DeleteResult, InsertManyResult, InsertOneResult, UpdateResult
+
+from .base import StorageEngine
+from .documents import (
+    DocumentCursor, apply_bulk_write, apply_update, clone, index_keys, is_operator_dict, matches,
+    normalize_keys, project, query_keys, sort_documents, upsert_seed,
+)
+
+_EPOCH = datetime(1970, 1, 1)
+_NAME = re.compile(r"^[A-Za-z0-9_.]+$")
+
+
+# ---------------------------------------------------------------------------
+# JSON encoding of BSON types
+# ---------------------------------------------------------------------------
+
+def _encode_default(value: Any) -> Any:
+    if isinstance(value, ObjectId):
+        return {"$oid": str(value)}
+    if isinstance(value, datetime):
+        if value.tzinfo is not None:
+            value = value.astimezone(timezone.utc).replace(tzinfo=None)
+        return {"$date": (value - _EPOCH) // timedelta(milliseconds=1)}
+    if isinstance(value, bytes):
+        return {"$binary": base64.b64encode(value).decode("ascii")}
+    raise TypeError(f"Cannot store value of type {type(value).__name__}")
+
+
+def _decode_hook(obj: dict) -> Any:
+    if len(obj) == 1:
+        if "$oid" in obj:
+            return ObjectId(obj["$oid"])
+        if "$date" in obj:
+            return _EPOCH + timedelta(milliseconds=obj["$date"])
+        if "$binary" in obj:
+            return base64.b64decode(obj["$binary"])
+    return obj
+
+
+def encode(doc: Any) -> str:
+    """Serialise a document (or value) to JSON text, tagging BSON types."""
+    return json.dumps(doc, default=_encode_default, separators=(",", ":"))
+
+
+def decode(text: str) -> Any:
+    return json.loads(text, object_hook=_decode_hook)
+
+
+def _id_key(value: Any) -> str:
+    if isinstance(value, ObjectId):
+        return f"oid:{value}"
+    return f"json:{encode(value)}"
+
+
+def _key_text(key: tuple) -> str:
+    return encode([list(part) if isinstance(part, tuple) else part for part in key])
+
+
+def _quote(name: str) -> str:
+    return '"' + name.replace('"', '""') + '"'
+
+
+# ---------------------------------------------------------------------------
+# Collections
+# ---------------------------------------------------------------------------
+
+class _IndexSpec:
+    def __init__(self, name: str, keys: List[tuple], options: dict):
+        self.name = name
+        self.keys = keys
+        self.fields = [field for field, _ in keys]
+        self.unique = bool(options.get("unique"))
+        self.expire_after_seconds = options.get("expireAfterSeconds")
+        self.options = options
+
+    def info(self) -> dict:
+        return {"key": list(self.keys), **self.options}
+
+
+class SQLiteCollection:
+    """Motor-compatible collection stored in one SQLite table."""
+
+    def __init__(self, engine: "SQLiteEngine", name: str):
+        if not _NAME.match(name):
+            raise ValueError(f"Invalid collection name '{name}'")
+        self.engine = engine
+        self.name = name
+        self.table = _quote(f"c_{name}")
+        self._indexes: Optional[Dict[str, _IndexSpec]] = None
+        self._next_expiry_check = 0.0
+
+    # -- thread-side helpers (run on the engine's SQLite thread) ----------
+
+    def _ix_table(self, index_name: str) -> str:
+        return _quote(f"ix_{self.name}_{index_name}")
+
+    def _setup(self, conn: sqlite3.Connection) -> Dict[str, _IndexSpec]:
+        if self._indexes is None:
+            conn.execute(f"CREATE TABLE IF NOT EXISTS {self.table} "
+                         f"(id TEXT PRIMARY KEY, doc TEXT NOT NULL CHECK (json_valid(doc)))")
+            self._indexes = {}
+            rows = conn.execute("SELECT name, spec FROM _indexes WHERE collection = ?", (self.name,))
+            for name, spec in rows.fetchall():
+                spec = json.loads(spec)
+                self._indexes[name] = _IndexSpec(name, [tuple(k) for k in spec.pop("key")], spec)
+        return self._indexes
+
+    def _expire(self, conn: sqlite3.Connection) -> None:
+        now = time.monotonic()
+        if now < self._next_expiry_check:
+            return
+        self._next_expiry_check = now + 1.0
+        for index in self._indexes.values():
+            if index.expire_after_seconds is None:
+                continue
+            cutoff = datetime.utcnow() - timedelta(seconds=index.expire_after_seconds)
+            path = f'$."{index.fields[0]}"."$date"'
+            rows = conn.execute(
+                f"SELECT id, doc FROM {self.table} "
+                f"WHERE CAST(json_extract(doc, ?) AS INTEGER) < ?",
+                (path, (cutoff - _EPOCH) // timedelta(milliseconds=1)),
+            ).fetchall()
+            for doc_id, text in rows:
+                self._remove(conn, doc_id, decode(text))
+
+    def _pushdown(self, query: dict) -> tuple:
+        """SQL narrowing the candidate rows; Python matching still runs afterwards."""
+        clauses, params = [], []
+        if "_id" in query:
+            condition = query["_id"]
+            if not is_operator_dict(condition) and not isinstance(condition, dict):
+                clauses.append("id = ?")
+                params.append(_id_key(condition))
+            elif is_operator_dict(condition) and set(condition) == {"$in"}:
+                values = list(condition["$in"])
+                clauses.append(f"id IN ({','.join('?' * len(values)) or 'NULL'})")
+                params.extend(_id_key(v) for v in values)
+
+        best = None
+        for index in self._indexes.values():
+            keys = query_keys(index.fields, query)
+            if keys is not None and (best is None or len(index.fields) > len(best[0].fields)):
+                best = (index, keys)
+        if best is not None:
+            index, keys = best
+            clauses.append(f"id IN (SELECT id FROM {self._ix_table(index.name)} "
+                           f"WHERE key IN ({','.join('?' * len(keys)) or 'NULL'}))")
+            params.extend(_key_text(key) for key in keys)
+
+        for field, condition in query.items():
+            if field.startswith("$") or "." in field or field == "_id":
+                continue
+            if isinstance(condition, (str, int, float)):
+                clauses.append("EXISTS (SELECT 1 FROM json_each(doc, ?) WHERE json_each.value = ?)")
+                params.extend([f'$."{field}"', int(condition) if isinstance(condition, bool) else condition])
+
+        where = f" WHERE {' AND '.join(clauses)}" if clauses else ""
+        return where, params
+
+    def _select(self, conn: sqlite3.Connection, query: Optional[dict]) -> List[tuple]:
+        self._setup(conn)
+        self._expire(conn)
+        query = query or {}
+        where, params = self._pushdown(query)
+        rows = conn.execute(f"SELECT id, doc FROM {self.table}{where} ORDER BY rowid", params)
+        result = []
+        for doc_id, text in rows:
+            doc = decode(text)
+            if matches(doc, query):
+                result.append((doc_id, doc))
+        return result
+
+    def _index_rows(self, index: _IndexSpec, doc: dict) -> Set[str]:
+        return {_key_text(key) for key in index_keys(index.fields, doc)}
+
+    def _add_keys(self, conn, index: _IndexSpec, doc_id: str, keys: Iterable[str]) -> None:
+        try:
+            conn.executemany(f"INSERT INTO {self._ix_table(index.name)} (key, id) VALUES (?, ?)",
+                             [(key, doc_id) for key in keys])
+        except sqlite3.IntegrityError:
+            raise DuplicateKeyError(
+                f"E11000 duplicate key error collection: {self.name} index: {index.name}"
+            ) from None
+
+    def _insert(self, conn: sqlite3.Connection, document: dict) -> Any:
+        if "_id" not in document:
+            document["_id"] = ObjectId()
+        doc_id = _id_key(document["_id"])
+        try:
+            conn.execute(f"INSERT INTO {self.table} (id, doc) VALUES (?, ?)", (doc_id, encode(document)))
+        except sqlite3.IntegrityError:
+            raise DuplicateKeyError(
+                f"E11000 duplicate key error collection: {self.name} index: _id_"
+            ) from None
+        for index in self._indexes.values():
+            self._add_keys(conn, index, doc_id, self._index_rows(index, document))
+        return document["_id"]
+
+    def _replace(self, conn: sqlite3.Connection, doc_id: str, old: dict, new: dict) -> None:
+        if new.get("_id") != old.get("_id"):
+            raise WriteError("Performing an update on the path '_id' would modify the immutable field '_id'")
+        conn.execute(f"UPDATE {self.table} SET doc = ? WHERE id = ?", (encode(new), doc_id))
+        for index in self._indexes.values():
+            before, after = self._index_rows(index, old), self._index_rows(index, new)
+            conn.executemany(f"DELETE FROM {self._ix_table(index.name)} WHERE key = ? AND id = ?",
+                             [(key, doc_id) for key in before - after])
+            self._add_keys(conn, index, doc_id, after - before)
+
+    def _remove(self, conn: sqlite3.Connection, doc_id: str, doc: dict) -> None:
+        conn.execute(f"DELETE FROM {self.table} WHERE id = ?", (doc_id,))
+        for index in self._indexes.values():
+            conn.execute(f"DELETE FROM {self._ix_table(index.name)} WHERE id = ?", (doc_id,))
+
+    def _update(self, conn, filter: dict, update: dict, many: bool, upsert: bool,
+                array_filters: Optional[List[dict]], sort: Optional[Any] = None) -> tuple:
+        targets = self._select(conn, filter)
+        if sort:
+            order = sort_documents([doc for _, doc in targets], normalize_keys(sort))
+            by_identity = {id(doc): doc_id for doc_id, doc in targets}
+            targets = [(by_identity[id(doc)], doc) for doc in order]
+        if not many:
+            targets = targets[:1]
+        changes = []
+        for doc_id, doc in targets:
+            updated = clone(doc)
+            apply_update(updated, update, filter, array_filters)
+            self._replace(conn, doc_id, doc, updated)
+            changes.append((doc, updated))
+        upserted = None
+        if not targets and upsert:
+            seed = upsert_seed(filter)
+            apply_update(seed, update, filter, array_filters, is_insert=True)
+            upserted = self._insert(conn, seed)
+            changes.append((None, seed))
+        return changes, upserted
+
+    async def _write(self, fn: Callable[[sqlite3.Connection], Any]) -> Any:
+        def run(conn: sqlite3.Connection):
+            self._setup(conn)
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                result = fn(conn)
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+            conn.execute("COMMIT")
+            return result
+        return await self.engine.run(run)
+
+    # -- indexes -----------------------------------------------------------
+
+    async def create_index(self, keys: Any, **kwargs) -> str:
+        spec = normalize_keys(keys)
+        name = kwargs.pop("name", None) or "_".join(f"{k}_{d}" for k, d in spec)
+        index = _IndexSpec(name, spec, kwargs)
+
+        def run(conn):
+            if name in self._indexes:
+                return name
+            # Another process sharing the file may have created it meanwhile
+            row = conn.execute("SELECT spec FROM _indexes WHERE collection = ? AND name = ?",
+                               (self.name, name)).fetchone()
+            if row is not None:
+                existing = json.loads(row[0])
+                self._indexes[name] = _IndexSpec(name, [tuple(k) for k in existing.pop("key")], existing)
+                return name
+            table = self._ix_table(name)
+            conn.execute(f"CREATE TABLE {table} (key TEXT NOT NULL, id TEXT NOT NULL, PRIMARY KEY (key, id))")
+            conn.execute(f"CREATE INDEX {_quote(f'ix_{self.name}_{name}_id')} ON {table} (id)")
+            if index.unique:
+                conn.execute(f"CREATE UNIQUE INDEX {_quote(f'ix_{self.name}_{name}_uniq')} ON {table} (key)")
+            for doc_id, text in conn.execute(f"SELECT id, doc FROM {self.table}").fetchall():
+                self._add_keys(conn, index, doc_id, self._index_rows(index, decode(text)))
+            conn.execute("INSERT INTO _indexes (collection, name, spec) VALUES (?, ?, ?)",
+                         (self.name, name, json.dumps({"key": spec, **kwargs})))
+            self._indexes[name] = index
+            return name
+
+        return await self._write(run)
+
+    async def index_information(self) -> Dict[str, dict]:
+        def run(conn):
+            info = {"_id_": {"key": [("_id", 1)]}}
+            info.update({name: index.info() for name, index in self._setup(conn).items()})
+            return info
+        return await self.engine.run(run)
+
+    async def drop_index(self, name: str) -> None:
+        def run(conn):
+            if name in self._indexes:
+                conn.execute(f"DROP TABLE {self._ix_table(name)}")
+                conn.execute("DELETE FROM _indexes WHERE collection = ? AND name = ?", (self.name, name))
+                del self._indexes[name]
+        await self._write(run)
+
+    # -- reads -------------------------------------------------------------
+
+    def find(self, filter: Optional[dict] = None, projection: Optional[Any] = None, **kwargs) -> "SQLiteCursor":
+        cursor = SQLiteCursor(self, filter, projection)
+        if kwargs.get("sort"):
+            cursor.sort(kwargs["sort"])
+        if kwargs.get("skip"):
+            cursor.skip(kwargs["skip"])
+        if kwargs.get("limit"):
+            cursor.limit(kwargs["limit"])
+        return cursor
+
+    async def find_one(self, filter: Optional[dict] = None, projection: Optional[Any] = None,
+                       **kwargs) -> Optional[dict]:
+        docs = await self.find(filter, projection, **kwargs).limit(1).to_list()
+        return docs[0] if docs else None
+
+    async def count_documents(self, filter: Optional[dict] = None, **kwargs) -> int:
+        return len(await self.engine.run(lambda conn: self._select(conn, filter)))
+
+    # -- writes ------------------------------------------------------------
+
+    async def insert_one(self, document: dict, **kwargs) -> InsertOneResult:
+        return InsertOneResult(await self._write(lambda conn: self._insert(conn, document)), True)
+
+    async def insert_many(self, documents: List[dict], ordered: bool = True, **kwargs) -> InsertManyResult:
+        ids = await self._write(lambda conn: [self._insert(conn, doc) for doc in documents])
+        return InsertManyResult(ids, True)
+
+    async def update_one(self, filter: dict, update: dict, upsert: bool = False,
+                         array_filters: Optional[List[dict]] = None, **kwargs) -> UpdateResult:
+        changes, upserted = await self._write(
+            lambda conn: self._update(conn, filter, update, False, upsert, array_filters))
+        return self._update_result(changes, upserted)
+
+    async def update_many(self, filter: dict, update: dict, upsert: bool = False,
+                          array_filters: Optional[List[dict]] = None, **kwargs) -> UpdateResult:
+        changes, upserted = await self._write(
+            lambda conn: self._update(conn, filter, update, True, upsert, array_filters))
+        return self._update_result(changes, upserted)
+
+    @staticmethod
+    def _update_result(changes: list, upserted: Any) -> UpdateResult:
+        modified = len(changes) - int(upserted is not None)
+        raw = {"n": len(changes), "nModified": modified}
+        if upserted is not None:
+            raw["upserted"] = upserted
+        return UpdateResult(raw, True)
+
+    async def find_one_and_update(self, filter: dict, update: dict, projection: Optional[Any] = None,
+                                  sort: Optional[Any] = None, upsert: bool = False,
+                                  return_document: bool = False,
+                                  array_filters: Optional[List[dict]] = None, **kwargs) -> Optional[dict]:
+        changes, _ = await self._write(
+            lambda conn: self._update(conn, filter, update, False, upsert, array_filters, sort))
+        if not changes:
+            return None
+        before, after = changes[0]
+        chosen = after if return_document else before
+        return None if chosen is None else project(chosen, projection)
+
+    async def find_one_and_delete(self, filter: dict, projection: Optional[Any] = None,
+                                  **kwargs) -> Optional[dict]:
+        def run(conn):
+            targets = self._select(conn, filter)[:1]
+            for doc_id, doc in targets:
+                self._remove(conn, doc_id, doc)
+            return targets[0][1] if targets else None
+        doc = await self._write(run)
+        return None if doc is None else project(doc, projection)
+
+    def _delete(self, conn, filter: dict, many: bool) -> int:
+        targets = self._select(conn, filter)
+        if not many:
+            targets = targets[:1]
+        for doc_id, doc in targets:
+            self._remove(conn, doc_id, doc)
+        return len(targets)
+
+    async def delete_one(self, filter: dict, **kwargs) -> DeleteResult:
+        return DeleteResult({"n": await self._write(lambda conn: self._delete(conn, filter, False))}, True)
+
+    async def delete_many(self, filter: dict, **kwargs) -> DeleteResult:
+        return DeleteResult({"n": await self._write(lambda conn: self._delete(conn, filter, True))}, True)
+
+    async def bulk_write(self, requests: List[Any], ordered: bool = True, **kwargs) -> BulkWriteResult:
+        """Apply the requests in one transaction."""
+        def run(conn):
+            def update(filter, update, many, upsert, array_filters):
+                changes, upserted = self._update(conn, filter, update, many, upsert, array_filters)
+                return len(changes) - int(upserted is not None), upserted
+            return apply_bulk_write(requests, lambda doc: self._insert(conn, doc), update,
+                              lambda filter, many: self._delete(conn, filter, many))
+        return await self._write(run)
+
+    async def drop(self) -> None:
+        await self.engine.database.drop_collection(self.name)
+
+
+class SQLiteCursor(DocumentCursor):
+    """Cursor that runs its query on first iteration."""
+
+    def __init__(self, collection: SQLiteCollection, filter: Optional[dict], projection: Optional[Any]):
+        super().__init__([], projection)
+        self._collection = collection
+        self._filter = filter
+        self._loaded = False
+
+    async def _load(self) -> None:
+        if not self._loaded:
+            rows = await self._collection.engine.run(lambda conn: self._collection._select(conn, self._filter))
+            self._docs = [doc for _, doc in rows]
+            self._loaded = True
+
+    async def __anext__(self) -> dict:
+        await self._load()
+        return await super().__anext__()
+
+    async def to_list(self, length: Optional[int] = None) -> List[dict]:
+        await self._load()
+        return await super().to_list(length)
+
+
+class SQLiteDatabase:
+    """Collections of one SQLite file, addressable like a Motor database."""
+
+    def __init__(self, engine: "SQLiteEngine", name: str):
+        self.engine = engine
+        self.name = name
+        self._collections: Dict[str, SQLiteCollection] = {}
+
+    def __getitem__(self, name: str) -> SQLiteCollection:
+        if name not in self._collections:
+            self._collections[name] = SQLiteCollection(self.engine, name)
+        return self._collections[name]
+
+    def __getattr__(self, name: str) -> SQLiteCollection:
+        if name.startswith("_"):
+            raise AttributeError(name)
+        return self[name]
+
+    async def list_collection_names(self) -> List[str]:
+        def run(conn):
+            rows = conn.execute("SELECT name FROM sqlite_master WHERE type = 'table' AND name LIKE 'c\\_%' ESCAPE '\\'")
+            return [name[2:] for (name,) in rows.fetchall()]
+        return await self.engine.run(run)
+
+    async def drop_collection(self, name: str) -> None:
+        collection = self[name]
+
+        def run(conn):
+            conn.execute("BEGIN IMMEDIATE")
+            for (index_name,) in conn.execute("SELECT name FROM _indexes WHERE collection = ?", (name,)).fetchall():
+                conn.execute(f"DROP TABLE IF EXISTS {collection._ix_table(index_name)}")
+            conn.execute("DELETE FROM _indexes WHERE collection = ?", (name,))
+            conn.execute(f"DROP TABLE IF EXISTS {collection.table}")
+            conn.execute("COMMIT")
+        await self.engine.run(run)
+        self._collections.pop(name, None)
+
+    async def command(self, command: Any, **kwargs) -> dict:
+        await self.engine.run(lambda conn: conn.execute("SELECT 1").fetchone())
+        return {"ok": 1.0}
+
+
+class SQLiteEngine(StorageEngine):
+    """Storage engine backed by a single SQLite database file."""
+
+    name = "sqlite"
+
+    def __init__(self, path: str = "hobbees.db", database_name: str = "hobbees"):
+        self.path = path
+        self._database_name = database_name
+        self._database: Optional[SQLiteDatabase] = None
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._conn: Optional[sqlite3.Connection] = None
+
+    @property
+    def database(self) -> SQLiteDatabase:
+        if self._database is None:
+            raise RuntimeError("SQLite engine is not connected")
+        return self._database
+
+    async def run(self, fn: Callable[[sqlite3.Connection], Any]) -> Any:
+        """Run ``fn(connection)`` on the SQLite thread."""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, fn, self._conn)
+
+    async def connect(self) -> None:
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="sqlite-storage")
+
+        def open_connection(_):
+            conn = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute("CREATE TABLE IF NOT EXISTS _indexes "
+                         "(collection TEXT NOT NULL, name TEXT NOT NULL, spec TEXT NOT NULL, "
+                         "PRIMARY KEY (collection, name))")
+            return conn
+
+        self._conn = await self.run(open_connection)
+        self._database = SQLiteDatabase(self, self._database_name)
+
+    async def close(self) -> None:
+        if self._conn is not None:
+            await self.run(lambda conn: conn.close())
+            self._conn = None
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
+        self._database = None
+
+    async def ping(self) -> bool:
+        try:
+            await self.database.command("ping")
+            return True
+        except Exception:
+            return False
@@ -0,0 +1,196 @@
+"""Per-category item activity, pre-aggregated in day buckets and written behind.
+
+Item writes add to the counters of their category's bucket for the current
+UTC day: items ``added``, ``removed`` and ``updated``, and under ``changes``
+the net change of every number field (``Quantity`` went up by 3). Counters
+of the same bucket are merged in memory and stored with one ``$inc`` upsert
+per bucket every ``ACTIVITY_FLUSH_SECONDS``, so a burst of writes costs one
+database write per bucket. Charts read the day buckets and roll them up
+(see ``ActivityService``), which costs the number of days, not of items.
+
+Buckets of a failed flush are merged back and retried with the next one;
+counters still buffered when a process dies are lost. Buckets are stored
+through the ``ActivityRepository`` of the app's ``Container``, which
+``lifespan`` passes to ``start``.
+"""
+import asyncio
+import logging
+from datetime import datetime
+from typing import TYPE_CHECKING, Dict, List, Optional, Tuple
+
+from ..config import settings
+from . import metrics
+
+if TYPE_CHECKING:
+    from ..dependencies import Container
+    from ..repositories.activity_repository import ActivityRepository
+
+logger = logging.getLogger(__name__)
+
+BucketKey = Tuple[str, str, str, datetime]  # (user_id, hobby_id, category, day)
+
+
+def number_changes(before: Optional[dict], after: Optional[dict]) -> Dict[str, float]:
+    """Net change of every number value between two versions of item data (None: no item)."""
+    changes: Dict[str, float] = {}
+    for data, sign in ((after, 1), (before, -1)):
+        for key, value in (data or {}).items():
+            if isinstance(value, (int, float)) and not isinstance(value, bool) \
+                    and "." not in key and not key.startswith("$"):
+                changes[key] = changes.get(key, 0) + sign * value
+    return {key: change for key, change in changes.items() if change}
+
+
+def today() -> datetime:
+    now = datetime.utcnow()
+    return datetime(now.year, now.month, now.day)
+
+
+class ActivityBucket:
+    """Counters waiting to be added to one stored bucket."""
+
+    __slots__ = ("added", "removed", "updated", "changes")
+
+    def __init__(self, added: int = 0, removed: int = 0, updated: int = 0,
+                 changes: Optional[Dict[str, float]] = None):
+        self.added, self.removed, self.updated = added, removed, updated
+        self.changes = dict(changes or {})
+
+    def merge(self, other: "ActivityBucket") -> None:
+        self.added += other.added
+        self.removed += other.removed
+        self.updated += other.updated
+        for field, change in other.changes.items():
+            self.changes[field] = self.changes.get(field, 0) + change
+
+    def update(self) -> dict:
+        """The ``$inc`` upsert that adds these counters to the stored bucket."""
+        counters = {"added": self.added, "removed": self.removed, "updated": self.updated}
+        counters.update({f"changes.{field}": change for field, change in self.changes.items()})
+        return {"$inc": counters}
+
+    def as_document(self, key: BucketKey) -> dict:
+        user_id, hobby_id, category, day = key
+        return {"user_id": user_id, "hobby_id": hobby_id, "category": category, "day": day,
+                "added": self.added, "removed": self.removed, "updated": self.updated,
+                "changes": dict(self.changes)}
+
+
+class ActivityCounter:
+    """Merges item activity per day bucket and stores it periodically."""
+
+    def __init__(self, flush_interval: float):
+        self.flush_interval = flush_interval
+        self.container: Optional["Container"] = None
+        self._buffer: Dict[BucketKey, ActivityBucket] = {}
+        self._task: Optional[asyncio.Task] = None
+        self._wake: Optional[asyncio.Event] = None
+        self._flushing: Optional[asyncio.Lock] = None
+        self._stopping = False
+
+    def repository(self) -> "ActivityRepository":
+        return self.container.activity_repository
+
+    @property
+    def pending(self) -> int:
+        return len(self._buffer)
+
+    def start(self, container: "Container") -> None:
+        """Start the background task; entries are stored through ``container``."""
+        if self._task is not None:
+            return
+        self.container = container
+        self._stopping = False
+        self._wake = asyncio.Event()
+        self._flushing = asyncio.Lock()
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        """Flush what is buffered and stop the background task."""
+        if self._task is None:
+            return
+        self._stopping = True
+        self._wake.set()
+        await self._task
+        self._task = None
+
+    async def record(self, user_id: str, hobby_id: str, category: str, added: int = 0, removed: int = 0,
+                     updated: int = 0, changes: Optional[Dict[str, float]] = None) -> None:
+        """Count item writes in today's bucket of a category. Stores it directly when not started."""
+        if not settings.ACTIVITY_ENABLED:
+            return
+        bucket = ActivityBucket(added, removed, updated, changes)
+        key = (user_id, hobby_id, category, today())
+        if self._task is None:
+            await self._write({key: bucket})
+            return
+        if key in self._buffer:
+            self._buffer[key].merge(bucket)
+        else:
+            self._buffer[key] = bucket
+
+    def buffered(self, user_id: str, hobby_id: str, category: str) -> List[dict]:
+        """A category's buckets not stored yet, so charts include the latest writes."""
+        return [bucket.as_document(key) for key, bucket in self._buffer.items()
+                if key[:3] == (user_id, hobby_id, category)]
+
+    async def rename(self, user_id: str, hobby_id: str, old: str, new: str) -> None:
+        """Move a category's activity to its new name."""
+        for key in [key for key in self._buffer if key[:3] == (user_id, hobby_id, old)]:
+            bucket = self._buffer.pop(key)
+            new_key = (user_id, hobby_id, new, key[3])
+            if new_key in self._buffer:
+                self._buffer[new_key].merge(bucket)
+            else:
+                self._buffer[new_key] = bucket
+        try:
+            await self.repository().rename_category(user_id, hobby_id, old, new)
+        except Exception:
+            logger.exception(f"Could not rename the activity of category '{old}'")
+
+    async def forget(self, user_id: str, hobby_id: str, category: Optional[str] = None) -> None:
+        """Drop the activity of a deleted category, or of every category of a deleted hobby."""
+        for key in [key for key in self._buffer
+                    if key[:2] == (user_id, hobby_id) and category in (None, key[2])]:
+            del self._buffer[key]
+        try:
+            await self.repository().delete(user_id, hobby_id, category)
+        except Exception:
+            logger.exception(f"Could not delete the activity of hobby {hobby_id}")
+
+    async def flush(self) -> None:
+        """Store everything buffered."""
+        if self._flushing is None:
+            self._flushing = asyncio.Lock()
+        async with self._flushing:
+            buckets, self._buffer = self._buffer, {}
+            await self._write(buckets)
+
+    async def _write(self, buckets: Dict[BucketKey, ActivityBucket]) -> None:
+        for key, bucket in buckets.items():
+            try:
+                await self.repository().increment(*key, bucket.update())
+                metrics.activity_bucket_writes.labels("written").inc()
+            except Exception:
+                logger.exception(f"Could not store activity of category '{key[2]}'")
+                if self._task is None:  # Nothing would flush it again
+                    metrics.activity_bucket_writes.labels("dropped").inc()
+                    continue
+                metrics.activity_bucket_writes.labels("retried").inc()
+                if key in self._buffer:
+                    self._buffer[key].merge(bucket)
+                else:
+                    self._buffer[key] = bucket
+
+    async def _run(self) -> None:
+        while not self._stopping:
+            try:
+                await asyncio.wait_for(self._wake.wait(), self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wake.clear()
+            await self.flush()
+        await self.flush()
+
+
+activity_counter = ActivityCounter(settings.ACTIVITY_FLUSH_SECONDS)
@@ -0,0 +1,197 @@
+"""Coalescing of rapid successive replacements of the same item.
+
+An editor that saves on every field blur replaces one item's data many
+times within seconds. A coalesced update is validated as usual but only
+parked here, keyed by (user, hobby, category, item); a later update to the
+same item replaces the parked data, and ``ITEM_WRITE_COALESCE_MS`` after
+the first one the latest data is written once. While data is parked:
+
+- reads through ``HobbyService`` overlay it, so a user sees their own edits;
+- any other hobby write of the same user flushes that user's parked data
+  first (see ``flushes_parked_writes``), so writes still apply in order; if
+  that flush fails, so does the other write;
+- a write that fails stays parked (and visible) and is retried with
+  exponential backoff, up to ``MAX_RETRY_DELAY`` apart;
+- shutdown flushes everything.
+
+Parked data lives in one process only: another process serving the same
+user reads the stored data until the flush, and a crash loses the edits of
+the last window, as does a shutdown whose final write fails. Data parked
+for an item that is gone by the time it is written (deleted or moved by
+another process) has nowhere to go and is discarded, with a warning.
+"""
+import asyncio
+import logging
+from contextvars import ContextVar
+from datetime import datetime
+from functools import wraps
+from inspect import signature
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Set, Tuple
+
+from ..config import settings
+from . import metrics
+
+logger = logging.getLogger(__name__)
+
+ItemKey = Tuple[str, str, str]  # (hobby_id, category_name, item_id)
+# Writes parked data: (hobby_id, user_id, category_name, item_id, data) -> None if the item is gone
+ItemStore = Callable[[str, str, str, str, dict], Awaitable[Any]]
+
+MAX_RETRY_DELAY = 30.0  # Seconds between retries of a failing write, at most
+
+# Set while a flush writes, so its own writes do not try to flush again
+_flushing: ContextVar[bool] = ContextVar("coalesce_flushing", default=False)
+
+
+class PendingWrite:
+    """The latest parked data of one item and the function to write it with."""
+
+    __slots__ = ("store", "data", "updated_at", "attempts")
+
+    def __init__(self, store: ItemStore, data: dict, updated_at: datetime):
+        self.store = store
+        self.data = data
+        self.updated_at = updated_at
+        self.attempts = 0  # Failed writes so far
+
+
+class ItemWriteCoalescer:
+    """Parks item replacements per user and writes each item's latest data once per window."""
+
+    def __init__(self, window_ms: int):
+        self.window = window_ms / 1000
+        self._pending: Dict[str, Dict[ItemKey, PendingWrite]] = {}
+        self._lock: Optional[asyncio.Lock] = None
+        self._tasks: Set[asyncio.Task] = set()
+        self._timers: Dict[Tuple[str, ItemKey], asyncio.TimerHandle] = {}
+
+    @property
+    def enabled(self) -> bool:
+        return self.window > 0
+
+    @property
+    def pending(self) -> int:
+        return sum(len(items) for items in self._pending.values())
+
+    def submit(self, store: ItemStore, user_id: str, hobby_id: str, category_name: str, item_id: str,
+               data: dict) -> datetime:
+        """Park ``data`` as the item's new data; return the ``updated_at`` to report."""
+        now = datetime.utcnow()
+        items = self._pending.setdefault(user_id, {})
+        key = (hobby_id, category_name, item_id)
+        if key in items:
+            metrics.coalesced_item_writes.labels("merged").inc()
+        items[key] = PendingWrite(store, data, now)
+        self._schedule(user_id, key)
+        return now
+
+    def overlay(self, hobby) -> None:
+        """Show the user's parked data in ``hobby`` (a model built for this caller)."""
+        items = self._pending.get(hobby.user_id)
+        if not items:
+            return
+        hobby_id = str(hobby.id)
+        for category in hobby.categories:
+            for item in category.items:
+                write = items.get((hobby_id, category.name, item.id))
+                if write is not None:
+                    item.data = write.data
+                    item.updated_at = write.updated_at
+
+    async def flush_user(self, user_id: str) -> None:
+        """Write everything parked for a user (before another write of theirs); raise if a write fails."""
+        if user_id in self._pending and not _flushing.get():
+            errors = await self._flush(lambda user, key: user == user_id)
+            if errors:
+                raise errors[0]
+
+    async def flush(self) -> None:
+        """Write everything parked."""
+        await self._flush(lambda user, key: True)
+
+    async def stop(self) -> None:
+        """Cancel the timers and write everything parked (on shutdown)."""
+        self._cancel_timers()
+        await self.flush()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._cancel_timers()  # Retries scheduled by failed writes
+        for user_id, items in self._pending.items():
+            logger.error(f"Dropped {len(items)} parked item writes of user {user_id} on shutdown")
+            metrics.coalesced_item_writes.labels("dropped").inc(len(items))
+        self._pending.clear()
+
+    def _cancel_timers(self) -> None:
+        for handle in self._timers.values():
+            handle.cancel()
+        self._timers.clear()
+
+    def _schedule(self, user_id: str, key: ItemKey, delay: Optional[float] = None) -> None:
+        # Flush a window after the first update, however many follow
+        if (user_id, key) not in self._timers:
+            self._timers[user_id, key] = asyncio.get_running_loop().call_later(
+                self.window if delay is None else delay, self._flush_later, user_id, key
+            )
+
+    def _flush_later(self, user_id: str, key: ItemKey) -> None:
+        del self._timers[user_id, key]
+        task = asyncio.create_task(self._flush(lambda user, k: user == user_id and k == key))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _flush(self, selected: Callable[[str, ItemKey], bool]) -> List[Exception]:
+        """Write the selected parked data; return the errors of the writes that failed (and stay parked)."""
+        # One flush at a time, so two writes of the same item cannot overtake each other
+        if self._lock is None:
+            self._lock = asyncio.Lock()
+        async with self._lock:
+            writes = [(user_id, key, write) for user_id, items in list(self._pending.items())
+                      for key, write in list(items.items()) if selected(user_id, key)]
+            if not writes:
+                return []
+            token = _flushing.set(True)
+            try:
+                errors = await asyncio.gather(*(self._write(user_id, key, write)
+                                                for user_id, key, write in writes))
+            finally:
+                _flushing.reset(token)
+            return [error for error in errors if error is not None]
+
+    async def _write(self, user_id: str, key: ItemKey, write: PendingWrite) -> Optional[Exception]:
+        hobby_id, category_name, item_id = key
+        items = self._pending.get(user_id, {})
+        try:
+            result = await write.store(hobby_id, user_id, category_name, item_id, write.data)
+        except Exception as error:
+            # Keep it parked and visible, and try again later unless a newer submit already waits its turn
+            write.attempts += 1
+            delay = min(self.window * 2 ** write.attempts, MAX_RETRY_DELAY)
+            logger.exception(f"Coalesced write of item {item_id} failed, retrying in {delay:.1f}s")
+            metrics.coalesced_item_writes.labels("retried").inc()
+            if items.get(key) is write:
+                self._schedule(user_id, key, delay)
+            return error
+        if result is None:
+            logger.warning(f"Discarded the parked data of item {item_id}: it is no longer in '{category_name}'")
+        metrics.coalesced_item_writes.labels("written" if result is not None else "discarded").inc()
+        # If a newer submit replaced it meanwhile, that one waits its turn
+        if items.get(key) is write:
+            del items[key]
+            if not items:
+                self._pending.pop(user_id, None)
+        elif key in items:
+            self._schedule(user_id, key)
+        return None
+
+
+item_writes = ItemWriteCoalescer(settings.ITEM_WRITE_COALESCE_MS)
+
+
+def flushes_parked_writes(method):
+    """Write the ``user``'s parked item data before running a write of theirs."""
+    user_of = signature(method).bind_partial
+
+    @wraps(method)
+    async def wrapper(self, *args, **kwargs):
+        await item_writes.flush_user(str(user_of(self, *args, **kwargs).arguments["user"].id))
+        return await method(self, *args, **kwargs)
+    return wrapper
@@ -0,0 +1,277 @@
+"""Columnar view of a category's items, for stats, filtering and sorting.
+
+``ItemColumns`` is built straight from the stored item documents, without
+building models, and holds one NumPy array per schema field:
+
+- number: float64, NaN where missing;
+- boolean: a bool array plus a mask of the items that have the field;
+- date: datetime64[D], NaT where missing or unparsable;
+- text: dictionary encoded, int32 codes into a sorted list of the distinct
+  values, -1 where missing. As the dictionary is sorted, comparing codes
+  compares the strings.
+
+A value of the wrong type counts as missing. Missing values never match a
+filter except ``ne`` (as in MongoDB) and sort last in either direction.
+
+NumPy is imported by this module only, which the service imports on first
+use, so it stays out of application startup.
+"""
+from typing import Any, Dict, List, Optional, Sequence
+
+import numpy as np
+
+from ..models.hobby import CategorySchema, FieldType
+
+FILTER_OPS = ("eq", "ne", "lt", "lte", "gt", "gte")
+TOP_VALUES = 10
+
+
+class FieldColumn:
+    """One field of every item; subclasses hold the encoded values."""
+
+    field_type: FieldType
+
+    def __init__(self, name: str, present: np.ndarray):
+        self.name = name
+        self.present = present
+
+    @property
+    def missing(self) -> int:
+        return int(len(self.present) - np.count_nonzero(self.present))
+
+    def stats(self) -> Dict[str, Any]:
+        return {"field": self.name, "type": self.field_type.value,
+                "count": int(np.count_nonzero(self.present)), "missing": self.missing}
+
+    def parse(self, value: str) -> Any:
+        """Turn a filter value from a query string into this column's type; raises ValueError."""
+        raise NotImplementedError
+
+    def compare(self, op: str, value: Any) -> np.ndarray:
+        """Mask of the items whose value compares ``op`` to ``value`` (already parsed)."""
+        raise NotImplementedError
+
+    def sort_key(self, descending: bool) -> np.ndarray:
+        """Key that sorts ascending into the requested order (missing values are handled by the caller)."""
+        raise NotImplementedError
+
+
+def _compare(values: np.ndarray, op: str, value: Any) -> np.ndarray:
+    if op == "eq":
+        return values == value
+    if op == "ne":
+        return values != value
+    if op == "lt":
+        return values < value
+    if op == "lte":
+        return values <= value
+    if op == "gt":
+        return values > value
+    return values >= value
+
+
+class NumberColumn(FieldColumn):
+    field_type = FieldType.NUMBER
+
+    def __init__(self, name: str, raw: Sequence[Any]):
+        values = np.fromiter(
+            (v if isinstance(v, (int, float)) and not isinstance(v, bool) else np.nan for v in raw),
+            dtype=np.float64, count=len(raw)
+        )
+        super().__init__(name, ~np.isnan(values))
+        self.values = values
+
+    def stats(self) -> Dict[str, Any]:
+        stats = super().stats()
+        present = self.values[self.present]
+        if len(present):
+            stats.update(min=float(present.min()), max=float(present.max()), sum=float(present.sum()),
+                         mean=float(present.mean()), median=float(np.median(present)))
+        return stats
+
+    def parse(self, value: str) -> float:
+        return float(value)
+
+    def compare(self, op: str, value: float) -> np.ndarray:
+        matches = _compare(self.values, op, value)
+        return matches | ~self.present if op == "ne" else matches & self.present
+
+    def sort_key(self, descending: bool) -> np.ndarray:
+        return -self.values if descending else self.values
+
+
+class BooleanColumn(FieldColumn):
+    field_type = FieldType.BOOLEAN
+
+    def __init__(self, name: str, raw: Sequence[Any]):
+        super().__init__(name, np.fromiter((isinstance(v, bool) for v in raw), dtype=bool, count=len(raw)))
+        self.values = np.fromiter((v is True for v in raw), dtype=bool, count=len(raw))
+
+    def stats(self) -> Dict[str, Any]:
+        stats = super().stats()
+        true = int(np.count_nonzero(self.values))
+        stats.update(true=true, false=stats["count"] - true)
+        return stats
+
+    def parse(self, value: str) -> bool:
+        if value.lower() in ("true", "1"):
+            return True
+        if value.lower() in ("false", "0"):
+            return False
+        raise ValueError(f"'{value}' is not a boolean")
+
+    def compare(self, op: str, value: bool) -> np.ndarray:
+        matches = _compare(self.values, op, value)
+        return matches | ~self.present if op == "ne" else matches & self.present
+
+    def sort_key(self, descending: bool) -> np.ndarray:
+        key = self.values.astype(np.int8)
+        return -key if descending else key
+
+
+class DateColumn(FieldColumn):
+    field_type = FieldType.DATE
+
+    def __init__(self, name: str, raw: Sequence[Any]):
+        # Dates are ISO strings; the day is the first ten characters, with or without a time
+        days = [v[:10] if isinstance(v, str) else None for v in raw]
+        try:
+            values = np.array(days, dtype="datetime64[D]")
+        except ValueError:
+            values = np.array([_parse_day(day) for day in days], dtype="datetime64[D]")
+        super().__init__(name, ~np.isnat(values))
+        self.values = values
+
+    def stats(self) -> Dict[str, Any]:
+        stats = super().stats()
+        present = self.values[self.present]
+        if len(present):
+            stats.update(min=str(present.min()), max=str(present.max()))
+        return stats
+
+    def parse(self, value: str) -> np.datetime64:
+        day = _parse_day(value[:10])
+        if np.isnat(day):
+            raise ValueError(f"'{value}' is not a date")
+        return day
+
+    def compare(self, op: str, value: np.datetime64) -> np.ndarray:
+        matches = _compare(self.values, op, value)
+        return matches | ~self.present if op == "ne" else matches & self.present
+
+    def sort_key(self, descending: bool) -> np.ndarray:
+        key = self.values.astype(np.int64)  # NaT is only ever missing, which the caller sorts last
+        return -key if descending else key
+
+
+def _parse_day(day: Optional[str]) -> np.datetime64:
+    try:
+        return np.datetime64(day, "D")
+    except (TypeError, ValueError):
+        return np.datetime64("NaT", "D")
+
+
+class TextColumn(FieldColumn):
+    field_type = FieldType.TEXT
+
+    def __init__(self, name: str, raw: Sequence[Any]):
+        first_seen: Dict[str, int] = {}
+        seen = np.fromiter(
+            (first_seen.setdefault(v, len(first_seen)) if isinstance(v, str) else -1 for v in raw),
+            dtype=np.int32, count=len(raw)
+        )
+        # Renumber so codes follow the sorted order of the values
+        self.categories: List[str] = sorted(first_seen)
+        remap = np.empty(len(first_seen) + 1, dtype=np.int32)
+        remap[-1] = -1
+        remap[[first_seen[v] for v in self.categories]] = np.arange(len(self.categories), dtype=np.int32)
+        self.codes = remap[seen]
+        super().__init__(name, self.codes >= 0)
+
+    def stats(self) -> Dict[str, Any]:
+        stats = super().stats()
+        counts = np.bincount(self.codes[self.present], minlength=len(self.categories))
+        top = np.argsort(-counts, kind="stable")[:TOP_VALUES]
+        stats.update(distinct=len(self.categories),
+                     top=[{"value": self.categories[code], "count": int(counts[code])}
+                          for code in top if counts[code]])
+        return stats
+
+    def parse(self, value: str) -> str:
+        return value
+
+    def compare(self, op: str, value: str) -> np.ndarray:
+        # Where ``value`` falls in the sorted dictionary turns every op into a code comparison
+        left = int(np.searchsorted(self.categories, value, side="left"))
+        found = left < len(self.categories) and self.categories[left] == value
+        if op in ("eq", "ne"):
+            matches = self.codes == left if found else np.zeros(len(self.codes), dtype=bool)
+            return ~matches if op == "ne" else matches
+        if op == "lt":
+            matches = self.codes < left
+        elif op == "lte":
+            matches = self.codes < left + found
+        elif op == "gt":
+            matches = self.codes >= left + found
+        else:
+            matches = self.codes >= left
+        return matches & self.present
+
+    def sort_key(self, descending: bool) -> np.ndarray:
+        return -self.codes if descending else self.codes
+
+
+COLUMN_TYPES = {
+    FieldType.NUMBER: NumberColumn,
+    FieldType.BOOLEAN: BooleanColumn,
+    FieldType.DATE: DateColumn,
+    FieldType.TEXT: TextColumn,
+}
+
+
+class ItemColumns:
+    """The items of one category, one array per field; positions index ``items``."""
+
+    def __init__(self, items: List[dict], columns: Dict[str, FieldColumn]):
+        self.items = items
+        self.columns = columns
+
+    def __len__(self) -> int:
+        return len(self.items)
+
+    @classmethod
+    def from_documents(cls, schema: CategorySchema, items: Sequence[dict]) -> "ItemColumns":
+        """Encode raw item documents (``{"id", "data", ...}``) field by field."""
+        datas = [item.get("data") or {} for item in items]
+        columns = {}
+        for field_def in schema.fields:
+            name = field_def.name
+            columns[name] = COLUMN_TYPES[FieldType(field_def.field_type)](name, [d.get(name) for d in datas])
+        return cls(list(items), columns)
+
+    def column(self, name: str) -> FieldColumn:
+        """The column of a schema field; raises KeyError for any other name."""
+        return self.columns[name]
+
+    def stats(self) -> List[Dict[str, Any]]:
+        """Summary statistics of every field, in schema order."""
+        return [column.stats() for column in self.columns.values()]
+
+    def mask(self, filters: Sequence[tuple]) -> np.ndarray:
+        """Items matching every ``(field, op, parsed value)`` filter."""
+        matches = np.ones(len(self.items), dtype=bool)
+        for name, op, value in filters:
+            matches &= self.columns[name].compare(op, value)
+        return matches
+
+    def order(self, name: Optional[str] = None, descending: bool = False,
+              mask: Optional[np.ndarray] = None) -> np.ndarray:
+        """Positions of the (masked) items sorted by a field, missing values last; stored order if no field."""
+        positions = np.arange(len(self.items)) if mask is None else np.flatnonzero(mask)
+        if name is None:
+            return positions[::-1] if descending else positions
+        column = self.columns[name]
+        key = column.sort_key(descending)[positions]
+        missing = ~column.present[positions]
+        # lexsort is stable and sorts by its last key first
+        return positions[np.lexsort((key, missing))]
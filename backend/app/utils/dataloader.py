@@ -0,0 +1,65 @@
+"""Per-tick batching of key lookups (DataLoader style).
+
+``load(key)`` calls made by concurrently running requests during one event
+loop iteration are collected and resolved by a single call to the batch
+function on the next iteration, e.g. one ``{"_id": {"$in": [...]}}`` query
+instead of one ``find_one`` per request. Keys requested twice in a batch
+are fetched once.
+"""
+import asyncio
+from typing import Awaitable, Callable, Dict, Generic, Hashable, List, Optional, TypeVar
+
+from . import metrics
+
+K = TypeVar("K", bound=Hashable)
+V = TypeVar("V")
+
+
+class DataLoader(Generic[K, V]):
+    """Collects keys for one loop tick and fetches them with ``batch_fn``.
+
+    ``batch_fn`` receives the distinct keys and returns a mapping; keys
+    missing from it resolve to None. If it raises, every waiter gets the
+    error.
+    """
+
+    def __init__(self, batch_fn: Callable[[List[K]], Awaitable[Dict[K, V]]], name: str,
+                 max_batch_size: int = 1000):
+        self.batch_fn = batch_fn
+        self.max_batch_size = max_batch_size
+        self._pending: Dict[K, asyncio.Future] = {}
+        self._batch_sizes = metrics.dataloader_batch_keys.labels(name)
+
+    async def load(self, key: K) -> Optional[V]:
+        future = self._pending.get(key)
+        if future is None:
+            loop = asyncio.get_running_loop()
+            if not self._pending:
+                loop.call_soon(self._dispatch)
+            future = self._pending[key] = loop.create_future()
+            if len(self._pending) >= self.max_batch_size:
+                self._dispatch()
+        # Shielded so one cancelled request does not cancel the key for the others
+        return await asyncio.shield(future)
+
+    def _dispatch(self) -> None:
+        if not self._pending:
+            return
+        batch, self._pending = self._pending, {}
+        self._batch_sizes.observe(len(batch))
+        asyncio.ensure_future(self._resolve(batch))
+
+    async def _resolve(self, batch: Dict[K, asyncio.Future]) -> None:
+        try:
+            values = await self.batch_fn(list(batch))
+        except BaseException as e:
+            for future in batch.values():
+                if not future.done():
+                    future.set_exception(e)
+                    future.exception()  # Waiters may all be gone
+            if not isinstance(e, Exception):
+                raise
+            return
+        for key, future in batch.items():
+            if not future.done():
+                future.set_result(values.get(key))
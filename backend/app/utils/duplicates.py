@@ -0,0 +1,155 @@
+"""Likely duplicate items: MinHash signatures of item text, indexed by LSH band.
+
+An item's text is the values of its category's text fields, lowercased
+with whitespace collapsed; its shingles are the overlapping runs of
+``SHINGLE_SIZE`` characters. Two items are as similar as the Jaccard
+index of their shingle sets (shared over all), so "Acme Latex" and
+"Acme Latx" are close while sharing a brand alone is not.
+
+A MinHash signature (the minimum of ``NUM_HASHES`` hash functions over
+the shingles) agrees with another in about that fraction of positions.
+Cut in ``BANDS`` bands, each band is hashed to one key, and items that
+share a band key are candidates: with four rows a band, pairs from about
+0.5 similar on are very likely to share one, far less similar pairs
+rarely do. The keys are stored per item in ``item_signatures`` under a
+multikey index, so finding the candidates of one item is one indexed
+lookup, whatever the size of its category, instead of a comparison with
+every item. Candidates are then checked against the exact similarity.
+
+Item writes keep the index current (``HobbyWriteEffects`` holds a
+``DuplicateIndex`` over the container's ``SignatureRepository``); a failed
+index write is logged, and the category's duplicates listing repairs it.
+"""
+import logging
+import re
+from functools import lru_cache
+from hashlib import blake2b
+from typing import TYPE_CHECKING, Dict, Iterable, List, Optional, Set
+
+from ..config import settings
+
+if TYPE_CHECKING:
+    from ..repositories.signature_repository import SignatureRepository
+
+logger = logging.getLogger(__name__)
+
+DUPLICATES_HEADER = "X-Possible-Duplicates"
+DUPLICATES_HEADER_LIMIT = 5  # Ids in the header; the duplicates listing has the rest
+SHINGLE_SIZE = 3
+NUM_HASHES = 64
+BANDS = 16
+_PRIME = (1 << 31) - 1  # Hash values and coefficients stay below it, so products fit in 64 bits
+_WHITESPACE = re.compile(r"\s+")
+
+
+def text_fields(category: dict) -> List[str]:
+    """Names of the text fields of a raw category document."""
+    fields = (category.get("schema") or {}).get("fields", [])
+    return [field["name"] for field in fields if field.get("field_type") == "text"]
+
+
+def item_text(data: Optional[dict], fields: List[str]) -> str:
+    """The text an item is compared by: its text field values, normalized."""
+    values = [(data or {}).get(field) for field in fields]
+    text = " ".join(value for value in values if isinstance(value, str))
+    return _WHITESPACE.sub(" ", text).strip().lower()
+
+
+def digest(text: str) -> str:
+    """Short fingerprint of an item's text, to tell when its signature is stale."""
+    return blake2b(text.encode(), digest_size=8).hexdigest()
+
+
+def shingles(text: str) -> Set[str]:
+    if len(text) <= SHINGLE_SIZE:
+        return {text} if text else set()
+    return {text[i:i + SHINGLE_SIZE] for i in range(len(text) - SHINGLE_SIZE + 1)}
+
+
+def similarity(first: Set[str], second: Set[str]) -> float:
+    """Jaccard index of two shingle sets."""
+    if not first or not second:
+        return 0.0
+    return len(first & second) / len(first | second)
+
+
+@lru_cache(maxsize=None)
+def _coefficients():
+    import numpy as np
+
+    # Fixed seed: band keys must agree across processes and restarts
+    rng = np.random.default_rng(20240613)
+    return (rng.integers(1, _PRIME, NUM_HASHES, dtype=np.uint64),
+            rng.integers(0, _PRIME, NUM_HASHES, dtype=np.uint64))
+
+
+def band_keys(grams: Set[str]) -> List[int]:
+    """The LSH band keys of a shingle set (empty for no text)."""
+    import numpy as np  # Loaded on the first item write, not at startup
+
+    if not grams:
+        return []
+    hashes = np.array([int.from_bytes(blake2b(gram.encode(), digest_size=8).digest(), "big") % _PRIME
+                       for gram in grams], dtype=np.uint64)
+    a, b = _coefficients()
+    minhash = ((a[:, None] * hashes[None, :] + b[:, None]) % _PRIME).min(axis=1)
+    rows = NUM_HASHES // BANDS
+    return [
+        # Seven bytes keep the keys within MongoDB's signed 64-bit integers
+        int.from_bytes(blake2b(bytes([band]) + minhash[band * rows:(band + 1) * rows].tobytes(),
+                               digest_size=7).digest(), "big")
+        for band in range(BANDS)
+    ]
+
+
+def signature(user_id: str, hobby_id: str, category: str, item_id: str, text: str) -> dict:
+    """The ``item_signatures`` document of an item."""
+    return {"user_id": user_id, "hobby_id": hobby_id, "category": category, "item_id": item_id,
+            "digest": digest(text), "bands": band_keys(shingles(text))}
+
+
+def band_candidates(signatures: Iterable[dict]) -> Dict[str, Set[str]]:
+    """For every item id, the ids of the items sharing a band key with it."""
+    by_key: Dict[int, List[str]] = {}
+    for doc in signatures:
+        for key in doc.get("bands", []):
+            by_key.setdefault(key, []).append(doc["item_id"])
+    candidates: Dict[str, Set[str]] = {}
+    for item_ids in by_key.values():
+        for item_id in item_ids:
+            candidates.setdefault(item_id, set()).update(other for other in item_ids if other != item_id)
+    return candidates
+
+
+class DuplicateIndex:
+    """Keeps the item signatures of every category in step with its items."""
+
+    def __init__(self, repository: "SignatureRepository"):
+        self.repository = repository
+
+    async def index(self, user_id: str, hobby_id: str, category: dict, items: Iterable[dict]) -> None:
+        """Store the signatures of new or changed items of a raw category document."""
+        if not settings.DUPLICATES_ENABLED:
+            return
+        fields = text_fields(category)
+        try:
+            await self.repository.upsert_many([
+                signature(user_id, hobby_id, category["name"], item["id"], item_text(item.get("data"), fields))
+                for item in items
+            ])
+        except Exception:
+            logger.exception(f"Could not index the items of category '{category['name']}'")
+
+    async def rename(self, user_id: str, hobby_id: str, old: str, new: str) -> None:
+        try:
+            await self.repository.rename_category(user_id, hobby_id, old, new)
+        except Exception:
+            logger.exception(f"Could not rename the signatures of category '{old}'")
+
+    async def forget(self, user_id: str, hobby_id: str, category: Optional[str] = None,
+                     item_ids: Optional[List[str]] = None) -> None:
+        """Drop the signatures of deleted items, of a deleted category or of every category of a hobby."""
+        try:
+            await self.repository.delete(user_id, hobby_id, category, item_ids)
+        except Exception:
+            logger.exception(f"Could not delete the signatures of hobby {hobby_id}")
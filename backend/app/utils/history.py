@@ -0,0 +1,132 @@
+"""Write-behind buffer for the item change history.
+
+Repository writes append their history entries to an in-memory buffer
+instead of writing them one by one; a background task stores the buffer
+with one ``insert_many`` every ``HISTORY_FLUSH_SECONDS``, or as soon as
+``HISTORY_BATCH_SIZE`` entries are waiting. Once ``HISTORY_MAX_PENDING``
+entries are waiting, ``record`` blocks until a flush makes room, so a slow
+database slows writers down rather than growing the buffer without bound.
+Entries leave the buffer only once stored, so readers find them in one
+or the other throughout, and a batch that fails to insert stays buffered
+and is retried by the next flush. The buffer is flushed on shutdown;
+entries still buffered when a process dies (or that still fail then) are
+lost. Entries are stored through the ``HistoryRepository`` of the app's
+``Container``, which ``lifespan`` passes to ``start``.
+"""
+import asyncio
+import logging
+from typing import TYPE_CHECKING, Callable, List, Optional
+
+from ..config import settings
+from . import metrics
+
+if TYPE_CHECKING:
+    from ..dependencies import Container
+    from ..repositories.history_repository import HistoryRepository
+
+logger = logging.getLogger(__name__)
+
+
+class HistoryWriter:
+    """Buffers history entries and stores them in batches."""
+
+    def __init__(self, batch_size: int, flush_interval: float, max_pending: int):
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_pending = max_pending
+        self.container: Optional["Container"] = None
+        self._buffer: List[dict] = []
+        self._task: Optional[asyncio.Task] = None
+        self._wake: Optional[asyncio.Event] = None
+        self._room: Optional[asyncio.Condition] = None
+        self._flushing: Optional[asyncio.Lock] = None
+        self._stopping = False
+
+    def repository(self) -> "HistoryRepository":
+        return self.container.history_repository
+
+    @property
+    def pending(self) -> int:
+        return len(self._buffer)
+
+    def start(self, container: "Container") -> None:
+        """Start the background task; entries are stored through ``container``."""
+        if self._task is not None:
+            return
+        self.container = container
+        self._stopping = False
+        self._wake = asyncio.Event()
+        self._room = asyncio.Condition()
+        self._flushing = asyncio.Lock()
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        """Flush what is buffered and stop the background task."""
+        if self._task is None:
+            return
+        self._stopping = True
+        self._wake.set()
+        await self._task
+        self._task = None
+        # Anything appended by writers released by the last flush, or left by a failed one
+        await self._write(self._buffer[:])
+        self._buffer.clear()
+
+    async def record(self, entry: dict) -> None:
+        """Queue an entry; waits while the buffer is full. Writes it directly when not started."""
+        if self._task is None:
+            await self._write([entry])
+            return
+        if len(self._buffer) >= self.max_pending:
+            metrics.history_backpressure_waits.labels().inc()
+            async with self._room:
+                self._wake.set()
+                await self._room.wait_for(lambda: len(self._buffer) < self.max_pending)
+        self._buffer.append(entry)
+        if len(self._buffer) >= self.batch_size:
+            self._wake.set()
+
+    def buffered(self, match: Callable[[dict], bool]) -> List[dict]:
+        """Entries not stored yet that ``match``, so readers can see their own writes."""
+        return [entry for entry in self._buffer if match(entry)]
+
+    async def flush(self) -> None:
+        """Store everything buffered, ``batch_size`` entries per insert; stop at a failed insert."""
+        async with self._flushing:
+            while self._buffer:
+                batch = self._buffer[:self.batch_size]
+                if not await self._write(batch, retry=True):
+                    return
+                del self._buffer[:len(batch)]  # Only appended to meanwhile, so still the head
+                async with self._room:
+                    self._room.notify_all()
+
+    async def _write(self, batch: List[dict], retry: bool = False) -> bool:
+        if not batch:
+            return True
+        try:
+            await self.repository().insert_entries(batch)
+            metrics.history_entries.labels("written").inc(len(batch))
+            return True
+        except Exception:
+            if retry:
+                logger.exception(f"Could not store {len(batch)} history entries, retrying with the next flush")
+                metrics.history_entries.labels("retried").inc(len(batch))
+            else:
+                logger.exception(f"Dropped {len(batch)} history entries")
+                metrics.history_entries.labels("dropped").inc(len(batch))
+            return False
+
+    async def _run(self) -> None:
+        while not self._stopping:
+            try:
+                await asyncio.wait_for(self._wake.wait(), self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wake.clear()
+            await self.flush()
+        await self.flush()
+
+
+history_writer = HistoryWriter(settings.HISTORY_BATCH_SIZE, settings.HISTORY_FLUSH_SECONDS,
+                               settings.HISTORY_MAX_PENDING)
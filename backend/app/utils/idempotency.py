@@ -0,0 +1,140 @@
+"""Idempotency keys for the creating POST routes.
+
+A client that sends ``Idempotency-Key: <unique value>`` with a create can
+retry it safely: the first response is stored for ``IDEMPOTENCY_TTL_HOURS``
+in the ``idempotency_keys`` collection (and the most recent ones in a small
+in-process LRU cache), and a retry with the same key gets that response
+back without running the route again. Keys are per user.
+
+While the first request runs, its key holds a claim document, so a
+duplicate arriving at another process gets 409 rather than running twice;
+a duplicate in the same process waits for the original and gets its
+response. A claim left by a crashed process lapses after
+``IDEMPOTENCY_LOCK_SECONDS``. Server errors (5xx) are not stored, so the
+retry runs again.
+"""
+import asyncio
+import re
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from typing import Dict, List, NamedTuple, Optional
+
+from ..config import settings
+
+MAX_KEY_LENGTH = 255
+
+IDEMPOTENT_ROUTES = [re.compile(pattern) for pattern in (
+    r"^/api/hobbies$",
+    r"^/api/hobbies/[^/]+/clone$",
+    r"^/api/hobbies/[^/]+/categories$",
+    r"^/api/hobbies/[^/]+/categories/[^/]+/items(/copy|/move)?$",
+    r"^/api/hobbies/[^/]+/categories/[^/]+/items/[^/]+/increment$",
+)]
+
+
+def is_idempotent_route(method: str, path: str) -> bool:
+    return method == "POST" and any(route.match(path) for route in IDEMPOTENT_ROUTES)
+
+
+class StoredResponse(NamedTuple):
+    """The first response to a key, and a fingerprint of the request it answered."""
+    fingerprint: str
+    status: int
+    headers: List[List[str]]
+    body: bytes
+    expires_at: datetime
+
+
+class IdempotencyStore:
+    """The stored responses, their in-process cache and the requests in flight."""
+
+    def __init__(self, cache_size: int, ttl_hours: float, lock_seconds: float):
+        self.cache_size = cache_size
+        self.ttl = timedelta(hours=ttl_hours)
+        self.lock = timedelta(seconds=lock_seconds)
+        self._cache: "OrderedDict[str, StoredResponse]" = OrderedDict()
+        self._in_flight: Dict[str, asyncio.Future] = {}
+
+    @staticmethod
+    def collection():
+        from ..database import get_database
+        return get_database().idempotency_keys
+
+    def cached(self, key: str) -> Optional[StoredResponse]:
+        stored = self._cache.get(key)
+        if stored is None:
+            return None
+        if stored.expires_at <= datetime.utcnow():
+            del self._cache[key]
+            return None
+        self._cache.move_to_end(key)
+        return stored
+
+    def _remember(self, key: str, stored: StoredResponse) -> None:
+        self._cache[key] = stored
+        self._cache.move_to_end(key)
+        while len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+
+    def in_flight(self, key: str) -> Optional[asyncio.Future]:
+        return self._in_flight.get(key)
+
+    def begin(self, key: str) -> None:
+        """Mark ``key`` as running here; same-process duplicates wait for ``end``."""
+        self._in_flight[key] = asyncio.get_running_loop().create_future()
+
+    def end(self, key: str) -> None:
+        flight = self._in_flight.pop(key, None)
+        if flight is not None and not flight.done():
+            flight.set_result(None)
+
+    async def claim(self, key: str, fingerprint: str) -> Optional[dict]:
+        """Claim ``key`` for a new request; if someone already has, return their document."""
+        from pymongo.errors import DuplicateKeyError
+
+        now = datetime.utcnow()
+        claim = {"fingerprint": fingerprint, "state": "running", "expires_at": now + self.lock}
+        try:
+            await self.collection().insert_one({"_id": key, **claim})
+            return None
+        except DuplicateKeyError:
+            pass
+        # A lapsed claim, or a stored response the TTL monitor has not removed yet
+        taken = await self.collection().find_one_and_update(
+            {"_id": key, "expires_at": {"$lt": now}},
+            {"$set": claim, "$unset": {"status": "", "headers": "", "body": ""}}
+        )
+        if taken is not None:
+            return None
+        existing = await self.collection().find_one({"_id": key})
+        if existing is None:  # Removed in between
+            return await self.claim(key, fingerprint)
+        if existing["state"] == "done":
+            self._remember(key, self._from_document(existing))
+        return existing
+
+    async def complete(self, key: str, fingerprint: str, status: int, headers: List[List[str]],
+                       body: bytes) -> None:
+        """Store the response to a claimed key."""
+        stored = StoredResponse(fingerprint, status, headers, body, datetime.utcnow() + self.ttl)
+        await self.collection().update_one({"_id": key}, {"$set": {
+            "state": "done",
+            "status": status,
+            "headers": headers,
+            "body": body,
+            "expires_at": stored.expires_at
+        }})
+        self._remember(key, stored)
+
+    async def release(self, key: str) -> None:
+        """Drop the claim of a request that failed, so a retry runs again."""
+        await self.collection().delete_one({"_id": key, "state": "running"})
+
+    @staticmethod
+    def _from_document(document: dict) -> StoredResponse:
+        return StoredResponse(document["fingerprint"], document["status"], document["headers"],
+                              bytes(document["body"]), document["expires_at"])
+
+
+idempotency_store = IdempotencyStore(settings.IDEMPOTENCY_CACHE_SIZE, settings.IDEMPOTENCY_TTL_HOURS,
+                                     settings.IDEMPOTENCY_LOCK_SECONDS)
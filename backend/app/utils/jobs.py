@@ -0,0 +1,188 @@
+"""In-process background jobs, persisted in the ``jobs`` collection.
+
+A request submits a job (a registered ``kind`` plus JSON ``params``) and
+returns at once. Every process runs ``JOB_WORKERS`` worker tasks that claim
+queued jobs from the database, so any process may run any job and queued
+jobs survive restarts. A running job holds a lease that its worker keeps
+renewing; if the process dies, the lease runs out and another worker runs
+the job again (at most ``JOB_MAX_ATTEMPTS`` times), so handlers must be
+safe to re-run: a checkpoint passed to ``progress`` is saved with the job
+and is in ``job.state`` when the next attempt starts. Handlers report
+progress through their ``JobContext``, which is also where a cancellation
+request reaches them. Handlers take their repositories and services from
+``context.container``, the app's ``Container``, which ``lifespan`` passes
+to ``start``.
+"""
+import asyncio
+import logging
+import os
+import socket
+from typing import TYPE_CHECKING, Awaitable, Callable, Dict, List, Optional
+from uuid import uuid4
+
+from ..config import settings
+from ..models.job import Job, JobStatus
+from . import metrics
+
+if TYPE_CHECKING:
+    from ..dependencies import Container
+    from ..repositories.job_repository import JobRepository
+
+logger = logging.getLogger(__name__)
+
+JobHandler = Callable[["JobContext"], Awaitable[Optional[dict]]]
+
+# kind -> handler; register with @job_handler("kind")
+JOB_HANDLERS: Dict[str, JobHandler] = {}
+
+
+def job_handler(kind: str) -> Callable[[JobHandler], JobHandler]:
+    """Decorator: run ``fn(context)`` for jobs of ``kind``; its return value is the job's result."""
+    def register(fn: JobHandler) -> JobHandler:
+        JOB_HANDLERS[kind] = fn
+        return fn
+    return register
+
+
+class JobCancelled(Exception):
+    """The job was cancelled (or taken over by another worker) and should stop."""
+
+
+class JobContext:
+    """What a handler gets: the job, the app's container and a way to report progress."""
+
+    def __init__(self, job: Job, queue: "JobQueue", container: "Container"):
+        self.job = job
+        self.container = container
+        self._queue = queue
+
+    @property
+    def params(self) -> dict:
+        return self.job.params
+
+    @property
+    def state(self) -> dict:
+        return self.job.state
+
+    async def progress(self, fraction: float, message: Optional[str] = None,
+                       state: Optional[dict] = None) -> None:
+        """Record progress in [0, 1] and optionally a checkpoint; raises JobCancelled if the job should stop."""
+        if state is not None:
+            self.job.state = state
+        cancel = await self._queue.repository().report_progress(
+            self.job.id, self._queue.worker_id, min(max(fraction, 0.0), 1.0), message,
+            self._queue.lease_seconds, state
+        )
+        if cancel is None or cancel:
+            raise JobCancelled()
+
+
+class JobQueue:
+    """Runs up to ``concurrency`` jobs at a time in this process."""
+
+    def __init__(self, concurrency: int, poll_interval: float, lease_seconds: float, max_attempts: int):
+        self.concurrency = concurrency
+        self.poll_interval = poll_interval
+        self.lease_seconds = lease_seconds
+        self.max_attempts = max_attempts
+        self.worker_id = f"{socket.gethostname()}:{os.getpid()}:{uuid4().hex[:8]}"
+        self.container: Optional["Container"] = None
+        self._tasks: List[asyncio.Task] = []
+        self._running: Dict[object, asyncio.Task] = {}
+        self._wake: Optional[asyncio.Event] = None
+        self._stopping = False
+
+    def repository(self) -> "JobRepository":
+        return self.container.job_repository
+
+    @property
+    def running(self) -> int:
+        return len(self._running)
+
+    def start(self, container: "Container") -> None:
+        """Start the workers; jobs and their handlers use ``container``."""
+        if self._tasks:
+            return
+        self.container = container
+        self._stopping = False
+        self._wake = asyncio.Event()
+        self._tasks = [asyncio.create_task(self._work()) for _ in range(self.concurrency)]
+        self._tasks.append(asyncio.create_task(self._heartbeat()))
+
+    async def stop(self) -> None:
+        """Stop the workers; jobs still running go back to the queue for another process."""
+        self._stopping = True
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    def notify(self) -> None:
+        """Wake an idle worker now instead of at its next poll (after a submit)."""
+        if self._wake is not None:
+            self._wake.set()
+
+    async def _work(self) -> None:
+        while True:
+            try:
+                job = await self.repository().claim_job(self.worker_id, self.lease_seconds)
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.exception("Could not claim a job")
+                job = None
+            if job is None:
+                self._wake.clear()
+                try:
+                    await asyncio.wait_for(self._wake.wait(), self.poll_interval)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+            await self._run(job)
+
+    async def _run(self, job: Job) -> None:
+        repository = self.repository()
+        handler = JOB_HANDLERS.get(job.kind)
+        if handler is None or job.attempts > self.max_attempts:
+            error = f"Unknown job kind '{job.kind}'" if handler is None else "Job was interrupted too many times"
+            await repository.finish_job(job.id, self.worker_id, JobStatus.FAILED, error=error)
+            metrics.jobs_finished.labels(job.kind, JobStatus.FAILED.value).inc()
+            return
+
+        task = asyncio.create_task(handler(JobContext(job, self, self.container)))
+        self._running[job.id] = task
+        try:
+            result = await task
+            status, error = JobStatus.SUCCEEDED, None
+        except (JobCancelled, asyncio.CancelledError):
+            if self._stopping:
+                await asyncio.shield(repository.release_job(job.id, self.worker_id))
+                raise
+            result, status, error = None, JobStatus.CANCELLED, None
+        except Exception as e:
+            logger.exception(f"Job {job.id} ({job.kind}) failed")
+            error = getattr(e, "detail", None) or str(e) or type(e).__name__  # HTTPException from a service
+            result, status = None, JobStatus.FAILED
+        finally:
+            self._running.pop(job.id, None)
+        await repository.finish_job(job.id, self.worker_id, status, result=result, error=error)
+        metrics.jobs_finished.labels(job.kind, status.value).inc()
+
+    async def _heartbeat(self) -> None:
+        """Renew the leases of running jobs and stop the ones asked to cancel."""
+        while True:
+            await asyncio.sleep(self.lease_seconds / 3)
+            try:
+                held = await self.repository().renew_leases(list(self._running), self.worker_id, self.lease_seconds)
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.exception("Could not renew job leases")
+                continue
+            for job_id, task in list(self._running.items()):
+                if held.get(job_id, True):  # Cancel requested, or the lease went to someone else
+                    task.cancel()
+
+
+job_queue = JobQueue(settings.JOB_WORKERS, settings.JOB_POLL_SECONDS, settings.JOB_LEASE_SECONDS,
+                     settings.JOB_MAX_ATTEMPTS)
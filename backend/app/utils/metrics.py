@@ -0,0 +1,278 @@
+"""In-process metrics in the Prometheus text exposition format.
+
+Metric children are bound to their label values once (``labels()`` memoises
+them), so recording is a dict lookup plus a few integer additions. All
+mutation happens on the event loop thread, which is why no locks are taken;
+producers on other threads (the Mongo command listener) hand their samples
+over through a deque instead of touching metrics directly.
+"""
+from bisect import bisect_left
+from collections import deque
+from typing import Callable, Deque, Dict, Iterable, List, Sequence, Tuple
+
+# Request latencies in seconds, from sub-millisecond cache hits to slow writes
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    if isinstance(value, int) or value.is_integer():
+        return str(int(value))
+    return repr(value)
+
+
+class CounterChild:
+    """A counter bound to one set of label values."""
+
+    __slots__ = ("value",)
+
+    def __init__(self):
+        self.value = 0.0
+
+    def inc(self, amount: float = 1.0) -> None:
+        self.value += amount
+
+
+class GaugeChild:
+    """A gauge bound to one set of label values."""
+
+    __slots__ = ("value",)
+
+    def __init__(self):
+        self.value = 0.0
+
+    def inc(self, amount: float = 1.0) -> None:
+        self.value += amount
+
+    def dec(self, amount: float = 1.0) -> None:
+        self.value -= amount
+
+    def set(self, value: float) -> None:
+        self.value = value
+
+
+class HistogramChild:
+    """A histogram bound to one set of label values.
+
+    Per-bucket (non-cumulative) counts are kept and summed at render time,
+    so ``observe`` touches a single slot.
+    """
+
+    __slots__ = ("buckets", "counts", "sum")
+
+    def __init__(self, buckets: Sequence[float]):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+
+    @property
+    def count(self) -> int:
+        return sum(self.counts)
+
+
+class Metric:
+    """Base class: a named family of children keyed by label values."""
+
+    type = "untyped"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._children: Dict[Tuple[str, ...], object] = {}
+
+    def _new_child(self):
+        raise NotImplementedError
+
+    def labels(self, *values: str):
+        """Return the child for ``values``, creating it on first use."""
+        child = self._children.get(values)
+        if child is None:
+            if len(values) != len(self.labelnames):
+                raise ValueError(f"{self.name} expects labels {self.labelnames}, got {values}")
+            child = self._children[values] = self._new_child()
+        return child
+
+    def samples(self) -> Iterable[Tuple[str, str, float]]:
+        """Yield ``(suffix, labels, value)`` for every child."""
+        for values, child in list(self._children.items()):
+            yield "", _format_labels(self.labelnames, values), child.value
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.type}"]
+        for suffix, labels, value in self.samples():
+            lines.append(f"{self.name}{suffix}{labels} {_format_value(value)}")
+        return lines
+
+
+class Counter(Metric):
+    type = "counter"
+
+    def _new_child(self) -> CounterChild:
+        return CounterChild()
+
+
+class Gauge(Metric):
+    type = "gauge"
+
+    def _new_child(self) -> GaugeChild:
+        return GaugeChild()
+
+
+class Histogram(Metric):
+    type = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                 buckets: Sequence[float] = DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def _new_child(self) -> HistogramChild:
+        return HistogramChild(self.buckets)
+
+    def samples(self) -> Iterable[Tuple[str, str, float]]:
+        for values, child in list(self._children.items()):
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), child.counts):
+                cumulative += count
+                le = f'le="{_format_value(bound)}"'
+                yield "_bucket", _format_labels(self.labelnames, values, le), cumulative
+            labels = _format_labels(self.labelnames, values)
+            yield "_sum", labels, child.sum
+            yield "_count", labels, cumulative
+
+
+class MetricsRegistry:
+    """Holds metrics and renders them for ``/metrics``."""
+
+    def __init__(self):
+        self._metrics: Dict[str, Metric] = {}
+        self._collectors: List[Callable[[], None]] = []
+
+    def register(self, metric: Metric) -> Metric:
+        if metric.name in self._metrics:
+            raise ValueError(f"Metric {metric.name} is already registered")
+        self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self.register(Counter(name, documentation, labelnames))
+
+    def gauge(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Gauge:
+        return self.register(Gauge(name, documentation, labelnames))
+
+    def histogram(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                  buckets: Sequence[float] = DEFAULT_BUCKETS) -> Histogram:
+        return self.register(Histogram(name, documentation, labelnames, buckets))
+
+    def get(self, name: str) -> Metric:
+        return self._metrics[name]
+
+    def add_collector(self, collector: Callable[[], None]) -> None:
+        """Run ``collector`` before every render (e.g. to drain queued samples)."""
+        self._collectors.append(collector)
+
+    def collect(self) -> None:
+        for collector in self._collectors:
+            collector()
+
+    def render(self) -> str:
+        self.collect()
+        lines: List[str] = []
+        for metric in self._metrics.values():
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+# Global registry and the application's metrics
+registry = MetricsRegistry()
+
+http_request_duration = registry.histogram(
+    "http_request_duration_seconds",
+    "HTTP request latency by route template, method and status code.",
+    ("method", "route", "status"),
+)
+http_requests_in_progress = registry.gauge(
+    "http_requests_in_progress",
+    "HTTP requests currently being handled.",
+    ("method",),
+)
+mongodb_command_duration = registry.histogram(
+    "mongodb_command_duration_seconds",
+    "MongoDB command latency by collection and command name.",
+    ("collection", "command"),
+)
+mongodb_command_failures = registry.counter(
+    "mongodb_command_failures_total",
+    "MongoDB commands that returned an error, by collection and command name.",
+    ("collection", "command"),
+)
+singleflight_calls = registry.counter(
+    "singleflight_calls_total",
+    "Coalesced reads: 'leader' calls hit the database, 'coalesced' calls shared a leader's result.",
+    ("group", "result"),
+)
+dataloader_batch_keys = registry.histogram(
+    "dataloader_batch_keys",
+    "Distinct keys resolved per batched lookup.",
+    ("loader",),
+    buckets=(1, 2, 4, 8, 16, 32, 64, 128, 256),
+)
+jobs_finished = registry.counter(
+    "jobs_finished_total",
+    "Background jobs run to an end in this process, by kind and final status.",
+    ("kind", "status"),
+)
+history_entries = registry.counter(
+    "history_entries_total",
+    "Item history entries flushed by the write-behind buffer: 'written', 'retried' after a failed insert, or 'dropped'.",
+    ("outcome",),
+)
+coalesced_item_writes = registry.counter(
+    "coalesced_item_writes_total",
+    "Coalesced item updates: 'merged' into a parked one; 'written', 'retried' after a failure, "
+    "'discarded' (item gone) or 'dropped' at shutdown once per window.",
+    ("outcome",),
+)
+activity_bucket_writes = registry.counter(
+    "activity_bucket_writes_total",
+    "Item activity buckets flushed: 'written', or after a failed write 'retried' with the next flush or 'dropped'.",
+    ("outcome",),
+)
+history_backpressure_waits = registry.counter(
+    "history_backpressure_waits_total",
+    "Writes that waited for the full history buffer to flush.",
+)
+
+# (collection, command, seconds, ok) samples queued by the Mongo command listener
+mongodb_command_samples: Deque[Tuple[str, str, float, bool]] = deque(maxlen=100_000)
+
+
+def record_mongodb_commands(samples: Deque[Tuple[str, str, float, bool]] = mongodb_command_samples) -> None:
+    """Fold queued command samples into the Mongo metrics. Call from the event loop."""
+    while samples:
+        collection, command, seconds, ok = samples.popleft()
+        mongodb_command_duration.labels(collection, command).observe(seconds)
+        if not ok:
+            mongodb_command_failures.labels(collection, command).inc()
+
+
+registry.add_collector(record_mongodb_commands)
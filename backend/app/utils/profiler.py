@@ -0,0 +1,243 @@
+"""Sampling profiler for individual requests.
+
+A background thread wakes every ``interval`` seconds and records the stack
+of the asyncio task serving the profiled request: the live thread stack when
+that task is running, or its chain of suspended coroutines (prefixed with
+``[await]``) while it waits on I/O. Samples are aggregated into collapsed
+stacks and can be exported for flamegraph.pl or speedscope.
+"""
+import asyncio
+import heapq
+import itertools
+import os
+import sys
+import threading
+import time
+import uuid
+from collections import Counter
+from datetime import datetime
+from types import CodeType, FrameType
+from typing import Callable, Dict, List, Optional, Tuple
+
+from ..config import settings
+
+FORMATS = ("collapsed", "speedscope")
+AWAIT_MARKER = "[await]"
+
+Stack = Tuple[str, ...]
+
+
+def _frame_name(code: CodeType) -> str:
+    filename = code.co_filename
+    for root in sys.path:
+        if root and filename.startswith(root):
+            filename = os.path.relpath(filename, root)
+            break
+    # ';' separates frames in the collapsed format
+    return f"{code.co_qualname} ({filename}:{code.co_firstlineno})".replace(";", ":")
+
+
+def _coroutine_codes(awaitable) -> List[CodeType]:
+    """Code objects of a suspended coroutine chain, outermost first."""
+    codes = []
+    while awaitable is not None:
+        frame = getattr(awaitable, "cr_frame", None) or getattr(awaitable, "gi_frame", None)
+        if frame is None:
+            break
+        codes.append(frame.f_code)
+        awaitable = getattr(awaitable, "cr_await", None) or getattr(awaitable, "gi_yieldfrom", None)
+    return codes
+
+
+def _thread_codes(frame: Optional[FrameType]) -> List[CodeType]:
+    """Code objects of a thread stack, outermost first."""
+    codes = []
+    while frame is not None:
+        codes.append(frame.f_code)
+        frame = frame.f_back
+    codes.reverse()
+    return codes
+
+
+class RequestProfile:
+    """Aggregated samples for one profiled request."""
+
+    def __init__(self, profile_id: str, method: str, path: str, interval: float):
+        self.id = profile_id
+        self.method = method
+        self.path = path
+        self.interval = interval
+        self.started_at = datetime.utcnow()
+        self.duration = 0.0
+        self.status_code: Optional[int] = None
+        self.stacks: Counter = Counter()
+
+    @property
+    def sample_count(self) -> int:
+        return sum(self.stacks.values())
+
+    def summary(self) -> dict:
+        return {
+            "id": self.id,
+            "method": self.method,
+            "path": self.path,
+            "status_code": self.status_code,
+            "started_at": self.started_at,
+            "duration_ms": round(self.duration * 1000, 3),
+            "samples": self.sample_count,
+        }
+
+    def collapsed(self) -> str:
+        """Brendan Gregg's collapsed format: ``root;child;leaf count`` per line."""
+        return "".join(f"{';'.join(stack)} {count}\n" for stack, count in self.stacks.most_common())
+
+    def speedscope(self) -> dict:
+        """A speedscope ``sampled`` profile, weighted in milliseconds."""
+        frames: List[dict] = []
+        index: Dict[str, int] = {}
+        samples, weights = [], []
+        for stack, count in self.stacks.most_common():
+            indices = []
+            for name in stack:
+                if name not in index:
+                    index[name] = len(frames)
+                    frames.append({"name": name})
+                indices.append(index[name])
+            samples.append(indices)
+            weights.append(round(count * self.interval * 1000, 3))
+        name = f"{self.method} {self.path}"
+        return {
+            "$schema": "https://www.speedscope.app/file-format-schema.json",
+            "name": name,
+            "exporter": "hobbees",
+            "activeProfileIndex": 0,
+            "shared": {"frames": frames},
+            "profiles": [{
+                "type": "sampled",
+                "name": name,
+                "unit": "milliseconds",
+                "startValue": 0,
+                "endValue": round(sum(weights), 3),
+                "samples": samples,
+                "weights": weights,
+            }],
+        }
+
+
+class SamplingProfiler:
+    """Samples one asyncio task from a background thread.
+
+    ``root`` is the code object the recorded stacks are trimmed to (the
+    profiling middleware), so event loop internals are left out.
+    """
+
+    def __init__(self, profile: RequestProfile, root: Optional[CodeType] = None):
+        self.profile = profile
+        self.root = root
+        self._task = asyncio.current_task()
+        self._loop = asyncio.get_running_loop()
+        self._thread_id = threading.get_ident()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name=f"profiler-{profile.id}", daemon=True)
+        self._names: Dict[CodeType, str] = {}
+
+    def __enter__(self) -> "SamplingProfiler":
+        self._started = time.perf_counter()
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self._stop.set()
+        self._thread.join()
+        self.profile.duration = time.perf_counter() - self._started
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.profile.interval):
+            stack = self._sample()
+            if stack:
+                self.profile.stacks[stack] += 1
+
+    def _sample(self) -> Optional[Stack]:
+        try:
+            if asyncio.current_task(self._loop) is self._task:
+                codes = _thread_codes(sys._current_frames().get(self._thread_id))
+                prefix: Stack = ()
+            else:
+                codes = _coroutine_codes(self._task.get_coro())
+                prefix = (AWAIT_MARKER,)
+        except (RuntimeError, ValueError):
+            # The task or its frames changed under us; skip this tick
+            return None
+        if self.root is not None and self.root in codes:
+            codes = codes[codes.index(self.root):]
+        return prefix + tuple(self._name(code) for code in codes)
+
+    def _name(self, code: CodeType) -> str:
+        name = self._names.get(code)
+        if name is None:
+            name = self._names[code] = _frame_name(code)
+        return name
+
+
+class ProfileStore:
+    """The slowest request profiles of the last ``max_age`` seconds, up to ``capacity``.
+
+    A min-heap keyed by duration: once full, a new profile replaces the
+    fastest one kept if it is slower, and is dropped otherwise. A burst of
+    quick requests therefore never evicts the slow ones worth looking at.
+    Profiles older than ``max_age`` are dropped before each add and read, so
+    one slow spike does not keep newer traffic out for good.
+    """
+
+    def __init__(self, capacity: int, max_age: float, clock: Callable[[], float] = time.monotonic):
+        self.capacity = capacity
+        self.max_age = max_age
+        self.clock = clock
+        self._heap: List[Tuple[float, int, RequestProfile]] = []
+        self._by_id: Dict[str, RequestProfile] = {}
+        self._added_at: Dict[str, float] = {}
+        self._order = itertools.count()  # Ties go to the older profile, and profiles are never compared
+
+    def new_id(self) -> str:
+        return uuid.uuid4().hex[:16]
+
+    def _expire(self) -> None:
+        cutoff = self.clock() - self.max_age
+        if not any(self._added_at[profile.id] < cutoff for _, _, profile in self._heap):
+            return
+        for _, _, profile in self._heap:
+            if self._added_at[profile.id] < cutoff:
+                del self._by_id[profile.id], self._added_at[profile.id]
+        self._heap = [entry for entry in self._heap if entry[2].id in self._by_id]
+        heapq.heapify(self._heap)
+
+    def add(self, profile: RequestProfile) -> None:
+        self._expire()
+        entry = (profile.duration, next(self._order), profile)
+        if len(self._heap) < self.capacity:
+            heapq.heappush(self._heap, entry)
+        elif self._heap and profile.duration > self._heap[0][0]:
+            _, _, evicted = heapq.heapreplace(self._heap, entry)
+            del self._by_id[evicted.id], self._added_at[evicted.id]
+        else:
+            return
+        self._by_id[profile.id] = profile
+        self._added_at[profile.id] = self.clock()
+
+    def get(self, profile_id: str) -> Optional[RequestProfile]:
+        self._expire()
+        return self._by_id.get(profile_id)
+
+    def slowest(self, limit: Optional[int] = None) -> List[RequestProfile]:
+        """Retained profiles, slowest first."""
+        self._expire()
+        return [profile for _, _, profile in heapq.nlargest(limit or len(self._heap), self._heap)]
+
+    def clear(self) -> None:
+        self._heap.clear()
+        self._by_id.clear()
+        self._added_at.clear()
+
+
+# Global store of profiles captured by the profiling middleware
+profile_store = ProfileStore(settings.PROFILER_HISTORY, settings.PROFILER_MAX_AGE_SECONDS)
@@ -0,0 +1,218 @@
+"""Token-bucket rate limiting.
+
+Each (route group, client) pair owns a bucket holding up to ``limit`` tokens
+that refills continuously at ``limit / period`` tokens per second; a request
+spends one token or is rejected. Buckets live in a backend: ``MemoryBackend``
+is per process, ``StorageBackend`` keeps them in the ``rate_limits``
+collection of the configured storage engine so every worker (and every
+replica on the same MongoDB) shares one budget.
+"""
+import logging
+import math
+import re
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Callable, Dict, Optional, Tuple
+
+from ..config import settings
+
+logger = logging.getLogger(__name__)
+
+_PERIODS = {"second": 1.0, "minute": 60.0, "hour": 3600.0, "day": 86400.0}
+_RATE = re.compile(r"^\s*(\d+)\s*/\s*(\d*)\s*(second|minute|hour|day)s?\s*$")
+
+
+@dataclass(frozen=True)
+class RateLimit:
+    """``limit`` requests per ``period`` seconds, allowing bursts of ``limit``."""
+
+    limit: int
+    period: float
+
+    @property
+    def rate(self) -> float:
+        return self.limit / self.period
+
+    @classmethod
+    def parse(cls, text: str) -> Optional["RateLimit"]:
+        """Parse ``"10/minute"`` or ``"100/5minutes"``; empty or zero means unlimited."""
+        if not text or not text.strip() or text.strip() == "0":
+            return None
+        match = _RATE.match(text.lower())
+        if not match:
+            raise ValueError(f"Invalid rate limit '{text}', expected e.g. '10/minute'")
+        limit = int(match.group(1))
+        if limit == 0:
+            return None
+        return cls(limit, int(match.group(2) or 1) * _PERIODS[match.group(3)])
+
+    @property
+    def policy(self) -> str:
+        """The ``RateLimit-Policy`` header value."""
+        return f"{self.limit};w={self.period:g}"
+
+
+@dataclass
+class Decision:
+    """Outcome of spending a token."""
+
+    allowed: bool
+    limit: int
+    remaining: int
+    reset_after: float  # Seconds until the bucket is full again
+    retry_after: float  # Seconds until the next token (0 when allowed)
+
+
+def spend(tokens: float, elapsed: float, rule: RateLimit) -> Tuple[float, Decision]:
+    """Refill a bucket holding ``tokens`` after ``elapsed`` seconds and spend one token."""
+    tokens = min(float(rule.limit), tokens + max(elapsed, 0.0) * rule.rate)
+    allowed = tokens >= 1.0
+    if allowed:
+        tokens -= 1.0
+    decision = Decision(
+        allowed=allowed,
+        limit=rule.limit,
+        remaining=int(tokens),
+        reset_after=(rule.limit - tokens) / rule.rate,
+        retry_after=0.0 if allowed else (1.0 - tokens) / rule.rate,
+    )
+    return tokens, decision
+
+
+class RateLimitBackend:
+    """Where buckets are kept. Subclasses implement ``hit``."""
+
+    async def hit(self, key: str, rule: RateLimit) -> Decision:
+        raise NotImplementedError
+
+
+class MemoryBackend(RateLimitBackend):
+    """Buckets in a process-local LRU dict, capped at ``max_keys`` entries."""
+
+    def __init__(self, max_keys: int = 100_000, clock: Callable[[], float] = time.monotonic):
+        self.max_keys = max_keys
+        self.clock = clock
+        self.buckets: "OrderedDict[str, Tuple[float, float]]" = OrderedDict()
+
+    async def hit(self, key: str, rule: RateLimit) -> Decision:
+        now = self.clock()
+        tokens, updated = self.buckets.pop(key, (float(rule.limit), now))
+        tokens, decision = spend(tokens, now - updated, rule)
+        self.buckets[key] = (tokens, now)
+        if len(self.buckets) > self.max_keys:
+            self.buckets.popitem(last=False)
+        return decision
+
+
+class StorageBackend(RateLimitBackend):
+    """Buckets shared through a storage collection.
+
+    Updates are compare-and-set on the bucket's ``updated`` timestamp and are
+    retried a few times when another worker wins the race. Buckets carry an
+    ``expires_at`` date for the collection's TTL index. If the store errors
+    the request is let through: an outage should not turn into a 429 storm.
+    """
+
+    MAX_ATTEMPTS = 5
+
+    def __init__(self, collection: Callable[[], object], clock: Callable[[], float] = time.time):
+        self.collection = collection
+        self.clock = clock
+
+    async def hit(self, key: str, rule: RateLimit) -> Decision:
+        from pymongo.errors import DuplicateKeyError
+
+        try:
+            for _ in range(self.MAX_ATTEMPTS):
+                collection = self.collection()
+                now = self.clock()
+                doc = await collection.find_one({"_id": key})
+                if doc is None:
+                    tokens, decision = spend(float(rule.limit), 0.0, rule)
+                    try:
+                        await collection.insert_one(self._document(key, tokens, now, decision))
+                    except DuplicateKeyError:
+                        continue
+                    return decision
+                tokens, decision = spend(doc["tokens"], now - doc["updated"], rule)
+                if not decision.allowed:
+                    return decision
+                result = await collection.update_one(
+                    {"_id": key, "updated": doc["updated"]},
+                    {"$set": self._document(key, tokens, now, decision)},
+                )
+                if result.matched_count:
+                    return decision
+        except Exception as e:
+            logger.warning(f"Rate limit store unavailable, allowing request: {e}")
+            return Decision(True, rule.limit, rule.limit, 0.0, 0.0)
+        # Lost every race: heavy contention on one key is itself a reason to back off
+        return Decision(False, rule.limit, 0, rule.period, 1.0 / rule.rate)
+
+    @staticmethod
+    def _document(key: str, tokens: float, now: float, decision: Decision) -> dict:
+        expires_at = datetime.utcfromtimestamp(now) + timedelta(seconds=math.ceil(decision.reset_after) + 1)
+        return {"_id": key, "tokens": tokens, "updated": now, "expires_at": expires_at}
+
+
+# Route groups: (group, HTTP methods, path prefix); first match wins
+ROUTE_GROUPS = [
+    ("auth", {"POST"}, "/api/auth/login"),
+    ("auth", {"POST"}, "/api/auth/register"),
+    ("read", {"GET", "HEAD"}, "/api/hobbies"),
+    ("write", {"POST", "PUT", "PATCH", "DELETE"}, "/api/hobbies"),
+    ("read", {"GET", "HEAD"}, "/api/jobs"),
+    ("write", {"POST"}, "/api/jobs"),
+    ("read", {"GET", "HEAD"}, "/api/history"),
+]
+
+
+def route_group(method: str, path: str) -> Optional[str]:
+    """The rate limit group a request falls in, or None if it is not limited."""
+    for group, methods, prefix in ROUTE_GROUPS:
+        if method in methods and path.startswith(prefix):
+            return group
+    return None
+
+
+class RateLimiter:
+    """Applies per-group rules to request keys through a backend."""
+
+    def __init__(self, backend: RateLimitBackend, rules: Dict[str, Optional[RateLimit]]):
+        self.backend = backend
+        self.rules = {group: rule for group, rule in rules.items() if rule is not None}
+        self.enabled = True
+
+    def rule_for(self, group: Optional[str]) -> Optional[RateLimit]:
+        if not self.enabled or group is None:
+            return None
+        return self.rules.get(group)
+
+    async def hit(self, group: str, identity: str) -> Decision:
+        return await self.backend.hit(f"{group}:{identity}", self.rules[group])
+
+
+def _rate_limit_collection():
+    from ..database import get_database
+    return get_database().rate_limits
+
+
+def build_rate_limiter() -> RateLimiter:
+    """Create the limiter described by the ``RATE_LIMIT_*`` settings."""
+    if settings.RATE_LIMIT_BACKEND == "memory":
+        backend = MemoryBackend()
+    elif settings.RATE_LIMIT_BACKEND == "storage":
+        backend = StorageBackend(_rate_limit_collection)
+    else:
+        raise ValueError(f"Unknown RATE_LIMIT_BACKEND '{settings.RATE_LIMIT_BACKEND}'")
+    return RateLimiter(backend, {
+        "auth": RateLimit.parse(settings.RATE_LIMIT_AUTH),
+        "read": RateLimit.parse(settings.RATE_LIMIT_READ),
+        "write": RateLimit.parse(settings.RATE_LIMIT_WRITE),
+    })
+
+
+# Global limiter used by RateLimitMiddleware
+rate_limiter = build_rate_limiter()
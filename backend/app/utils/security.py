@@ -1,12 +1,23 @@
-"""Security utilities for password hashing and JWT tokens."""
+"""Security utilities for password hashing and JWT tokens.
+
+passlib/bcrypt and python-jose (which pulls in cryptography) are imported on
+first use rather than at module import, keeping worker and test start-up fast.
+"""
 from datetime import datetime, timedelta
 from typing import Optional
-from jose import JWTError, jwt
-from passlib.context import CryptContext
 from ..config import settings
 
-# Password hashing context
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+# Password hashing context, created on first use
+_pwd_context = None
+
+
+def get_pwd_context():
+    """Return the bcrypt password hashing context."""
+    global _pwd_context
+    if _pwd_context is None:
+        from passlib.context import CryptContext
+        _pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+    return _pwd_context
 
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
@@ -15,7 +26,7 @@ def verify_password(plain_password: str, hashed_password: str) -> bool:
     password_bytes = plain_password.encode('utf-8')
     if len(password_bytes) > 72:
         plain_password = password_bytes[:72].decode('utf-8', errors='ignore')
-    return pwd_context.verify(plain_password, hashed_password)
+    return get_pwd_context().verify(plain_password, hashed_password)
 
 
 def get_password_hash(password: str) -> str:
@@ -25,11 +36,12 @@ def get_password_hash(password: str) -> str:
     if len(password_bytes) > 72:
         # Truncate to 72 bytes at a safe character boundary
         password = password_bytes[:72].decode('utf-8', errors='ignore')
-    return pwd_context.hash(password)
+    return get_pwd_context().hash(password)
 
 
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -> str:
     """Create a JWT access token."""
+    from jose import jwt
     to_encode = data.copy()
     if expires_delta:
         expire = datetime.utcnow() + expires_delta
@@ -43,8 +55,24 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -
 
 def decode_access_token(token: str) -> Optional[dict]:
     """Decode and verify a JWT access token."""
+    from jose import JWTError, jwt
     try:
         payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
         return payload
     except JWTError:
         return None
+
+
+def request_token_payload(scope: dict) -> Optional[dict]:
+    """Claims of the request's bearer token, or None without a valid one.
+
+    Decoded once per request and kept in ``scope["state"]`` (``request.state``
+    in routes): the rate limit and idempotency middlewares and the auth
+    dependency all read it from there.
+    """
+    state = scope.setdefault("state", {})
+    if "token_payload" not in state:
+        authorization = next((v for n, v in scope["headers"] if n == b"authorization"), b"").decode("latin-1")
+        scheme, _, token = authorization.partition(" ")
+        state["token_payload"] = decode_access_token(token) if scheme.lower() == "bearer" and token else None
+    return state["token_payload"]
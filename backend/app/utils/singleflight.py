@@ -0,0 +1,71 @@
+"""Coalescing of concurrent identical reads ("singleflight").
+
+The first caller for a key (the leader) runs the read itself; callers that
+arrive while it is in flight wait on a shared future instead of issuing
+their own query, so an uncontended read pays for one dict lookup and a
+future. If the leader is cancelled its followers start over rather than
+failing. Results are shared, so callers must not mutate them; return raw
+documents and build models per caller.
+"""
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, Hashable
+
+from ..config import settings
+from . import metrics
+
+
+class SingleFlight:
+    """Deduplicates in-flight calls by key within one event loop."""
+
+    def __init__(self, name: str):
+        self.name = name
+        self.enabled = settings.SINGLEFLIGHT_ENABLED
+        self._flights: Dict[Hashable, asyncio.Future] = {}
+        self._leaders = metrics.singleflight_calls.labels(name, "leader")
+        self._coalesced = metrics.singleflight_calls.labels(name, "coalesced")
+
+    @property
+    def in_flight(self) -> int:
+        return len(self._flights)
+
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable[Any]]) -> Any:
+        """Return ``await fn()``, sharing the call with concurrent callers of ``key``."""
+        if not self.enabled:
+            return await fn()
+        flight = self._flights.get(key)
+        if flight is not None:
+            self._coalesced.inc()
+            try:
+                # Shielded so a cancelled follower does not cancel the flight
+                return await asyncio.shield(flight)
+            except asyncio.CancelledError:
+                if not flight.cancelled():
+                    raise
+            return await self.do(key, fn)  # The leader was cancelled; start over
+
+        self._leaders.inc()
+        flight = self._flights[key] = asyncio.get_running_loop().create_future()
+        try:
+            result = await fn()
+        except asyncio.CancelledError:
+            flight.cancel()
+            raise
+        except BaseException as e:
+            flight.set_exception(e)
+            flight.exception()  # Retrieved here, so no warning when nobody else waits
+            raise
+        else:
+            flight.set_result(result)
+            return result
+        finally:
+            if self._flights.get(key) is flight:
+                del self._flights[key]
+
+    def forget(self, predicate: Callable[[Hashable], bool]) -> None:
+        """Stop sharing in-flight calls whose key matches, e.g. after a write.
+
+        Callers already waiting keep their result; later callers start a
+        fresh call that is guaranteed to observe the write.
+        """
+        for key in [key for key in self._flights if predicate(key)]:
+            del self._flights[key]
@@ -0,0 +1,42 @@
+"""Image thumbnail rendering in a worker pool.
+
+Decoding and resizing are CPU bound, so they run on a small thread pool
+(Pillow releases the GIL while it decodes and resamples) instead of on the
+event loop. Pillow is imported on first use; without it ``available()`` is
+False and attachments are still stored and served, just not thumbnailed.
+"""
+import asyncio
+import importlib.util
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+from typing import Optional, Tuple
+
+from ..config import settings
+
+_executor: Optional[ThreadPoolExecutor] = None
+
+
+def available() -> bool:
+    return importlib.util.find_spec("PIL") is not None
+
+
+def render(data: bytes, size: int) -> Tuple[bytes, str]:
+    """Scale an image to fit in ``size`` x ``size``; return the bytes and content type."""
+    from PIL import Image, ImageOps
+
+    with Image.open(BytesIO(data)) as image:
+        image = ImageOps.exif_transpose(image)
+        image.thumbnail((size, size))
+        out = BytesIO()
+        if image.mode in ("RGBA", "LA", "P"):
+            image.save(out, format="PNG", optimize=True)
+            return out.getvalue(), "image/png"
+        image.convert("RGB").save(out, format="JPEG", quality=85, optimize=True)
+        return out.getvalue(), "image/jpeg"
+
+
+async def render_in_pool(data: bytes, size: int) -> Tuple[bytes, str]:
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(max_workers=settings.THUMBNAIL_WORKERS, thread_name_prefix="thumbnails")
+    return await asyncio.get_running_loop().run_in_executor(_executor, render, data, size)
@@ -0,0 +1,123 @@
+"""Rolling item activity day buckets up into day, week or month periods, with NumPy.
+
+Like ``columnar`` this module imports NumPy and is only imported on first
+use. Weeks start on Monday; all days are UTC.
+"""
+from datetime import date, datetime
+from typing import Dict, List, Sequence
+
+import numpy as np
+
+from .columnar import NumberColumn
+
+
+def period_start(days: np.ndarray, granularity: str) -> np.ndarray:
+    """The first day of the period holding each of ``days`` (datetime64[D])."""
+    if granularity == "week":
+        # 1970-01-01 was a Thursday, so Monday is three days after day zero
+        return days - (days.astype(np.int64) + 3) % 7
+    if granularity == "month":
+        return days.astype("datetime64[M]").astype("datetime64[D]")
+    return days
+
+
+def next_period(starts: np.ndarray, granularity: str) -> np.ndarray:
+    if granularity == "week":
+        return starts + 7
+    if granularity == "month":
+        return (starts.astype("datetime64[M]") + 1).astype("datetime64[D]")
+    return starts + 1
+
+
+def period_range(start: date, end: date, granularity: str) -> np.ndarray:
+    """Start days of every period from the one holding ``start`` to the one holding ``end``."""
+    first, last = period_start(np.array([start, end], dtype="datetime64[D]"), granularity)
+    if granularity == "month":
+        return np.arange(first.astype("datetime64[M]"), last.astype("datetime64[M]") + 1).astype("datetime64[D]")
+    return np.arange(first, last + 1, 7 if granularity == "week" else 1)
+
+
+def seed_baseline(items: Sequence[dict], fields: List[str], buckets: Sequence[dict], now: datetime) -> dict:
+    """What a category held before its activity was counted, from its current items.
+
+    Items created before the first day with counted writes are spread over
+    their creation days, at their current values. Whatever that and the
+    counted buckets do not explain (items there before counting started
+    and removed since, items created on the first counted day before
+    counting started, values changed since) is kept as a starting
+    ``items`` count and ``totals``.
+    """
+    counted_since = min((bucket["day"] for bucket in buckets), default=now)
+    created = np.array([item.get("created_at") for item in items], dtype="datetime64[D]")
+    before = created < np.datetime64(counted_since, "D")
+    days, slot = np.unique(created[before], return_inverse=True)
+    counted_items = sum(bucket["added"] - bucket["removed"] for bucket in buckets)
+
+    changes, totals = {}, {}
+    datas = [item.get("data") or {} for item in items]
+    for field in fields:
+        values = np.nan_to_num(NumberColumn(field, [data.get(field) for data in datas]).values)
+        per_day = np.bincount(slot, weights=values[before], minlength=len(days))
+        counted = sum(bucket.get("changes", {}).get(field, 0) for bucket in buckets)
+        changes[field] = per_day.tolist()
+        totals[field] = float(values.sum() - per_day.sum() - counted)
+    return {
+        "days": [datetime.combine(day.item(), datetime.min.time()) for day in days],
+        "added": np.bincount(slot, minlength=len(days)).tolist(),
+        "changes": changes,
+        "items": int(len(items) - np.count_nonzero(before) - counted_items),
+        "totals": totals,
+        "created_at": now,
+    }
+
+
+def roll_up(buckets: Sequence[dict], baseline: dict, fields: List[str], granularity: str,
+            start: date, end: date) -> List[Dict]:
+    """Activity per period from ``start`` to ``end``, with the item count and field totals at each period's end."""
+    days = [bucket["day"] for bucket in buckets] + list(baseline["days"])
+    seeded = len(baseline["days"])
+    added = np.array([bucket["added"] for bucket in buckets] + list(baseline["added"]), dtype=np.int64)
+    removed = np.array([bucket["removed"] for bucket in buckets] + [0] * seeded, dtype=np.int64)
+    updated = np.array([bucket["updated"] for bucket in buckets] + [0] * seeded, dtype=np.int64)
+    changes = {
+        field: np.array([bucket.get("changes", {}).get(field, 0) for bucket in buckets]
+                        + list(baseline["changes"].get(field, [0] * seeded)), dtype=np.float64)
+        for field in fields
+    }
+
+    days = np.array(days, dtype="datetime64[D]")
+    order = np.argsort(days, kind="stable")
+    days = days[order]
+    starts = period_range(start, end, granularity)
+    ends = next_period(starts, granularity)
+
+    # Activity: which period each day falls in (days outside the range are dropped)
+    slot = np.searchsorted(starts, period_start(days, granularity))
+    inside = (days >= starts[0]) & (days < ends[-1])
+
+    def per_period(values: np.ndarray) -> np.ndarray:
+        return np.bincount(slot[inside], weights=values[order][inside], minlength=len(starts))
+
+    # State at each period's end: the running sum over every day before it
+    last = np.searchsorted(days, ends, side="left") - 1
+
+    def at_end(values: np.ndarray, initial: float) -> np.ndarray:
+        running = np.concatenate(([initial], initial + np.cumsum(values[order])))
+        return running[last + 1]
+
+    item_counts = at_end(added - removed, baseline["items"])
+    field_changes = {field: per_period(values) for field, values in changes.items()}
+    field_totals = {field: at_end(values, baseline["totals"].get(field, 0.0)) for field, values in changes.items()}
+    added, removed, updated = per_period(added), per_period(removed), per_period(updated)
+    return [
+        {
+            "start": starts[i].item(),
+            "added": int(added[i]),
+            "removed": int(removed[i]),
+            "updated": int(updated[i]),
+            "items": int(item_counts[i]),
+            "changes": {field: float(field_changes[field][i]) for field in fields},
+            "totals": {field: float(field_totals[field][i]) for field in fields},
+        }
+        for i in range(len(starts))
+    ]
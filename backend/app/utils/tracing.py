@@ -0,0 +1,246 @@
+"""Lightweight request tracing.
+
+Spans follow the W3C trace context model (128-bit trace id, 64-bit span id,
+``traceparent`` header) so traces can be stitched to upstream callers. The
+active span lives in a context variable; instrumented functions check it and
+do nothing extra when the request is not being traced. Finished traces are
+handed to an exporter when their root span ends.
+"""
+import json
+import random
+import re
+import time
+from collections import deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import wraps
+from inspect import iscoroutinefunction, isfunction
+from typing import Any, Callable, Deque, Dict, Iterator, List, Optional, Tuple
+
+from ..config import settings
+
+_TRACEPARENT = re.compile(r"^00-([0-9a-f]{32})-([0-9a-f]{16})-([0-9a-f]{2})$")
+
+_current_span: ContextVar[Optional["Span"]] = ContextVar("current_span", default=None)
+
+
+def _new_id(bits: int) -> str:
+    return f"{random.getrandbits(bits):0{bits // 4}x}"
+
+
+def parse_traceparent(header: Optional[str]) -> Optional[Tuple[str, str, bool]]:
+    """Return ``(trace_id, parent_span_id, sampled)`` from a traceparent header."""
+    if not header:
+        return None
+    match = _TRACEPARENT.match(header.strip().lower())
+    if not match or match.group(1) == "0" * 32 or match.group(2) == "0" * 16:
+        return None
+    return match.group(1), match.group(2), bool(int(match.group(3), 16) & 1)
+
+
+class Span:
+    """A timed operation within a trace."""
+
+    __slots__ = ("trace", "name", "span_id", "parent_id", "start_ns", "end_ns", "attributes", "error")
+
+    def __init__(self, trace: "Trace", name: str, parent_id: Optional[str], attributes: Dict[str, Any]):
+        self.trace = trace
+        self.name = name
+        self.span_id = _new_id(64)
+        self.parent_id = parent_id
+        self.start_ns = time.time_ns()
+        self.end_ns: Optional[int] = None
+        self.attributes = attributes
+        self.error: Optional[str] = None
+
+    @property
+    def trace_id(self) -> str:
+        return self.trace.trace_id
+
+    @property
+    def duration_ms(self) -> float:
+        return ((self.end_ns or time.time_ns()) - self.start_ns) / 1e6
+
+    def set_attribute(self, key: str, value: Any) -> None:
+        self.attributes[key] = value
+
+    def record_exception(self, exc: BaseException) -> None:
+        self.error = f"{type(exc).__name__}: {exc}"
+
+    def end(self) -> None:
+        if self.end_ns is None:
+            self.end_ns = time.time_ns()
+            # list.append is atomic, so spans may end on driver threads
+            self.trace.spans.append(self)
+
+    def traceparent(self) -> str:
+        return f"00-{self.trace_id}-{self.span_id}-01"
+
+    def to_dict(self) -> dict:
+        return {
+            "trace_id": self.trace_id,
+            "span_id": self.span_id,
+            "parent_id": self.parent_id,
+            "name": self.name,
+            "start_ns": self.start_ns,
+            "end_ns": self.end_ns,
+            "duration_ms": round(self.duration_ms, 3),
+            "attributes": self.attributes,
+            "error": self.error,
+        }
+
+
+class Trace:
+    """The spans recorded for one sampled request."""
+
+    __slots__ = ("trace_id", "spans")
+
+    def __init__(self, trace_id: str):
+        self.trace_id = trace_id
+        self.spans: List[Span] = []
+
+
+class InMemoryExporter:
+    """Keeps the most recent traces in memory (tests, debugging)."""
+
+    def __init__(self, maxlen: int = 1000):
+        self.traces: Deque[List[dict]] = deque(maxlen=maxlen)
+
+    def export(self, spans: List[Span]) -> None:
+        self.traces.append([span.to_dict() for span in spans])
+
+    def clear(self) -> None:
+        self.traces.clear()
+
+
+class JsonLinesExporter:
+    """Appends one JSON object per span to a file."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._file = None
+
+    def export(self, spans: List[Span]) -> None:
+        if self._file is None:
+            self._file = open(self.path, "a", encoding="utf-8")
+        self._file.write("".join(json.dumps(span.to_dict(), default=str) + "\n" for span in spans))
+        self._file.flush()
+
+    def close(self) -> None:
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+
+class Tracer:
+    """Starts traces and child spans and exports finished traces."""
+
+    def __init__(self, exporter, sample_rate: float = 1.0):
+        self.exporter = exporter
+        self.sample_rate = sample_rate
+
+    def should_sample(self, parent_sampled: Optional[bool]) -> bool:
+        """Follow the caller's decision if there is one, else sample at ``sample_rate``."""
+        if parent_sampled is not None:
+            return parent_sampled
+        return self.sample_rate >= 1.0 or random.random() < self.sample_rate
+
+    @contextmanager
+    def start_trace(self, name: str, traceparent: Optional[str] = None,
+                    **attributes: Any) -> Iterator[Optional[Span]]:
+        """Open a root span for a request, or yield None if it is not sampled."""
+        parent = parse_traceparent(traceparent)
+        if not self.should_sample(parent[2] if parent else None):
+            yield None
+            return
+        trace = Trace(parent[0] if parent else _new_id(128))
+        root = Span(trace, name, parent[1] if parent else None, attributes)
+        token = _current_span.set(root)
+        try:
+            yield root
+        except BaseException as exc:
+            root.record_exception(exc)
+            raise
+        finally:
+            _current_span.reset(token)
+            root.end()
+            self.exporter.export(sorted(trace.spans, key=lambda s: s.start_ns))
+
+    @contextmanager
+    def span(self, name: str, **attributes: Any) -> Iterator[Optional[Span]]:
+        """Open a child of the current span; a no-op outside a sampled trace."""
+        parent = _current_span.get()
+        if parent is None:
+            yield None
+            return
+        span = Span(parent.trace, name, parent.span_id, attributes)
+        token = _current_span.set(span)
+        try:
+            yield span
+        except BaseException as exc:
+            span.record_exception(exc)
+            raise
+        finally:
+            _current_span.reset(token)
+            span.end()
+
+
+def current_span() -> Optional[Span]:
+    """The active span, if the current request is being traced."""
+    return _current_span.get()
+
+
+def start_child_span(name: str, **attributes: Any) -> Optional[Span]:
+    """Start a span under the current one without activating it.
+
+    For callbacks that see the start and end of an operation separately
+    (e.g. driver command listeners); the caller must ``end()`` it.
+    """
+    parent = _current_span.get()
+    if parent is None:
+        return None
+    return Span(parent.trace, name, parent.span_id, attributes)
+
+
+def traced(name: Optional[str] = None) -> Callable:
+    """Decorator: run the function in a span named ``name`` (default: qualname)."""
+    def decorator(fn: Callable) -> Callable:
+        span_name = name or fn.__qualname__
+        if iscoroutinefunction(fn):
+            @wraps(fn)
+            async def async_wrapper(*args, **kwargs):
+                if _current_span.get() is None:
+                    return await fn(*args, **kwargs)
+                with tracer.span(span_name):
+                    return await fn(*args, **kwargs)
+            return async_wrapper
+
+        @wraps(fn)
+        def wrapper(*args, **kwargs):
+            if _current_span.get() is None:
+                return fn(*args, **kwargs)
+            with tracer.span(span_name):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def traced_methods(cls: type) -> type:
+    """Class decorator: trace every method defined on ``cls`` (dunders excluded)."""
+    for attr, value in list(vars(cls).items()):
+        if isfunction(value) and not attr.startswith("__"):
+            setattr(cls, attr, traced(f"{cls.__name__}.{attr}")(value))
+    return cls
+
+
+def build_exporter():
+    """Create the exporter selected by ``settings.TRACE_EXPORTER``."""
+    if settings.TRACE_EXPORTER == "jsonl":
+        return JsonLinesExporter(settings.TRACE_FILE)
+    if settings.TRACE_EXPORTER == "memory":
+        return InMemoryExporter()
+    raise ValueError(f"Unknown trace exporter '{settings.TRACE_EXPORTER}'. Choose from: memory, jsonl")
+
+
+# Global tracer used by the tracing middleware and instrumented code
+tracer = Tracer(build_exporter(), settings.TRACE_SAMPLE_RATE)
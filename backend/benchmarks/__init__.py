@@ -0,0 +1,4 @@
+"""Microbenchmarks for backend hot paths.
+
+Run ``python -m benchmarks --help`` from the ``backend`` directory.
+"""
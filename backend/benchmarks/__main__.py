@@ -0,0 +1,78 @@
+"""Command-line entry point: ``python -m benchmarks``."""
+import argparse
+import importlib
+import pkgutil
+import sys
+
+from . import harness
+
+
+def load_benchmarks() -> None:
+    """Import every ``bench_*`` module in this package so it registers its cases."""
+    import benchmarks
+
+    for module in pkgutil.iter_modules(benchmarks.__path__):
+        if module.name.startswith("bench_"):
+            importlib.import_module(f"benchmarks.{module.name}")
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        prog="python -m benchmarks",
+        description="Run backend microbenchmarks and compare them to a JSON baseline.",
+    )
+    parser.add_argument("patterns", nargs="*", help="Only run cases matching these globs/substrings")
+    parser.add_argument("--list", action="store_true", help="List case ids and exit")
+    parser.add_argument("--rounds", type=int, default=5, help="Timed rounds per case (default: 5)")
+    parser.add_argument("--quick", action="store_true", help="Skip cases with parameters above 1000")
+    parser.add_argument("--save", metavar="PATH", help="Write results to a JSON baseline")
+    parser.add_argument("--compare", metavar="PATH", help="Compare results to a JSON baseline")
+    parser.add_argument("--threshold", type=float, default=0.10,
+                        help="Allowed slowdown before a case is flagged (default: 0.10 = 10%%)")
+    parser.add_argument("--stat", choices=["min", "median", "mean"], default="min",
+                        help="Statistic compared against the baseline (default: min)")
+    return parser
+
+
+def main(argv=None) -> int:
+    args = build_parser().parse_args(argv)
+    load_benchmarks()
+
+    if args.list:
+        for bench in harness.REGISTRY.values():
+            for cid in bench.case_ids():
+                print(f"{bench.group:<10} {cid}")
+        return 0
+
+    baseline = harness.load_baseline(args.compare) if args.compare else {}
+
+    def report(result: harness.Result) -> None:
+        line = (f"{result.case:<36} median {harness.format_duration(result.median):>12}  "
+                f"min {harness.format_duration(result.min):>12}  "
+                f"({result.rounds}x{result.iterations})")
+        if result.case in baseline:
+            ratio = getattr(result, args.stat) / baseline[result.case][args.stat]
+            line += f"  {ratio:6.2f}x baseline"
+        print(line, flush=True)
+
+    results = harness.run(args.patterns or None, rounds=args.rounds,
+                          max_param=1000 if args.quick else None, on_result=report)
+
+    if args.save:
+        harness.save_baseline(args.save, results)
+        print(f"Saved {len(results)} results to {args.save}")
+
+    if args.compare:
+        comparisons = harness.compare(results, baseline, args.threshold, args.stat)
+        regressions = [c for c in comparisons if c.regressed]
+        for c in regressions:
+            print(f"REGRESSION {c.case}: {harness.format_duration(c.baseline)} -> "
+                  f"{harness.format_duration(c.current)} ({c.ratio:.2f}x)", file=sys.stderr)
+        print(f"{len(comparisons)} compared, {len(regressions)} regressed "
+              f"(threshold {args.threshold:.0%})")
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,81 @@
+"""Benchmarks for category stats and item queries: item models vs. the columnar view.
+
+Both paths start from the raw hobby document, as read from the database,
+and produce the same answer; the object path is what the service would do
+with the ``Hobby`` model it builds for every other route.
+"""
+from collections import Counter
+import statistics
+
+from app.models.hobby import CategorySchema, FieldType, Hobby
+from app.utils.columnar import ItemColumns
+
+from .documents import hobby_document
+from .harness import benchmark, sweep
+
+ITEM_COUNTS = [1_000, 10_000, 100_000]
+PAGE = 50
+
+
+def _category(items: int):
+    doc = hobby_document(items, categories=1)
+    category = doc["categories"][0]
+    schema = CategorySchema(**category["schema"])
+    number = next(f.name for f in schema.fields if f.field_type == FieldType.NUMBER)
+    text = next(f.name for f in schema.fields if f.field_type == FieldType.TEXT)
+    return doc, category, schema, number, text
+
+
+def _object_stats(hobby: Hobby):
+    """Per-field stats over item models, the way a loop over ``category.items`` would."""
+    category = hobby.categories[0]
+    stats = []
+    for field_def in category.schema.fields:
+        values = [item.data[field_def.name] for item in category.items if field_def.name in item.data]
+        if field_def.field_type == FieldType.NUMBER and values:
+            stats.append((min(values), max(values), sum(values), statistics.mean(values),
+                          statistics.median(values)))
+        elif field_def.field_type == FieldType.TEXT:
+            stats.append(Counter(values).most_common(10))
+        else:
+            stats.append((min(values, default=None), max(values, default=None)))
+    return stats
+
+
+@benchmark("category_stats_objects", sweep("items", ITEM_COUNTS), group="columnar")
+def bench_category_stats_objects(items: int):
+    """Parse the hobby into models, then compute every field's stats in Python."""
+    doc = _category(items)[0]
+    return lambda: _object_stats(Hobby(**doc))
+
+
+@benchmark("category_stats_columnar", sweep("items", ITEM_COUNTS), group="columnar")
+def bench_category_stats_columnar(items: int):
+    """Encode the raw items into columns, then ``ItemColumns.stats``."""
+    _, category, schema, _, _ = _category(items)
+    return lambda: ItemColumns.from_documents(schema, category["items"]).stats()
+
+
+@benchmark("item_query_objects", sweep("items", ITEM_COUNTS), group="columnar")
+def bench_item_query_objects(items: int):
+    """Filter on a number and a text field, sort by the number, take the first page, over models."""
+    doc, _, _, number, text = _category(items)
+
+    def run():
+        matches = [item for item in Hobby(**doc).categories[0].items
+                   if item.data.get(number, -1) >= 10 and item.data.get(text, "") < "m"]
+        matches.sort(key=lambda item: item.data[number], reverse=True)
+        return len(matches), matches[:PAGE]
+    return run
+
+
+@benchmark("item_query_columnar", sweep("items", ITEM_COUNTS), group="columnar")
+def bench_item_query_columnar(items: int):
+    """The same query through ``ItemColumns.mask`` and ``order``."""
+    _, category, schema, number, text = _category(items)
+
+    def run():
+        columns = ItemColumns.from_documents(schema, category["items"])
+        positions = columns.order(number, True, columns.mask([(number, "gte", 10.0), (text, "lt", "m")]))
+        return len(positions), [columns.items[i] for i in positions[:PAGE]]
+    return run
@@ -0,0 +1,37 @@
+"""Benchmarks for resolving a route's services: built per request vs. taken from the container."""
+from types import SimpleNamespace
+
+from app.dependencies import Container, get_auth_service, get_hobby_service
+from app.repositories.attachment_repository import AttachmentRepository
+from app.repositories.hobby_repository import HobbyRepository
+from app.repositories.user_repository import UserRepository
+from app.services.auth_service import AuthService
+from app.services.hobby_service import HobbyService
+from app.storage import create_engine
+
+from .harness import benchmark
+
+_engine = create_engine("memory")
+
+
+@benchmark("services_per_request", group="dependencies")
+def bench_services_per_request():
+    """What an authenticated hobby route built before the container: auth and hobby service chains."""
+    db, engine = _engine.database, _engine
+
+    def run():
+        AuthService(UserRepository(db))
+        HobbyService(HobbyRepository(db, engine), AttachmentRepository(db))
+    return run
+
+
+@benchmark("services_from_container", group="dependencies")
+def bench_services_from_container():
+    """The same two services taken from the application container."""
+    request = SimpleNamespace(app=SimpleNamespace(state=SimpleNamespace(
+        container=Container(_engine.database, _engine))))
+
+    def run():
+        get_auth_service(request)
+        get_hobby_service(request)
+    return run
@@ -0,0 +1,59 @@
+"""Benchmarks for the insert-time duplicate check: every item vs. the band key index.
+
+Both check one new item against a category, given the category's items
+(which the insert has read anyway); the index path asks the stored
+signatures for candidates first, so it only compares the few that share
+a band key.
+"""
+import asyncio
+
+from app.repositories.signature_repository import SignatureRepository
+from app.storage import create_engine
+from app.utils.duplicates import band_keys, item_text, shingles, signature, similarity, text_fields
+
+from .documents import hobby_document
+from .harness import benchmark, sweep
+
+ITEM_COUNTS = [1_000, 10_000, 50_000]
+THRESHOLD = 0.7
+
+
+def _category(items: int):
+    category = hobby_document(items, categories=1)["categories"][0]
+    fields = text_fields(category)
+    by_id = {item["id"]: item for item in category["items"]}
+    new = category["items"][items // 2]["data"]  # A duplicate of an existing item
+    return category, fields, by_id, new
+
+
+@benchmark("duplicate_check_pairs", sweep("items", ITEM_COUNTS), group="duplicates")
+def bench_duplicate_check_pairs(items: int):
+    """Compare the new item's shingles with those of every item in the category."""
+    category, fields, by_id, new = _category(items)
+
+    def run():
+        grams = shingles(item_text(new, fields))
+        return [item_id for item_id, item in by_id.items()
+                if similarity(grams, shingles(item_text(item["data"], fields))) >= THRESHOLD]
+    return run
+
+
+@benchmark("duplicate_check_index", sweep("items", ITEM_COUNTS), group="duplicates")
+def bench_duplicate_check_index(items: int):
+    """Band keys of the new item, one indexed lookup (memory engine), then compare the candidates."""
+    category, fields, by_id, new = _category(items)
+    engine = create_engine("memory")
+    repository = SignatureRepository(engine.database)
+    loop = asyncio.new_event_loop()
+    loop.run_until_complete(repository.collection.create_index(
+        [("user_id", 1), ("hobby_id", 1), ("category", 1), ("bands", 1)]))
+    loop.run_until_complete(repository.collection.insert_many([
+        signature("u", "h", "c", item["id"], item_text(item["data"], fields)) for item in category["items"]
+    ]))
+
+    def run():
+        grams = shingles(item_text(new, fields))
+        candidates = loop.run_until_complete(repository.find_candidates("u", "h", "c", band_keys(grams)))
+        return [item_id for item_id in candidates
+                if similarity(grams, shingles(item_text(by_id[item_id]["data"], fields))) >= THRESHOLD]
+    return run
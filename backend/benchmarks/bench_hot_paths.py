@@ -0,0 +1,54 @@
+"""Benchmarks for model parsing, response serialization, validation and JWTs."""
+from datetime import timedelta
+
+from app.models.hobby import CategorySchema, Hobby
+from app.routers.hobbies import hobby_to_response
+from app.services.hobby_service import HobbyService
+from app.utils.security import create_access_token, decode_access_token
+
+from .documents import ITEM_COUNTS, hobby_document
+from .harness import benchmark, sweep
+
+_TOKEN_CLAIMS = {"sub": "benchmark_user", "user_id": "507f1f77bcf86cd799439011"}
+
+
+@benchmark("hobby_parse", sweep("items", ITEM_COUNTS), group="models")
+def bench_hobby_parse(items: int):
+    """``Hobby(**doc)`` on a raw document as returned by Motor."""
+    doc = hobby_document(items)
+    return lambda: Hobby(**doc)
+
+
+@benchmark("hobby_to_response", sweep("items", ITEM_COUNTS), group="routers")
+def bench_hobby_to_response(items: int):
+    """``routers.hobbies.hobby_to_response`` on an already parsed hobby."""
+    hobby = Hobby(**hobby_document(items))
+    return lambda: hobby_to_response(hobby)
+
+
+@benchmark("validate_item_data", sweep("items", ITEM_COUNTS), group="services")
+def bench_validate_item_data(items: int):
+    """``HobbyService._validate_item_data`` over every item of a category."""
+    doc = hobby_document(items, categories=1)
+    category = doc["categories"][0]
+    schema = CategorySchema(**category["schema"])
+    payloads = [item["data"] for item in category["items"]]
+    service = HobbyService(hobby_repository=None)
+
+    def run():
+        for data in payloads:
+            service._validate_item_data(data, schema)
+    return run
+
+
+@benchmark("create_access_token", group="security")
+def bench_create_access_token():
+    """``utils.security.create_access_token``."""
+    return lambda: create_access_token(_TOKEN_CLAIMS, expires_delta=timedelta(minutes=30))
+
+
+@benchmark("decode_access_token", group="security")
+def bench_decode_access_token():
+    """``utils.security.decode_access_token`` on a valid token."""
+    token = create_access_token(_TOKEN_CLAIMS, expires_delta=timedelta(days=1))
+    return lambda: decode_access_token(token)
@@ -0,0 +1,42 @@
+"""Synthetic documents shared by the benchmarks."""
+from datetime import datetime
+from typing import Any, Dict
+import random
+
+from bson import ObjectId
+
+from loadtest.dataset import HOBBY_TEMPLATES, build_schema, fake_item_data
+
+ITEM_COUNTS = [10, 100, 1_000, 10_000, 50_000]
+
+
+def hobby_document(item_count: int, categories: int = 4, seed: int = 7) -> Dict[str, Any]:
+    """A raw hobby document (as stored in MongoDB) holding ``item_count`` items in total."""
+    rng = random.Random(seed)
+    templates = [(name, fields) for hobby in HOBBY_TEMPLATES.values() for name, fields in hobby.items()]
+    now = datetime.utcnow()
+    doc = {
+        "_id": ObjectId(),
+        "user_id": str(ObjectId()),
+        "name": "Benchmark Hobby",
+        "description": "Synthetic hobby used by benchmarks",
+        "categories": [],
+        "created_at": now,
+        "updated_at": now,
+    }
+    for index in range(categories):
+        name, fields = templates[index % len(templates)]
+        schema = build_schema(name, fields)
+        count = item_count // categories + (1 if index < item_count % categories else 0)
+        doc["categories"].append({
+            "name": f"{name} {index}",
+            "schema": schema.model_dump(mode="json"),
+            "items": [
+                {"id": str(ObjectId()), "data": fake_item_data(rng, schema),
+                 "created_at": now, "updated_at": now}
+                for _ in range(count)
+            ],
+            "created_at": now,
+            "updated_at": now,
+        })
+    return doc
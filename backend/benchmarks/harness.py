@@ -0,0 +1,168 @@
+"""Minimal benchmark registry, timer and JSON baseline comparison.
+
+Benchmarks are registered with :func:`benchmark`. Each registered function
+receives its parameters and returns a zero-argument callable to time, so any
+setup work (building documents, tokens, ...) stays out of the measurement.
+"""
+from dataclasses import asdict, dataclass, field
+from typing import Any, Callable, Dict, Iterable, List, Optional
+import fnmatch
+import json
+import platform
+import statistics
+import time
+
+
+@dataclass
+class Benchmark:
+    """A registered benchmark and the parameter sweep it runs over."""
+    name: str
+    factory: Callable[..., Callable[[], Any]]
+    params: List[Dict[str, Any]] = field(default_factory=lambda: [{}])
+    group: str = "default"
+
+    def case_ids(self) -> List[str]:
+        return [case_id(self.name, p) for p in self.params]
+
+
+@dataclass
+class Result:
+    """Timing statistics for one benchmark case, in seconds per call."""
+    case: str
+    group: str
+    params: Dict[str, Any]
+    rounds: int
+    iterations: int
+    min: float
+    median: float
+    mean: float
+    stdev: float
+
+
+REGISTRY: Dict[str, Benchmark] = {}
+
+
+def case_id(name: str, params: Dict[str, Any]) -> str:
+    """Stable identifier, e.g. ``hobby_parse[items=1000]``."""
+    if not params:
+        return name
+    return f"{name}[{','.join(f'{k}={v}' for k, v in params.items())}]"
+
+
+def benchmark(name: Optional[str] = None, params: Optional[Iterable[Dict[str, Any]]] = None,
+              group: str = "default"):
+    """Register a benchmark factory."""
+    def decorator(factory):
+        bench_name = name or factory.__name__
+        REGISTRY[bench_name] = Benchmark(bench_name, factory, list(params or [{}]), group)
+        return factory
+    return decorator
+
+
+def sweep(key: str, values: Iterable[Any]) -> List[Dict[str, Any]]:
+    """Build a single-parameter sweep, e.g. ``sweep("items", [10, 100])``."""
+    return [{key: value} for value in values]
+
+
+def time_callable(fn: Callable[[], Any], rounds: int = 5, min_round_time: float = 0.05,
+                  max_total_time: float = 10.0) -> tuple:
+    """Time ``fn`` over several rounds, calibrating iterations per round.
+
+    Returns ``(per_call_timings, iterations_per_round)``.
+    """
+    fn()  # warm-up, also primes lazy caches
+    iterations = 1
+    while True:
+        started = time.perf_counter()
+        for _ in range(iterations):
+            fn()
+        elapsed = time.perf_counter() - started
+        if elapsed >= min_round_time or iterations >= 1 << 20:
+            break
+        iterations *= 2 if elapsed == 0 else max(2, min(10, int(min_round_time / elapsed) + 1))
+
+    timings = [elapsed / iterations]
+    budget_end = time.perf_counter() + max_total_time
+    while len(timings) < rounds and time.perf_counter() < budget_end:
+        started = time.perf_counter()
+        for _ in range(iterations):
+            fn()
+        timings.append((time.perf_counter() - started) / iterations)
+    return timings, iterations
+
+
+def run(patterns: Optional[List[str]] = None, rounds: int = 5, max_param: Optional[int] = None,
+        on_result: Optional[Callable[[Result], None]] = None) -> List[Result]:
+    """Run every registered case whose id matches one of ``patterns``."""
+    results = []
+    for bench in REGISTRY.values():
+        for params in bench.params:
+            cid = case_id(bench.name, params)
+            if patterns and not any(fnmatch.fnmatch(cid, p) or p in cid for p in patterns):
+                continue
+            if max_param is not None and any(isinstance(v, int) and v > max_param for v in params.values()):
+                continue
+            fn = bench.factory(**params)
+            timings, iterations = time_callable(fn, rounds=rounds)
+            result = Result(
+                case=cid,
+                group=bench.group,
+                params=params,
+                rounds=len(timings),
+                iterations=iterations,
+                min=min(timings),
+                median=statistics.median(timings),
+                mean=statistics.fmean(timings),
+                stdev=statistics.stdev(timings) if len(timings) > 1 else 0.0,
+            )
+            results.append(result)
+            if on_result:
+                on_result(result)
+    return results
+
+
+def save_baseline(path: str, results: List[Result]) -> None:
+    """Write results as a JSON baseline keyed by case id."""
+    payload = {
+        "machine": {"python": platform.python_version(), "platform": platform.platform()},
+        "created_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "results": {r.case: asdict(r) for r in results},
+    }
+    with open(path, "w") as fh:
+        json.dump(payload, fh, indent=2, sort_keys=True)
+
+
+def load_baseline(path: str) -> Dict[str, dict]:
+    with open(path) as fh:
+        return json.load(fh)["results"]
+
+
+@dataclass
+class Comparison:
+    """Current vs. baseline timing for one case."""
+    case: str
+    baseline: float
+    current: float
+    ratio: float
+    regressed: bool
+
+
+def compare(results: List[Result], baseline: Dict[str, dict], threshold: float = 0.10,
+            stat: str = "min") -> List[Comparison]:
+    """Compare results to a baseline; a case regresses if it is slower by more than ``threshold``."""
+    comparisons = []
+    for result in results:
+        previous = baseline.get(result.case)
+        if previous is None:
+            continue
+        before, now = previous[stat], getattr(result, stat)
+        ratio = now / before if before else float("inf")
+        comparisons.append(Comparison(result.case, before, now, ratio, ratio > 1.0 + threshold))
+    return comparisons
+
+
+def format_duration(seconds: float) -> str:
+    for unit, scale in (("s", 1.0), ("ms", 1e-3), ("us", 1e-6)):
+        if seconds >= scale:
+            return f"{seconds / scale:.3f} {unit}"
+    return f"{seconds / 1e-9:.1f} ns"
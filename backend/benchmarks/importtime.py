@@ -0,0 +1,124 @@
+"""Import-time report and budget check for ``app.main``.
+
+Each measurement runs in a fresh interpreter. ``own`` is the time spent
+importing the application after FastAPI itself (the baseline) is loaded,
+which is the part this repo controls; the budget in ``import_budget.json``
+caps it and lists heavy modules that must only be imported on first use.
+
+    python -m benchmarks.importtime            # report
+    python -m benchmarks.importtime --check    # exit 1 when over budget
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+from collections import defaultdict
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+BUDGET_FILE = Path(__file__).with_name("import_budget.json")
+
+_MEASURE = """
+import json, sys, time
+start = time.perf_counter()
+import {baseline}
+mid = time.perf_counter()
+import {module}
+end = time.perf_counter()
+print(json.dumps({{"baseline": mid - start, "total": end - start, "modules": sorted(sys.modules)}}))
+"""
+
+
+def _python(*args: str) -> subprocess.CompletedProcess:
+    env = {**os.environ, "PYTHONWARNINGS": "ignore"}
+    return subprocess.run([sys.executable, *args], cwd=BACKEND_DIR, env=env,
+                          capture_output=True, text=True, check=True)
+
+
+def load_budget(path: Path = BUDGET_FILE) -> dict:
+    return json.loads(path.read_text())
+
+
+def measure(module: str = "app.main", baseline: str = "fastapi", runs: int = 5) -> dict:
+    """Best-of-``runs`` import times in seconds, plus the modules left loaded."""
+    samples = [json.loads(_python("-c", _MEASURE.format(module=module, baseline=baseline)).stdout)
+               for _ in range(runs)]
+    return {
+        "module": module,
+        "baseline_module": baseline,
+        "total": min(s["total"] for s in samples),
+        "baseline": min(s["baseline"] for s in samples),
+        "own": min(s["total"] - s["baseline"] for s in samples),
+        "modules": samples[0]["modules"],
+    }
+
+
+def importtime_profile(module: str = "app.main") -> List[Tuple[str, int, int]]:
+    """``(module, self_us, cumulative_us)`` rows from ``python -X importtime``."""
+    stderr = _python("-X", "importtime", "-c", f"import {module}").stderr
+    rows = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        rows.append((name.strip(), int(self_us), int(cumulative_us)))
+    return rows
+
+
+def check(measurement: dict, budget: dict) -> List[str]:
+    """Budget violations, as human-readable messages."""
+    problems = []
+    own_ms = measurement["own"] * 1000
+    if own_ms > budget["own_ms"]:
+        problems.append(f"importing {measurement['module']} took {own_ms:.0f} ms after "
+                        f"{measurement['baseline_module']} (budget {budget['own_ms']} ms)")
+    loaded = {name.split(".")[0] for name in measurement["modules"]}
+    for name in budget.get("lazy", []):
+        if name in loaded:
+            problems.append(f"{name} is imported eagerly by {measurement['module']}")
+    return problems
+
+
+def format_report(measurement: dict, profile: List[Tuple[str, int, int]], top: int = 15) -> str:
+    by_package: Dict[str, int] = defaultdict(int)
+    for name, self_us, _ in profile:
+        by_package[name.split(".")[0]] += self_us
+    lines = [
+        f"{measurement['module']}: {measurement['total'] * 1000:.1f} ms total, "
+        f"{measurement['baseline'] * 1000:.1f} ms in {measurement['baseline_module']}, "
+        f"{measurement['own'] * 1000:.1f} ms own",
+        "",
+        f"Top {top} packages by self time:",
+    ]
+    for package, self_us in sorted(by_package.items(), key=lambda kv: -kv[1])[:top]:
+        lines.append(f"  {self_us / 1000:8.1f} ms  {package}")
+    lines += ["", f"Top {top} modules by cumulative time:"]
+    for name, _, cumulative_us in sorted(profile, key=lambda row: -row[2])[:top]:
+        lines.append(f"  {cumulative_us / 1000:8.1f} ms  {name}")
+    return "\n".join(lines)
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.importtime", description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=5, help="Fresh interpreters to take the best of")
+    parser.add_argument("--top", type=int, default=15, help="Rows per table")
+    parser.add_argument("--check", action="store_true", help="Exit 1 if the budget is exceeded")
+    args = parser.parse_args(argv)
+
+    budget = load_budget()
+    measurement = measure(budget["module"], budget["baseline"], args.runs)
+    print(format_report(measurement, importtime_profile(budget["module"]), args.top))
+    problems = check(measurement, budget)
+    print()
+    for problem in problems:
+        print(f"OVER BUDGET: {problem}")
+    if not problems:
+        print(f"Within budget ({budget['own_ms']} ms own, lazy: {', '.join(budget['lazy'])})")
+    return 1 if problems and args.check else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
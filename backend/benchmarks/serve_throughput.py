@@ -0,0 +1,144 @@
+"""Single- vs multi-worker throughput of ``python -m app serve``.
+
+Seeds a SQLite file (or the configured MongoDB with ``--storage mongo``),
+then for each worker count starts the production server as a subprocess,
+waits for ``/api/ready`` and replays a hobby-heavy mix over real HTTP.
+
+    python -m benchmarks.serve_throughput                       # 1 vs one-per-CPU
+    python -m benchmarks.serve_throughput --workers 1 2 4 --duration 20
+
+The load generator is a single asyncio process, so on small machines it can
+become the bottleneck before the server does; compare ``p99`` as well as
+``rps``.
+"""
+import argparse
+import asyncio
+import logging
+import os
+import secrets
+import signal
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import List, Optional
+
+import httpx
+
+from app.server import default_workers
+from loadtest.dataset import DatasetSpec, generate_dataset, seed_database
+from loadtest.driver import parse_mix, run_load
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+HOBBY_MIX = "get_hobby=5,list_hobbies=3,update_item=2"
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+async def _seed(storage: str, sqlite_path: str, dataset) -> None:
+    from app.config import settings
+    from app.database import create_indexes
+    from app.storage import create_engine
+
+    engine = create_engine(storage, url=settings.MONGODB_URL, path=sqlite_path,
+                           database_name=settings.DATABASE_NAME)
+    await engine.connect()
+    try:
+        await seed_database(engine.database, dataset)
+        await create_indexes(engine.database)
+    finally:
+        await engine.close()
+
+
+def start_server(workers: int, port: int, env: dict) -> subprocess.Popen:
+    return subprocess.Popen(
+        [sys.executable, "-m", "app", "serve", "--host", "127.0.0.1", "--port", str(port),
+         "--workers", str(workers), "--no-access-log", "--log-level", "warning"],
+        cwd=BACKEND_DIR, env=env,
+    )
+
+
+async def wait_ready(base_url: str, process: subprocess.Popen, timeout: float = 30.0) -> None:
+    deadline = time.monotonic() + timeout
+    async with httpx.AsyncClient(base_url=base_url) as client:
+        while time.monotonic() < deadline:
+            if process.poll() is not None:
+                raise RuntimeError(f"server exited with code {process.returncode}")
+            try:
+                if (await client.get("/api/ready")).status_code == 200:
+                    return
+            except httpx.TransportError:
+                pass
+            await asyncio.sleep(0.2)
+    raise TimeoutError(f"{base_url} not ready after {timeout:.0f}s")
+
+
+def stop_server(process: subprocess.Popen) -> None:
+    process.send_signal(signal.SIGTERM)
+    try:
+        process.wait(timeout=40)
+    except subprocess.TimeoutExpired:
+        process.kill()
+        process.wait()
+
+
+async def measure(workers: int, args, dataset, env: dict) -> dict:
+    port = _free_port()
+    base_url = f"http://127.0.0.1:{port}"
+    process = start_server(workers, port, env)
+    try:
+        await wait_ready(base_url, process)
+        limits = httpx.Limits(max_connections=args.concurrency)
+        async with httpx.AsyncClient(base_url=base_url, timeout=30.0, limits=limits) as client:
+            recorder = await run_load(client, dataset, parse_mix(args.mix), args.concurrency,
+                                      duration=args.duration, seed=args.seed)
+    finally:
+        stop_server(process)
+    return recorder.summary()["TOTAL"]
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.serve_throughput",
+                                     description=__doc__.split("\n\n")[0])
+    parser.add_argument("--workers", type=int, nargs="+",
+                        help=f"Worker counts to compare (default: 1 {default_workers()})")
+    parser.add_argument("--storage", choices=["sqlite", "mongo"], default="sqlite")
+    parser.add_argument("--duration", type=float, default=10.0, help="Seconds per run")
+    parser.add_argument("--concurrency", type=int, default=64)
+    parser.add_argument("--mix", default=HOBBY_MIX)
+    parser.add_argument("--users", type=int, default=20)
+    parser.add_argument("--seed", type=int, default=1234)
+    return parser
+
+
+async def main(argv: Optional[List[str]] = None) -> int:
+    args = build_parser().parse_args(argv)
+    logging.getLogger("httpx").setLevel(logging.WARNING)
+    worker_counts = args.workers or sorted({1, default_workers()})
+
+    dataset = generate_dataset(DatasetSpec(users=args.users, hobbies_per_user=3, categories_per_hobby=3,
+                                           items_per_category=50, seed=args.seed,
+                                           username_prefix=f"serve{secrets.token_hex(3)}_"))
+    with tempfile.TemporaryDirectory() as tmp:
+        sqlite_path = os.path.join(tmp, "serve.db")
+        await _seed(args.storage, sqlite_path, dataset)
+        # All load comes from one address, which the rate limiter would throttle
+        env = {**os.environ, "STORAGE_ENGINE": args.storage, "SQLITE_PATH": sqlite_path,
+               "RATE_LIMIT_ENABLED": "False"}
+
+        print(f"{'workers':>7} {'requests':>9} {'err':>5} {'rps':>9} {'p50 ms':>8} {'p99 ms':>8}")
+        for workers in worker_counts:
+            row = await measure(workers, args, dataset, env)
+            print(f"{workers:>7} {row['count']:>9} {row['errors']:>5} {row['rps']:>9.1f} "
+                  f"{row['p50_ms']:>8.2f} {row['p99_ms']:>8.2f}", flush=True)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(main()))
@@ -0,0 +1,4 @@
+"""Load-testing harness for the HobBees API.
+
+Run ``python -m loadtest --help`` from the ``backend`` directory.
+"""
@@ -0,0 +1,97 @@
+"""Command-line entry point: ``python -m loadtest``."""
+import argparse
+import asyncio
+import json
+import logging
+import secrets
+import sys
+
+import httpx
+
+from .dataset import DatasetSpec, generate_dataset, seed_database
+from .driver import DEFAULT_MIX, in_process_client, parse_mix, run_load
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        prog="python -m loadtest",
+        description="Seed a synthetic dataset and replay a mix of HobBees API calls.",
+    )
+    target = parser.add_argument_group("target")
+    target.add_argument("--target", help="Base URL of a running server, e.g. http://localhost:8000. "
+                                         "Omit to run the app in-process.")
+    target.add_argument("--storage", choices=["memory", "sqlite", "mongo"], default="memory",
+                        help="Storage engine for in-process runs (default: memory)")
+    target.add_argument("--sqlite-path", default=":memory:",
+                        help="Database file for --storage sqlite (default: in-memory)")
+    target.add_argument("--mongodb-url", help="MongoDB URL used to seed a --target server "
+                                              "(default: settings.MONGODB_URL)")
+    target.add_argument("--database", help="Database name used to seed a --target server "
+                                           "(default: settings.DATABASE_NAME)")
+
+    data = parser.add_argument_group("dataset")
+    data.add_argument("--users", type=int, default=10)
+    data.add_argument("--hobbies", type=int, default=3, help="Hobbies per user")
+    data.add_argument("--categories", type=int, default=3, help="Categories per hobby")
+    data.add_argument("--items", type=int, default=50, help="Items per category")
+    data.add_argument("--seed", type=int, default=1234)
+
+    run = parser.add_argument_group("run")
+    run.add_argument("--concurrency", type=int, default=10, help="Concurrent virtual users")
+    run.add_argument("--duration", type=float, help="Seconds to run (default: 30 unless --requests)")
+    run.add_argument("--requests", type=int, help="Total requests to issue")
+    run.add_argument("--mix", help="Weighted operations, e.g. 'get_hobby=5,add_item=1' "
+                                   f"(default: {','.join(f'{k}={v}' for k, v in DEFAULT_MIX.items())})")
+    run.add_argument("--json", dest="json_path", help="Also write the summary as JSON to this path")
+    return parser
+
+
+async def _seed_remote(args, dataset) -> None:
+    from motor.motor_asyncio import AsyncIOMotorClient
+    from app.config import settings
+
+    client = AsyncIOMotorClient(args.mongodb_url or settings.MONGODB_URL)
+    try:
+        await seed_database(client[args.database or settings.DATABASE_NAME], dataset)
+    finally:
+        client.close()
+
+
+async def main(argv=None) -> int:
+    args = build_parser().parse_args(argv)
+    logging.getLogger("httpx").setLevel(logging.WARNING)
+    mix = parse_mix(args.mix) if args.mix else dict(DEFAULT_MIX)
+    duration = args.duration if args.duration or args.requests else 30.0
+
+    spec = DatasetSpec(
+        users=args.users,
+        hobbies_per_user=args.hobbies,
+        categories_per_hobby=args.categories,
+        items_per_category=args.items,
+        seed=args.seed,
+        username_prefix=f"load{secrets.token_hex(3)}_",
+    )
+    dataset = generate_dataset(spec)
+    print(f"Generated {len(dataset.users)} users, {len(dataset.hobby_documents)} hobbies, "
+          f"{dataset.item_count} items", file=sys.stderr)
+
+    if args.target:
+        await _seed_remote(args, dataset)
+        async with httpx.AsyncClient(base_url=args.target, timeout=30.0) as client:
+            recorder = await run_load(client, dataset, mix, args.concurrency, duration,
+                                      args.requests, args.seed)
+    else:
+        async with in_process_client(args.storage, args.sqlite_path) as (client, db):
+            await seed_database(db, dataset)
+            recorder = await run_load(client, dataset, mix, args.concurrency, duration,
+                                      args.requests, args.seed)
+
+    print(recorder.format_table())
+    if args.json_path:
+        with open(args.json_path, "w") as fh:
+            json.dump({"spec": vars(spec), "routes": recorder.summary()}, fh, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(main()))
@@ -0,0 +1,207 @@
+"""Synthetic dataset generator for load tests.
+
+Builds N users x M hobbies x K items per category, using category schemas
+modelled on the kinds of collections people actually track.
+"""
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from typing import Any, Dict, List
+import random
+
+from bson import ObjectId
+
+from app.models.hobby import CategorySchema, FieldDefinition, FieldType
+from app.utils.security import get_password_hash
+
+
+# Hobby name -> {category name: [(field name, field type, required), ...]}
+HOBBY_TEMPLATES: Dict[str, Dict[str, List[tuple]]] = {
+    "Slingshot": {
+        "Latex": [("Brand", "text", True), ("Colour", "text", False),
+                  ("Thickness", "number", True), ("Quantity", "number", False)],
+        "Ammo": [("Material", "text", True), ("Diameter", "number", True),
+                 ("Weight", "number", False), ("Quantity", "number", False)],
+        "Frames": [("Maker", "text", True), ("Model", "text", True),
+                   ("Purchased", "date", False), ("Favourite", "boolean", False)],
+    },
+    "Fishing": {
+        "Lures": [("Brand", "text", True), ("Colour", "text", False),
+                  ("Weight", "number", True), ("Quantity", "number", False)],
+        "Rods": [("Brand", "text", True), ("Length", "number", True),
+                 ("Action", "text", False), ("Purchased", "date", False)],
+        "Catches": [("Species", "text", True), ("Weight", "number", False),
+                    ("Caught On", "date", True), ("Released", "boolean", False)],
+    },
+    "Board Games": {
+        "Games": [("Title", "text", True), ("Players", "number", False),
+                  ("Played", "date", False), ("Owned", "boolean", True)],
+        "Expansions": [("Title", "text", True), ("Base Game", "text", True),
+                       ("Quantity", "number", False)],
+    },
+    "Knitting": {
+        "Yarn": [("Brand", "text", True), ("Colour", "text", True),
+                 ("Weight", "text", False), ("Quantity", "number", False)],
+        "Needles": [("Size", "number", True), ("Material", "text", False),
+                    ("Circular", "boolean", False)],
+    },
+}
+
+_WORDS = [
+    "Amber", "Black", "Cobalt", "Crimson", "Forest", "Golden", "Ivory", "Jade",
+    "Lime", "Navy", "Onyx", "Pearl", "Ruby", "Sage", "Slate", "Yellow",
+    "Acme", "Apex", "Hawk", "Nova", "Orion", "Pike", "Snipersling", "Summit",
+]
+
+
+@dataclass
+class DatasetSpec:
+    """Shape of the synthetic dataset."""
+    users: int = 10
+    hobbies_per_user: int = 3
+    categories_per_hobby: int = 3
+    items_per_category: int = 50
+    seed: int = 1234
+    password: str = "LoadTest123!"
+    username_prefix: str = "loaduser"
+
+
+@dataclass
+class SeededUser:
+    """A generated user plus the ids the driver needs to address its data."""
+    user_id: str
+    username: str
+    password: str
+    hobbies: Dict[str, Dict[str, List[str]]] = field(default_factory=dict)
+    schemas: Dict[str, CategorySchema] = field(default_factory=dict)
+
+
+@dataclass
+class Dataset:
+    """Generated documents ready for insertion."""
+    spec: DatasetSpec
+    users: List[SeededUser]
+    user_documents: List[Dict[str, Any]]
+    hobby_documents: List[Dict[str, Any]]
+
+    @property
+    def item_count(self) -> int:
+        return sum(
+            len(category["items"])
+            for hobby in self.hobby_documents
+            for category in hobby["categories"]
+        )
+
+
+def build_schema(category_name: str, fields: List[tuple]) -> CategorySchema:
+    """Build a CategorySchema from a template field list."""
+    return CategorySchema(
+        category_name=category_name,
+        fields=[
+            FieldDefinition(name=name, field_type=FieldType(field_type), required=required)
+            for name, field_type, required in fields
+        ],
+    )
+
+
+def fake_value(rng: random.Random, field_type: FieldType) -> Any:
+    """Generate a plausible value for a field type."""
+    if field_type == FieldType.TEXT:
+        return f"{rng.choice(_WORDS)} {rng.choice(_WORDS)}"
+    if field_type == FieldType.NUMBER:
+        return rng.choice([rng.randint(0, 50), round(rng.uniform(0.1, 30.0), 2)])
+    if field_type == FieldType.BOOLEAN:
+        return rng.random() < 0.5
+    day = datetime(2020, 1, 1) + timedelta(days=rng.randint(0, 2000))
+    return day.date().isoformat()
+
+
+def fake_item_data(rng: random.Random, schema: CategorySchema) -> Dict[str, Any]:
+    """Generate item data that passes validation against ``schema``."""
+    data = {}
+    for field_def in schema.fields:
+        if field_def.required or rng.random() < 0.7:
+            data[field_def.name] = fake_value(rng, field_def.field_type)
+    return data
+
+
+def generate_dataset(spec: DatasetSpec) -> Dataset:
+    """Generate user and hobby documents for ``spec`` deterministically."""
+    rng = random.Random(spec.seed)
+    # Hashing is deliberately slow; every generated user shares one hash.
+    hashed_password = get_password_hash(spec.password)
+    now = datetime.utcnow()
+    hobby_names = list(HOBBY_TEMPLATES)
+
+    users: List[SeededUser] = []
+    user_documents: List[Dict[str, Any]] = []
+    hobby_documents: List[Dict[str, Any]] = []
+
+    for user_index in range(spec.users):
+        user_oid = ObjectId()
+        username = f"{spec.username_prefix}{user_index:05d}"
+        user_documents.append({
+            "_id": user_oid,
+            "username": username,
+            "email": f"{username}@example.com",
+            "hashed_password": hashed_password,
+            "is_active": True,
+            "created_at": now,
+            "updated_at": now,
+        })
+        seeded = SeededUser(user_id=str(user_oid), username=username, password=spec.password)
+
+        for hobby_index in range(spec.hobbies_per_user):
+            template_name = hobby_names[(user_index + hobby_index) % len(hobby_names)]
+            template = HOBBY_TEMPLATES[template_name]
+            hobby_oid = ObjectId()
+            categories = []
+            category_items: Dict[str, List[str]] = {}
+
+            for category_index in range(spec.categories_per_hobby):
+                base_name = list(template)[category_index % len(template)]
+                cycle = category_index // len(template)
+                category_name = base_name if cycle == 0 else f"{base_name} {cycle + 1}"
+                schema = build_schema(category_name, template[base_name])
+                seeded.schemas[category_name] = schema
+
+                items = []
+                for _ in range(spec.items_per_category):
+                    item_id = str(ObjectId())
+                    items.append({
+                        "id": item_id,
+                        "data": fake_item_data(rng, schema),
+                        "created_at": now,
+                        "updated_at": now,
+                    })
+                category_items[category_name] = [item["id"] for item in items]
+                categories.append({
+                    "name": category_name,
+                    "schema": schema.model_dump(mode="json"),
+                    "items": items,
+                    "created_at": now,
+                    "updated_at": now,
+                })
+
+            hobby_documents.append({
+                "_id": hobby_oid,
+                "user_id": str(user_oid),
+                "name": f"{template_name} {hobby_index + 1}",
+                "description": f"Synthetic {template_name.lower()} collection",
+                "categories": categories,
+                "created_at": now,
+                "updated_at": now,
+            })
+            seeded.hobbies[str(hobby_oid)] = category_items
+
+        users.append(seeded)
+
+    return Dataset(spec=spec, users=users, user_documents=user_documents,
+                   hobby_documents=hobby_documents)
+
+
+async def seed_database(db, dataset: Dataset, batch_size: int = 500) -> None:
+    """Insert a generated dataset into a (Motor or in-memory) database."""
+    for collection, documents in ((db.users, dataset.user_documents),
+                                  (db.hobbies, dataset.hobby_documents)):
+        for start in range(0, len(documents), batch_size):
+            await collection.insert_many(documents[start:start + batch_size])
@@ -0,0 +1,268 @@
+"""Async HTTP driver that replays a weighted mix of API operations."""
+from contextlib import asynccontextmanager
+from dataclasses import dataclass, field
+from typing import Awaitable, Callable, Dict, List, Optional
+import asyncio
+import random
+import time
+
+import httpx
+
+from app.models.hobby import CategorySchema
+from .dataset import Dataset, SeededUser, fake_item_data, fake_value
+from .report import LatencyRecorder
+
+
+DEFAULT_MIX: Dict[str, int] = {
+    "get_hobby": 30,
+    "list_hobbies": 20,
+    "update_item": 15,
+    "add_item": 10,
+    "me": 10,
+    "delete_item": 5,
+    "update_hobby": 5,
+    "login": 3,
+    "add_category": 2,
+}
+
+
+def parse_mix(text: str) -> Dict[str, int]:
+    """Parse ``"get_hobby=30,list_hobbies=20"`` into a weight mapping."""
+    mix = {}
+    for part in filter(None, (p.strip() for p in text.split(","))):
+        name, _, weight = part.partition("=")
+        if name not in OPERATIONS:
+            raise ValueError(f"Unknown operation '{name}'. Choose from: {', '.join(sorted(OPERATIONS))}")
+        mix[name] = int(weight or 1)
+    if not mix:
+        raise ValueError("Operation mix is empty")
+    return mix
+
+
+@dataclass
+class VirtualUser:
+    """Per-connection state: credentials, token and the ids it may address."""
+    user: SeededUser
+    rng: random.Random
+    token: Optional[str] = None
+    created_categories: int = 0
+    headers: Dict[str, str] = field(default_factory=dict)
+
+    def pick_hobby(self) -> str:
+        return self.rng.choice(list(self.user.hobbies))
+
+    def pick_category(self, hobby_id: str) -> str:
+        return self.rng.choice(list(self.user.hobbies[hobby_id]))
+
+    def pick_item(self) -> Optional[tuple]:
+        hobby_id = self.pick_hobby()
+        category = self.pick_category(hobby_id)
+        items = self.user.hobbies[hobby_id][category]
+        if not items:
+            return None
+        return hobby_id, category, self.rng.choice(items)
+
+
+Operation = Callable[[httpx.AsyncClient, VirtualUser], Awaitable[tuple]]
+
+
+async def _login(client: httpx.AsyncClient, vu: VirtualUser) -> tuple:
+    response = await client.post("/api/auth/login", json={
+        "username": vu.user.username, "password": vu.user.password
+    })
+    if response.status_code == 200:
+        vu.token = response.json()["access_token"]
+        vu.headers = {"Authorization": f"Bearer {vu.token}"}
+    return "POST /api/auth/login", response
+
+
+async def _me(client, vu):
+    return "GET /api/auth/me", await client.get("/api/auth/me", headers=vu.headers)
+
+
+async def _list_hobbies(client, vu):
+    return "GET /api/hobbies", await client.get("/api/hobbies", headers=vu.headers)
+
+
+async def _get_hobby(client, vu):
+    hobby_id = vu.pick_hobby()
+    return "GET /api/hobbies/{hobby_id}", await client.get(f"/api/hobbies/{hobby_id}", headers=vu.headers)
+
+
+async def _update_hobby(client, vu):
+    hobby_id = vu.pick_hobby()
+    response = await client.put(
+        f"/api/hobbies/{hobby_id}",
+        json={"description": f"Updated at {time.time():.3f}"},
+        headers=vu.headers,
+    )
+    return "PUT /api/hobbies/{hobby_id}", response
+
+
+async def _add_category(client, vu):
+    hobby_id = vu.pick_hobby()
+    vu.created_categories += 1
+    name = f"Load {vu.created_categories} {vu.rng.randint(0, 1 << 30)}"
+    fields = [
+        {"name": "Label", "field_type": "text", "required": True},
+        {"name": "Quantity", "field_type": "number", "required": False},
+    ]
+    response = await client.post(
+        f"/api/hobbies/{hobby_id}/categories",
+        json={"name": name, "fields": fields},
+        headers=vu.headers,
+    )
+    if response.status_code == 201:
+        vu.user.hobbies[hobby_id][name] = []
+        vu.user.schemas[name] = _schema_from_response(response.json(), name)
+    return "POST /api/hobbies/{hobby_id}/categories", response
+
+
+async def _add_item(client, vu):
+    hobby_id = vu.pick_hobby()
+    category = vu.pick_category(hobby_id)
+    data = fake_item_data(vu.rng, vu.user.schemas[category])
+    response = await client.post(
+        f"/api/hobbies/{hobby_id}/categories/{category}/items",
+        json={"data": data},
+        headers=vu.headers,
+    )
+    if response.status_code == 201:
+        for cat in response.json()["categories"]:
+            if cat["name"] == category and cat["items"]:
+                vu.user.hobbies[hobby_id][category].append(cat["items"][-1]["id"])
+    return "POST /api/hobbies/{hobby_id}/categories/{category_name}/items", response
+
+
+async def _update_item(client, vu):
+    target = vu.pick_item()
+    if target is None:
+        return await _add_item(client, vu)
+    hobby_id, category, item_id = target
+    data = fake_item_data(vu.rng, vu.user.schemas[category])
+    response = await client.put(
+        f"/api/hobbies/{hobby_id}/categories/{category}/items/{item_id}",
+        json={"data": data},
+        headers=vu.headers,
+    )
+    return "PUT /api/hobbies/{hobby_id}/categories/{category_name}/items/{item_id}", response
+
+
+async def _patch_item(client, vu):
+    target = vu.pick_item()
+    if target is None:
+        return await _add_item(client, vu)
+    hobby_id, category, item_id = target
+    field_def = vu.rng.choice(vu.user.schemas[category].fields)
+    response = await client.patch(
+        f"/api/hobbies/{hobby_id}/categories/{category}/items/{item_id}",
+        json={"data": {field_def.name: fake_value(vu.rng, field_def.field_type)}},
+        headers=vu.headers,
+    )
+    return "PATCH /api/hobbies/{hobby_id}/categories/{category_name}/items/{item_id}", response
+
+
+async def _delete_item(client, vu):
+    target = vu.pick_item()
+    if target is None:
+        return await _add_item(client, vu)
+    hobby_id, category, item_id = target
+    vu.user.hobbies[hobby_id][category].remove(item_id)
+    response = await client.delete(
+        f"/api/hobbies/{hobby_id}/categories/{category}/items/{item_id}",
+        headers=vu.headers,
+    )
+    return "DELETE /api/hobbies/{hobby_id}/categories/{category_name}/items/{item_id}", response
+
+
+def _schema_from_response(hobby: dict, category_name: str) -> CategorySchema:
+    for category in hobby["categories"]:
+        if category["name"] == category_name:
+            return CategorySchema(**category["schema"])
+    raise KeyError(category_name)
+
+
+OPERATIONS: Dict[str, Operation] = {
+    "login": _login,
+    "me": _me,
+    "list_hobbies": _list_hobbies,
+    "get_hobby": _get_hobby,
+    "update_hobby": _update_hobby,
+    "add_category": _add_category,
+    "add_item": _add_item,
+    "update_item": _update_item,
+    "patch_item": _patch_item,
+    "delete_item": _delete_item,
+}
+
+
+async def run_load(client: httpx.AsyncClient, dataset: Dataset, mix: Dict[str, int],
+                   concurrency: int = 10, duration: Optional[float] = None,
+                   total_requests: Optional[int] = None, seed: int = 0) -> LatencyRecorder:
+    """Drive ``client`` with ``concurrency`` virtual users until a stop condition.
+
+    Each virtual user logs in once (not recorded unless ``login`` is in the
+    mix) and then issues operations drawn from ``mix`` back to back. The run
+    stops after ``duration`` seconds or ``total_requests`` requests, whichever
+    comes first.
+    """
+    if duration is None and total_requests is None:
+        raise ValueError("Either duration or total_requests is required")
+
+    names = list(mix)
+    weights = [mix[name] for name in names]
+    recorder = LatencyRecorder()
+    remaining = [total_requests if total_requests is not None else float("inf")]
+
+    virtual_users = [
+        VirtualUser(user=dataset.users[i % len(dataset.users)], rng=random.Random(seed + i))
+        for i in range(concurrency)
+    ]
+    await asyncio.gather(*(_login(client, vu) for vu in virtual_users))
+
+    recorder.started_at = time.perf_counter()
+    deadline = recorder.started_at + duration if duration is not None else float("inf")
+
+    async def worker(vu: VirtualUser) -> None:
+        while remaining[0] > 0 and time.perf_counter() < deadline:
+            remaining[0] -= 1
+            name = vu.rng.choices(names, weights)[0]
+            started = time.perf_counter()
+            try:
+                route, response = await OPERATIONS[name](client, vu)
+            except httpx.HTTPError:
+                recorder.record_failure(name, time.perf_counter() - started)
+                continue
+            recorder.record(route, response.status_code, time.perf_counter() - started)
+
+    await asyncio.gather(*(worker(vu) for vu in virtual_users))
+    recorder.finished_at = time.perf_counter()
+    return recorder
+
+
+@asynccontextmanager
+async def in_process_client(storage: str = "memory", sqlite_path: str = ":memory:",
+                            rate_limit: bool = False):
+    """Yield an httpx client bound to the ASGI app plus the database it uses.
+
+    The app starts and stops through its own lifespan. ``storage`` names a
+    storage engine: ``"memory"``, ``"sqlite"`` (at ``sqlite_path``) or
+    ``"mongo"`` (``settings.MONGODB_URL``). Every in-process request comes
+    from one client address, so rate limiting is switched off unless
+    ``rate_limit`` is set.
+    """
+    from app.config import settings
+    from app.database import database
+    from app.main import app
+    from app.utils.rate_limit import rate_limiter
+
+    saved = settings.STORAGE_ENGINE, settings.SQLITE_PATH, settings.BACKGROUND_STARTUP, rate_limiter.enabled
+    settings.STORAGE_ENGINE, settings.SQLITE_PATH, settings.BACKGROUND_STARTUP = storage, sqlite_path, False
+    rate_limiter.enabled = rate_limit
+    try:
+        async with app.router.lifespan_context(app):
+            async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app),
+                                         base_url="http://loadtest") as client:
+                yield client, database.db
+    finally:
+        settings.STORAGE_ENGINE, settings.SQLITE_PATH, settings.BACKGROUND_STARTUP, rate_limiter.enabled = saved
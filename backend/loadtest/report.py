@@ -0,0 +1,88 @@
+"""Latency recording and per-route reporting for load tests."""
+from collections import Counter, defaultdict
+from dataclasses import dataclass, field
+from typing import Dict, List
+import math
+
+
+def percentile(sorted_values: List[float], pct: float) -> float:
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return 0.0
+    rank = max(1, math.ceil(pct / 100.0 * len(sorted_values)))
+    return sorted_values[min(rank, len(sorted_values)) - 1]
+
+
+@dataclass
+class RouteStats:
+    """Samples collected for one route template."""
+    latencies: List[float] = field(default_factory=list)
+    statuses: Counter = field(default_factory=Counter)
+    errors: int = 0
+
+
+class LatencyRecorder:
+    """Collects request latencies keyed by ``"METHOD /route/{template}"``."""
+
+    def __init__(self):
+        self.routes: Dict[str, RouteStats] = defaultdict(RouteStats)
+        self.started_at: float = 0.0
+        self.finished_at: float = 0.0
+
+    def record(self, route: str, status_code: int, seconds: float) -> None:
+        stats = self.routes[route]
+        stats.latencies.append(seconds)
+        stats.statuses[status_code] += 1
+        if status_code >= 400:
+            stats.errors += 1
+
+    def record_failure(self, route: str, seconds: float) -> None:
+        """Record a request that never produced a response (e.g. connection error)."""
+        stats = self.routes[route]
+        stats.latencies.append(seconds)
+        stats.statuses[0] += 1
+        stats.errors += 1
+
+    @property
+    def elapsed(self) -> float:
+        return max(self.finished_at - self.started_at, 1e-9)
+
+    def summary(self) -> Dict[str, dict]:
+        """Per-route throughput and latency percentiles (milliseconds)."""
+        result = {}
+        all_latencies: List[float] = []
+        for route in sorted(self.routes):
+            stats = self.routes[route]
+            ordered = sorted(stats.latencies)
+            all_latencies.extend(ordered)
+            result[route] = _stats_row(ordered, stats.errors, self.elapsed)
+            result[route]["statuses"] = {str(k): v for k, v in sorted(stats.statuses.items())}
+        total_errors = sum(stats.errors for stats in self.routes.values())
+        result["TOTAL"] = _stats_row(sorted(all_latencies), total_errors, self.elapsed)
+        return result
+
+    def format_table(self) -> str:
+        """Render the summary as a fixed-width text table."""
+        summary = self.summary()
+        width = max([len(route) for route in summary] + [5])
+        header = (f"{'route':<{width}}  {'count':>7} {'err':>5} {'rps':>8} "
+                  f"{'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'max ms':>8}")
+        lines = [header, "-" * len(header)]
+        for route, row in summary.items():
+            lines.append(
+                f"{route:<{width}}  {row['count']:>7} {row['errors']:>5} {row['rps']:>8.1f} "
+                f"{row['p50_ms']:>8.2f} {row['p95_ms']:>8.2f} {row['p99_ms']:>8.2f} {row['max_ms']:>8.2f}"
+            )
+        return "\n".join(lines)
+
+
+def _stats_row(ordered: List[float], errors: int, elapsed: float) -> dict:
+    return {
+        "count": len(ordered),
+        "errors": errors,
+        "rps": len(ordered) / elapsed,
+        "p50_ms": percentile(ordered, 50) * 1000,
+        "p95_ms": percentile(ordered, 95) * 1000,
+        "p99_ms": percentile(ordered, 99) * 1000,
+        "max_ms": (ordered[-1] if ordered else 0.0) * 1000,
+    }
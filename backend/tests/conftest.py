@@ -1,6 +1,9 @@
 """Pytest configuration and fixtures."""
 import pytest
 import asyncio
+from contextlib import asynccontextmanager
+import httpx
+import pytest_asyncio
 from motor.motor_asyncio import AsyncIOMotorClient
 from app.config import settings
 
@@ -43,3 +46,55 @@ def test_hobby_data():
         "name": "Test Hobby",
         "description": "A test hobby for unit testing"
     }
+
+
+@pytest.fixture
+def in_process_client(monkeypatch):
+    """Run the app through its own lifespan on a fresh in-memory store.
+
+    ``async with in_process_client() as (client, db)`` yields an httpx
+    client bound to the ASGI app and the database it uses. Every request
+    comes from one client address, so rate limiting is switched off
+    unless ``rate_limit`` is set.
+    """
+    from app.database import database
+    from app.main import app
+    from app.utils import rate_limit as rate_limit_module
+
+    @asynccontextmanager
+    async def connect(rate_limit: bool = False):
+        monkeypatch.setattr(settings, "STORAGE_ENGINE", "memory")
+        monkeypatch.setattr(settings, "BACKGROUND_STARTUP", False)
+        monkeypatch.setattr(rate_limit_module.rate_limiter, "enabled", rate_limit)
+        async with app.router.lifespan_context(app):
+            async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app),
+                                         base_url="http://test") as client:
+                yield client, database.db
+
+    return connect
+
+
+@pytest.fixture
+def login():
+    """``await login(client, username)`` registers and logs in a user and returns ``(headers, user_id)``."""
+    from app.database import database
+
+    async def login(client, username: str = "tester", admin: bool = False):
+        await client.post("/api/auth/register", json={
+            "username": username, "email": f"{username}@example.com", "password": "Password123!"})
+        if admin:
+            await database.db.users.update_one({"username": username}, {"$set": {"is_admin": True}})
+        token = (await client.post("/api/auth/login", json={
+            "username": username, "password": "Password123!"})).json()["access_token"]
+        headers = {"Authorization": f"Bearer {token}"}
+        return headers, (await client.get("/api/auth/me", headers=headers)).json()["id"]
+
+    return login
+
+
+@pytest_asyncio.fixture
+async def user_client(in_process_client, login):
+    """An in-process client and a logged-in user: ``(client, headers, user_id)``."""
+    async with in_process_client() as (client, _):
+        headers, user_id = await login(client)
+        yield client, headers, user_id
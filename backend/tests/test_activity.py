@@ -0,0 +1,94 @@
+"""Category activity (time-bucketed analytics) tests."""
+from datetime import datetime, timedelta
+import pytest
+from bson import ObjectId
+from app.utils.activity import activity_counter
+
+pytest.importorskip("numpy")
+
+FIELDS = [{"name": "Brand", "field_type": "text"}, {"name": "Quantity", "field_type": "number"}]
+
+
+@pytest.mark.asyncio
+async def test_item_writes_are_counted_per_day(in_process_client, login):
+    """Test that every kind of item write lands in today's bucket, merged in memory, and follows renames."""
+    async with in_process_client() as (client, db):
+        headers, _ = await login(client)
+        hobby = (await client.post("/api/hobbies", headers=headers, json={
+            "name": "Slingshot", "categories": [
+                {"name": "Latex", "fields": FIELDS, "items": [{"data": {"Brand": "Acme", "Quantity": 3}},
+                                                             {"data": {"Brand": "Zebra", "Quantity": 4}}]},
+                {"name": "Retired", "fields": FIELDS}]})).json()
+        url = f"/api/hobbies/{hobby['id']}/categories"
+        first, second = (item["id"] for item in hobby["categories"][0]["items"])
+        await client.put(f"{url}/Latex/items/{first}", headers=headers, json={"data": {"Brand": "Acme", "Quantity": 10}})
+        await client.patch(f"{url}/Latex/items/{first}", headers=headers, json={"data": {"Quantity": 8}})
+        await client.post(f"{url}/Latex/items/{first}/increment", headers=headers, json={"field": "Quantity", "amount": -1})
+        await client.post(f"{url}/Latex/items", headers=headers, json={"data": {"Brand": "Acme", "Quantity": 5}})
+        await client.post(f"{url}/Latex/items/move", headers=headers,
+                          json={"item_ids": [second], "target_category": "Retired"})
+        pending = activity_counter.pending
+        daily = (await client.get(f"{url}/Latex/activity", headers=headers, params={"granularity": "day"})).json()
+        retired = (await client.get(f"{url}/Retired/activity", headers=headers)).json()
+
+        await client.put(f"{url}/Latex", headers=headers, json={"name": "Bands"})
+        renamed = (await client.get(f"{url}/Bands/activity", headers=headers)).json()
+        await client.delete(f"{url}/Bands", headers=headers)
+        await activity_counter.flush()
+        left = await db.item_activity.count_documents({"hobby_id": hobby["id"]})
+
+    assert pending == 2  # One merged bucket per category written today
+    today = daily["periods"][-1]
+    assert len(daily["periods"]) == 30 and daily["fields"] == ["Quantity"]
+    assert (today["added"], today["removed"], today["updated"]) == (3, 1, 3)
+    assert today["items"] == 2 and today["totals"] == {"Quantity": 12.0}
+    assert today["changes"] == {"Quantity": 12.0}
+    assert daily["periods"][-2]["items"] == 0
+    assert retired["granularity"] == "month" and len(retired["periods"]) == 12
+    assert retired["periods"][-1]["items"] == 1 and retired["periods"][-1]["totals"] == {"Quantity": 4.0}
+    assert renamed["periods"][-1]["totals"] == {"Quantity": 12.0}
+    assert left == 1  # Only Retired's bucket
+
+
+@pytest.mark.asyncio
+async def test_existing_items_are_seeded_once(in_process_client, login):
+    """Test that items from before counting are charted by creation date and later writes add on."""
+    now = datetime.utcnow()
+    this_month = datetime(now.year, now.month, 1)
+    last_month = (this_month - timedelta(days=1)).replace(day=15)
+    months_ago = (last_month - timedelta(days=40)).replace(day=3)
+    async with in_process_client() as (client, db):
+        headers, user_id = await login(client)
+        hobby_id = ObjectId()
+        items = [{"id": str(ObjectId()), "data": {"Quantity": quantity}, "attachments": [],
+                  "created_at": created, "updated_at": created}
+                 for quantity, created in ((2, months_ago), (3, last_month), (4, last_month), (None, last_month))]
+        await db.hobbies.insert_one({
+            "_id": hobby_id, "user_id": user_id, "name": "Old", "description": None,
+            "categories": [{"name": "Latex", "schema": {"category_name": "Latex", "fields": FIELDS},
+                            "items": items, "created_at": months_ago, "updated_at": months_ago}],
+            "created_at": months_ago, "updated_at": months_ago})
+        url = f"/api/hobbies/{hobby_id}/categories/Latex"
+
+        monthly = (await client.get(f"{url}/activity", headers=headers)).json()
+        await client.post(f"{url}/items", headers=headers, json={"data": {"Quantity": 10}})
+        again = (await client.get(f"{url}/activity", headers=headers)).json()
+        weekly = (await client.get(f"{url}/activity", headers=headers, params={
+            "granularity": "week", "start": last_month.date().isoformat(), "end": last_month.date().isoformat()})).json()
+        baselines = await db.item_activity_baselines.count_documents({})
+        too_many = await client.get(f"{url}/activity", headers=headers, params={"granularity": "day",
+                                                                                  "start": "2000-01-01"})
+        missing = await client.get(f"{url}x/activity", headers=headers)
+
+    by_month = {period["start"][:7]: period for period in monthly["periods"]}
+    assert by_month[months_ago.strftime("%Y-%m")]["added"] == 1
+    assert by_month[last_month.strftime("%Y-%m")]["added"] == 3
+    assert by_month[last_month.strftime("%Y-%m")]["totals"] == {"Quantity": 9.0}
+    assert monthly["periods"][-1]["items"] == 4
+    assert again["periods"][-1]["added"] == 1
+    assert (again["periods"][-1]["items"], again["periods"][-1]["totals"]) == (5, {"Quantity": 19.0})
+    assert baselines == 1
+    week_start = last_month.date() - timedelta(days=last_month.weekday())
+    assert [period["start"] for period in weekly["periods"]] == [week_start.isoformat()]
+    assert weekly["periods"][0]["added"] == 3
+    assert too_many.status_code == 400 and missing.status_code == 404
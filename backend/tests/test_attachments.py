@@ -0,0 +1,114 @@
+"""Item attachment endpoint tests."""
+import asyncio
+from io import BytesIO
+import pytest
+from app.config import settings
+from app.utils import thumbnails
+
+
+async def _setup(client, headers):
+    hobby = (await client.post("/api/hobbies", headers=headers, json={
+        "name": "Slingshot", "categories": [{"name": "Latex", "fields": [],
+                                             "items": [{"data": {"Brand": "Acme"}}]}]})).json()
+    item_id = hobby["categories"][0]["items"][0]["id"]
+    return hobby["id"], f"/api/hobbies/{hobby['id']}/categories/Latex/items/{item_id}"
+
+
+async def _chunks(data: bytes):
+    for offset in range(0, len(data), 1000):
+        yield data[offset:offset + 1000]
+
+
+@pytest.mark.asyncio
+async def test_upload_download_ranges_and_delete(monkeypatch, in_process_client, login):
+    """Test a chunked streaming upload, full and ranged downloads, and deletion."""
+    monkeypatch.setattr(settings, "ATTACHMENT_CHUNK_SIZE", 4096)
+    data = bytes(range(256)) * 40
+    async with in_process_client() as (client, db):
+        headers, _ = await login(client)
+        hobby_id, item_url = await _setup(client, headers)
+        uploaded = await client.post(f"{item_url}/attachments", params={"filename": "../manual.pdf"},
+                                     content=_chunks(data), headers={**headers, "Content-Type": "application/pdf"})
+        attachment = uploaded.json()
+        file_url = f"{item_url}/attachments/{attachment['id']}"
+        hobby = (await client.get(f"/api/hobbies/{hobby_id}", headers=headers)).json()
+        full = await client.get(file_url, headers=headers)
+        partial = await client.get(file_url, headers={**headers, "Range": "bytes=4000-4199"})
+        suffix = await client.get(file_url, headers={**headers, "Range": "bytes=-10"})
+        unsatisfiable = await client.get(file_url, headers={**headers, "Range": "bytes=99999-"})
+        chunk_count = await db["attachments.chunks"].count_documents({})
+
+        deleted = await client.delete(file_url, headers=headers)
+        gone = await client.get(file_url, headers=headers)
+        remaining = await db["attachments.chunks"].count_documents({})
+
+    assert uploaded.status_code == 201
+    assert attachment["filename"] == "manual.pdf" and attachment["length"] == len(data)
+    assert hobby["categories"][0]["items"][0]["attachments"] == [attachment]
+    assert chunk_count == 3
+
+    assert full.status_code == 200 and full.content == data
+    assert full.headers["content-type"] == "application/pdf"
+    assert full.headers["accept-ranges"] == "bytes"
+    assert partial.status_code == 206 and partial.content == data[4000:4200]
+    assert partial.headers["content-range"] == f"bytes 4000-4199/{len(data)}"
+    assert suffix.status_code == 206 and suffix.content == data[-10:]
+    assert unsatisfiable.status_code == 416
+
+    assert deleted.status_code == 204 and gone.status_code == 404
+    assert remaining == 0
+
+
+@pytest.mark.asyncio
+async def test_upload_limits(monkeypatch, in_process_client, login):
+    """Test type and size limits, and that deleting the item deletes its files."""
+    monkeypatch.setattr(settings, "ATTACHMENT_MAX_BYTES", 5000)
+    monkeypatch.setattr(settings, "ATTACHMENT_MAX_PER_ITEM", 1)
+    async with in_process_client() as (client, db):
+        headers, _ = await login(client)
+        hobby_id, item_url = await _setup(client, headers)
+        pdf = {**headers, "Content-Type": "application/pdf"}
+        wrong_type = await client.post(f"{item_url}/attachments", content=b"x",
+                                       headers={**headers, "Content-Type": "text/html"})
+        declared = await client.post(f"{item_url}/attachments", content=b"x" * 6000, headers=pdf)
+        streamed = await client.post(f"{item_url}/attachments", content=_chunks(b"x" * 6000), headers=pdf)
+        first = await client.post(f"{item_url}/attachments", content=b"x" * 10, headers=pdf)
+        second = await client.post(f"{item_url}/attachments", content=b"x" * 10, headers=pdf)
+        thumbnail = await client.get(f"{item_url}/attachments/{first.json()['id']}/thumbnail", headers=headers)
+        other_item = await client.get(f"{item_url}x/attachments/{first.json()['id']}", headers=headers)
+        files_before = await db["attachments.files"].count_documents({})
+        await client.delete(item_url, headers=headers)
+        files_after = await db["attachments.files"].count_documents({})
+
+    assert wrong_type.status_code == 415
+    assert declared.status_code == 413 and streamed.status_code == 413
+    assert first.status_code == 201
+    assert second.status_code == 409
+    assert thumbnail.status_code == 415
+    assert other_item.status_code == 404
+    assert (files_before, files_after) == (1, 0)
+
+
+@pytest.mark.asyncio
+async def test_thumbnails_render_once(monkeypatch, user_client):
+    """Test that concurrent thumbnail requests render once and later ones hit the cache."""
+    Image = pytest.importorskip("PIL.Image")
+    png = BytesIO()
+    Image.new("RGB", (800, 600), "orange").save(png, format="PNG")
+    renders = []
+    render = thumbnails.render
+    monkeypatch.setattr(thumbnails, "render", lambda data, size: renders.append(size) or render(data, size))
+
+    client, headers, _ = user_client
+    _, item_url = await _setup(client, headers)
+    attachment = (await client.post(f"{item_url}/attachments", content=png.getvalue(),
+                                    headers={**headers, "Content-Type": "image/png"})).json()
+    url = f"{item_url}/attachments/{attachment['id']}/thumbnail"
+    first = await asyncio.gather(*(client.get(url, params={"size": 128}, headers=headers) for _ in range(3)))
+    cached = await client.get(url, params={"size": 128}, headers=headers)
+    bad_size = await client.get(url, params={"size": 129}, headers=headers)
+
+    assert all(r.status_code == 200 for r in first) and cached.content == first[0].content
+    assert Image.open(BytesIO(cached.content)).size == (128, 96)
+    assert renders == [128]
+    assert bad_size.status_code == 400
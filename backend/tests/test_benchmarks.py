@@ -0,0 +1,42 @@
+"""Benchmark harness tests."""
+from benchmarks import harness
+from benchmarks.documents import hobby_document
+
+
+def test_case_ids_and_sweep():
+    """Test parameterised case ids."""
+    assert harness.sweep("items", [10, 100]) == [{"items": 10}, {"items": 100}]
+    assert harness.case_id("hobby_parse", {"items": 10}) == "hobby_parse[items=10]"
+    assert harness.case_id("decode_access_token", {}) == "decode_access_token"
+
+
+def test_hobby_document_item_count():
+    """Test that synthetic documents hold the requested number of items."""
+    doc = hobby_document(1001, categories=4)
+    assert sum(len(c["items"]) for c in doc["categories"]) == 1001
+    assert len({c["name"] for c in doc["categories"]}) == 4
+
+
+def test_compare_flags_slowdowns_beyond_threshold():
+    """Test baseline comparison."""
+    def result(case, seconds):
+        return harness.Result(case=case, group="g", params={}, rounds=1, iterations=1,
+                              min=seconds, median=seconds, mean=seconds, stdev=0.0)
+
+    baseline = {"fast": {"min": 1.0}, "slow": {"min": 1.0}}
+    comparisons = harness.compare([result("fast", 1.05), result("slow", 1.5), result("new", 9.0)],
+                                  baseline, threshold=0.10)
+
+    by_case = {c.case: c for c in comparisons}
+    assert set(by_case) == {"fast", "slow"}
+    assert not by_case["fast"].regressed
+    assert by_case["slow"].regressed
+
+
+def test_save_and_load_baseline(tmp_path):
+    """Test that a saved baseline round-trips."""
+    path = tmp_path / "baseline.json"
+    results = [harness.Result(case="x", group="g", params={"items": 10}, rounds=3, iterations=2,
+                              min=0.1, median=0.2, mean=0.2, stdev=0.01)]
+    harness.save_baseline(str(path), results)
+    assert harness.load_baseline(str(path))["x"]["median"] == 0.2
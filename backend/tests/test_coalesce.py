@@ -0,0 +1,102 @@
+"""Coalesced item update tests."""
+import asyncio
+from types import SimpleNamespace
+import pytest
+from app.utils.coalesce import ItemWriteCoalescer, item_writes
+
+
+async def _setup(client, headers):
+    hobby = (await client.post("/api/hobbies", headers=headers, json={
+        "name": "Knitting", "categories": [{"name": "Yarn", "fields": [
+            {"name": "Color", "field_type": "text"}, {"name": "Skeins", "field_type": "number"}],
+            "items": [{"data": {"Color": "red", "Skeins": 1}}]}]})).json()
+    item_id = hobby["categories"][0]["items"][0]["id"]
+    return hobby["id"], f"/api/hobbies/{hobby['id']}/categories/Yarn/items/{item_id}"
+
+
+async def _stored(db, hobby_id):
+    hobby = await db.hobbies.find_one({})
+    return hobby["categories"][0]["items"][0]["data"]
+
+
+@pytest.mark.asyncio
+async def test_updates_coalesce_into_one_write(monkeypatch, in_process_client, login):
+    """Test that rapid updates are written once, read back at once and validated up front."""
+    monkeypatch.setattr(item_writes, "window", 0.05)
+    async with in_process_client() as (client, db):
+        headers, _ = await login(client)
+        hobby_id, item_url = await _setup(client, headers)
+        writes = []
+        update = db.hobbies.find_one_and_update
+
+        async def counting_update(*args, **kwargs):
+            writes.append(args[1])
+            return await update(*args, **kwargs)
+        monkeypatch.setattr(db.hobbies, "find_one_and_update", counting_update)
+
+        responses = [await client.put(item_url, params={"coalesce": "true"}, headers=headers,
+                                      json={"data": {"Color": color, "Skeins": n}})
+                     for n, color in enumerate(["blue", "green", "teal"], start=2)]
+        invalid = await client.put(item_url, params={"coalesce": "true"}, headers=headers,
+                                   json={"data": {"Skeins": "many"}})
+        read = (await client.get(f"/api/hobbies/{hobby_id}", headers=headers)).json()
+        stored_before = await _stored(db, hobby_id)
+        await asyncio.sleep(0.15)
+        stored_after = await _stored(db, hobby_id)
+        history = (await client.get(f"/api/history/items/{read['categories'][0]['items'][0]['id']}",
+                                    headers=headers)).json()
+
+    assert [r.status_code for r in responses] == [200, 200, 200] and invalid.status_code == 400
+    assert responses[-1].json()["categories"][0]["items"][0]["data"] == {"Color": "teal", "Skeins": 4}
+    assert read["categories"][0]["items"][0]["data"] == {"Color": "teal", "Skeins": 4}
+    assert stored_before == {"Color": "red", "Skeins": 1}
+    assert stored_after == {"Color": "teal", "Skeins": 4}
+    assert len(writes) == 1
+    assert [entry["action"] for entry in history] == ["updated"]
+
+
+@pytest.mark.asyncio
+async def test_other_writes_and_shutdown_flush_first(monkeypatch, in_process_client, login):
+    """Test that a later write of the user applies after the parked update, and that shutdown flushes."""
+    monkeypatch.setattr(item_writes, "window", 60)
+    async with in_process_client() as (client, db):
+        headers, _ = await login(client)
+        hobby_id, item_url = await _setup(client, headers)
+        await client.put(item_url, params={"coalesce": "true"}, headers=headers,
+                         json={"data": {"Color": "blue", "Skeins": 2}})
+        await client.post(f"{item_url}/increment", headers=headers, json={"field": "Skeins", "amount": 1})
+        after_increment = await _stored(db, hobby_id)
+        await client.put(item_url, params={"coalesce": "true"}, headers=headers,
+                         json={"data": {"Color": "black", "Skeins": 9}})
+        pending = item_writes.pending
+    stored = await _stored(db, hobby_id)
+
+    assert after_increment == {"Color": "blue", "Skeins": 3}
+    assert pending == 1
+    assert stored == {"Color": "black", "Skeins": 9}
+
+
+@pytest.mark.asyncio
+async def test_failed_writes_stay_parked_and_retry():
+    """Test that a failing write stays visible, fails the user's next write and is retried with backoff."""
+    coalescer = ItemWriteCoalescer(window_ms=10)
+    attempts = []
+
+    async def flaky_store(hobby_id, user_id, category_name, item_id, data):
+        attempts.append(data)
+        if len(attempts) < 3:
+            raise RuntimeError("database unavailable")
+        return object()
+
+    coalescer.submit(flaky_store, "u1", "h1", "Yarn", "i1", {"Color": "blue"})
+    with pytest.raises(RuntimeError):
+        await coalescer.flush_user("u1")  # Another write of the user must not overtake it
+    item = SimpleNamespace(id="i1", data={"Color": "red"}, updated_at=None)
+    coalescer.overlay(SimpleNamespace(id="h1", user_id="u1",
+                                      categories=[SimpleNamespace(name="Yarn", items=[item])]))
+    parked = coalescer.pending
+    await asyncio.sleep(0.2)  # The window's timer fails again, the backed-off retry succeeds
+
+    assert parked == 1 and item.data == {"Color": "blue"}
+    assert attempts == [{"Color": "blue"}] * 3
+    assert coalescer.pending == 0
@@ -0,0 +1,77 @@
+"""Category stats and item query tests (columnar item view)."""
+import pytest
+
+pytest.importorskip("numpy")
+
+FIELDS = [{"name": "Brand", "field_type": "text"}, {"name": "Width", "field_type": "number"},
+          {"name": "In stock", "field_type": "boolean"}, {"name": "Bought", "field_type": "date"},
+          {"name": "Size: mm", "field_type": "number"}]
+ITEMS = [
+    {"Brand": "Theraband", "Width": 20, "In stock": True, "Bought": "2024-03-01"},
+    {"Brand": "Acme", "Width": 25.5, "In stock": False, "Bought": "2023-11-15T10:00:00"},
+    {"Brand": "Acme", "In stock": True, "Size: mm": 3},
+    {"Brand": "Zebra", "Width": 18, "Bought": "not a date"},
+    {"Width": 30},
+]
+
+
+async def _setup(client, headers):
+    hobby = (await client.post("/api/hobbies", headers=headers, json={
+        "name": "Slingshot", "categories": [{"name": "Latex", "fields": FIELDS,
+                                             "items": [{"data": data} for data in ITEMS]}]})).json()
+    return f"/api/hobbies/{hobby['id']}/categories/Latex"
+
+
+@pytest.mark.asyncio
+async def test_category_stats(user_client):
+    """Test per-type statistics, with missing and wrongly typed values left out."""
+    client, headers, _ = user_client
+    url = await _setup(client, headers)
+    response = await client.get(f"{url}/stats", headers=headers)
+    missing = await client.get(f"{url}x/stats", headers=headers)
+
+    assert response.status_code == 200 and missing.status_code == 404
+    body = response.json()
+    assert body["items"] == 5
+    fields = {f["field"]: f for f in body["fields"]}
+    assert fields["Width"]["count"] == 4 and fields["Width"]["missing"] == 1
+    assert (fields["Width"]["min"], fields["Width"]["max"], fields["Width"]["sum"]) == (18, 30, 93.5)
+    assert fields["Width"]["median"] == 22.75
+    assert (fields["In stock"]["true"], fields["In stock"]["false"]) == (2, 1)
+    assert fields["Bought"]["count"] == 2
+    assert (fields["Bought"]["min"], fields["Bought"]["max"]) == ("2023-11-15", "2024-03-01")
+    assert fields["Brand"]["distinct"] == 3
+    assert fields["Brand"]["top"][0] == {"value": "Acme", "count": 2}
+
+
+@pytest.mark.asyncio
+async def test_query_items_filters_and_sorts(user_client):
+    """Test filters on every type, sorting with missing values last, paging and bad requests."""
+    client, headers, _ = user_client
+    url = await _setup(client, headers)
+
+    async def brands(**params):
+        response = await client.get(f"{url}/items", headers=headers, params=params)
+        assert response.status_code == 200, response.text
+        body = response.json()
+        return body["total"], [item["data"].get("Brand") for item in body["items"]]
+
+    by_width = await brands(sort="Width", order="desc")
+    text_range = await brands(where=["Brand:gte:B", "Brand:lt:Zz"], sort="Brand")
+    not_acme = await brands(where="Brand:ne:Acme")
+    in_stock = await brands(where="In stock:eq:true", sort="Brand", order="desc")
+    recent = await brands(where="Bought:gt:2024-01-01")
+    colon = await brands(where="Size: mm:gte:3")
+    page = await brands(sort="Width", limit=2, offset=1)
+    bad = [await client.get(f"{url}/items", headers=headers, params=params) for params in (
+        {"where": "Width:like:2"}, {"where": "Width:gt:wide"}, {"where": "Colour:eq:red"},
+        {"sort": "Colour"})]
+
+    assert by_width == (5, [None, "Acme", "Theraband", "Zebra", "Acme"])
+    assert text_range == (2, ["Theraband", "Zebra"])
+    assert not_acme == (3, ["Theraband", "Zebra", None])
+    assert in_stock == (2, ["Theraband", "Acme"])
+    assert recent == (1, ["Theraband"])
+    assert colon == (1, ["Acme"])
+    assert page == (5, ["Theraband", "Acme"])
+    assert [r.status_code for r in bad] == [400, 400, 400, 400]
@@ -0,0 +1,69 @@
+"""Batched user lookup tests."""
+import asyncio
+import pytest
+from fastapi import HTTPException
+from app.models.user import User
+from app.repositories.user_repository import UserRepository
+from app.services.auth_service import AuthService
+from app.storage.memory import MemoryEngine
+from app.utils.dataloader import DataLoader
+
+
+@pytest.mark.asyncio
+async def test_loads_in_one_tick_share_a_batch():
+    """Test batching, key de-duplication, missing keys and later batches."""
+    batches = []
+
+    async def fetch(keys):
+        batches.append(sorted(keys))
+        return {key: key.upper() for key in keys if key != "missing"}
+
+    loader = DataLoader(fetch, "test")
+    results = await asyncio.gather(*(loader.load(key) for key in ["a", "b", "a", "missing"]))
+    assert results == ["A", "B", "A", None]
+    assert batches == [["a", "b", "missing"]]
+
+    assert await loader.load("c") == "C"
+    assert batches[-1] == ["c"]
+
+
+@pytest.mark.asyncio
+async def test_batch_errors_reach_every_waiter():
+    """Test that a failing batch fails each load and the loader recovers."""
+    fail = True
+
+    async def fetch(keys):
+        if fail:
+            raise RuntimeError("down")
+        return {key: key for key in keys}
+
+    loader = DataLoader(fetch, "test-errors")
+    results = await asyncio.gather(loader.load("a"), loader.load("b"), return_exceptions=True)
+    assert all(isinstance(r, RuntimeError) for r in results)
+    fail = False
+    assert await loader.load("a") == "a"
+
+
+@pytest.mark.asyncio
+async def test_concurrent_auth_uses_one_users_query():
+    """Test that concurrent token checks resolve users with one $in query by _id."""
+    engine = MemoryEngine()
+    repo = UserRepository(engine.database)
+    users = [await repo.create_user(User(username=f"user{i}", email=f"user{i}@example.com", hashed_password="x"))
+             for i in range(3)]
+    auth = AuthService(repo)
+    tokens = [auth.create_token_for_user(user).access_token for user in users for _ in range(2)]
+
+    queries = []
+    find = engine.database.users.find
+    engine.database.users.find = lambda filter=None, *a, **kw: queries.append(filter) or find(filter, *a, **kw)
+    resolved = await asyncio.gather(*(AuthService(UserRepository(engine.database)).get_current_user(t)
+                                      for t in tokens))
+
+    assert [user.username for user in resolved] == ["user0", "user0", "user1", "user1", "user2", "user2"]
+    assert len(queries) == 1 and len(queries[0]["_id"]["$in"]) == 3
+
+    await repo.delete_user(str(users[0].id))
+    with pytest.raises(HTTPException) as exc:
+        await auth.get_current_user(tokens[0])
+    assert exc.value.status_code == 401
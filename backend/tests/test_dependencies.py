@@ -0,0 +1,54 @@
+"""Dependency container tests."""
+import pytest
+from app.dependencies import get_hobby_service
+from app.main import app
+from app.models.hobby import Hobby
+from app.utils.activity import activity_counter
+from app.utils.history import history_writer
+from app.utils.jobs import job_queue
+
+
+class FakeHobbyService:
+    async def get_user_hobbies(self, user):
+        return [Hobby(_id="507f1f77bcf86cd799439011", user_id=str(user.id), name="Fake")]
+
+
+@pytest.mark.asyncio
+async def test_container_is_shared_and_swappable(in_process_client, login):
+    """Test that requests and the write-behind workers share one container whose components can be swapped."""
+    async with in_process_client() as (client, db):
+        container = app.state.container
+        headers, _ = await login(client)
+
+
+        real = container.hobby_service
+        with container.override(hobby_service=FakeHobbyService()):
+            faked = (await client.get("/api/hobbies", headers=headers)).json()
+        restored = (await client.get("/api/hobbies", headers=headers)).json()
+        fake_history, fake_activity, fake_jobs = object(), object(), object()
+        with container.override(history_repository=fake_history, activity_repository=fake_activity,
+                                job_repository=fake_jobs):
+            writers = [history_writer.repository(), activity_counter.repository(), job_queue.repository()]
+
+    assert container.hobby_service is real
+    assert container.hobby_service.hobby_repository is container.hobby_repository
+    assert container.hobby_repository.db is db
+    assert container.hobby_service.write_effects is container.attachment_service.write_effects
+    assert container.hobby_write_effects.duplicate_index.repository is container.signature_repository
+    assert [hobby["name"] for hobby in faked] == ["Fake"]
+    assert restored == []
+    assert writers == [fake_history, fake_activity, fake_jobs]
+
+
+@pytest.mark.asyncio
+async def test_app_dependency_overrides_reach_the_routes(in_process_client, login):
+    """Test that app.dependency_overrides applies to the routers' endpoints."""
+    async with in_process_client() as (client, db):
+        headers, _ = await login(client)
+        app.dependency_overrides[get_hobby_service] = FakeHobbyService
+        try:
+            faked = (await client.get("/api/hobbies", headers=headers)).json()
+        finally:
+            del app.dependency_overrides[get_hobby_service]
+
+    assert [hobby["name"] for hobby in faked] == ["Fake"]
@@ -0,0 +1,97 @@
+"""Duplicate item detection tests."""
+from datetime import datetime
+import pytest
+from bson import ObjectId
+
+pytest.importorskip("numpy")
+
+FIELDS = [{"name": "Name", "field_type": "text"}, {"name": "Brand", "field_type": "text"},
+          {"name": "Bought", "field_type": "date"}]
+
+
+@pytest.mark.asyncio
+async def test_likely_duplicates_are_flagged_on_insert(in_process_client, login):
+    """Test that item writes keep the index current and an insert names the items it likely duplicates."""
+    async with in_process_client() as (client, db):
+        headers, _ = await login(client)
+        hobby = (await client.post("/api/hobbies", headers=headers, json={
+            "name": "Slingshot", "categories": [
+                {"name": "Latex", "fields": FIELDS, "items": [
+                    {"data": {"Name": "Latex band 0.75mm", "Brand": "Acme", "Bought": "2024-03-01"}},
+                    {"data": {"Name": "Theraband Gold", "Brand": "Thera", "Bought": "2024-03-01"}}]},
+                {"name": "Retired", "fields": FIELDS}]})).json()
+        url = f"/api/hobbies/{hobby['id']}/categories"
+        band, gold = (item["id"] for item in hobby["categories"][0]["items"])
+
+        typo = await client.post(f"{url}/Latex/items", headers=headers, json={
+            "data": {"Name": "Latex  Band 0.75 mm", "Brand": "ACME", "Bought": "2024-05-02"}})
+        other = await client.post(f"{url}/Latex/items", headers=headers, json={
+            "data": {"Name": "Flat band 0.6mm", "Brand": "Simple", "Bought": "2024-03-01"}})
+        flat = other.json()["categories"][0]["items"][-1]["id"]
+        await client.put(f"{url}/Latex/items/{flat}", headers=headers, json={
+            "data": {"Name": "Theraband Gold", "Brand": "Thera"}})
+        listed = (await client.get(f"{url}/Latex/duplicates", headers=headers)).json()
+        await client.post(f"{url}/Latex/items/move", headers=headers,
+                          json={"item_ids": [gold], "target_category": "Retired"})
+        moved = await client.post(f"{url}/Retired/items", headers=headers, json={
+            "data": {"Name": "Theraband gold", "Brand": "Thera"}})
+        await client.delete(f"{url}/Latex/items/{band}", headers=headers)
+        left = await db.item_signatures.count_documents({"hobby_id": hobby["id"], "category": "Latex"})
+
+    assert typo.status_code == 201 and typo.headers["X-Possible-Duplicates"] == band
+    assert "X-Possible-Duplicates" not in other.headers
+    assert listed["total"] == 2 and listed["min_similarity"] == 0.7
+    assert listed["pairs"][0] == {"item_ids": sorted([gold, flat]), "similarity": 1.0}
+    assert set(listed["pairs"][1]["item_ids"]) == {band, typo.json()["categories"][0]["items"][2]["id"]}
+    assert moved.headers["X-Possible-Duplicates"] == gold
+    assert left == 2  # The typo and the edited item
+
+
+@pytest.mark.asyncio
+async def test_listing_indexes_items_written_around_the_index(in_process_client, login):
+    """Test that the duplicates listing stores missing and stale signatures and drops orphans."""
+    async with in_process_client() as (client, db):
+        headers, user_id = await login(client)
+        hobby_id = ObjectId()
+        now = datetime.utcnow()
+        names = ["Pine cone slingshot", "Pine-cone slingshot!", "Oak fork", "Maple fork"]
+        items = [{"id": str(ObjectId()), "data": {"Name": name}, "attachments": [], "created_at": now,
+                  "updated_at": now} for name in names]
+        await db.hobbies.insert_one({
+            "_id": hobby_id, "user_id": user_id, "name": "Old", "description": None,
+            "categories": [{"name": "Frames", "schema": {"category_name": "Frames", "fields": FIELDS},
+                            "items": items, "created_at": now, "updated_at": now}],
+            "created_at": now, "updated_at": now})
+        await db.item_signatures.insert_one({"user_id": user_id, "hobby_id": str(hobby_id), "category": "Frames",
+                                             "item_id": "gone", "digest": "", "bands": []})
+        url = f"/api/hobbies/{hobby_id}/categories/Frames"
+
+        before = await client.post(f"{url}/items", headers=headers, json={"data": {"Name": "Oak fork"}})
+        listed = (await client.get(f"{url}/duplicates", headers=headers, params={"min_similarity": 0.5})).json()
+        stored = await db.item_signatures.count_documents({"hobby_id": str(hobby_id)})
+        after = await client.post(f"{url}/items", headers=headers, json={"data": {"Name": "pine cone  slingshot"}})
+        missing = await client.get(f"{url}x/duplicates", headers=headers)
+
+    assert "X-Possible-Duplicates" not in before.headers  # Nothing indexed yet but itself
+    assert [set(pair["item_ids"]) for pair in listed["pairs"]] == [
+        {items[2]["id"], before.json()["categories"][0]["items"][-1]["id"]}, {items[0]["id"], items[1]["id"]}]
+    assert stored == 5
+    assert after.headers["X-Possible-Duplicates"].split(", ")[0] == items[0]["id"]
+    assert missing.status_code == 404
+
+
+@pytest.mark.asyncio
+async def test_duplicates_header_lists_the_closest_few(user_client):
+    """Test that the insert header names at most five items, most alike first."""
+    client, headers, _ = user_client
+    names = ["Red fletching"] * 4 + ["Red fletchings", "Red fletching!", "Red fletchin"]
+    hobby = (await client.post("/api/hobbies", headers=headers, json={
+        "name": "Archery", "categories": [
+            {"name": "Parts", "fields": FIELDS, "items": [{"data": {"Name": name}} for name in names]}]})).json()
+    item_ids = [item["id"] for item in hobby["categories"][0]["items"]]
+
+    added = await client.post(f"/api/hobbies/{hobby['id']}/categories/Parts/items", headers=headers,
+                              json={"data": {"Name": "Red fletching"}})
+
+    listed = added.headers["X-Possible-Duplicates"].split(", ")
+    assert len(listed) == 5 and set(listed[:4]) == set(item_ids[:4])
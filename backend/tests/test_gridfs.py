@@ -0,0 +1,44 @@
+"""GridFS bucket tests on the in-process engines."""
+import pytest
+from pymongo.errors import DuplicateKeyError
+from app.database import create_indexes
+from app.storage import create_engine
+from app.storage.gridfs import FileTooLarge, GridFSBucket
+
+
+async def _pieces(data: bytes, size: int):
+    for offset in range(0, len(data), size):
+        yield data[offset:offset + size]
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("storage", ["memory", "sqlite"])
+async def test_chunked_upload_and_ranged_reads(storage, tmp_path):
+    """Test that uploads are split into chunks and ranges read only what they need."""
+    engine = create_engine(storage, path=str(tmp_path / "files.db"))
+    await engine.connect()
+    await create_indexes(engine.database)
+    bucket = GridFSBucket(engine.database, "attachments", chunk_size=10)
+    data = bytes(range(256)) * 2
+
+    file = await bucket.upload_from_stream("photo.jpg", _pieces(data, 7), {"owner": "u1"})
+    assert file["length"] == 512 and file["filename"] == "photo.jpg"
+    assert await bucket.chunks.count_documents({"files_id": file["_id"]}) == 52
+    stored = await bucket.find_file(file["_id"])
+    assert stored["metadata"] == {"owner": "u1"} and stored["chunkSize"] == 10
+
+    assert await bucket.read(stored) == data
+    for start, end in [(0, 1), (5, 25), (10, 20), (500, 512), (123, 456)]:
+        assert b"".join([piece async for piece in bucket.stream(stored, start, end)]) == data[start:end]
+    assert [piece async for piece in bucket.stream(stored, 600)] == []
+
+    with pytest.raises(FileTooLarge):
+        await bucket.upload_from_stream("big.bin", _pieces(data, 100), max_length=300)
+    assert await bucket.chunks.count_documents({}) == 52
+    with pytest.raises(DuplicateKeyError):
+        await bucket.upload_from_stream("again.jpg", _pieces(b"x", 1), file_id=file["_id"])
+
+    assert await bucket.delete(file["_id"])
+    assert await bucket.find_file(file["_id"]) is None
+    assert await bucket.chunks.count_documents({}) == 0
+    await engine.close()
@@ -0,0 +1,106 @@
+"""Item change history tests."""
+import asyncio
+import pytest
+from app.dependencies import Container
+from app.utils.history import HistoryWriter, history_writer
+
+
+@pytest.mark.asyncio
+async def test_writer_batches_and_applies_backpressure():
+    """Test size-triggered batches, blocking when full and the flush on stop."""
+    batches = []
+    release = asyncio.Event()
+
+    class SlowRepository:
+        async def insert_entries(self, entries):
+            await release.wait()
+            batches.append(len(entries))
+
+    writer = HistoryWriter(batch_size=3, flush_interval=60, max_pending=5)
+    writer.start(Container(db=None, engine=None))
+    writer.container.history_repository = SlowRepository()
+    for n in range(3):
+        await writer.record({"n": n})  # The third wakes the flusher, which takes the batch and stalls
+    await asyncio.sleep(0.01)
+    for n in range(3, 5):  # The batch in flight stays buffered until stored, so two more fill it
+        await writer.record({"n": n})
+    blocked = asyncio.create_task(writer.record({"n": 5}))
+    await asyncio.sleep(0.01)
+    was_blocked = not blocked.done()
+
+    release.set()
+    await asyncio.wait_for(blocked, 1)
+    await writer.stop()
+
+    assert was_blocked
+    assert batches[0] == 3 and sum(batches) == 6 and max(batches) <= 3
+    assert writer.pending == 0
+
+
+@pytest.mark.asyncio
+async def test_failed_batches_stay_buffered():
+    """Test that entries stay visible while stored and are retried after a failed insert."""
+    stored = []
+    failures = [RuntimeError("down")]
+
+    class FlakyRepository:
+        async def insert_entries(self, entries):
+            seen_while_inserting.append(len(writer.buffered(lambda entry: True)))
+            if failures:
+                raise failures.pop()
+            stored.extend(entries)
+
+    seen_while_inserting = []
+    writer = HistoryWriter(batch_size=10, flush_interval=60, max_pending=10)
+    writer.start(Container(db=None, engine=None))
+    writer.container.history_repository = FlakyRepository()
+    for n in range(2):
+        await writer.record({"n": n})
+    await writer.flush()
+    after_failure = writer.pending
+    await writer.flush()
+    await writer.stop()
+
+    assert seen_while_inserting == [2, 2]
+    assert after_failure == 2 and [entry["n"] for entry in stored] == [0, 1]
+    assert writer.pending == 0
+
+
+@pytest.mark.asyncio
+async def test_item_history_endpoint(monkeypatch, in_process_client, login):
+    """Test that item writes show up in order, across a move, before and after a flush."""
+    monkeypatch.setattr(history_writer, "flush_interval", 60)
+    async with in_process_client() as (client, db):
+        headers, _ = await login(client)
+        hobby = (await client.post("/api/hobbies", headers=headers, json={
+            "name": "Tennis", "categories": [
+                {"name": "Strings", "fields": [{"name": "Sets", "field_type": "number"}]},
+                {"name": "Old", "fields": [{"name": "Sets", "field_type": "number"}]}]})).json()
+        base = f"/api/hobbies/{hobby['id']}/categories"
+        item_id = (await client.post(f"{base}/Strings/items", headers=headers, json={
+            "data": {"Sets": 3}})).json()["categories"][0]["items"][0]["id"]
+        await client.post(f"{base}/Strings/items/{item_id}/increment", headers=headers,
+                          json={"field": "Sets", "amount": -1})
+        await client.patch(f"{base}/Strings/items/{item_id}", headers=headers, json={"data": {"Note": "gut"}})
+        await client.post(f"{base}/Strings/items/move", headers=headers,
+                          json={"item_ids": [item_id], "target_category": "Old"})
+
+        url = f"/api/history/items/{item_id}"
+        buffered = (await client.get(url, headers=headers)).json()
+        stored_before = await db.item_history.count_documents({})
+        await history_writer.flush()
+        stored = (await client.get(url, headers=headers)).json()
+        page = (await client.get(url, headers=headers, params={"limit": 2})).json()
+        older = (await client.get(url, headers=headers, params={"before": page[-1]["at"]})).json()
+        other_user = await client.get("/api/history/items/nope", headers=headers)
+
+    actions = ["moved", "patched", "incremented", "created"]
+    assert stored_before == 0
+    assert [entry["action"] for entry in buffered] == actions
+    assert stored == buffered
+    assert stored[0]["category"] == "Old" and stored[0]["changes"]["from_category"] == "Strings"
+    assert stored[1]["changes"] == {"set": {"Note": "gut"}, "unset": []}
+    assert stored[2]["changes"] == {"field": "Sets", "amount": -1, "value": 2}
+    assert stored[3]["changes"] == {"data": {"Sets": 3}}
+    assert [entry["action"] for entry in page + older] == actions
+    assert other_user.json() == []
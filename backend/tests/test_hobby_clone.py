@@ -0,0 +1,58 @@
+"""Hobby clone and compound create endpoint tests."""
+import pytest
+
+LATEX = {
+    "name": "Latex",
+    "fields": [{"name": "Brand", "field_type": "text", "required": True},
+               {"name": "Quantity", "field_type": "number"}],
+    "items": [{"data": {"Brand": "Acme", "Quantity": 3}}, {"data": {"Brand": "Apex"}}],
+}
+
+
+@pytest.mark.asyncio
+async def test_compound_create_and_clone(user_client):
+    """Test creating a hobby with categories and items, then cloning it."""
+    client, headers, _ = user_client
+    created = await client.post("/api/hobbies", headers=headers, json={
+        "name": "Slingshot", "categories": [LATEX, {"name": "Ammo", "fields": []}]})
+    hobby = created.json()
+    full = await client.post(f"/api/hobbies/{hobby['id']}/clone", headers=headers,
+                             json={"name": "Slingshot 2027"})
+    layout = await client.post(f"/api/hobbies/{hobby['id']}/clone", headers=headers,
+                               json={"include_items": False})
+    missing = await client.post("/api/hobbies/507f1f77bcf86cd799439011/clone", headers=headers, json={})
+    listed = (await client.get("/api/hobbies", headers=headers)).json()
+
+    assert created.status_code == 201
+    assert [cat["name"] for cat in hobby["categories"]] == ["Latex", "Ammo"]
+    assert [item["data"] for item in hobby["categories"][0]["items"]] == [item["data"] for item in LATEX["items"]]
+
+    assert full.status_code == 201
+    clone = full.json()
+    assert clone["id"] != hobby["id"] and clone["name"] == "Slingshot 2027"
+    assert [item["data"] for item in clone["categories"][0]["items"]] == [item["data"] for item in LATEX["items"]]
+    assert not {item["id"] for item in clone["categories"][0]["items"]} & \
+        {item["id"] for item in hobby["categories"][0]["items"]}
+    assert layout.json()["name"] == "Slingshot"
+    assert [cat["items"] for cat in layout.json()["categories"]] == [[], []]
+    assert layout.json()["categories"][0]["schema"] == hobby["categories"][0]["schema"]
+    assert missing.status_code == 404
+    assert len(listed) == 3
+
+
+@pytest.mark.asyncio
+async def test_compound_create_validates_everything_first(user_client):
+    """Test that a bad seed item or duplicate category creates nothing."""
+    client, headers, _ = user_client
+    bad_item = await client.post("/api/hobbies", headers=headers, json={
+        "name": "Slingshot", "categories": [{**LATEX, "items": [{"data": {"Quantity": 1}}]}]})
+    duplicate = await client.post("/api/hobbies", headers=headers, json={
+        "name": "Slingshot", "categories": [LATEX, LATEX]})
+    plain = await client.post("/api/hobbies", headers=headers, json={"name": "Archery"})
+    listed = (await client.get("/api/hobbies", headers=headers)).json()
+
+    assert bad_item.status_code == 400
+    assert bad_item.json()["detail"] == "Category 'Latex': Required field 'Brand' is missing"
+    assert duplicate.status_code == 400
+    assert plain.status_code == 201 and plain.json()["categories"] == []
+    assert [hobby["name"] for hobby in listed] == ["Archery"]
@@ -0,0 +1,65 @@
+"""Idempotency-Key tests."""
+import asyncio
+import pytest
+from app.utils.idempotency import idempotency_store
+
+
+@pytest.mark.asyncio
+async def test_retries_replay_the_first_response(monkeypatch, in_process_client, login):
+    """Test replays from the cache and the collection, key reuse and per-user keys."""
+    monkeypatch.setattr(idempotency_store, "_cache", type(idempotency_store._cache)())
+    async with in_process_client() as (client, db):
+        headers, _ = await login(client)
+        other, _ = await login(client, "other")
+        keyed = {**headers, "Idempotency-Key": "create-1"}
+        body = {"name": "Pottery", "categories": []}
+        first = await client.post("/api/hobbies", json=body, headers=keyed)
+        retry = await client.post("/api/hobbies", json=body, headers=keyed)
+        idempotency_store._cache.clear()  # As if the retry reached another process
+        stored = await client.post("/api/hobbies", json=body, headers=keyed)
+        different = await client.post("/api/hobbies", json={"name": "Glazes"}, headers=keyed)
+        unkeyed = await client.post("/api/hobbies", json=body, headers=headers)
+        other_user = await client.post("/api/hobbies", json=body,
+                                       headers={**other, "Idempotency-Key": "create-1"})
+        invalid = await client.post("/api/hobbies", json={"name": ""}, headers={**headers, "Idempotency-Key": "bad"})
+        invalid_retry = await client.post("/api/hobbies", json={"name": ""},
+                                          headers={**headers, "Idempotency-Key": "bad"})
+        hobbies = await db.hobbies.count_documents({})
+
+    assert first.status_code == 201 and "idempotent-replayed" not in first.headers
+    assert retry.status_code == 201 and retry.json() == first.json()
+    assert retry.headers["idempotent-replayed"] == "true"
+    assert stored.json() == first.json() and stored.headers["idempotent-replayed"] == "true"
+    assert different.status_code == 422
+    assert unkeyed.json()["id"] != first.json()["id"]
+    assert other_user.status_code == 201 and other_user.json()["id"] != first.json()["id"]
+    assert invalid.status_code == 422 and invalid_retry.headers["idempotent-replayed"] == "true"
+    assert hobbies == 3
+
+
+@pytest.mark.asyncio
+async def test_concurrent_duplicates_wait_for_the_original(in_process_client, login):
+    """Test that duplicates sent together create one item, and a claim held elsewhere answers 409."""
+    async with in_process_client() as (client, db):
+        headers, _ = await login(client)
+        hobby = (await client.post("/api/hobbies", headers=headers, json={
+            "name": "Birding", "categories": [{"name": "Sightings", "fields": []}]})).json()
+        url = f"/api/hobbies/{hobby['id']}/categories/Sightings/items"
+        keyed = {**headers, "Idempotency-Key": "sighting-1"}
+        responses = await asyncio.gather(*(client.post(url, json={"data": {"Bird": "Wren"}}, headers=keyed)
+                                           for _ in range(5)))
+        stored = await client.get(f"/api/hobbies/{hobby['id']}", headers=headers)
+
+        # A claim held by a request still running in another process
+        claim = await db.idempotency_keys.find_one({"_id": {"$regex": "sighting-1$"}})
+        await db.idempotency_keys.insert_one({**claim, "_id": claim["_id"].replace("sighting-1", "sighting-2"),
+                                              "state": "running"})
+        busy = await client.post(url, json={"data": {"Bird": "Wren"}},
+                                 headers={**headers, "Idempotency-Key": "sighting-2"})
+        too_long = await client.post(url, json={"data": {}}, headers={**headers, "Idempotency-Key": "k" * 256})
+
+    assert [r.status_code for r in responses] == [201] * 5
+    assert len({r.text for r in responses}) == 1
+    assert sum(r.headers.get("idempotent-replayed") == "true" for r in responses) == 4
+    assert len(stored.json()["categories"][0]["items"]) == 1
+    assert busy.status_code == 409 and too_long.status_code == 400
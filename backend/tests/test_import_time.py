@@ -0,0 +1,19 @@
+"""Import-time budget tests."""
+import subprocess
+import sys
+from benchmarks.importtime import BACKEND_DIR, check, load_budget, measure
+
+
+def test_heavy_dependencies_are_lazy():
+    """Test that app.main does not import the modules listed as lazy."""
+    budget = load_budget()
+    measurement = measure(budget["module"], budget["baseline"], runs=1)
+    problems = [p for p in check(measurement, budget) if "eagerly" in p]
+    assert problems == []
+
+
+def test_openapi_schema_is_built_on_first_request():
+    """Test that no OpenAPI schema is generated at import time."""
+    script = ("import app.main as m; assert m.app.openapi_schema is None; "
+              "m.app.openapi(); assert m.app.openapi_schema is not None")
+    subprocess.run([sys.executable, "-W", "ignore", "-c", script], cwd=BACKEND_DIR, check=True)
@@ -0,0 +1,53 @@
+"""Atomic item field increment endpoint tests."""
+import asyncio
+import pytest
+
+
+async def _setup(client, headers):
+    hobby = (await client.post("/api/hobbies", json={"name": "Slingshot"}, headers=headers)).json()
+    await client.post(f"/api/hobbies/{hobby['id']}/categories", headers=headers, json={
+        "name": "Latex", "fields": [{"name": "Brand", "field_type": "text"},
+                                    {"name": "Quantity", "field_type": "number"}]})
+    hobby = (await client.post(f"/api/hobbies/{hobby['id']}/categories/Latex/items", headers=headers,
+                               json={"data": {"Brand": "Acme", "Quantity": 3}})).json()
+    item_id = hobby["categories"][0]["items"][0]["id"]
+    return f"/api/hobbies/{hobby['id']}/categories/Latex/items/{item_id}/increment", item_id
+
+
+@pytest.mark.asyncio
+async def test_use_one_up_until_empty(user_client):
+    """Test concurrent decrements with a floor return only the new value."""
+    client, headers, _ = user_client
+    url, item_id = await _setup(client, headers)
+    responses = await asyncio.gather(*(
+        client.post(url, headers=headers, json={"field": "Quantity", "amount": -1, "floor": 0})
+        for _ in range(5)
+    ))
+    refill = await client.post(url, headers=headers, json={"field": "Quantity", "amount": 10})
+
+    ok = [r.json() for r in responses if r.status_code == 200]
+    assert sorted(body["value"] for body in ok) == [0, 1, 2]
+    assert ok[0]["item_id"] == item_id and ok[0]["field"] == "Quantity"
+    rejected = [r for r in responses if r.status_code != 200]
+    assert [r.status_code for r in rejected] == [409, 409]
+    assert rejected[0].json()["detail"] == "Field 'Quantity' would drop below 0"
+    assert refill.json()["value"] == 10
+
+
+@pytest.mark.asyncio
+async def test_increment_errors(user_client):
+    """Test 400/404 answers for bad fields, categories and items."""
+    client, headers, _ = user_client
+    url, _ = await _setup(client, headers)
+    not_number = await client.post(url, headers=headers, json={"field": "Brand"})
+    dotted = await client.post(url, headers=headers, json={"field": "data.Quantity"})
+    no_category = await client.post(url.replace("/Latex/", "/Rubber/"), headers=headers,
+                                    json={"field": "Quantity"})
+    no_item = await client.post(url.replace("/items/", "/items/x"), headers=headers,
+                                json={"field": "Quantity"})
+
+    assert not_number.status_code == 400
+    assert not_number.json()["detail"] == "Field 'Brand' is not a number field"
+    assert dotted.status_code == 400
+    assert no_category.status_code == 404
+    assert no_item.status_code == 404 and no_item.json()["detail"] == "Item not found"
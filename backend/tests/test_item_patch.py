@@ -0,0 +1,29 @@
+"""PATCH partial item update tests."""
+import pytest
+
+
+@pytest.mark.asyncio
+async def test_patch_changes_only_sent_keys(user_client):
+    """Test set/remove semantics and per-key validation for PATCH."""
+    client, headers, _ = user_client
+    hobby = (await client.post("/api/hobbies", json={"name": "Slingshot"}, headers=headers)).json()
+    await client.post(f"/api/hobbies/{hobby['id']}/categories", headers=headers, json={
+        "name": "Latex", "fields": [{"name": "Brand", "field_type": "text", "required": True},
+                                    {"name": "Colour", "field_type": "text"},
+                                    {"name": "Quantity", "field_type": "number"}]})
+    hobby = (await client.post(f"/api/hobbies/{hobby['id']}/categories/Latex/items", headers=headers,
+                               json={"data": {"Brand": "Acme", "Colour": "Red", "Quantity": 3}})).json()
+    url = f"/api/hobbies/{hobby['id']}/categories/Latex/items/{hobby['categories'][0]['items'][0]['id']}"
+
+    patched = await client.patch(url, headers=headers, json={"data": {"Quantity": 4, "Colour": None}})
+    bad_type = await client.patch(url, headers=headers, json={"data": {"Quantity": "four"}})
+    drop_required = await client.patch(url, headers=headers, json={"data": {"Brand": None}})
+    empty = await client.patch(url, headers=headers, json={"data": {}})
+    missing = await client.patch(url + "x", headers=headers, json={"data": {"Quantity": 1}})
+
+    assert patched.status_code == 200
+    assert patched.json()["categories"][0]["items"][0]["data"] == {"Brand": "Acme", "Quantity": 4}
+    assert bad_type.status_code == 400
+    assert drop_required.json()["detail"] == "Required field 'Brand' cannot be removed"
+    assert empty.status_code == 400
+    assert missing.status_code == 404
@@ -0,0 +1,82 @@
+"""Item move/copy endpoint tests."""
+import pytest
+
+
+async def _setup(client, headers):
+    hobbies = []
+    for name in ["Slingshot", "Archery"]:
+        hobby = (await client.post("/api/hobbies", json={"name": name}, headers=headers)).json()
+        hobbies.append(hobby["id"])
+    fields = [{"name": "Brand", "field_type": "text"}, {"name": "Quantity", "field_type": "number"}]
+    await client.post(f"/api/hobbies/{hobbies[0]}/categories", headers=headers,
+                      json={"name": "Latex", "fields": fields})
+    await client.post(f"/api/hobbies/{hobbies[0]}/categories", headers=headers,
+                      json={"name": "Retired", "fields": fields})
+    await client.post(f"/api/hobbies/{hobbies[1]}/categories", headers=headers, json={
+        "name": "Strings", "fields": [{"name": "Brand", "field_type": "text", "required": True}]})
+    for data in [{"Brand": "Acme", "Quantity": 3}, {"Brand": "Apex"}, {"Quantity": 1}]:
+        hobby = (await client.post(f"/api/hobbies/{hobbies[0]}/categories/Latex/items", headers=headers,
+                                   json={"data": data})).json()
+    item_ids = [item["id"] for item in hobby["categories"][0]["items"]]
+    return *hobbies, item_ids
+
+
+@pytest.mark.asyncio
+async def test_move_and_copy_items(user_client):
+    """Test bulk moves within and across hobbies, and copies with new ids."""
+    client, headers, _ = user_client
+    slingshot, archery, ids = await _setup(client, headers)
+    base = f"/api/hobbies/{slingshot}/categories/Latex/items"
+
+    moved = await client.post(f"{base}/move", headers=headers,
+                              json={"item_ids": ids, "target_category": "Retired"})
+    copied = await client.post(f"/api/hobbies/{slingshot}/categories/Retired/items/copy", headers=headers,
+                               json={"item_ids": ids[:2], "target_category": "Strings",
+                                     "target_hobby_id": archery})
+    across = await client.post(f"/api/hobbies/{slingshot}/categories/Retired/items/move", headers=headers,
+                               json={"item_ids": ids[:1], "target_category": "Strings",
+                                     "target_hobby_id": archery})
+    source = (await client.get(f"/api/hobbies/{slingshot}", headers=headers)).json()
+    target = (await client.get(f"/api/hobbies/{archery}", headers=headers)).json()
+
+    assert moved.status_code == 200
+    assert moved.json() == {"hobby_id": slingshot, "category": "Retired", "item_ids": ids}
+    assert copied.status_code == 200
+    new_ids = copied.json()["item_ids"]
+    assert len(new_ids) == 2 and not set(new_ids) & set(ids)
+    assert across.json()["item_ids"] == ids[:1]
+
+    assert source["categories"][0]["items"] == []
+    assert [item["id"] for item in source["categories"][1]["items"]] == ids[1:]
+    assert [item["id"] for item in target["categories"][0]["items"]] == new_ids + ids[:1]
+    assert [item["data"]["Brand"] for item in target["categories"][0]["items"]] == ["Acme", "Apex", "Acme"]
+
+
+@pytest.mark.asyncio
+async def test_transfer_errors(user_client):
+    """Test target schema re-validation and 400/404 answers; nothing moves on error."""
+    client, headers, _ = user_client
+    slingshot, archery, ids = await _setup(client, headers)
+    base = f"/api/hobbies/{slingshot}/categories/Latex/items"
+
+    invalid = await client.post(f"{base}/move", headers=headers, json={
+        "item_ids": ids, "target_category": "Strings", "target_hobby_id": archery})
+    same = await client.post(f"{base}/move", headers=headers,
+                             json={"item_ids": ids, "target_category": "Latex"})
+    missing_item = await client.post(f"{base}/copy", headers=headers,
+                                     json={"item_ids": [ids[0], "nope"], "target_category": "Retired"})
+    missing_category = await client.post(f"{base}/copy", headers=headers,
+                                         json={"item_ids": ids, "target_category": "Nope"})
+    missing_hobby = await client.post(f"{base}/move", headers=headers, json={
+        "item_ids": ids, "target_category": "Strings", "target_hobby_id": "507f1f77bcf86cd799439011"})
+    empty = await client.post(f"{base}/move", headers=headers, json={"item_ids": [], "target_category": "X"})
+    source = (await client.get(f"/api/hobbies/{slingshot}", headers=headers)).json()
+
+    assert invalid.status_code == 400
+    assert invalid.json()["detail"] == f"Item {ids[2]}: Required field 'Brand' is missing"
+    assert same.status_code == 400
+    assert missing_item.status_code == 404 and missing_item.json()["detail"] == "Items not found: nope"
+    assert missing_category.status_code == 404
+    assert missing_hobby.status_code == 404 and missing_hobby.json()["detail"] == "Target hobby not found"
+    assert empty.status_code == 422
+    assert [item["id"] for item in source["categories"][0]["items"]] == ids
@@ -0,0 +1,182 @@
+"""Background job queue tests."""
+import asyncio
+from datetime import datetime, timedelta
+import pytest
+from app.config import settings
+from app.main import app
+from app.models.job import Job, JobStatus
+from app.repositories.job_repository import JobRepository
+from app.utils.jobs import JOB_HANDLERS, JobQueue, job_handler
+
+
+@pytest.fixture
+def handlers():
+    yield
+    for kind in [kind for kind in JOB_HANDLERS if kind.startswith("test_")]:
+        del JOB_HANDLERS[kind]
+
+
+async def _wait_for(repository, job, *statuses):
+    for _ in range(200):
+        job = await repository.get_job(str(job.id), job.user_id)
+        if job.status in statuses:
+            return job
+        await asyncio.sleep(0.01)
+    raise AssertionError(f"Job stayed {job.status}")
+
+
+@pytest.mark.asyncio
+async def test_jobs_run_report_progress_and_cancel(monkeypatch, handlers, in_process_client):
+    """Test success, failure, progress checkpoints and cancelling queued and running jobs."""
+    monkeypatch.setattr(settings, "JOBS_ENABLED", False)
+    release = asyncio.Event()
+
+    @job_handler("test_sum")
+    async def run_sum(ctx):
+        await ctx.progress(0.5, "halfway", state={"partial": 1})
+        return {"sum": sum(ctx.params["values"])}
+
+    @job_handler("test_fail")
+    async def run_fail(ctx):
+        raise ValueError("bad input")
+
+    @job_handler("test_wait")
+    async def run_wait(ctx):
+        while not release.is_set():
+            await ctx.progress(0.1)
+            await asyncio.sleep(0.01)
+
+    async with in_process_client() as (_, db):
+        repository = JobRepository(db)
+        queued = await repository.create_job(Job(user_id="u1", kind="test_wait"))
+        cancelled = await repository.request_cancel(str(queued.id), "u1")
+
+        queue = JobQueue(concurrency=2, poll_interval=0.01, lease_seconds=30, max_attempts=3)
+        queue.start(app.state.container)
+        try:
+            summed = await repository.create_job(Job(user_id="u1", kind="test_sum", params={"values": [1, 2, 3]}))
+            failed = await repository.create_job(Job(user_id="u1", kind="test_fail"))
+            waiting = await repository.create_job(Job(user_id="u1", kind="test_wait"))
+            summed = await _wait_for(repository, summed, JobStatus.SUCCEEDED)
+            failed = await _wait_for(repository, failed, JobStatus.FAILED)
+            await _wait_for(repository, waiting, JobStatus.RUNNING)
+            await repository.request_cancel(str(waiting.id), "u1")
+            waiting = await _wait_for(repository, waiting, JobStatus.CANCELLED)
+        finally:
+            await queue.stop()
+
+    assert cancelled.status == JobStatus.CANCELLED and cancelled.started_at is None
+    assert summed.result == {"sum": 6} and summed.progress == 1.0
+    assert summed.state == {"partial": 1} and summed.message == "halfway"
+    assert summed.expires_at is not None
+    assert failed.error == "bad input" and failed.attempts == 1
+    assert waiting.cancel_requested and waiting.finished_at is not None
+
+
+@pytest.mark.asyncio
+async def test_expired_lease_is_reclaimed_and_stop_requeues(monkeypatch, handlers, in_process_client):
+    """Test that a dead worker's job runs again, and that stopping puts running jobs back."""
+    monkeypatch.setattr(settings, "JOBS_ENABLED", False)
+    started = asyncio.Event()
+
+    @job_handler("test_resume")
+    async def run_resume(ctx):
+        return {"resumed_from": ctx.state.get("done", 0)}
+
+    @job_handler("test_block")
+    async def run_block(ctx):
+        started.set()
+        await asyncio.Event().wait()
+
+    async with in_process_client() as (_, db):
+        repository = JobRepository(db)
+        # A job a crashed worker held, with a checkpoint and an expired lease
+        orphan = await repository.create_job(Job(user_id="u1", kind="test_resume"))
+        await db.jobs.update_one({"_id": orphan.id}, {"$set": {
+            "status": "running", "worker": "dead", "attempts": 1, "state": {"done": 40},
+            "lease_expires_at": datetime.utcnow() - timedelta(seconds=1)}})
+
+        queue = JobQueue(concurrency=1, poll_interval=0.01, lease_seconds=30, max_attempts=3)
+        queue.start(app.state.container)
+        orphan = await _wait_for(repository, orphan, JobStatus.SUCCEEDED)
+        blocked = await repository.create_job(Job(user_id="u1", kind="test_block"))
+        await asyncio.wait_for(started.wait(), 2)
+        await queue.stop()
+        blocked = await repository.get_job(str(blocked.id), "u1")
+
+    assert orphan.result == {"resumed_from": 40} and orphan.attempts == 2
+    assert blocked.status == JobStatus.QUEUED and blocked.attempts == 0 and blocked.worker is None
+
+
+@pytest.mark.asyncio
+async def test_background_move_endpoint(monkeypatch, in_process_client, login):
+    """Test moving items through a job, polling it, and the jobs endpoints."""
+    monkeypatch.setattr(settings, "JOB_POLL_SECONDS", 0.01)
+    async with in_process_client() as (client, _):
+        headers, _ = await login(client)
+        hobby = (await client.post("/api/hobbies", headers=headers, json={
+            "name": "Archery", "categories": [
+                {"name": "Arrows", "fields": [], "items": [{"data": {"n": n}} for n in range(250)]},
+                {"name": "Broken", "fields": []}]})).json()
+        item_ids = [item["id"] for item in hobby["categories"][0]["items"]]
+        url = f"/api/hobbies/{hobby['id']}/categories/Arrows/items/move"
+        body = {"item_ids": item_ids, "target_category": "Broken"}
+
+        accepted = await client.post(url, params={"background": "true"}, json=body, headers=headers)
+        job_url = accepted.headers["location"]
+        for _ in range(200):
+            job = (await client.get(job_url, headers=headers)).json()
+            if job["status"] == "succeeded":
+                break
+            await asyncio.sleep(0.01)
+        moved = (await client.get(f"/api/hobbies/{hobby['id']}", headers=headers)).json()
+        listed = await client.get("/api/jobs", headers=headers)
+        cancel_finished = await client.post(f"{job_url}/cancel", headers=headers)
+        missing = await client.get("/api/jobs/507f1f77bcf86cd799439011", headers=headers)
+        missing_hobby = await client.post(url.replace(hobby["id"], "507f1f77bcf86cd799439011"),
+                                          params={"background": "true"}, json=body, headers=headers)
+        too_many = await client.post(url, json={**body, "item_ids": [str(n) for n in range(501)]},
+                                     headers=headers)
+
+    assert accepted.status_code == 202 and accepted.json()["status"] == "queued"
+    assert job["status"] == "succeeded" and job["progress"] == 1.0
+    assert job["result"]["item_ids"] == item_ids and job["message"] == "250 of 250 items"
+    assert [len(cat["items"]) for cat in moved["categories"]] == [0, 250]
+    assert [j["id"] for j in listed.json()] == [job["id"]]
+    assert cancel_finished.status_code == 409
+    assert missing.status_code == 404 and missing_hobby.status_code == 404
+    assert too_many.status_code == 400
+
+
+@pytest.mark.asyncio
+async def test_rerun_copy_job_does_not_copy_twice(monkeypatch, in_process_client, login):
+    """Test that a copy job re-run after losing its checkpoint skips the copies it already made."""
+    monkeypatch.setattr(settings, "JOB_POLL_SECONDS", 0.01)
+
+    async def finished(client, job_url, headers):
+        for _ in range(200):
+            job = (await client.get(job_url, headers=headers)).json()
+            if job["status"] == "succeeded":
+                return job
+            await asyncio.sleep(0.01)
+
+    async with in_process_client() as (client, db):
+        headers, _ = await login(client)
+        hobby = (await client.post("/api/hobbies", headers=headers, json={
+            "name": "Archery", "categories": [
+                {"name": "Arrows", "fields": [], "items": [{"data": {"n": n}} for n in range(150)]},
+                {"name": "Spares", "fields": []}]})).json()
+        body = {"item_ids": [item["id"] for item in hobby["categories"][0]["items"]], "target_category": "Spares"}
+        accepted = await client.post(f"/api/hobbies/{hobby['id']}/categories/Arrows/items/copy",
+                                     params={"background": "true"}, json=body, headers=headers)
+        first = await finished(client, accepted.headers["location"], headers)
+        # The worker lost its lease after the last batch, before its checkpoint was saved
+        await db.jobs.update_one({"status": "succeeded"}, {"$set": {
+            "status": "running", "worker": "dead", "state": {"done": 100, "item_ids": first["result"]["item_ids"][:100]},
+            "lease_expires_at": datetime.utcnow() - timedelta(seconds=1)}})
+        rerun = await finished(client, accepted.headers["location"], headers)
+        copied = (await client.get(f"/api/hobbies/{hobby['id']}", headers=headers)).json()["categories"][1]["items"]
+
+    assert rerun["attempts"] == 2
+    assert len(copied) == 150 and [item["data"]["n"] for item in copied] == list(range(150))
+    assert rerun["result"]["item_ids"] == first["result"]["item_ids"] == [item["id"] for item in copied]
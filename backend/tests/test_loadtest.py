@@ -0,0 +1,77 @@
+"""Load-testing harness tests."""
+import pytest
+from app.models.hobby import CategorySchema
+from app.services.hobby_service import HobbyService
+from loadtest.dataset import DatasetSpec, generate_dataset, seed_database
+from loadtest.driver import in_process_client, parse_mix, run_load
+from loadtest.report import LatencyRecorder, percentile
+
+
+def test_percentile_nearest_rank():
+    """Test nearest-rank percentiles."""
+    values = [float(v) for v in range(1, 101)]
+    assert percentile(values, 50) == 50.0
+    assert percentile(values, 95) == 95.0
+    assert percentile(values, 99) == 99.0
+    assert percentile([], 50) == 0.0
+
+
+def test_recorder_summary():
+    """Test per-route summary rows and totals."""
+    recorder = LatencyRecorder()
+    recorder.started_at, recorder.finished_at = 0.0, 2.0
+    recorder.record("GET /api/hobbies", 200, 0.010)
+    recorder.record("GET /api/hobbies", 500, 0.030)
+    recorder.record_failure("get_hobby", 0.5)
+
+    summary = recorder.summary()
+    assert summary["GET /api/hobbies"]["count"] == 2
+    assert summary["GET /api/hobbies"]["errors"] == 1
+    assert summary["GET /api/hobbies"]["statuses"] == {"200": 1, "500": 1}
+    assert summary["TOTAL"]["count"] == 3
+    assert summary["TOTAL"]["rps"] == 1.5
+
+
+def test_generated_items_match_schemas():
+    """Test that generated items validate against their category schema."""
+    dataset = generate_dataset(DatasetSpec(users=2, hobbies_per_user=2,
+                                           categories_per_hobby=4, items_per_category=5))
+    validator = HobbyService(hobby_repository=None)
+
+    assert len(dataset.user_documents) == 2
+    assert len(dataset.hobby_documents) == 4
+    assert dataset.item_count == 2 * 2 * 4 * 5
+    for user in dataset.users:
+        for categories in user.hobbies.values():
+            assert len(categories) == 4
+    for hobby in dataset.hobby_documents:
+        names = [category["name"] for category in hobby["categories"]]
+        assert len(names) == len(set(names))
+        for category in hobby["categories"]:
+            schema = CategorySchema(**category["schema"])
+            for item in category["items"]:
+                validator._validate_item_data(item["data"], schema)
+
+
+def test_parse_mix_rejects_unknown_operation():
+    """Test operation mix parsing."""
+    assert parse_mix("get_hobby=3, me") == {"get_hobby": 3, "me": 1}
+    with pytest.raises(ValueError):
+        parse_mix("drop_everything=1")
+
+
+@pytest.mark.asyncio
+async def test_in_process_run_against_memory_storage():
+    """Test a short in-process run with the in-memory stand-in."""
+    dataset = generate_dataset(DatasetSpec(users=2, hobbies_per_user=1,
+                                           categories_per_hobby=2, items_per_category=3))
+    mix = {"get_hobby": 3, "list_hobbies": 2, "add_item": 2, "update_item": 2, "delete_item": 1}
+
+    async with in_process_client("memory") as (client, db):
+        await seed_database(db, dataset)
+        recorder = await run_load(client, dataset, mix, concurrency=2, total_requests=40)
+
+    summary = recorder.summary()
+    assert summary["TOTAL"]["count"] == 40
+    assert summary["TOTAL"]["errors"] == 0
+    assert "GET /api/hobbies/{hobby_id}" in summary
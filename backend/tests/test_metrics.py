@@ -0,0 +1,85 @@
+"""Metrics endpoint and instrumentation tests."""
+import pytest
+from collections import deque
+from types import SimpleNamespace
+from app.storage.monitoring import CommandMetricsListener
+from app.utils import metrics
+from app.utils.metrics import MetricsRegistry
+
+
+def _sample(text, line_prefix):
+    for line in text.splitlines():
+        if line.startswith(line_prefix):
+            return float(line.rsplit(" ", 1)[1])
+    return 0.0
+
+
+def test_histogram_exposition():
+    """Test cumulative buckets, sum and count in the text format."""
+    registry = MetricsRegistry()
+    histogram = registry.histogram("op_seconds", "Op latency.", ("op",), buckets=(0.1, 1.0))
+    child = histogram.labels("read")
+    for value in (0.05, 0.1, 0.5, 3.0):
+        child.observe(value)
+
+    text = registry.render()
+    assert "# TYPE op_seconds histogram" in text
+    assert 'op_seconds_bucket{op="read",le="0.1"} 2' in text
+    assert 'op_seconds_bucket{op="read",le="1"} 3' in text
+    assert 'op_seconds_bucket{op="read",le="+Inf"} 4' in text
+    assert 'op_seconds_count{op="read"} 4' in text
+    assert histogram.labels("read") is child
+
+
+def test_label_values_are_escaped():
+    """Test label escaping and label arity checks."""
+    registry = MetricsRegistry()
+    counter = registry.counter("things_total", "Things.", ("name",))
+    counter.labels('a"b\\c').inc(2)
+
+    assert 'things_total{name="a\\"b\\\\c"} 2' in registry.render()
+    with pytest.raises(ValueError):
+        counter.labels("a", "b")
+
+
+def test_command_listener_drains_into_metrics():
+    """Test that command events are queued and folded in on drain."""
+    listener = CommandMetricsListener(deque())
+    before = metrics.mongodb_command_duration.labels("hobbies", "find").count
+    failures = metrics.mongodb_command_failures.labels("hobbies", "update").value
+
+    for request_id, name, ok in ((1, "find", True), (2, "update", False), (3, "ping", True)):
+        started = SimpleNamespace(command_name=name, command={name: "hobbies" if name != "ping" else 1},
+                                  connection_id=("localhost", 27017), request_id=request_id)
+        listener.started(started)
+        finished = SimpleNamespace(command_name=name, connection_id=started.connection_id,
+                                   request_id=request_id, duration_micros=1500)
+        (listener.succeeded if ok else listener.failed)(finished)
+
+    assert listener.pending == 3
+    listener.drain()
+    assert listener.pending == 0
+    assert metrics.mongodb_command_duration.labels("hobbies", "find").count == before + 1
+    assert metrics.mongodb_command_failures.labels("hobbies", "update").value == failures + 1
+    assert metrics.mongodb_command_duration.labels("", "ping").count >= 1
+
+
+@pytest.mark.asyncio
+async def test_metrics_endpoint_reports_route_templates(in_process_client):
+    """Test that requests are recorded by route template and status."""
+    async with in_process_client() as (client, _):
+        await client.get("/api/health")
+        await client.get("/api/hobbies/0123456789abcdef01234567",
+                         headers={"Authorization": "Bearer not-a-token"})
+        await client.get("/no/such/route")
+        response = await client.get("/metrics")
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain")
+    text = response.text
+    assert _sample(text, 'http_request_duration_seconds_count{method="GET",route="/api/health",status="200"}') >= 1
+    assert _sample(text, 'http_request_duration_seconds_count{method="GET",route="/api/hobbies/{hobby_id}",status="401"}') >= 1
+    assert _sample(text, 'http_request_duration_seconds_count{method="GET",route="<unmatched>",status="404"}') >= 1
+    assert "0123456789abcdef01234567" not in text
+    # The scrape itself is still in flight while rendering
+    assert _sample(text, 'http_requests_in_progress{method="GET"}') == 1
@@ -0,0 +1,97 @@
+"""Request profiler tests."""
+import asyncio
+import json
+import time
+import pytest
+from app.utils.profiler import AWAIT_MARKER, ProfileStore, RequestProfile, SamplingProfiler, profile_store
+
+
+async def _busy(seconds):
+    deadline = time.perf_counter() + seconds
+    while time.perf_counter() < deadline:
+        pass
+
+
+async def _workload():
+    await asyncio.sleep(0.03)
+    await _busy(0.03)
+
+
+@pytest.mark.asyncio
+async def test_sampler_records_running_and_awaiting_stacks():
+    """Test that CPU and await time both show up in the samples."""
+    profile = RequestProfile("p1", "GET", "/x", interval=0.001)
+    with SamplingProfiler(profile, root=_workload.__code__):
+        await _workload()
+
+    collapsed = profile.collapsed()
+    assert profile.sample_count > 0
+    assert any(line.startswith("_workload") and "_busy" in line for line in collapsed.splitlines())
+    assert any(line.startswith(f"{AWAIT_MARKER};_workload") for line in collapsed.splitlines())
+
+    speedscope = profile.speedscope()
+    frames = speedscope["shared"]["frames"]
+    sampled = speedscope["profiles"][0]
+    assert len(sampled["samples"]) == len(sampled["weights"]) == len(profile.stacks)
+    assert all(0 <= i < len(frames) for stack in sampled["samples"] for i in stack)
+    json.dumps(speedscope)
+
+
+def test_store_keeps_the_slowest_profiles():
+    """Test that a full store drops its fastest profile for a slower one and lists slowest first."""
+    store = ProfileStore(capacity=3, max_age=60)
+    for i, duration in enumerate((0.5, 0.1, 0.3, 0.2, 0.05, 0.4)):
+        profile = RequestProfile(f"p{i}", "GET", "/x", 0.001)
+        profile.duration = duration
+        store.add(profile)
+
+    assert store.get("p1") is None and store.get("p3") is None and store.get("p4") is None
+    assert [p.id for p in store.slowest()] == ["p0", "p5", "p2"]
+    assert [p.id for p in store.slowest(1)] == ["p0"]
+
+
+def test_store_drops_profiles_past_their_age():
+    """Test that old slow profiles age out, making room for newer faster ones."""
+    now = [0.0]
+    store = ProfileStore(capacity=2, max_age=60, clock=lambda: now[0])
+    for i, (at, duration) in enumerate(((0, 9.0), (0, 8.0), (30, 0.1), (70, 0.2), (100, 0.3))):
+        now[0] = at
+        profile = RequestProfile(f"p{i}", "GET", "/x", 0.001)
+        profile.duration = duration
+        store.add(profile)
+    kept = [p.id for p in store.slowest()]
+    now[0] = 200
+
+    assert kept == ["p4", "p3"]  # p2 came while the spike at 0 filled the store; by 70 the spike aged out
+    assert store.slowest() == [] and store.get("p4") is None
+
+
+@pytest.mark.asyncio
+async def test_profiling_is_admin_only(in_process_client, login):
+    """Test the profiling flag end to end for admins and regular users."""
+    profile_store.clear()
+    async with in_process_client() as (client, _):
+        admin, _ = await login(client, "profadmin", admin=True)
+        user, _ = await login(client, "profuser")
+        hobby = (await client.post("/api/hobbies", json={"name": "Kites"}, headers=admin)).json()
+
+        response = await client.get(f"/api/hobbies/{hobby['id']}?profile=1", headers=admin)
+        assert response.status_code == 200
+        profile_id = response.headers["x-profile-id"]
+        response = await client.get("/api/hobbies", headers={**admin, "X-Profile": "1"})
+        assert "x-profile-id" in response.headers
+
+        ignored = await client.get("/api/hobbies?profile=1", headers=user)
+        assert ignored.status_code == 200 and "x-profile-id" not in ignored.headers
+        assert "x-profile-id" not in (await client.get("/api/hobbies?profile=0", headers=admin)).headers
+        assert (await client.get("/api/admin/profiles", headers=user)).status_code == 403
+
+        listed = (await client.get("/api/admin/profiles", headers=admin)).json()
+        assert {p["id"] for p in listed} == {profile_id, response.headers["x-profile-id"]}
+        assert listed[0]["duration_ms"] >= listed[1]["duration_ms"]
+
+        speedscope = await client.get(f"/api/admin/profiles/{profile_id}", headers=admin)
+        assert speedscope.json()["profiles"][0]["type"] == "sampled"
+        collapsed = await client.get(f"/api/admin/profiles/{profile_id}?format=collapsed", headers=admin)
+        assert collapsed.headers["content-type"].startswith("text/plain")
+        assert (await client.get("/api/admin/profiles/missing", headers=admin)).status_code == 404
@@ -0,0 +1,118 @@
+"""Rate limiting tests."""
+import pytest
+from app.storage.memory import MemoryEngine
+from app.utils import rate_limit, security
+from app.utils.rate_limit import MemoryBackend, RateLimit, RateLimiter, StorageBackend, route_group
+from app.utils.security import create_access_token
+
+
+class FakeClock:
+    def __init__(self, now=1000.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+def test_parse_rate_limits():
+    """Test rule parsing, including multi-unit periods and disabled rules."""
+    assert RateLimit.parse("10/minute") == RateLimit(10, 60.0)
+    assert RateLimit.parse("100 / 5 minutes") == RateLimit(100, 300.0)
+    assert RateLimit.parse("") is None
+    assert RateLimit.parse("0/second") is None
+    assert RateLimit.parse("5/hour").policy == "5;w=3600"
+    with pytest.raises(ValueError):
+        RateLimit.parse("ten per minute")
+
+
+def test_route_groups():
+    """Test which requests fall into which limit group."""
+    assert route_group("POST", "/api/auth/login") == "auth"
+    assert route_group("GET", "/api/auth/me") is None
+    assert route_group("GET", "/api/hobbies/abc") == "read"
+    assert route_group("PATCH", "/api/hobbies/abc") == "write"
+    assert route_group("OPTIONS", "/api/hobbies") is None
+    assert route_group("GET", "/api/health") is None
+
+
+@pytest.mark.asyncio
+async def test_memory_bucket_refills():
+    """Test bursts up to the limit, rejection, then steady refill."""
+    clock = FakeClock()
+    backend = MemoryBackend(clock=clock)
+    rule = RateLimit(3, 3.0)  # One token per second
+
+    decisions = [await backend.hit("k", rule) for _ in range(4)]
+    assert [d.allowed for d in decisions] == [True, True, True, False]
+    assert decisions[2].remaining == 0
+    assert decisions[3].retry_after == pytest.approx(1.0)
+
+    clock.now += 1.0
+    assert (await backend.hit("k", rule)).allowed
+    assert not (await backend.hit("k", rule)).allowed
+    assert (await backend.hit("other", rule)).remaining == 2
+
+
+@pytest.mark.asyncio
+async def test_storage_backend_is_shared():
+    """Test that two limiters on one store (two workers) share a budget."""
+    engine = MemoryEngine()
+    clock = FakeClock()
+    rules = {"auth": RateLimit(2, 60.0)}
+    workers = [RateLimiter(StorageBackend(lambda: engine.database.rate_limits, clock), rules)
+               for _ in range(2)]
+
+    assert (await workers[0].hit("auth", "ip:1.2.3.4")).allowed
+    assert (await workers[1].hit("auth", "ip:1.2.3.4")).allowed
+    denied = await workers[0].hit("auth", "ip:1.2.3.4")
+    assert not denied.allowed
+    assert denied.retry_after == pytest.approx(30.0)
+
+    clock.now += 30.0
+    assert (await workers[1].hit("auth", "ip:1.2.3.4")).allowed
+    bucket = await engine.database.rate_limits.find_one({"_id": "auth:ip:1.2.3.4"})
+    assert bucket["tokens"] == pytest.approx(0.0)
+
+
+@pytest.mark.asyncio
+async def test_middleware_limits_by_user_and_ip(monkeypatch, in_process_client):
+    """Test 429 responses, headers, and keying by token user id vs IP."""
+    limiter = RateLimiter(MemoryBackend(), {"auth": RateLimit(1, 60.0), "read": RateLimit(2, 60.0)})
+    monkeypatch.setattr(rate_limit, "rate_limiter", limiter)
+    alice = {"Authorization": f"Bearer {create_access_token({'sub': 'alice', 'user_id': 'a1'})}"}
+    renamed = {"Authorization": f"Bearer {create_access_token({'sub': 'alicia', 'user_id': 'a1'})}"}
+    bob = {"Authorization": f"Bearer {create_access_token({'sub': 'bob', 'user_id': 'b1'})}"}
+
+    async with in_process_client(rate_limit=True) as (client, _):
+        first = await client.get("/api/hobbies", headers=alice)
+        await client.get("/api/hobbies", headers=alice)
+        limited = await client.get("/api/hobbies", headers=renamed)
+        other_user = await client.get("/api/hobbies", headers=bob)
+        login = await client.post("/api/auth/login", json={"username": "x", "password": "y"})
+        login_again = await client.post("/api/auth/login", json={"username": "x", "password": "y"})
+        health = await client.get("/api/health")
+
+    assert first.headers["ratelimit-limit"] == "2"
+    assert first.headers["ratelimit-remaining"] == "1"
+    assert first.headers["ratelimit-policy"] == "2;w=60"
+    assert limited.status_code == 429
+    assert limited.json() == {"detail": "Rate limit exceeded"}
+    assert limited.headers["retry-after"] == "30"
+    assert other_user.status_code != 429
+    assert login.status_code != 429 and login_again.status_code == 429
+    assert "ratelimit-limit" not in health.headers
+
+
+@pytest.mark.asyncio
+async def test_token_is_decoded_once_per_request(monkeypatch, in_process_client, login):
+    """Test that rate limiting, idempotency and the auth dependency share one decoded token."""
+    async with in_process_client(rate_limit=True) as (client, _):
+        headers, _ = await login(client)
+        decoded = []
+        decode = security.decode_access_token
+        monkeypatch.setattr(security, "decode_access_token", lambda token: decoded.append(token) or decode(token))
+        created = await client.post("/api/hobbies", json={"name": "Kites"},
+                                    headers={**headers, "Idempotency-Key": "kites"})
+
+    assert created.status_code == 201
+    assert len(decoded) == 1
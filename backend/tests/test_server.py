@@ -0,0 +1,59 @@
+"""Production server option and config tests."""
+import pytest
+from app.__main__ import build_parser
+from app.config import settings
+from app.server import ServeOptions, build_config, default_workers, pick_http, pick_loop
+
+
+def test_options_follow_settings(monkeypatch):
+    """Test that settings seed the options and zero workers means one per CPU."""
+    monkeypatch.setattr(settings, "SERVER_WORKERS", 0)
+    monkeypatch.setattr(settings, "SERVER_MAX_REQUESTS", 1000)
+    options = ServeOptions.from_settings()
+
+    assert options.max_requests == 1000
+    assert options.workers == 0
+    assert options.resolved().workers == default_workers() >= 1
+    assert ServeOptions(workers=3).resolved().workers == 3
+
+
+def test_build_config_applies_tuning():
+    """Test loop/http selection, socket tuning and graceful shutdown."""
+    config = build_config(ServeOptions(port=9001, backlog=512, keep_alive=15, graceful_timeout=7))
+
+    assert config.app == "app.main:app"
+    assert config.port == 9001
+    assert config.loop == pick_loop()
+    assert config.http == pick_http()
+    assert config.backlog == 512
+    assert config.timeout_keep_alive == 15
+    assert config.timeout_graceful_shutdown == 7
+    assert config.limit_max_requests is None
+    assert config.server_header is False
+
+
+def test_max_requests_jitter_range():
+    """Test that each worker's request limit lands in [max, max + jitter]."""
+    limits = {build_config(ServeOptions(max_requests=100, max_requests_jitter=10)).limit_max_requests
+              for _ in range(200)}
+
+    assert limits <= set(range(100, 111))
+    assert len(limits) > 1
+    assert build_config(ServeOptions(max_requests=50)).limit_max_requests == 50
+
+
+def test_cli_parses_serve_flags():
+    """Test the ``python -m app serve`` flags map onto ServeOptions."""
+    args = vars(build_parser().parse_args([
+        "serve", "--port", "8100", "--workers", "4", "--max-requests", "500",
+        "--max-requests-jitter", "50", "--keep-alive", "10", "--no-access-log",
+    ]))
+    args.pop("command")
+    options = ServeOptions(**args)
+
+    assert (options.port, options.workers, options.max_requests) == (8100, 4, 500)
+    assert options.max_requests_jitter == 50
+    assert options.keep_alive == 10
+    assert options.access_log is False
+    with pytest.raises(SystemExit):
+        build_parser().parse_args([])
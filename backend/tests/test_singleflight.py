@@ -0,0 +1,109 @@
+"""Singleflight read coalescing tests."""
+import asyncio
+import pytest
+from app.models.hobby import Hobby
+from app.repositories import hobby_repository
+from app.repositories.hobby_repository import HobbyRepository
+from app.storage.memory import MemoryEngine
+from app.utils.singleflight import SingleFlight
+
+
+class CountingCollection:
+    """Wraps a collection, counting find_one calls and holding them on a gate."""
+
+    def __init__(self, collection):
+        self.collection = collection
+        self.find_one_calls = 0
+        self.gate = asyncio.Event()
+
+    async def find_one(self, *args, **kwargs):
+        self.find_one_calls += 1
+        await self.gate.wait()
+        return await self.collection.find_one(*args, **kwargs)
+
+    def __getattr__(self, name):
+        return getattr(self.collection, name)
+
+
+@pytest.mark.asyncio
+async def test_concurrent_calls_share_one_result():
+    """Test that callers of an in-flight key share it and metrics count them."""
+    flight = SingleFlight("test-share")
+    calls = 0
+    release = asyncio.Event()
+
+    async def load(key):
+        nonlocal calls
+        calls += 1
+        await release.wait()
+        return {"key": key}
+
+    waiters = [asyncio.create_task(flight.do("k", lambda: load("k"))) for _ in range(5)]
+    other = asyncio.create_task(flight.do("other", lambda: load("other")))
+    await asyncio.sleep(0)
+    assert flight.in_flight == 2
+    release.set()
+
+    results = await asyncio.gather(*waiters)
+    assert results == [{"key": "k"}] * 5 and all(r is results[0] for r in results)
+    assert await other == {"key": "other"}
+    assert calls == 2 and flight.in_flight == 0
+    assert flight._coalesced.value == 4
+    assert flight._leaders.value == 2
+
+
+@pytest.mark.asyncio
+async def test_leader_cancellation_and_errors():
+    """Test that a cancelled leader does not fail followers, and errors are shared."""
+    flight = SingleFlight("test-cancel")
+    release = asyncio.Event()
+
+    async def load():
+        await release.wait()
+        return "value"
+
+    leader = asyncio.create_task(flight.do("k", load))
+    await asyncio.sleep(0)
+    follower = asyncio.create_task(flight.do("k", load))
+    await asyncio.sleep(0)
+    leader.cancel()
+    release.set()
+    assert await follower == "value"
+
+    async def fail():
+        await asyncio.sleep(0)
+        raise RuntimeError("boom")
+
+    results = await asyncio.gather(flight.do("e", fail), flight.do("e", fail), return_exceptions=True)
+    assert all(isinstance(r, RuntimeError) for r in results)
+    assert flight.in_flight == 0
+
+
+@pytest.mark.asyncio
+async def test_repository_coalesces_and_writes_invalidate():
+    """Test one query for duplicate reads, and a fresh query after a write."""
+    engine = MemoryEngine()
+    repo = HobbyRepository(engine.database)
+    hobby = await repo.create_hobby(Hobby(user_id="u1", name="Chess"))
+    counting = repo.collection = CountingCollection(repo.collection)
+
+    reads = [asyncio.create_task(repo.get_hobby_by_id(str(hobby.id), "u1")) for _ in range(3)]
+    await asyncio.sleep(0)
+    counting.gate.set()
+    results = await asyncio.gather(*reads)
+    assert counting.find_one_calls == 1
+    assert {r.name for r in results} == {"Chess"}
+    assert results[0] is not results[1]
+
+    # A read in flight across a write must not be shared with readers after it
+    counting.gate.clear()
+    stale = asyncio.create_task(repo.get_hobby_by_id(str(hobby.id), "u1"))
+    await asyncio.sleep(0)
+    await repo.update_hobby(str(hobby.id), "u1", {"name": "Go"})
+    assert hobby_repository.hobby_reads.in_flight == 0
+    fresh = asyncio.create_task(repo.get_hobby_by_id(str(hobby.id), "u1"))
+    await asyncio.sleep(0)
+    counting.gate.set()
+    await stale
+    assert (await fresh).name == "Go"
+    assert counting.find_one_calls == 3
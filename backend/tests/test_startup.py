@@ -0,0 +1,113 @@
+"""Startup, index reconciliation and readiness tests."""
+import asyncio
+import httpx
+import pytest
+from app.config import settings
+from app.database import (
+    INDEXES, check_readiness, close_database_connection, connect_to_database, create_indexes, database,
+)
+from app.main import app
+from app.storage.memory import MemoryEngine
+
+
+class FlakyEngine(MemoryEngine):
+    """In-memory engine whose first pings fail, counting every ping."""
+
+    def __init__(self, failures=0):
+        super().__init__()
+        self.failures = failures
+        self.pings = 0
+        self.gate = asyncio.Event()
+        self.gate.set()
+
+    async def ping(self):
+        self.pings += 1
+        await self.gate.wait()
+        return self.pings > self.failures
+
+
+@pytest.fixture
+def fast_backoff(monkeypatch):
+    monkeypatch.setattr(settings, "DB_WARMUP_BACKOFF_SECONDS", 0.001)
+    monkeypatch.setattr(settings, "DB_WARMUP_ATTEMPTS", 0)
+    monkeypatch.setattr(settings, "READY_CACHE_SECONDS", 60.0)
+
+
+@pytest.mark.asyncio
+async def test_create_indexes_skips_existing():
+    """Test that reconciliation only creates missing indexes."""
+    db = MemoryEngine().database
+    await db.hobbies.create_index("user_id")
+
+    created = await create_indexes(db)
+    assert len(created) == len(INDEXES) - 1 and "user_id_1" not in created
+    assert await create_indexes(db) == []
+    assert set(await db.users.index_information()) == {"_id_", "username_1", "email_1"}
+
+
+@pytest.mark.asyncio
+async def test_warm_up_retries_with_backoff(fast_backoff):
+    """Test that warm-up keeps pinging until the store answers."""
+    engine = FlakyEngine(failures=3)
+    try:
+        await connect_to_database(engine)
+        assert engine.pings == 4
+        assert database.indexes_ready
+    finally:
+        await close_database_connection()
+
+
+@pytest.mark.asyncio
+async def test_warm_up_gives_up(fast_backoff, monkeypatch):
+    """Test the attempt limit."""
+    monkeypatch.setattr(settings, "DB_WARMUP_ATTEMPTS", 2)
+    engine = FlakyEngine(failures=10)
+    try:
+        await connect_to_database(engine)
+        assert engine.pings == 2
+        assert not database.indexes_ready
+    finally:
+        await close_database_connection()
+
+
+@pytest.mark.asyncio
+async def test_background_startup_and_readiness(fast_backoff, monkeypatch):
+    """Test that startup returns immediately and /api/ready tracks the store."""
+    engine = FlakyEngine()
+    engine.gate.clear()
+    try:
+        await connect_to_database(engine, background=True)
+        assert not database.warm_up_task.done()
+
+        monkeypatch.setattr(settings, "DB_PING_TIMEOUT_SECONDS", 0.01)
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as client:
+            assert (await client.get("/api/health")).status_code == 200
+            response = await client.get("/api/ready")
+            assert response.status_code == 503
+            assert response.json() == {"status": "unavailable", "storage": "memory", "indexes": "pending"}
+
+            engine.gate.set()
+            await database.warm_up_task
+            response = await client.get("/api/ready")
+            assert response.status_code == 200
+            assert response.json()["indexes"] == "ready"
+    finally:
+        await close_database_connection()
+
+
+@pytest.mark.asyncio
+async def test_readiness_is_cached(fast_backoff, monkeypatch):
+    """Test that readiness pings are cached and shared."""
+    engine = FlakyEngine()
+    try:
+        await connect_to_database(engine)
+        pings = engine.pings
+        results = await asyncio.gather(*(check_readiness() for _ in range(5)))
+        assert all(r["status"] == "ready" for r in results)
+        assert engine.pings == pings
+
+        monkeypatch.setattr(settings, "READY_CACHE_SECONDS", 0.0)
+        await asyncio.gather(*(check_readiness() for _ in range(5)))
+        assert engine.pings == pings + 1
+    finally:
+        await close_database_connection()
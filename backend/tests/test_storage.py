@@ -0,0 +1,426 @@
+"""Storage engine conformance tests.
+
+Every test here runs against each engine; the Mongo run is skipped when no
+server is reachable at ``settings.MONGODB_URL``.
+"""
+import asyncio
+import pytest
+import pytest_asyncio
+from datetime import datetime, timedelta
+from bson import ObjectId
+from pymongo import DeleteMany, InsertOne, UpdateOne
+from pymongo.errors import DuplicateKeyError
+from app.config import settings
+from app.database import create_indexes
+from app.models.hobby import Attachment, Hobby, Category, CategorySchema, FieldDefinition, SubCategoryItem
+from app.models.user import User
+from app.repositories.hobby_repository import HobbyRepository
+from app.repositories.user_repository import UserRepository
+from app.storage import create_engine
+from app.storage.memory import MemoryEngine
+from app.storage.sqlite import SQLiteEngine
+
+
+@pytest_asyncio.fixture(params=["memory", "sqlite", "mongo"])
+async def engine(request, tmp_path):
+    """A connected, empty storage engine."""
+    name = request.param
+    if name == "mongo":
+        engine = create_engine(
+            "mongo", url=settings.MONGODB_URL,
+            database_name=f"{settings.DATABASE_NAME}_conformance",
+            client_options={"serverSelectionTimeoutMS": 300},
+        )
+    else:
+        engine = create_engine(name, path=str(tmp_path / "conformance.db"),
+                               database_name="conformance")
+    await engine.connect()
+    if not await engine.ping():
+        await engine.close()
+        pytest.skip(f"{name} storage is not reachable")
+    await engine.drop_database()
+    yield engine
+    await engine.drop_database()
+    await engine.close()
+
+
+@pytest_asyncio.fixture
+async def db(engine):
+    database = engine.database
+    await create_indexes(database)
+    return database
+
+
+def _hobby(user_id="u1", name="Slingshot"):
+    return Hobby(user_id=user_id, name=name, categories=[])
+
+
+def _category(name="Latex"):
+    schema = CategorySchema(category_name=name, fields=[
+        FieldDefinition(name="Brand", field_type="text", required=True),
+        FieldDefinition(name="Quantity", field_type="number"),
+    ])
+    return Category(name=name, schema=schema, items=[])
+
+
+@pytest.mark.asyncio
+async def test_insert_and_find(db):
+    """Test inserts, lookups by _id and field, and natural order."""
+    first = await db.things.insert_one({"name": "a", "n": 1})
+    await db.things.insert_many([{"name": "b", "n": 2}, {"name": "c", "n": 3}])
+
+    doc = await db.things.find_one({"_id": first.inserted_id})
+    assert doc["name"] == "a"
+    assert (await db.things.find_one({"name": "b"}))["n"] == 2
+    assert await db.things.find_one({"name": "zzz"}) is None
+    assert [d["name"] async for d in db.things.find({})] == ["a", "b", "c"]
+    assert await db.things.count_documents({"n": {"$gte": 2}}) == 2
+    assert [d["name"] for d in await db.things.find({"name": {"$in": ["c", "a"]}}).to_list(None)] == ["a", "c"]
+
+
+@pytest.mark.asyncio
+async def test_types_round_trip(db):
+    """Test ObjectId, datetime, nested and boolean values survive storage."""
+    now = datetime.utcnow()
+    oid = ObjectId()
+    await db.things.insert_one({"_id": oid, "when": now, "ref": oid, "flag": True,
+                                "nested": {"list": [1, 2.5, "x", None]}})
+
+    doc = await db.things.find_one({"_id": oid})
+    assert doc["ref"] == oid
+    assert abs(doc["when"] - now) < timedelta(milliseconds=1)
+    assert doc["flag"] is True
+    assert doc["nested"] == {"list": [1, 2.5, "x", None]}
+    assert await db.things.find_one({"flag": True}) is not None
+    assert await db.things.find_one({"when": {"$lt": now - timedelta(seconds=1)}}) is None
+
+
+@pytest.mark.asyncio
+async def test_unique_indexes(db):
+    """Test unique index enforcement on insert and update."""
+    await db.users.insert_one({"username": "alice", "email": "a@example.com"})
+    await db.users.insert_one({"username": "bob", "email": "b@example.com"})
+
+    with pytest.raises(DuplicateKeyError):
+        await db.users.insert_one({"username": "alice", "email": "other@example.com"})
+    with pytest.raises(DuplicateKeyError):
+        await db.users.update_one({"username": "bob"}, {"$set": {"email": "a@example.com"}})
+    assert (await db.users.find_one({"username": "bob"}))["email"] == "b@example.com"
+    await db.jobs.insert_one({"_id": "same"})
+    with pytest.raises(DuplicateKeyError):
+        await db.jobs.insert_one({"_id": "same"})
+
+    info = await db.users.index_information()
+    assert "_id_" in info and "username_1" in info
+    assert await db.users.create_index("username", unique=True) == "username_1"
+
+
+@pytest.mark.asyncio
+async def test_array_updates(db):
+    """Test positional, filtered and pull updates on nested arrays."""
+    result = await db.hobbies.insert_one({"user_id": "u1", "categories": [
+        {"name": "A", "items": [{"id": "1", "data": {"q": 1}}]},
+        {"name": "B", "items": [{"id": "2", "data": {"q": 5}}, {"id": "3", "data": {"q": 7}}]},
+    ]})
+    hobby_id = result.inserted_id
+
+    await db.hobbies.update_one({"_id": hobby_id, "categories.name": "B"},
+                                {"$push": {"categories.$.items": {"id": "4", "data": {"q": 0}}}})
+    await db.hobbies.update_one(
+        {"_id": hobby_id},
+        {"$inc": {"categories.$[cat].items.$[item].data.q": -2}},
+        array_filters=[{"cat.name": "B"}, {"item.data.q": {"$gte": 5}}],
+    )
+    doc = await db.hobbies.find_one_and_update(
+        {"_id": hobby_id, "categories.name": "B"},
+        {"$pull": {"categories.$.items": {"id": "4"}}},
+        return_document=True,
+    )
+    # The positional element is the one the query matched, even once renamed
+    renamed = await db.hobbies.find_one_and_update(
+        {"_id": hobby_id, "categories.name": "A"},
+        {"$set": {"categories.$.name": "C", "categories.$.note": "renamed"}},
+        return_document=True,
+    )
+
+    assert [i["data"]["q"] for i in doc["categories"][1]["items"]] == [3, 5]
+    assert renamed["categories"][0]["name"] == "C" and renamed["categories"][0]["note"] == "renamed"
+    assert doc["categories"][0]["items"][0]["data"]["q"] == 1
+    assert await db.hobbies.find_one({"categories.items.id": "4"}) is None
+    assert await db.hobbies.find_one({"categories.items.data.q": 5}) is not None
+    assert await db.hobbies.find_one({"categories.items": {"$all": [
+        {"$elemMatch": {"id": "2", "data.q": 3}}, {"$elemMatch": {"id": "3"}}]}}) is not None
+    assert await db.hobbies.find_one({"categories.items": {"$all": [
+        {"$elemMatch": {"id": "2", "data.q": 5}}, {"$elemMatch": {"id": "3"}}]}}) is None
+
+
+@pytest.mark.asyncio
+async def test_projection_sort_skip_limit(db):
+    """Test projections and cursor modifiers."""
+    await db.things.insert_many([{"n": n, "sub": {"a": n, "b": -n}} for n in (3, 1, 2, 5, 4)])
+
+    docs = await db.things.find({}, {"n": 1, "sub.a": 1, "_id": 0}).sort("n", -1).skip(1).limit(2).to_list(None)
+    assert docs == [{"n": 4, "sub": {"a": 4}}, {"n": 3, "sub": {"a": 3}}]
+    excluded = await db.things.find_one({"n": 1}, {"sub": 0})
+    assert set(excluded) == {"_id", "n"}
+
+
+@pytest.mark.asyncio
+async def test_upsert_and_delete(db):
+    """Test upserts and deletes."""
+    await db.counters.update_one({"key": "k"}, {"$inc": {"value": 2}, "$setOnInsert": {"created": True}},
+                                 upsert=True)
+    await db.counters.update_one({"key": "k"}, {"$inc": {"value": 3}, "$setOnInsert": {"created": False}},
+                                 upsert=True)
+    doc = await db.counters.find_one({"key": "k"}, {"_id": 0})
+    assert doc == {"key": "k", "value": 5, "created": True}
+
+    await db.counters.insert_many([{"key": "x"}, {"key": "x"}, {"key": "y"}])
+    assert (await db.counters.delete_one({"key": "x"})).deleted_count == 1
+    assert (await db.counters.delete_many({"key": {"$in": ["x", "y"]}})).deleted_count == 2
+    assert await db.counters.count_documents({}) == 1
+
+
+@pytest.mark.asyncio
+async def test_bulk_write(db):
+    """Test that bulk writes apply inserts, upserts and deletes in order and count them."""
+    await db.counters.insert_one({"key": "a", "value": 1})
+    result = await db.counters.bulk_write([
+        UpdateOne({"key": "a"}, {"$inc": {"value": 1}}, upsert=True),
+        UpdateOne({"key": "b"}, {"$set": {"value": 10}}, upsert=True),
+        InsertOne({"key": "c", "value": 0}),
+        DeleteMany({"key": "c"}),
+    ], ordered=False)
+
+    assert (result.matched_count, result.upserted_count, result.inserted_count, result.deleted_count) == (1, 1, 1, 1)
+    assert list(result.upserted_ids) == [1]
+    assert [doc async for doc in db.counters.find({}, {"_id": 0})] == [
+        {"key": "a", "value": 2}, {"key": "b", "value": 10}]
+
+
+@pytest.mark.asyncio
+async def test_user_repository(db):
+    """Test the user repository on every engine."""
+    repo = UserRepository(db)
+    user = await repo.create_user(User(username="alice", email="alice@example.com", hashed_password="x"))
+
+    assert (await repo.get_user_by_id(str(user.id))).username == "alice"
+    assert (await repo.get_user_by_username("alice")).id == user.id
+    assert (await repo.get_user_by_email("alice@example.com")).id == user.id
+    assert (await repo.update_user(str(user.id), {"is_active": False})).is_active is False
+    assert await repo.delete_user(str(user.id)) is True
+    assert await repo.get_user_by_id(str(user.id)) is None
+
+
+@pytest.mark.asyncio
+async def test_hobby_repository(db):
+    """Test the hobby repository CRUD flow on every engine."""
+    repo = HobbyRepository(db)
+    hobby = await repo.create_hobby(_hobby())
+    hobby_id = str(hobby.id)
+
+    await repo.create_hobby(_hobby(name="Other"))
+    await repo.create_hobby(_hobby(user_id="u2"))
+    assert len(await repo.get_hobbies_by_user("u1")) == 2
+    assert await repo.get_hobby_by_id(hobby_id, "u2") is None
+
+    hobby = await repo.add_category(hobby_id, "u1", _category())
+    item = SubCategoryItem(data={"Brand": "Acme", "Quantity": 2})
+    hobby = await repo.add_item_to_category(hobby_id, "u1", "Latex", item)
+    assert hobby.categories[0].items[0].data == {"Brand": "Acme", "Quantity": 2}
+
+    hobby = await repo.update_item_in_category(hobby_id, "u1", "Latex", item.id,
+                                               {"data": {"Brand": "Apex"}})
+    assert hobby.categories[0].items[0].data == {"Brand": "Apex"}
+
+    hobby = await repo.update_category(hobby_id, "u1", "Latex", {"name": "Rubber"})
+    assert hobby.categories[0].name == "Rubber"
+    hobby = await repo.delete_item_from_category(hobby_id, "u1", "Rubber", item.id)
+    assert hobby.categories[0].items == []
+    hobby = await repo.delete_category(hobby_id, "u1", "Rubber")
+    assert hobby.categories == []
+
+    assert (await repo.update_hobby(hobby_id, "u1", {"name": "Renamed"})).name == "Renamed"
+    assert await repo.delete_hobby(hobby_id, "u1") is True
+    assert await repo.get_hobby_by_id(hobby_id, "u1") is None
+
+
+@pytest.mark.asyncio
+async def test_item_patch_touches_only_given_keys(db):
+    """Test that concurrent patches to different keys of one item both land."""
+    repo = HobbyRepository(db)
+    hobby_id = str((await repo.create_hobby(_hobby())).id)
+    await repo.add_category(hobby_id, "u1", _category())
+    item = SubCategoryItem(data={"Brand": "Acme", "Quantity": 2, "Colour": "Red"})
+    await repo.add_item_to_category(hobby_id, "u1", "Latex", item)
+
+    await asyncio.gather(
+        repo.patch_item_in_category(hobby_id, "u1", "Latex", item.id, {"Quantity": 5}, []),
+        repo.patch_item_in_category(hobby_id, "u1", "Latex", item.id, {"Brand": "Apex"}, ["Colour"]),
+    )
+    hobby = await repo.get_hobby_by_id(hobby_id, "u1")
+    assert hobby.categories[0].items[0].data == {"Brand": "Apex", "Quantity": 5}
+    assert await repo.patch_item_in_category(hobby_id, "u1", "Latex", "nope", {"Quantity": 1}, []) is None
+
+
+@pytest.mark.asyncio
+async def test_atomic_item_increment(db):
+    """Test guarded $inc on an item field via array filters on every engine."""
+    repo = HobbyRepository(db)
+    hobby_id = str((await repo.create_hobby(_hobby())).id)
+    await repo.add_category(hobby_id, "u1", _category())
+    items = [SubCategoryItem(data={"Brand": "Acme"}), SubCategoryItem(data={"Brand": "Apex", "Quantity": 2})]
+    for item in items:
+        await repo.add_item_to_category(hobby_id, "u1", "Latex", item)
+    item_id = items[1].id
+
+    decrements = await asyncio.gather(*(
+        repo.increment_item_field(hobby_id, "u1", "Latex", item_id, "Quantity", -1, minimum=0)
+        for _ in range(3)
+    ))
+    assert sorted(decrements, key=lambda v: (v is None, v)) == [0, 1, None]
+    assert await repo.increment_item_field(hobby_id, "u1", "Latex", item_id, "Quantity", 5, maximum=4) is None
+    assert await repo.increment_item_field(hobby_id, "u1", "Latex", item_id, "Quantity", 2.5) == 2.5
+    # Missing value, non-number field, wrong user
+    assert await repo.increment_item_field(hobby_id, "u1", "Latex", items[0].id, "Quantity", 1) is None
+    assert await repo.increment_item_field(hobby_id, "u1", "Latex", item_id, "Brand", 1) is None
+    assert await repo.increment_item_field(hobby_id, "u2", "Latex", item_id, "Quantity", 1) is None
+
+    hobby = await repo.get_hobby_by_id(hobby_id, "u1")
+    assert [item.data for item in hobby.categories[0].items] == [{"Brand": "Acme"},
+                                                                 {"Brand": "Apex", "Quantity": 2.5}]
+
+
+@pytest.mark.asyncio
+async def test_hobby_clone(db):
+    """Test cloning with and without items gives fresh ids and leaves the source alone."""
+    repo = HobbyRepository(db)
+    source_id = str((await repo.create_hobby(_hobby())).id)
+    for name in ["Latex", "Ammo"]:
+        await repo.add_category(source_id, "u1", _category(name))
+    await repo.add_item_to_category(source_id, "u1", "Latex", SubCategoryItem(data={"Brand": "Acme"}))
+    source = await repo.get_hobby_by_id(source_id, "u1")
+
+    full = await repo.clone_hobby(source_id, "u1", name="Slingshot 2027")
+    bare = await repo.clone_hobby(source_id, "u1", include_items=False)
+    assert await repo.clone_hobby(source_id, "u2") is None
+
+    stored = await repo.get_hobby_by_id(str(full.id), "u1")
+    assert stored.name == "Slingshot 2027" and bare.name == "Slingshot"
+    assert [cat.name for cat in stored.categories] == ["Latex", "Ammo"]
+    assert stored.categories[0].schema == source.categories[0].schema
+    assert stored.categories[0].items[0].data == {"Brand": "Acme"}
+    assert stored.categories[0].items[0].id != source.categories[0].items[0].id
+    assert [cat.items for cat in (await repo.get_hobby_by_id(str(bare.id), "u1")).categories] == [[], []]
+    assert len((await repo.get_hobby_by_id(source_id, "u1")).categories[0].items) == 1
+
+
+@pytest.mark.asyncio
+async def test_item_transfers(engine, db):
+    """Test moves within one hobby and across hobbies, guarded against stale items."""
+    repo = HobbyRepository(db, engine)
+    first = str((await repo.create_hobby(_hobby())).id)
+    second = str((await repo.create_hobby(_hobby(name="Archery"))).id)
+    for hobby_id, category in [(first, "Latex"), (first, "Spare"), (second, "Latex")]:
+        await repo.add_category(hobby_id, "u1", _category(category))
+    for i in range(3):
+        await repo.add_item_to_category(first, "u1", "Latex", SubCategoryItem(data={"Brand": f"B{i}"}))
+    items = (await repo.get_hobby_by_id(first, "u1")).categories[0].items
+    ids = [item.id for item in items]
+
+    assert await repo.transfer_items(first, "u1", "Latex", items[:2], first, "Spare", True)
+    hobby = await repo.get_hobby_by_id(first, "u1")
+    assert [[item.id for item in cat.items] for cat in hobby.categories] == [ids[2:], ids[:2]]
+
+    # Edited since it was read: a move of the stale copy must not apply, in either direction
+    await repo.patch_item_in_category(first, "u1", "Latex", ids[2], {"Quantity": 1}, [])
+    assert not await repo.transfer_items(first, "u1", "Latex", items[2:], first, "Spare", True)
+    assert not await repo.transfer_items(first, "u1", "Latex", items[2:], second, "Latex", True)
+    assert (await repo.get_hobby_by_id(second, "u1")).categories[0].items == []
+
+    fresh = (await repo.get_hobby_by_id(first, "u1")).categories[0].items
+    assert await repo.transfer_items(first, "u1", "Latex", fresh, second, "Latex", True)
+    assert (await repo.get_hobby_by_id(first, "u1")).categories[0].items == []
+    target = await repo.get_hobby_by_id(second, "u1")
+    assert [item.data for item in target.categories[0].items] == [{"Brand": "B2", "Quantity": 1}]
+    # Already in the target: nothing is pushed twice
+    assert not await repo.transfer_items(first, "u1", "Spare", target.categories[0].items, second, "Latex", False)
+
+
+@pytest.mark.asyncio
+async def test_legacy_items_move(engine, db):
+    """Test that items stored before attachments (other keys, other key order) move, unless edited since."""
+    repo = HobbyRepository(db, engine)
+    hobby_id = str((await repo.create_hobby(_hobby())).id)
+    for category in ("Latex", "Spare"):
+        await repo.add_category(hobby_id, "u1", _category(category))
+    stamp = datetime(2023, 5, 1)
+    legacy = [{"updated_at": stamp, "data": {"Brand": f"B{i}"}, "created_at": stamp, "id": str(ObjectId())}
+              for i in range(2)]
+    await db.hobbies.update_one({"_id": ObjectId(hobby_id)},
+                                {"$push": {"categories.$[cat].items": {"$each": legacy}}},
+                                array_filters=[{"cat.name": "Latex"}])
+    items = (await repo.get_hobby_by_id(hobby_id, "u1")).categories[0].items
+
+    assert await repo.transfer_items(hobby_id, "u1", "Latex", items[:1], hobby_id, "Spare", True)
+    # An attachment added since the read counts as an edit
+    await repo.add_attachment(hobby_id, "u1", "Latex", items[1].id,
+                              Attachment(id="a1", filename="a.png", content_type="image/png", length=1), limit=5)
+    assert not await repo.transfer_items(hobby_id, "u1", "Latex", items[1:], hobby_id, "Spare", True)
+    hobby = await repo.get_hobby_by_id(hobby_id, "u1")
+    assert [[item.id for item in cat.items] for cat in hobby.categories] == [[items[1].id], [items[0].id]]
+
+
+@pytest.mark.asyncio
+async def test_memory_engine_uses_indexes():
+    """Test that the in-memory engine answers indexed queries from its indexes."""
+    engine = MemoryEngine()
+    await create_indexes(engine.database)
+    hobbies = engine.database.hobbies
+
+    assert hobbies.explain({"user_id": "u1"}) == "user_id_1"
+    assert hobbies.explain({"user_id": "u1", "name": "x"}) in ("user_id_1_name_1", "user_id_1")
+    assert hobbies.explain({"_id": ObjectId()}) == "_id_"
+    assert hobbies.explain({"description": "x"}) == "COLLSCAN"
+
+
+@pytest.mark.asyncio
+async def test_sqlite_engine_persists(tmp_path):
+    """Test that SQLite data and indexes survive a reconnect."""
+    path = str(tmp_path / "persist.db")
+    engine = SQLiteEngine(path)
+    await engine.connect()
+    await create_indexes(engine.database)
+    await engine.database.users.insert_one({"username": "alice", "email": "a@example.com"})
+    await engine.close()
+
+    engine = SQLiteEngine(path)
+    await engine.connect()
+    try:
+        assert (await engine.database.users.find_one({"username": "alice"}))["email"] == "a@example.com"
+        with pytest.raises(DuplicateKeyError):
+            await engine.database.users.insert_one({"username": "alice", "email": "b@example.com"})
+    finally:
+        await engine.close()
+
+
+@pytest.mark.asyncio
+async def test_sqlite_engines_share_a_file(tmp_path):
+    """Test that workers sharing one SQLite file can all reconcile indexes."""
+    path = str(tmp_path / "shared.db")
+    first, second = SQLiteEngine(path), SQLiteEngine(path)
+    await first.connect()
+    await second.connect()
+    try:
+        # Both list indexes before either creates them, as racing workers do
+        await first.database.users.index_information()
+        await second.database.users.index_information()
+        await create_indexes(first.database)
+        await create_indexes(second.database)
+
+        await first.database.users.insert_one({"username": "alice", "email": "a@example.com"})
+        with pytest.raises(DuplicateKeyError):
+            await second.database.users.insert_one({"username": "alice", "email": "b@example.com"})
+    finally:
+        await first.close()
+        await second.close()
@@ -0,0 +1,107 @@
+"""Request tracing tests."""
+import json
+import httpx
+import pytest
+from types import SimpleNamespace
+from app.main import app
+from app.middleware.tracing_middleware import TracingMiddleware
+from app.storage.monitoring import CommandTracingListener
+from app.utils.tracing import InMemoryExporter, JsonLinesExporter, Tracer, parse_traceparent, tracer
+
+TRACE_ID = "4bf92f3577b34da6a3ce929d0e0e4736"
+PARENT_ID = "00f067aa0ba902b7"
+
+
+@pytest.fixture
+def exporter():
+    """Route the global tracer to a fresh in-memory exporter."""
+    previous, rate = tracer.exporter, tracer.sample_rate
+    tracer.exporter = InMemoryExporter()
+    yield tracer.exporter
+    tracer.exporter, tracer.sample_rate = previous, rate
+
+
+def test_parse_traceparent():
+    """Test W3C traceparent parsing."""
+    assert parse_traceparent(f"00-{TRACE_ID}-{PARENT_ID}-01") == (TRACE_ID, PARENT_ID, True)
+    assert parse_traceparent(f"00-{TRACE_ID}-{PARENT_ID}-00") == (TRACE_ID, PARENT_ID, False)
+    assert parse_traceparent(f"00-{'0' * 32}-{PARENT_ID}-01") is None
+    assert parse_traceparent("garbage") is None
+    assert parse_traceparent(None) is None
+
+
+def test_sampling_follows_parent_then_rate():
+    """Test parent-based sampling with a ratio fallback."""
+    never = Tracer(InMemoryExporter(), sample_rate=0.0)
+    with never.start_trace("root") as root:
+        assert root is None
+        with never.span("child") as child:
+            assert child is None
+    with never.start_trace("root", f"00-{TRACE_ID}-{PARENT_ID}-01") as root:
+        assert root.trace_id == TRACE_ID and root.parent_id == PARENT_ID
+    always = Tracer(InMemoryExporter(), sample_rate=1.0)
+    with always.start_trace("root", f"00-{TRACE_ID}-{PARENT_ID}-00") as root:
+        assert root is None
+    assert len(never.exporter.traces) == 1 and not always.exporter.traces
+
+
+def test_spans_nest_and_record_errors(tmp_path):
+    """Test span parenting, error capture and the JSON lines exporter."""
+    path = tmp_path / "traces.jsonl"
+    local = Tracer(JsonLinesExporter(str(path)))
+    with pytest.raises(ValueError):
+        with local.start_trace("root") as root:
+            with local.span("outer", key="value") as outer:
+                with local.span("inner"):
+                    raise ValueError("boom")
+    local.exporter.close()
+
+    spans = [json.loads(line) for line in path.read_text().splitlines()]
+    by_name = {span["name"]: span for span in spans}
+    assert [span["name"] for span in spans] == ["root", "outer", "inner"]
+    assert by_name["outer"]["parent_id"] == root.span_id
+    assert by_name["inner"]["parent_id"] == outer.span_id
+    assert by_name["outer"]["attributes"] == {"key": "value"}
+    assert by_name["inner"]["error"] == "ValueError: boom"
+    assert {span["trace_id"] for span in spans} == {root.trace_id}
+
+
+def test_command_listener_adds_mongo_spans(exporter):
+    """Test that command events become children of the current span."""
+    listener = CommandTracingListener()
+    with tracer.start_trace("root"):
+        with tracer.span("HobbyRepository.get_hobby_by_id") as repo_span:
+            event = SimpleNamespace(command_name="find", command={"find": "hobbies"}, database_name="hobbees",
+                                    connection_id=("localhost", 27017), request_id=7)
+            listener.started(event)
+            listener.succeeded(event)
+
+    spans = {span["name"]: span for span in exporter.traces[-1]}
+    assert spans["mongodb.find"]["parent_id"] == repo_span.span_id
+    assert spans["mongodb.find"]["attributes"]["db.collection"] == "hobbies"
+
+
+@pytest.mark.asyncio
+async def test_request_trace_covers_all_layers(exporter, in_process_client, login):
+    """Test that a traced request records auth, service, repository and serialization spans."""
+    async with in_process_client():
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=TracingMiddleware(app)),
+                                     base_url="http://test") as client:
+            tracer.sample_rate = 0.0
+            headers, _ = await login(client)
+            hobby = (await client.post("/api/hobbies", json={"name": "Kites"}, headers=headers)).json()
+            assert not exporter.traces
+
+            response = await client.get(f"/api/hobbies/{hobby['id']}", headers={
+                **headers, "traceparent": f"00-{TRACE_ID}-{PARENT_ID}-01"})
+
+    assert response.headers["x-trace-id"] == TRACE_ID
+    spans = {span["name"]: span for span in exporter.traces[-1]}
+    root = spans["GET /api/hobbies/{hobby_id}"]
+    assert root["parent_id"] == PARENT_ID
+    assert root["attributes"]["http.status_code"] == 200
+    assert spans["auth.get_current_user"]["parent_id"] == root["span_id"]
+    assert spans["UserRepository.load_user_by_id"]["parent_id"] == spans["auth.get_current_user"]["span_id"]
+    service = spans["HobbyService.get_hobby"]
+    assert spans["HobbyRepository.get_hobby_by_id"]["parent_id"] == service["span_id"]
+    assert spans["hobby_to_response"]["parent_id"] == root["span_id"]
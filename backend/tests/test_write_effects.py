@@ -0,0 +1,50 @@
+"""Post-write hook tests."""
+import pytest
+from app.models.history import HistoryAction
+from app.models.user import User
+from app.repositories.hobby_repository import HobbyRepository
+from app.schemas.hobby import HobbyCreate, SubCategoryItemCreate, SubCategoryItemUpdate
+from app.services.hobby_service import HobbyService
+from app.storage.memory import MemoryEngine
+
+
+class RecordingEffects:
+    """Records which write effects were reported, and with what."""
+
+    def __init__(self):
+        self.calls = []
+
+    def __getattr__(self, name):
+        async def report(*args, **kwargs):
+            self.calls.append((name, args, kwargs))
+        return report
+
+
+@pytest.mark.asyncio
+async def test_service_reports_writes_the_repository_only_stores():
+    """Test that the repository stores without side effects and the service reports each write once."""
+    engine = MemoryEngine()
+    effects = RecordingEffects()
+    repository = HobbyRepository(engine.database, engine)
+    service = HobbyService(repository, write_effects=effects)
+    user = User(username="alice", email="alice@example.com", hashed_password="x")
+
+    hobby = await service.create_hobby(HobbyCreate(name="Knitting", categories=[
+        {"name": "Yarn", "fields": [{"name": "Skeins", "field_type": "number"}]}
+    ]), user)
+    hobby_id = str(hobby.id)
+    added = await service.add_item_to_category(hobby_id, "Yarn", SubCategoryItemCreate(data={"Skeins": 2}), user)
+    item_id = added.categories[0].items[0].id
+    updated = await service.update_item_in_category(hobby_id, "Yarn", item_id,
+                                                    SubCategoryItemUpdate(data={"Skeins": 5}), user)
+    stored_only = len(effects.calls)
+    await repository.update_item_in_category(hobby_id, str(user.id), "Yarn", item_id, {"data": {"Skeins": 7}})
+
+    assert [name for name, _, _ in effects.calls] == ["hobby_created", "item_added", "item_changed"]
+    assert len(effects.calls) == stored_only
+    _, args, kwargs = effects.calls[-1]
+    action, _, _, category, before, item = args
+    assert action == HistoryAction.UPDATED and category.name == "Yarn"
+    assert before == {"Skeins": 2} and item.data == {"Skeins": 5} and kwargs == {"data": {"Skeins": 5}}
+    # The repository returns the hobby as written, without rebuilding it
+    assert updated.categories[0].items[0].data == {"Skeins": 5}